@@ -0,0 +1,122 @@
+"""Benchmark ContentProcessingPipeline dispatch over a large message stream.
+
+Compares the dispatch-table pipeline against the previous behaviour: a linear
+``can_process`` scan per message, a function-level import inside every
+``process()`` call and a fresh fallback processor for unclaimed content.
+
+Usage:
+    python benchmarks/pipeline_dispatch.py [--messages N] [--repeat R]
+"""
+
+import argparse
+import time
+from typing import Callable, List
+
+from conv2md.domain.models import ContentType, Message
+from conv2md.markdown.pipeline import (
+    CodeContentProcessor,
+    ContentProcessingPipeline,
+    ImageContentProcessor,
+    TextContentProcessor,
+)
+
+
+class _LinearScanTextProcessor(TextContentProcessor):
+    """Text processor importing its helper per call, as before the change."""
+
+    def process(self, message: Message) -> str:
+        from conv2md.markdown.blocks import escape_markdown_content
+
+        return escape_markdown_content(str(message.content))
+
+
+class _LinearScanCodeProcessor(CodeContentProcessor):
+    """Code processor importing its helper per call, as before the change."""
+
+    def process(self, message: Message) -> str:
+        from conv2md.markdown.blocks import create_code_block
+
+        return create_code_block(message.content, message.language)
+
+
+class _LinearScanImageProcessor(ImageContentProcessor):
+    """Image processor importing its helper per call, as before the change."""
+
+    def process(self, message: Message) -> str:
+        from conv2md.markdown.blocks import escape_markdown_content
+
+        return f"![Image]({escape_markdown_content(str(message.content))})"
+
+
+def _linear_scan_process(processors, message: Message) -> str:
+    """Dispatch the way process_message did before the dispatch table."""
+    for processor in processors:
+        if processor.can_process(message.content_type):
+            return processor.process(message)
+    return _LinearScanTextProcessor().process(message)
+
+
+def build_messages(count: int) -> List[Message]:
+    """Build a mixed stream of short messages, mostly text like real chats."""
+    templates = [
+        Message(speaker="User", content="Hello there", content_type=ContentType.TEXT),
+        Message(
+            speaker="Bot", content="Sure - see below", content_type=ContentType.TEXT
+        ),
+        Message(
+            speaker="Bot",
+            content="print('hi')",
+            content_type=ContentType.CODE,
+            language="python",
+        ),
+        Message(speaker="User", content="shot.png", content_type=ContentType.IMAGE),
+    ]
+    return [templates[i % len(templates)] for i in range(count)]
+
+
+def _time(label: str, run: Callable[[], None], repeat: int, count: int) -> float:
+    """Run ``run`` ``repeat`` times and report the best wall time."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    print(
+        f"{label:<24} {best:8.3f} s  "
+        f"{count / best / 1e6:6.2f} M msg/s  {best / count * 1e9:7.1f} ns/msg"
+    )
+    return best
+
+
+def main() -> None:
+    """Parse arguments and run both dispatch strategies."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages)
+    pipeline = ContentProcessingPipeline()
+    linear = [
+        _LinearScanTextProcessor(),
+        _LinearScanCodeProcessor(),
+        _LinearScanImageProcessor(),
+    ]
+
+    def run_linear() -> None:
+        for message in messages:
+            _linear_scan_process(linear, message)
+
+    def run_dispatch() -> None:
+        process = pipeline.process_message
+        for message in messages:
+            process(message)
+
+    print(f"{args.messages:,} messages, best of {args.repeat}")
+    baseline = _time("linear scan", run_linear, args.repeat, args.messages)
+    current = _time("dispatch table", run_dispatch, args.repeat, args.messages)
+    print(f"speedup: {baseline / current:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
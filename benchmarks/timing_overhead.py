@@ -0,0 +1,76 @@
+"""Benchmark the cost of per-processor timing histograms in MarkdownGenerator.
+
+Generates the same conversation with timing collection on and off. Content
+types alternate message by message, the worst case for timing overhead: every
+message is its own processor call, and so a candidate for timing. With
+--stream, the conversation goes through generate_stream instead.
+
+Usage:
+    python benchmarks/timing_overhead.py [--messages N] [--repeat R] [--stream]
+"""
+
+import argparse
+import time
+
+from conv2md.domain.models import ContentType, Conversation, Message
+from conv2md.markdown.generator import MarkdownGenerator
+
+
+def build_conversation(count: int) -> Conversation:
+    """Build a conversation alternating text, code and image messages."""
+    templates = [
+        Message(speaker="User", content="Hello *there*", timestamp="12:34"),
+        Message(
+            speaker="Bot",
+            content="print('hi')",
+            content_type=ContentType.CODE,
+            language="python",
+        ),
+        Message(speaker="User", content="shot.png", content_type=ContentType.IMAGE),
+    ]
+    return Conversation(messages=[templates[i % len(templates)] for i in range(count)])
+
+
+def best_times(conversation: Conversation, repeat: int, stream: bool = False):
+    """Return the best conversion wall time with timing collection off and on.
+
+    Runs alternate between the two generators so machine noise and thermal
+    drift affect both sides alike.
+    """
+    generators = {
+        False: MarkdownGenerator(collect_timings=False),
+        True: MarkdownGenerator(collect_timings=True),
+    }
+    best = {False: float("inf"), True: float("inf")}
+    for _ in range(repeat):
+        for enabled, generator in generators.items():
+            started = time.perf_counter()
+            if stream:
+                for _ in generator.generate_stream(conversation.messages):
+                    pass
+            else:
+                generator.generate(conversation)
+            best[enabled] = min(best[enabled], time.perf_counter() - started)
+    return best[False], best[True]
+
+
+def main() -> None:
+    """Parse arguments and compare timing collection on and off."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--stream", action="store_true")
+    args = parser.parse_args()
+
+    conversation = build_conversation(args.messages)
+    disabled, enabled = best_times(conversation, args.repeat, args.stream)
+
+    mode = "streamed" if args.stream else "generated"
+    print(f"{args.messages:,} alternating messages {mode}, best of {args.repeat}")
+    print(f"timings off  {disabled:8.3f} s")
+    print(f"timings on   {enabled:8.3f} s")
+    print(f"overhead     {(enabled / disabled - 1) * 100:7.2f} %")
+
+
+if __name__ == "__main__":
+    main()
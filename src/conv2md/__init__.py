@@ -1,3 +1,43 @@
-"""conv2md package."""
+"""conv2md package.
+
+The library API is imported on first use, so ``import conv2md`` (and with it
+the CLI's start-up) does not load the converters.
+"""
+
+from typing import Any, List
 
 __version__ = "0.1.0"
+
+__all__ = [
+    "AsyncFileWriter",
+    "ConvertedSource",
+    "aconvert",
+    "agenerate_to",
+    "convert_many",
+    "__version__",
+]
+
+_LAZY_EXPORTS = {
+    "AsyncFileWriter": "conv2md.application.aio",
+    "aconvert": "conv2md.application.aio",
+    "agenerate_to": "conv2md.application.aio",
+    "ConvertedSource": "conv2md.application.many",
+    "convert_many": "conv2md.application.many",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a library API name from its module on first access."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    """List the lazy exports alongside the module's own names."""
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
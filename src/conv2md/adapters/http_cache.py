@@ -0,0 +1,605 @@
+"""On-disk HTTP cache: response bodies and their Markdown, by content digest.
+
+Converting the same site again mostly downloads pages that have not
+changed. This fetcher keeps each 200 response's body on disk with its
+validators, and asks again with If-None-Match / If-Modified-Since: a 304
+costs a round trip and no body, and the body is read from the cache. A
+response still fresh by its Cache-Control max-age is not asked for at all.
+
+Bodies are stored once per content digest, whichever URLs served them, and
+the Markdown converted from a body is stored the same way, keyed by the
+body's digest and the conv2md version and options. A page whose content is
+unchanged is then neither downloaded nor converted again.
+
+The cache evicts what has gone unused for longer than ``max_age_seconds``
+and then, least recently used first, whatever exceeds ``max_bytes``.
+"""
+
+import http.client
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from conv2md.adapters.manifest import options_fingerprint
+from conv2md.markdown.registry import MetricsRegistry
+from conv2md.ports.cache import ConversionCache, content_hasher
+from conv2md.ports.fetcher import ContentFetcher, FetchResponse
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.sqlite"
+SCHEMA_VERSION = 1
+DEFAULT_MAX_CACHE_BYTES = 1024 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 30 * 24 * 60 * 60
+# Temporary files older than this were left by a run that crashed; younger
+# ones may belong to another run sharing the cache
+STALE_TEMP_SECONDS = 60 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    used_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blobs_by_use ON blobs (used_at);
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_type TEXT NOT NULL,
+    fresh_until REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS conversions (
+    digest TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    markdown_digest TEXT NOT NULL,
+    PRIMARY KEY (digest, fingerprint)
+) WITHOUT ROWID;
+"""
+
+
+class CacheError(Exception):
+    """Raised when the cache directory cannot be used as asked."""
+
+
+@dataclass
+class CacheStats:
+    """Counts of how requests and conversions were served by the cache."""
+
+    # Served from disk without a request: still fresh by max-age
+    hits: int = 0
+    # Served from disk after the server answered 304 Not Modified
+    revalidated: int = 0
+    # Downloaded in full
+    misses: int = 0
+    conversions_reused: int = 0
+    evicted: int = 0
+
+
+@dataclass
+class _CachedResponseInfo:
+    """What the cache knows about a URL's last response."""
+
+    digest: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_type: str
+    fresh_until: float
+
+
+class _CachedResponse(FetchResponse):
+    """A response whose body is read from the cache."""
+
+    def __init__(self, url: str, info: _CachedResponseInfo, body: BinaryIO):
+        headers = http.client.HTTPMessage()
+        headers["Content-Type"] = info.content_type
+        headers["Content-Length"] = str(os.fstat(body.fileno()).st_size)
+        if info.etag:
+            headers["ETag"] = info.etag
+        if info.last_modified:
+            headers["Last-Modified"] = info.last_modified
+        super().__init__(url, 200, headers)
+        self.body_digest = info.digest
+        self._body = body
+
+    def read(self, size: int = -1) -> bytes:
+        return self._body.read(size)
+
+    def close(self) -> None:
+        self._body.close()
+
+
+class _RecordingResponse(FetchResponse):
+    """A downloaded response whose body is copied into the cache as it is read.
+
+    The copy is kept only if the body is read to the end; a response closed
+    early, or failing part way, leaves the cache as it was.
+    """
+
+    def __init__(self, cache: "HTTPCache", url: str, response: FetchResponse):
+        super().__init__(response.url, response.status, response.headers)
+        self._cache = cache
+        self._cache_url = url
+        self._response = response
+        self._hasher = content_hasher()
+        self._size = 0
+        self._temp_path: Optional[str] = None
+        self._file: Optional[BinaryIO] = None
+        try:
+            self._temp_path, self._file = cache._temp_file()
+        except OSError as e:
+            logger.warning(f"Not caching {url}: {e}")
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._response.read(size)
+        if self._file is None:
+            return data
+        if data:
+            try:
+                self._file.write(data)
+            except OSError as e:
+                logger.warning(f"Not caching {self._cache_url}: {e}")
+                self._discard()
+                return data
+            self._hasher.update(data)
+            self._size += len(data)
+        elif size != 0:
+            self._commit()
+        return data
+
+    def close(self) -> None:
+        try:
+            self._response.close()
+        finally:
+            self._discard()
+
+    def _commit(self) -> None:
+        """Move the complete body into the cache."""
+        file, self._file = self._file, None
+        try:
+            file.close()
+            self._cache._store(
+                self._cache_url,
+                self._temp_path,
+                self._hasher.hexdigest(),
+                self._size,
+                self.headers,
+            )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Not caching {self._cache_url}: {e}")
+            _unlink(self._temp_path)
+
+    def _discard(self) -> None:
+        """Drop an incomplete copy."""
+        if self._file is not None:
+            file, self._file = self._file, None
+            file.close()
+            _unlink(self._temp_path)
+
+
+class HTTPCache(ContentFetcher, ConversionCache):
+    """ContentFetcher keeping responses, and their conversions, on disk.
+
+    Thread-safe. Use as a context manager, or call close() when done:
+    closing evicts what is over the limits, then closes the wrapped
+    fetcher.
+    """
+
+    def __init__(
+        self,
+        fetcher: ContentFetcher,
+        directory: Path,
+        options: Dict[str, Any],
+        *,
+        max_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Open or create the cache in ``directory``.
+
+        Args:
+            fetcher: Fetcher that downloads what the cache cannot serve
+            directory: Directory the cache is kept in
+            options: Output-affecting options of this run; Markdown cached
+                under other options or another conv2md version is not reused
+            max_bytes: Most bytes of bodies and Markdown kept
+            max_age_seconds: Longest a cached item is kept unused
+            clock: Wall-clock time source; entries outlive the process
+
+        Raises:
+            CacheError: If the cache was written by an incompatible version
+            sqlite3.Error: If the index cannot be opened
+            OSError: If the directory cannot be created
+        """
+        self.fetcher = fetcher
+        self.directory = directory
+        self.fingerprint = options_fingerprint(options)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.stats = CacheStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self._blob_dir = directory / "blobs"
+        self._temp_dir = directory / "tmp"
+        self._blob_dir.mkdir(parents=True, exist_ok=True)
+        self._temp_dir.mkdir(exist_ok=True)
+        self._remove_stale_temp_files()
+
+        # Requests come from the fetch threads; every use holds the lock
+        self._db = sqlite3.connect(
+            directory / INDEX_NAME, isolation_level=None, check_same_thread=False
+        )
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # Losing the last commits on power loss only costs downloads
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._check_schema()
+        except BaseException:
+            self._db.close()
+            raise
+
+    def _check_schema(self) -> None:
+        """Create the tables, or refuse a cache of another schema version."""
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise CacheError(
+                f"{self.directory} has schema version {version}, expected "
+                f"{SCHEMA_VERSION}; delete it to start an empty cache"
+            )
+        self._db.executescript(_SCHEMA)
+        self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _remove_stale_temp_files(self) -> None:
+        """Delete temporary files left behind by runs that crashed."""
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        for entry in os.scandir(self._temp_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+    def fetch(
+        self, url: str, headers: Optional[Mapping[str, str]] = None
+    ) -> FetchResponse:
+        """Serve ``url`` from the cache if it is fresh or unchanged, else fetch it.
+
+        Requests with headers of their own are sent unconditionally: the
+        caller may be revalidating for itself.
+
+        Args:
+            url: Absolute http or https URL
+            headers: Extra request headers
+
+        Returns:
+            The response; a cached body is served with status 200
+
+        Raises:
+            FetchError: If the wrapped fetcher cannot fetch the URL
+        """
+        info = None if headers else self._lookup(url)
+        if info is not None and info.fresh_until > self._clock():
+            response = self._serve(url, info)
+            if response is not None:
+                self._count("hits")
+                return response
+
+        request_headers = dict(headers or {})
+        if info is not None:
+            if info.etag:
+                request_headers["If-None-Match"] = info.etag
+            if info.last_modified:
+                request_headers["If-Modified-Since"] = info.last_modified
+        response = self.fetcher.fetch(url, request_headers)
+
+        if info is not None and response.status == 304:
+            response.close()
+            self._refresh(url, info, response.headers)
+            cached = self._serve(url, info)
+            if cached is not None:
+                self._count("revalidated")
+                return cached
+            # Evicted in the meantime: ask again, unconditionally
+            response = self.fetcher.fetch(url, headers)
+
+        self._count("misses")
+        if response.status == 200 and _is_storable(response.headers):
+            return _RecordingResponse(self, url, response)
+        return response
+
+    def get_conversion(self, digest: str) -> Optional[bytes]:
+        """Return Markdown cached for ``digest`` under this run's options."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT markdown_digest FROM conversions "
+                "WHERE digest = ? AND fingerprint = ?",
+                (digest, self.fingerprint),
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._blob_path(row[0]), "rb") as f:
+                markdown = f.read()
+        except FileNotFoundError:
+            return None
+        self._touch(row[0])
+        self._count("conversions_reused")
+        return markdown
+
+    def put_conversion(self, digest: str, markdown: bytes) -> None:
+        """Cache the Markdown converted from content with ``digest``.
+
+        A cache that cannot be written is logged, not raised: the Markdown
+        has been written to its output, and the next run converts again.
+        """
+        hasher = content_hasher()
+        hasher.update(markdown)
+        markdown_digest = hasher.hexdigest()
+        temp_path = None
+        try:
+            temp_path, file = self._temp_file()
+            with file:
+                file.write(markdown)
+            self._add_blob(temp_path, markdown_digest, len(markdown))
+            with self._transaction():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO conversions VALUES (?, ?, ?)",
+                    (digest, self.fingerprint, markdown_digest),
+                )
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Not caching a conversion: {e}")
+            if temp_path is not None:
+                _unlink(temp_path)
+
+    def prune(self) -> int:
+        """Evict items unused for too long, then the least recently used over size.
+
+        Responses and conversions whose content is evicted go with it, as
+        do bodies no response refers to any more.
+
+        Returns:
+            Number of bodies and Markdown files deleted
+        """
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                evicted = self._select_evictions()
+                self._db.executemany(
+                    "DELETE FROM blobs WHERE digest = ?", [(d,) for d in evicted]
+                )
+                self._db.execute(
+                    "DELETE FROM responses "
+                    "WHERE digest NOT IN (SELECT digest FROM blobs)"
+                )
+                self._db.execute(
+                    "DELETE FROM conversions "
+                    "WHERE markdown_digest NOT IN (SELECT digest FROM blobs)"
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            self.stats.evicted += len(evicted)
+        # Files go once the index no longer points at them
+        for digest in evicted:
+            _unlink(self._blob_path(digest))
+        return len(evicted)
+
+    def _select_evictions(self) -> List[str]:
+        """Return the digests to evict. Caller holds the lock in a transaction."""
+        cutoff = self._clock() - self.max_age_seconds
+        evicted = [
+            digest
+            for (digest,) in self._db.execute(
+                "SELECT digest FROM blobs WHERE used_at < ? OR digest NOT IN ("
+                "SELECT digest FROM responses UNION "
+                "SELECT markdown_digest FROM conversions)",
+                (cutoff,),
+            )
+        ]
+        kept_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs "
+            "WHERE used_at >= ? AND digest IN ("
+            "SELECT digest FROM responses UNION "
+            "SELECT markdown_digest FROM conversions)",
+            (cutoff,),
+        ).fetchone()[0]
+        if kept_bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT digest, size FROM blobs WHERE used_at >= ? ORDER BY used_at",
+                (cutoff,),
+            )
+            doomed = set(evicted)
+            for digest, size in rows:
+                if kept_bytes <= self.max_bytes:
+                    break
+                if digest not in doomed:
+                    evicted.append(digest)
+                    kept_bytes -= size
+        return evicted
+
+    def publish(self, registry: MetricsRegistry) -> None:
+        """Export the cache's counters to ``registry``."""
+        with self._lock:
+            stats = CacheStats(**vars(self.stats))
+        registry.set_counter(
+            "http_cache_requests_total",
+            "Fetches through the HTTP cache, by how they were served.",
+            {"hit": stats.hits, "revalidated": stats.revalidated, "miss": stats.misses},
+        )
+        registry.set_counter(
+            "http_cache_conversions_reused_total",
+            "Conversions skipped because cached Markdown matched the content.",
+            {"markdown": stats.conversions_reused},
+        )
+        registry.set_counter(
+            "http_cache_evicted_total",
+            "Cached bodies and Markdown files evicted.",
+            {"age_or_size": stats.evicted},
+        )
+
+    def close(self) -> None:
+        """Evict what is over the limits, close the index and the fetcher."""
+        try:
+            self.prune()
+        finally:
+            self._db.close()
+            self.fetcher.close()
+
+    def _lookup(self, url: str) -> Optional[_CachedResponseInfo]:
+        """Return what is cached for ``url``, if anything."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest, etag, last_modified, content_type, fresh_until "
+                "FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return None if row is None else _CachedResponseInfo(*row)
+
+    def _serve(self, url: str, info: _CachedResponseInfo) -> Optional[_CachedResponse]:
+        """Open the cached body, or return None if it has gone."""
+        try:
+            body = open(self._blob_path(info.digest), "rb")
+        except FileNotFoundError:
+            return None
+        self._touch(info.digest)
+        return _CachedResponse(url, info, body)
+
+    def _refresh(
+        self, url: str, info: _CachedResponseInfo, headers: Mapping[str, str]
+    ) -> None:
+        """Record the validators and freshness a 304 came with."""
+        # A 304 carries the headers that changed; the rest still stand
+        info.etag = headers.get("ETag") or info.etag
+        info.last_modified = headers.get("Last-Modified") or info.last_modified
+        info.fresh_until = self._clock() + _max_age(headers)
+        with self._transaction():
+            self._db.execute(
+                "UPDATE responses SET etag = ?, last_modified = ?, fresh_until = ? "
+                "WHERE url = ?",
+                (info.etag, info.last_modified, info.fresh_until, url),
+            )
+
+    def _store(
+        self,
+        url: str,
+        temp_path: str,
+        digest: str,
+        size: int,
+        headers: Mapping[str, str],
+    ) -> None:
+        """Add a downloaded body and record it as the response for ``url``."""
+        self._add_blob(temp_path, digest, size)
+        with self._transaction():
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    digest,
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    headers.get("Content-Type", ""),
+                    self._clock() + _max_age(headers),
+                ),
+            )
+
+    def _add_blob(self, temp_path: str, digest: str, size: int) -> None:
+        """Move a written temporary file into place under its digest."""
+        path = self._blob_path(digest)
+        path.parent.mkdir(exist_ok=True)
+        # The same content is stored once; replacing it with itself is harmless
+        os.replace(temp_path, path)
+        with self._transaction():
+            self._db.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)",
+                (digest, size, self._clock()),
+            )
+
+    def _touch(self, digest: str) -> None:
+        """Mark content as just used, for age and size eviction."""
+        with self._transaction():
+            self._db.execute(
+                "UPDATE blobs SET used_at = ? WHERE digest = ?",
+                (self._clock(), digest),
+            )
+
+    def _temp_file(self) -> Tuple[str, BinaryIO]:
+        """Create a temporary file in the cache, on the blobs' file system."""
+        fd, temp_path = tempfile.mkstemp(dir=self._temp_dir)
+        return temp_path, os.fdopen(fd, "wb")
+
+    def _blob_path(self, digest: str) -> Path:
+        """Return where content with ``digest`` is stored."""
+        return self._blob_dir / digest[:2] / digest
+
+    def _count(self, name: str) -> None:
+        """Add one to a stats counter."""
+        with self._lock:
+            setattr(self.stats, name, getattr(self.stats, name) + 1)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run the block in one locked transaction, rolled back if it raises."""
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+
+def _cache_control(headers: Mapping[str, str]) -> Dict[str, Optional[str]]:
+    """Parse Cache-Control into lower-cased directives and their values."""
+    directives: Dict[str, Optional[str]] = {}
+    for part in headers.get("Cache-Control", "").split(","):
+        name, sep, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"') if sep else None
+    return directives
+
+
+def _max_age(headers: Mapping[str, str]) -> float:
+    """Return how long a response may be served without revalidating."""
+    directives = _cache_control(headers)
+    if "no-cache" in directives:
+        return 0.0
+    value = directives.get("max-age") or ""
+    return float(value) if value.isdigit() else 0.0
+
+
+def _is_storable(headers: Mapping[str, str]) -> bool:
+    """Whether a 200 response is worth keeping: allowed, and reusable later."""
+    if "no-store" in _cache_control(headers):
+        return False
+    return bool(
+        headers.get("ETag") or headers.get("Last-Modified") or _max_age(headers)
+    )
+
+
+def _unlink(path: Any) -> None:
+    """Delete a file if it exists."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,388 @@
+"""HTTP fetcher on a per-host pool of persistent http.client connections.
+
+Opening a connection costs a TCP handshake and, for https, a TLS one: far
+more than a small request on a connection already open. A page with 80
+images on one host would pay 81 handshakes with a connection per request.
+This fetcher keeps connections open after each response and hands them to
+the next request for the same host, so it pays one handshake per
+concurrent request instead.
+
+Connections sit idle for at most ``idle_timeout`` seconds; servers close
+idle connections on their own schedule too, so one taken from the pool may
+turn out to be closed. That is checked before use, and a request that still
+fails on a reused connection is sent again, at worst on a fresh one.
+"""
+
+import http.client
+import logging
+import select
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from conv2md import __version__
+from conv2md.markdown.registry import MetricsRegistry
+from conv2md.ports.fetcher import ContentFetcher, FetchError, FetchResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PER_HOST = 6
+DEFAULT_IDLE_TIMEOUT_SECONDS = 30.0
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 10.0
+DEFAULT_READ_TIMEOUT_SECONDS = 30.0
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+# A response body still unread when it is closed is drained, keeping the
+# connection, if at most this much is left; otherwise the connection closes
+MAX_DRAIN_BYTES = 64 * 1024
+
+USER_AGENT = f"conv2md/{__version__}"
+
+# (scheme, host, port)
+HostKey = Tuple[str, str, int]
+
+# Failures that mean a reused connection had been closed by the server
+# while idle: the request never reached it, so it is safe to resend
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+
+@dataclass
+class PoolStats:
+    """Counts of how requests were served by the pool."""
+
+    requests: int = 0
+    reused: int = 0
+    opened: int = 0
+    stale_discarded: int = 0
+    stale_retries: int = 0
+    idle_closed: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of connections taken from the pool rather than opened."""
+        total = self.reused + self.opened
+        return self.reused / total if total else 0.0
+
+
+class _IdleConnection:
+    """A connection waiting in the pool, with when it was last used."""
+
+    __slots__ = ("connection", "idle_since")
+
+    def __init__(self, connection: http.client.HTTPConnection, idle_since: float):
+        self.connection = connection
+        self.idle_since = idle_since
+
+
+class PooledResponse(FetchResponse):
+    """Response whose connection goes back to the pool when it is closed."""
+
+    def __init__(
+        self,
+        pool: "HTTPConnectionPool",
+        key: HostKey,
+        connection: http.client.HTTPConnection,
+        response: http.client.HTTPResponse,
+        url: str,
+    ):
+        super().__init__(url, response.status, response.headers)
+        self._pool = pool
+        self._key = key
+        self._connection: Optional[http.client.HTTPConnection] = connection
+        self._response = response
+
+    def read(self, size: int = -1) -> bytes:
+        if self._connection is None:
+            return b""
+        try:
+            return self._response.read(None if size < 0 else size)
+        except (OSError, http.client.HTTPException) as e:
+            self._release(reusable=False)
+            raise FetchError(f"Failed reading {self.url}: {e}") from e
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        reusable = not self._response.will_close
+        if reusable and not self._response.isclosed():
+            reusable = self._drain()
+        self._release(reusable)
+
+    def _drain(self) -> bool:
+        """Read what is left of a short body; return whether it all came."""
+        try:
+            leftover = self._response.read(MAX_DRAIN_BYTES + 1)
+        except (OSError, http.client.HTTPException):
+            return False
+        return len(leftover) <= MAX_DRAIN_BYTES and self._response.isclosed()
+
+    def _release(self, reusable: bool) -> None:
+        connection, self._connection = self._connection, None
+        self._pool._checkin(self._key, connection, reusable)
+
+
+class HTTPConnectionPool(ContentFetcher):
+    """ContentFetcher keeping up to ``max_per_host`` connections per host.
+
+    Thread-safe. A request for a host whose connections are all in use
+    waits for one to be released, so ``max_per_host`` is also the cap on
+    concurrent requests to one host.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT_SECONDS,
+        read_timeout: float = DEFAULT_READ_TIMEOUT_SECONDS,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Create an empty pool.
+
+        Args:
+            max_per_host: Connections kept, and requests in flight, per host
+            idle_timeout: Seconds an unused connection is kept open
+            connect_timeout: Seconds allowed to open a connection
+            read_timeout: Seconds allowed between bytes of a response
+            ssl_context: TLS settings for https; the system defaults if
+                omitted
+            clock: Monotonic time source, replaceable in tests
+        """
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.ssl_context = ssl_context
+        self.stats = PoolStats()
+        self._clock = clock
+        self._lock = threading.Condition()
+        # Most recently used last: taking from the end reuses the connection
+        # least likely to have been closed by the server
+        self._idle: Dict[HostKey, List[_IdleConnection]] = {}
+        self._active: Dict[HostKey, int] = {}
+        self._closed = False
+
+    def fetch(
+        self, url: str, headers: Optional[Mapping[str, str]] = None
+    ) -> PooledResponse:
+        """Send a GET request for ``url``, following redirects.
+
+        Args:
+            url: Absolute http or https URL
+            headers: Extra request headers
+
+        Returns:
+            The response to the last request of the redirect chain
+
+        Raises:
+            FetchError: If the URL is not supported, a connection fails, or
+                there are more than MAX_REDIRECTS redirects
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._request(url, headers)
+            location = response.headers.get("Location")
+            if response.status not in REDIRECT_STATUSES or not location:
+                return response
+            response.close()
+            url = urljoin(url, location)
+        raise FetchError(f"More than {MAX_REDIRECTS} redirects fetching {url}")
+
+    def _request(
+        self, url: str, headers: Optional[Mapping[str, str]]
+    ) -> PooledResponse:
+        """Send one request, resending it if a reused connection was stale."""
+        key, target = _split_url(url)
+        request_headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}
+        request_headers.update(headers or {})
+
+        while True:
+            connection, reused = self._checkout(key)
+            try:
+                connection.request("GET", target, headers=request_headers)
+                response = connection.getresponse()
+            except _STALE_ERRORS as e:
+                self._checkin(key, connection, reusable=False)
+                if not reused:
+                    raise FetchError(f"Failed fetching {url}: {e}") from e
+                # Every GET is safe to resend. The next attempt may reuse
+                # another idle connection, so this loop ends once the idle
+                # ones run out or one works.
+                logger.debug(f"Reused connection to {key[1]} was closed; resending")
+                with self._lock:
+                    self.stats.stale_retries += 1
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                self._checkin(key, connection, reusable=False)
+                raise FetchError(f"Failed fetching {url}: {e}") from e
+            with self._lock:
+                self.stats.requests += 1
+            return PooledResponse(self, key, connection, response, url)
+
+    def _checkout(self, key: HostKey) -> Tuple[http.client.HTTPConnection, bool]:
+        """Take an idle connection to the host, or open one; flag which."""
+        with self._lock:
+            if self._closed:
+                raise FetchError("The connection pool is closed")
+            while self._active.get(key, 0) >= self.max_per_host:
+                self._lock.wait()
+            self._active[key] = self._active.get(key, 0) + 1
+            connection = self._take_idle(key)
+            if connection is not None:
+                self.stats.reused += 1
+                return connection, True
+            self.stats.opened += 1
+
+        try:
+            return self._connect(key), False
+        except BaseException:
+            with self._lock:
+                self._active[key] -= 1
+                self._lock.notify()
+            raise
+
+    def _take_idle(self, key: HostKey) -> Optional[http.client.HTTPConnection]:
+        """Pop the freshest usable idle connection. Caller holds the lock."""
+        idle = self._idle.get(key)
+        now = self._clock()
+        while idle:
+            entry = idle.pop()
+            if now - entry.idle_since > self.idle_timeout:
+                self.stats.idle_closed += 1
+                entry.connection.close()
+            elif _has_been_closed(entry.connection):
+                self.stats.stale_discarded += 1
+                entry.connection.close()
+            else:
+                return entry.connection
+        return None
+
+    def _connect(self, key: HostKey) -> http.client.HTTPConnection:
+        """Open a connection, with the connect timeout during the handshake."""
+        scheme, host, port = key
+        if scheme == "https":
+            connection: http.client.HTTPConnection = http.client.HTTPSConnection(
+                host, port, timeout=self.connect_timeout, context=self.ssl_context
+            )
+        else:
+            connection = http.client.HTTPConnection(
+                host, port, timeout=self.connect_timeout
+            )
+        try:
+            connection.connect()
+        except OSError as e:
+            connection.close()
+            raise FetchError(f"Cannot connect to {host}:{port}: {e}") from e
+        connection.sock.settimeout(self.read_timeout)
+        return connection
+
+    def _checkin(
+        self, key: HostKey, connection: http.client.HTTPConnection, reusable: bool
+    ) -> None:
+        """Return a connection to the pool, or close it."""
+        with self._lock:
+            self._active[key] -= 1
+            if reusable and not self._closed:
+                self._idle.setdefault(key, []).append(
+                    _IdleConnection(connection, self._clock())
+                )
+                connection = None
+            self._lock.notify_all()
+        if connection is not None:
+            connection.close()
+
+    def prune(self) -> int:
+        """Close connections idle for longer than the idle timeout.
+
+        Idle connections are also checked as they are taken from the pool;
+        pruning only stops expired ones from holding sockets in between.
+
+        Returns:
+            Number of connections closed
+        """
+        expired = []
+        with self._lock:
+            now = self._clock()
+            for idle in self._idle.values():
+                fresh = [e for e in idle if now - e.idle_since <= self.idle_timeout]
+                expired.extend(
+                    e for e in idle if now - e.idle_since > self.idle_timeout
+                )
+                idle[:] = fresh
+            self.stats.idle_closed += len(expired)
+        for entry in expired:
+            entry.connection.close()
+        return len(expired)
+
+    def publish(self, registry: MetricsRegistry) -> None:
+        """Export the pool's counters and hit rate to ``registry``."""
+        with self._lock:
+            stats = PoolStats(**vars(self.stats))
+        registry.set_counter(
+            "http_pool_connections_total",
+            "Connections used by the fetcher, by whether they were reused.",
+            {"reused": stats.reused, "opened": stats.opened},
+        )
+        registry.set_counter(
+            "http_pool_discarded_total",
+            "Pooled connections closed instead of reused, by reason.",
+            {
+                "idle_timeout": stats.idle_closed,
+                "closed_by_server": stats.stale_discarded,
+                "failed_on_reuse": stats.stale_retries,
+            },
+        )
+        registry.set_gauge(
+            "http_pool_hit_ratio",
+            "Share of fetcher connections taken from the pool.",
+            stats.hit_rate,
+        )
+
+    def close(self) -> None:
+        """Close every idle connection; responses still open close theirs."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+        for entries in idle.values():
+            for entry in entries:
+                entry.connection.close()
+
+
+def _split_url(url: str) -> Tuple[HostKey, str]:
+    """Return the pool key and request target for ``url``."""
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError as e:
+        raise FetchError(f"Invalid URL {url!r}: {e}") from e
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise FetchError(f"Only absolute http and https URLs can be fetched: {url}")
+    port = port or (443 if parts.scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target = f"{target}?{parts.query}"
+    return (parts.scheme, parts.hostname, port), target
+
+
+def _has_been_closed(connection: http.client.HTTPConnection) -> bool:
+    """Whether the server has closed an idle connection.
+
+    An idle keep-alive connection has nothing to read; if it is readable,
+    the server has closed it (or sent something unsolicited) and it cannot
+    carry another request.
+    """
+    if connection.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
@@ -0,0 +1,337 @@
+"""Local HTTP conversion service built on http.server.
+
+``POST /convert`` takes a JSON conversation as the request body and answers
+with its Markdown. The response is streamed with chunked transfer encoding
+as messages are converted, so the first bytes go out before the whole body
+has been parsed. ``GET /metrics`` serves conversion and server metrics in
+the Prometheus text format.
+
+Requests are handled on a thread each, but conversions run on a bounded
+ConverterPool: when every converter is busy and the wait queue is full, a
+request is answered 503 at once rather than piling up. The server is meant
+for localhost or a trusted network; it has no authentication.
+"""
+
+import io
+import json
+import logging
+import threading
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from conv2md.application.convert import CONVERSION_ERRORS, convert_stream
+from conv2md.application.service import ConverterPool, PoolSaturated
+from conv2md.markdown.constants import MAX_TOTAL_CONVERSATION_SIZE
+from conv2md.markdown.registry import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+CONVERT_PATH = "/convert"
+METRICS_PATH = "/metrics"
+MARKDOWN_CONTENT_TYPE = "text/markdown; charset=utf-8"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_MAX_QUEUE = 64
+# A queued request gives up after this long; its client has likely given up
+QUEUE_TIMEOUT_SECONDS = 30.0
+# A client that sends or reads nothing for this long is disconnected
+CLIENT_TIMEOUT_SECONDS = 30.0
+# Seconds a rejected client is told to wait before retrying
+RETRY_AFTER_SECONDS = 1
+# Bodies up to this size are read in full before a converter is taken, so a
+# client sending one slowly holds only its own thread meanwhile, and one
+# answered 503 sees the answer rather than a reset connection. Larger bodies
+# stream into the conversion: their converter, like every converter while
+# it writes the response, is held for as long as the client takes, up to
+# CLIENT_TIMEOUT_SECONDS for each read or write.
+MAX_BUFFERED_BODY_BYTES = 4 * 1024 * 1024
+
+
+class _ChunkedWriter:
+    """Text stream writing an HTTP/1.1 chunked response body.
+
+    Writes are buffered and each flush sends one chunk, so the chunk size
+    follows convert_stream's flush interval rather than its per-message
+    writes. The status line and headers are sent with the first chunk,
+    which leaves the handler free to send an error status instead for as
+    long as nothing has been written.
+    """
+
+    def __init__(self, handler: "ConversionRequestHandler"):
+        self._handler = handler
+        self._buffer: list = []
+        self.started = False
+
+    def write(self, text: str) -> int:
+        self._buffer.append(text)
+        return len(text)
+
+    def flush(self) -> None:
+        data = "".join(self._buffer).encode("utf-8")
+        self._buffer.clear()
+        if not data:
+            return
+        if not self.started:
+            self._handler.send_response(HTTPStatus.OK)
+            self._handler.send_header("Content-Type", MARKDOWN_CONTENT_TYPE)
+            self._handler.send_header("Transfer-Encoding", "chunked")
+            self._handler.end_headers()
+            self.started = True
+        self._handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def close(self) -> None:
+        """Send what is buffered and the terminating chunk."""
+        self.flush()
+        if not self.started:
+            # Nothing converted to anything: still a valid, empty document
+            self._handler.send_response(HTTPStatus.OK)
+            self._handler.send_header("Content-Type", MARKDOWN_CONTENT_TYPE)
+            self._handler.send_header("Transfer-Encoding", "chunked")
+            self._handler.end_headers()
+            self.started = True
+        self._handler.wfile.write(b"0\r\n\r\n")
+
+
+class _BodyReader:
+    """Binary stream over exactly ``length`` bytes of a request body."""
+
+    def __init__(self, stream: Any, length: int):
+        self._stream = stream
+        self._remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._stream.read(size) if size else b""
+        self._remaining -= len(data)
+        return data
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """Routes /convert and /metrics; everything else is 404."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and each body chunk are separate writes. With Nagle's
+    # algorithm on, the second waits for the client's delayed ACK of the
+    # first, adding 40ms to every response on a kept-alive connection.
+    disable_nagle_algorithm = True
+    timeout = CLIENT_TIMEOUT_SECONDS
+    server: "ConversionHTTPServer"
+
+    def do_POST(self) -> None:
+        if self.path.split("?", 1)[0] != CONVERT_PATH:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}")
+            return
+
+        length = self._content_length()
+        if length is None:
+            return
+        body: Any = _BodyReader(self.rfile, length)
+        buffered = length <= MAX_BUFFERED_BODY_BYTES
+        if buffered:
+            data = body.read()
+            if len(data) < length:
+                # The client hung up part way through its body
+                self.close_connection = True
+                return
+            body = io.BytesIO(data)
+        try:
+            with self.server.pool.acquire(QUEUE_TIMEOUT_SECONDS) as pair:
+                output = self._convert(body, *pair)
+        except PoolSaturated as e:
+            if not buffered:
+                self.close_connection = True
+            self._send_error(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                str(e),
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+            return
+        if output is not None:
+            # Sent after the converter is back in the pool, so a client that
+            # has read the whole response never finds it still taken
+            output.close()
+            self.server.count_response(HTTPStatus.OK)
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != METRICS_PATH:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path {self.path}")
+            return
+        body = self.server.render_metrics().encode("utf-8")
+        self._send_body(HTTPStatus.OK, METRICS_CONTENT_TYPE, body)
+
+    def _content_length(self) -> Optional[int]:
+        """Return the declared body length, or answer the error and None."""
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            self.close_connection = True
+            self._send_error(HTTPStatus.LENGTH_REQUIRED, "Send a Content-Length")
+            return None
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.close_connection = True
+            self._send_error(HTTPStatus.LENGTH_REQUIRED, "Send a Content-Length")
+            return None
+        if length < 0 or length > MAX_TOTAL_CONVERSATION_SIZE:
+            self.close_connection = True
+            self._send_error(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Conversations are limited to {MAX_TOTAL_CONVERSATION_SIZE} bytes",
+            )
+            return None
+        return length
+
+    def _convert(
+        self, body: Any, converter: Any, generator: Any
+    ) -> Optional[_ChunkedWriter]:
+        """Stream the body through the converter into a chunked response.
+
+        Args:
+            body: Binary stream of the request body, read or still arriving
+            converter: JSONConverter taken from the pool
+            generator: MarkdownGenerator taken from the pool
+
+        Returns:
+            The response stream, still to be closed, or None if the
+            conversion failed and the response was answered or abandoned
+        """
+        output = _ChunkedWriter(self)
+        try:
+            convert_stream(
+                body,
+                output,
+                generator=generator,
+                converter=converter,
+                registry=self.server.registry,
+            )
+        except CONVERSION_ERRORS as e:
+            # Whatever is left of the body is unread
+            self.close_connection = True
+            if not output.started:
+                self._send_error(HTTPStatus.BAD_REQUEST, str(e))
+                return None
+            # Too late for an error status: end the connection without the
+            # terminating chunk, which tells the client the body is incomplete
+            logger.warning(f"Conversion failed after the response started: {e}")
+            self.server.count_response("aborted")
+            return None
+        return output
+
+    def _send_error(
+        self,
+        status: HTTPStatus,
+        message: str,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        body = json.dumps({"error": message}).encode("utf-8")
+        self._send_body(status, "application/json", body, headers)
+
+    def _send_body(
+        self,
+        status: HTTPStatus,
+        content_type: str,
+        body: bytes,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count_response(status)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Access logs go to logging, not unconditionally to stderr
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class ConversionHTTPServer(ThreadingHTTPServer):
+    """HTTP server converting request bodies on a bounded converter pool."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple,
+        pool: ConverterPool,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        """Bind the server.
+
+        Args:
+            address: (host, port) to listen on; port 0 picks a free port
+            pool: Converters the requests share
+            registry: Registry conversions are reported to; a new one if
+                omitted
+        """
+        self.pool = pool
+        self.registry = registry or MetricsRegistry()
+        self._responses: Counter = Counter()
+        self._responses_lock = threading.Lock()
+        super().__init__(address, ConversionRequestHandler)
+
+    def count_response(self, status: Any) -> None:
+        """Count one response by status code, or "aborted"."""
+        key = str(int(status)) if isinstance(status, HTTPStatus) else str(status)
+        with self._responses_lock:
+            self._responses[key] += 1
+
+    def render_metrics(self) -> str:
+        """Render conversion metrics plus the server's own."""
+        with self._responses_lock:
+            responses = dict(self._responses)
+        self.registry.set_counter(
+            "http_responses_total", "HTTP responses sent, by status code.", responses
+        )
+        self.registry.set_counter(
+            "http_rejected_total",
+            "Requests turned away because the converter pool was saturated.",
+            {"saturated": self.pool.rejected},
+        )
+        self.registry.set_gauge(
+            "http_conversions_in_progress",
+            "Conversions running now.",
+            self.pool.in_use,
+        )
+        self.registry.set_gauge(
+            "http_conversions_waiting",
+            "Requests waiting for a free converter.",
+            self.pool.waiting,
+        )
+        return self.registry.render()
+
+
+def serve_http(
+    host: str,
+    port: int,
+    workers: int,
+    max_queue: int = DEFAULT_MAX_QUEUE,
+    *,
+    use_plugins: bool = False,
+    on_ready: Optional[Callable[[ConversionHTTPServer], None]] = None,
+) -> None:
+    """Run the HTTP service until interrupted.
+
+    Args:
+        host: Address to listen on
+        port: Port to listen on; 0 picks a free one
+        workers: Conversions allowed to run at once
+        max_queue: Requests allowed to wait for a converter before 503s
+        use_plugins: Enable installed content processor plugins
+        on_ready: Called with the listening server, e.g. to report its port
+
+    Raises:
+        OSError: If the address cannot be bound
+    """
+    pool = ConverterPool(workers, max_queue, use_plugins=use_plugins)
+    with ConversionHTTPServer((host, port), pool) as server:
+        logger.info(f"Serving HTTP on {host}:{server.server_address[1]}")
+        if on_ready is not None:
+            on_ready(server)
+        server.serve_forever()
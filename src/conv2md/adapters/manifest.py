@@ -0,0 +1,361 @@
+"""SQLite manifest of converted files, for incremental and resumable batches.
+
+The manifest lives in the output directory and records, for every Markdown
+file written there, the digest of the input it was converted from and a
+fingerprint of the conv2md version and options that produced it. A later
+run skips inputs whose output is still valid.
+
+Each batch run is also journalled: the files it is about to convert are
+recorded as pending before any conversion starts and marked as they finish,
+so an interrupted run can be resumed without walking and checking the
+inputs again.
+
+Results are written in batched transactions rather than one per file: with
+several workers converting small files, a commit per file would make the
+manifest's fsyncs the bottleneck of the whole run.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from conv2md import __version__
+from conv2md.application.batch import BatchItem, FileOutcome, file_digest
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".conv2md-manifest.sqlite"
+SCHEMA_VERSION = 1
+
+# Results are committed once this many are buffered or this long after the
+# previous commit, whichever comes first. A crash loses at most that much
+# bookkeeping, and those files are simply converted again on resume.
+FLUSH_EVERY_OUTCOMES = 1000
+FLUSH_INTERVAL_SECONDS = 1.0
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    output_path TEXT PRIMARY KEY,
+    input_path TEXT NOT NULL,
+    input_size INTEGER NOT NULL,
+    input_mtime_ns INTEGER NOT NULL,
+    input_digest TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    output_size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    options TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS journal (
+    run_id INTEGER NOT NULL,
+    output_path TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (run_id, output_path)
+) WITHOUT ROWID;
+"""
+
+
+class ManifestError(Exception):
+    """Raised when the manifest cannot be used as asked."""
+
+
+def options_fingerprint(options: Dict[str, Any]) -> str:
+    """Return a fingerprint of the conv2md version and output-affecting options.
+
+    Args:
+        options: JSON-serialisable options that change the Markdown produced
+
+    Returns:
+        A short hex digest; equal fingerprints mean equal output for equal input
+    """
+    payload = json.dumps(
+        {"version": __version__, "options": options}, sort_keys=True
+    ).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+class ConversionManifest:
+    """Record of converted files and the batch runs that converted them.
+
+    Use as a context manager, or call close() when done. Not thread-safe:
+    all calls must come from the thread that converts the batch (outcomes
+    from worker processes are reported back to that thread).
+    """
+
+    def __init__(self, out_dir: Path, options: Dict[str, Any]):
+        """Open or create the manifest in ``out_dir``.
+
+        Args:
+            out_dir: Output directory the manifest describes
+            options: Output-affecting options of this run, see
+                options_fingerprint
+
+        Raises:
+            ManifestError: If the manifest exists but was written by an
+                incompatible version of conv2md
+            sqlite3.Error: If the database cannot be opened
+        """
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self.path = out_dir / MANIFEST_NAME
+        self.options = options
+        self.fingerprint = options_fingerprint(options)
+        self.run_id: Optional[int] = None
+        self._buffer: List[FileOutcome] = []
+        self._last_flush = time.monotonic()
+
+        # Autocommit mode: transactions are opened explicitly so that each
+        # flush is exactly one commit
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # In WAL mode NORMAL is still crash-safe for the database; it can
+            # only lose the last commits on power loss, which resume redoes
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._check_schema()
+        except BaseException:
+            self._db.close()
+            raise
+
+    def _check_schema(self) -> None:
+        """Create the tables, or refuse a manifest of another schema version."""
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ManifestError(
+                f"{self.path} has schema version {version}, expected "
+                f"{SCHEMA_VERSION}; delete it to reconvert everything"
+            )
+        self._db.executescript(_SCHEMA)
+        self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self) -> "ConversionManifest":
+        """Return the open manifest."""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Commit buffered results and close, even if the batch failed."""
+        self.close()
+
+    def close(self) -> None:
+        """Commit buffered results and close the database."""
+        try:
+            self.flush()
+        finally:
+            self._db.close()
+
+    def select_stale(self, items: Iterable[BatchItem]) -> Tuple[List[BatchItem], int]:
+        """Split a work list into the files that need converting and the rest.
+
+        An output is still valid when it was produced with this run's
+        fingerprint from an input with the same content digest, and it
+        still has the size it was written with. An input whose size and
+        mtime match the manifest is trusted without being read; otherwise
+        it is hashed, so touching a file does not make it stale.
+
+        Args:
+            items: Planned work, in the order it should run
+
+        Returns:
+            The items to convert, in their original order, and the number
+            skipped as up to date
+        """
+        stale = []
+        skipped = 0
+        refreshed = []
+        for item in items:
+            row = self._db.execute(
+                "SELECT input_size, input_mtime_ns, input_digest, output_size "
+                "FROM outputs "
+                "WHERE output_path = ? AND input_path = ? AND fingerprint = ?",
+                (str(item.output_path), str(item.input_path), self.fingerprint),
+            ).fetchone()
+            if row is None or not _has_size(item.output_path, row[3]):
+                stale.append(item)
+                continue
+            try:
+                stat = os.stat(item.input_path)
+                if (stat.st_size, stat.st_mtime_ns) != (row[0], row[1]):
+                    if file_digest(item.input_path) != row[2]:
+                        stale.append(item)
+                        continue
+                    # Same content under a new mtime: remember the new stat
+                    # so the next run need not read the file again
+                    refreshed.append(
+                        (stat.st_size, stat.st_mtime_ns, str(item.output_path))
+                    )
+            except OSError:
+                # Let the conversion report why the input cannot be read
+                stale.append(item)
+                continue
+            skipped += 1
+
+        if refreshed:
+            with self._transaction():
+                self._db.executemany(
+                    "UPDATE outputs SET input_size = ?, input_mtime_ns = ? "
+                    "WHERE output_path = ?",
+                    refreshed,
+                )
+        return stale, skipped
+
+    def start_run(self, items: List[BatchItem]) -> int:
+        """Journal a run about to convert ``items``.
+
+        A new run supersedes any earlier interrupted one, whose journal is
+        discarded: the new run checks every input itself.
+
+        Args:
+            items: Every file the run will convert
+
+        Returns:
+            The run's id
+        """
+        with self._transaction():
+            self._db.execute("DELETE FROM journal")
+            self._db.execute("DELETE FROM runs")
+            cursor = self._db.execute(
+                "INSERT INTO runs (options, started_at) VALUES (?, ?)",
+                (json.dumps(self.options, sort_keys=True), time.time()),
+            )
+            self.run_id = cursor.lastrowid
+            self._db.executemany(
+                "INSERT INTO journal (run_id, output_path, input_path, size, state)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        self.run_id,
+                        str(item.output_path),
+                        str(item.input_path),
+                        item.size,
+                        PENDING,
+                    )
+                    for item in items
+                ),
+            )
+        return self.run_id
+
+    def resume(self) -> Optional[List[BatchItem]]:
+        """Continue the last run if it was interrupted.
+
+        The manifest adopts the interrupted run's options, so the files it
+        had left are converted, and recorded, the way the run began them.
+
+        Returns:
+            The run's files not yet converted, largest first, or None if the
+            last run finished
+        """
+        row = self._db.execute(
+            "SELECT id, options FROM runs WHERE finished_at IS NULL "
+            "ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        self.run_id = row[0]
+        self.options = json.loads(row[1])
+        self.fingerprint = options_fingerprint(self.options)
+        rows = self._db.execute(
+            "SELECT input_path, output_path, size FROM journal "
+            "WHERE run_id = ? AND state = ? ORDER BY size DESC, input_path",
+            (self.run_id, PENDING),
+        )
+        return [
+            BatchItem(input_path=Path(input_path), output_path=Path(output), size=size)
+            for input_path, output, size in rows
+        ]
+
+    def record(self, outcome: FileOutcome) -> None:
+        """Buffer a finished file's result, committing if it is time to.
+
+        Outcomes must come from a batch run with ``record_digests=True``;
+        successful ones without a digest are journalled but not recorded as
+        valid outputs.
+        """
+        self._buffer.append(outcome)
+        if (
+            len(self._buffer) >= FLUSH_EVERY_OUTCOMES
+            or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit every buffered result in one transaction."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        outputs = []
+        journal = []
+        for outcome in self._buffer:
+            output_path = str(outcome.item.output_path)
+            journal.append((DONE if outcome.ok else FAILED, self.run_id, output_path))
+            if outcome.ok and outcome.input_digest and outcome.input_stat:
+                try:
+                    output_size = os.stat(outcome.item.output_path).st_size
+                except OSError:
+                    continue
+                outputs.append(
+                    (
+                        output_path,
+                        str(outcome.item.input_path),
+                        *outcome.input_stat,
+                        outcome.input_digest,
+                        self.fingerprint,
+                        output_size,
+                    )
+                )
+
+        with self._transaction():
+            self._db.executemany(
+                "INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?)", outputs
+            )
+            if self.run_id is not None:
+                self._db.executemany(
+                    "UPDATE journal SET state = ? WHERE run_id = ? AND output_path = ?",
+                    journal,
+                )
+        self._buffer.clear()
+
+    def finish_run(self) -> None:
+        """Mark the current run complete and drop its journal."""
+        self.flush()
+        if self.run_id is None:
+            return
+        with self._transaction():
+            self._db.execute("DELETE FROM journal WHERE run_id = ?", (self.run_id,))
+            self._db.execute(
+                "UPDATE runs SET finished_at = ? WHERE id = ?",
+                (time.time(), self.run_id),
+            )
+        self.run_id = None
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """Run the block in one transaction, rolled back if it raises."""
+        self._db.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+
+def _has_size(path: Path, size: int) -> bool:
+    """Return whether the file at ``path`` exists with ``size`` bytes."""
+    try:
+        return os.stat(path).st_size == size
+    except OSError:
+        return False
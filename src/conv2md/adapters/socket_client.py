@@ -0,0 +1,69 @@
+"""Client for the conversion daemon's Unix socket protocol.
+
+The protocol is newline-delimited JSON. The client sends one job per line,
+then shuts down its side of the connection. Each job has the form
+``{"input": ..., "out_dir": ..., "options": {...}}``, where the input is a
+file, directory or glob pattern. The daemon answers with one line per
+converted file, in completion order, and closes the connection when every
+job is done:
+
+    {"input": ..., "output": ..., "error": null, "metrics": {...}}
+
+A job that cannot be expanded into files gets a single line with its
+``input``, an ``error`` and no ``output``.
+
+This module is imported by the CLI on every client invocation, so it uses
+nothing beyond the socket and json modules: the point of the daemon is
+that the client stays cheap to start.
+"""
+
+import json
+import socket
+from typing import Any, Dict, Iterable, Iterator
+
+# Lines longer than this are a protocol error, not a job
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class DaemonUnavailable(Exception):
+    """Raised when no daemon is listening on the socket."""
+
+
+def encode_line(message: Dict[str, Any]) -> bytes:
+    """Return ``message`` as one protocol line."""
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def submit_jobs(
+    socket_path: str, jobs: Iterable[Dict[str, Any]]
+) -> Iterator[Dict[str, Any]]:
+    """Send jobs to the daemon and yield its results as they arrive.
+
+    Args:
+        socket_path: Path of the daemon's Unix socket
+        jobs: Job descriptors, see the module docstring
+
+    Yields:
+        One result per converted file, in completion order
+
+    Raises:
+        DaemonUnavailable: If nothing is listening on ``socket_path``
+        OSError: If the connection fails part way
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            connection.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise DaemonUnavailable(
+                f"No conv2md daemon on {socket_path}; start one with "
+                f"'conv2md serve --socket {socket_path}'"
+            ) from e
+        connection.sendall(b"".join(encode_line(job) for job in jobs))
+        # End of jobs: the daemon starts answering once it sees this
+        connection.shutdown(socket.SHUT_WR)
+        with connection.makefile("rb") as replies:
+            for line in replies:
+                yield json.loads(line)
+    finally:
+        connection.close()
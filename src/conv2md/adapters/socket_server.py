@@ -0,0 +1,190 @@
+"""Conversion daemon serving the Unix socket protocol of socket_client.
+
+Each connection is handled on its own thread, which expands the
+connection's jobs into files and hands them to a shared ConversionService.
+Results are written back as each file finishes, so a client converting a
+directory sees progress while the rest of its files are still converting.
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+from concurrent.futures import Future, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from conv2md.adapters.socket_client import MAX_LINE_BYTES, encode_line
+from conv2md.application.batch import FileOutcome, expand_inputs, plan_batch
+from conv2md.application.service import ConversionService
+
+logger = logging.getLogger(__name__)
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Reads a connection's jobs, converts them and streams the results."""
+
+    server: "ConversionDaemon"
+
+    def handle(self) -> None:
+        futures = []
+        try:
+            while line := self.rfile.readline(MAX_LINE_BYTES + 1):
+                if len(line) > MAX_LINE_BYTES:
+                    # The connection ends here, before its results are sent
+                    logger.warning(
+                        "Job line too long; cancelling the connection's jobs"
+                    )
+                    _cancel(futures)
+                    self._send({"error": "Job line too long"})
+                    return
+                futures.extend(self._submit(line))
+
+            for future in as_completed(futures):
+                self._send(_result(future.result()))
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away: nobody is waiting for the rest
+            logger.info("Client disconnected; cancelling its remaining jobs")
+            _cancel(futures)
+
+    def _submit(self, line: bytes) -> "List[Future[FileOutcome]]":
+        """Queue the files of one job line, answering at once if it is bad."""
+        try:
+            job = json.loads(line)
+            spec = str(job["input"])
+            out_dir = Path(job["out_dir"])
+            options = job.get("options", {})
+        except (ValueError, KeyError, TypeError) as e:
+            self._send({"error": f"Invalid job: {e}"})
+            return []
+
+        # The daemon's working directory is not the client's
+        if not (os.path.isabs(spec) and out_dir.is_absolute()):
+            self._send({"input": spec, "error": "Job paths must be absolute"})
+            return []
+        try:
+            files, root = expand_inputs([spec])
+        except (OSError, ValueError) as e:
+            self._send({"input": spec, "error": str(e)})
+            return []
+
+        return [
+            self.server.service.submit(
+                item,
+                use_plugins=bool(options.get("use_plugins", False)),
+                track_memory=bool(options.get("track_memory", False)),
+            )
+            for item in plan_batch(files, root, out_dir)
+        ]
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self.wfile.write(encode_line(message))
+        self.wfile.flush()
+
+
+def _cancel(futures: "List[Future[FileOutcome]]") -> None:
+    """Cancel the jobs of a connection that will not read their results.
+
+    Jobs already running finish, but those still queued never start.
+    """
+    for future in futures:
+        future.cancel()
+
+
+def _result(outcome: FileOutcome) -> Dict[str, Any]:
+    """Return the protocol line for one converted file."""
+    return {
+        "input": str(outcome.item.input_path),
+        "output": str(outcome.item.output_path),
+        "error": outcome.error,
+        "metrics": outcome.metrics.to_dict() if outcome.metrics else None,
+    }
+
+
+class ConversionDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server converting jobs on a pool of warm workers.
+
+    The socket is created readable and writable by its owner only: jobs
+    read and write files with the daemon's permissions.
+    """
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self, socket_path: Path, service: Optional[ConversionService]):
+        """Bind the socket, replacing a stale one left by a dead daemon.
+
+        Args:
+            socket_path: Where to create the socket
+            service: Service that converts the jobs; may be set after binding,
+                as long as it is before serving
+
+        Raises:
+            OSError: If another daemon is already listening on the path
+        """
+        self.socket_path = socket_path
+        self.service = service
+        _remove_stale_socket(socket_path)
+        previous_umask = os.umask(0o177)
+        try:
+            super().__init__(os.fspath(socket_path), _JobHandler)
+        finally:
+            os.umask(previous_umask)
+
+    def server_close(self) -> None:
+        """Close and remove the socket."""
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def _remove_stale_socket(socket_path: Path) -> None:
+    """Remove a socket nothing listens on; refuse to replace a live one."""
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{socket_path} exists and is not a socket")
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(os.fspath(socket_path))
+    except ConnectionRefusedError:
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"A conv2md daemon is already listening on {socket_path}")
+
+
+def serve(
+    socket_path: Path,
+    workers: Optional[int] = None,
+    on_ready: Optional[Callable[[], None]] = None,
+) -> None:
+    """Run the daemon until interrupted.
+
+    Args:
+        socket_path: Where to create the socket
+        workers: Worker processes; the CPU count if omitted
+        on_ready: Called once the workers are warm and the socket accepts
+            connections
+
+    Raises:
+        OSError: If the socket cannot be created, e.g. because another
+            daemon is listening on it
+    """
+    # Bound first, so a live daemon on the path is reported before the
+    # workers are started for nothing
+    with ConversionDaemon(socket_path, service=None) as daemon:
+        with ConversionService(workers) as service:
+            daemon.service = service
+            logger.info(f"Serving on {socket_path}")
+            if on_ready is not None:
+                on_ready()
+            daemon.serve_forever()
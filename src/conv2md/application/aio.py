@@ -0,0 +1,336 @@
+"""Async conversion use case: convert without blocking the event loop.
+
+Parsing and rendering are CPU-bound and would stall every other task on the
+loop for as long as a large conversation takes. Here they run on an
+executor, a batch of messages at a time, while the event loop only writes
+the rendered Markdown: to a socket through an asyncio.StreamWriter, or to a
+file through AsyncFileWriter, whose writes also run on the executor.
+
+Cancelling the awaiting task stops the conversion before the next message:
+the batch being rendered is abandoned and nothing more is written. The
+cancellation is only raised once the executor has let go of the batch, so
+the files it reads and writes are not closed under it.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
+
+from conv2md.application.convert import (
+    ConversionResult,
+    DecodingReader,
+    observe_failure,
+    open_atomic,
+    timed_messages,
+)
+from conv2md.converters.json_conv import JSONConverter
+from conv2md.domain.models import Conversation, Message
+from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.metrics import ConversionMetrics, StageMetrics
+from conv2md.markdown.registry import MetricsRegistry
+
+# Markdown rendered per trip to the executor. Larger batches cost fewer
+# hand-offs; smaller ones start writing sooner and hold less in memory.
+RENDER_BATCH_BYTES = 64 * 1024
+
+
+class AsyncWriter(Protocol):
+    """Where async conversions write: asyncio.StreamWriter satisfies this."""
+
+    def write(self, data: bytes) -> None:
+        """Queue ``data`` to be written."""
+
+    async def drain(self) -> None:
+        """Wait until the queued data has been written."""
+
+
+class _ConversionCancelled(Exception):
+    """Raised in the executor to stop a conversion whose task was cancelled."""
+
+
+class AsyncFileWriter:
+    """Async writer to a file that replaces ``path`` once closed successfully.
+
+    Use as an async context manager. Opening, writing and replacing the file
+    run on the executor; if the block raises, or is cancelled, the file is
+    left as it was.
+    """
+
+    def __init__(self, path: Path, executor: Optional[Executor] = None):
+        """Prepare the writer; the file is opened on entering the context.
+
+        Args:
+            path: File to create or replace
+            executor: Executor for the file operations; the loop's default
+                executor if omitted
+        """
+        self.path = path
+        self._executor = executor
+        self._atomic: Any = None
+        self._file: Any = None
+        self._pending: List[bytes] = []
+
+    async def __aenter__(self) -> "AsyncFileWriter":
+        """Open the temporary file the data goes to."""
+        self._atomic = open_atomic(self.path, "wb")
+        self._file = await self._run(self._atomic.__enter__)
+        return self
+
+    def write(self, data: bytes) -> None:
+        """Queue ``data``; it is written on the next drain."""
+        self._pending.append(data)
+
+    async def drain(self) -> None:
+        """Write the queued data on the executor."""
+        if self._pending:
+            data = b"".join(self._pending)
+            self._pending.clear()
+            await self._run(self._file.write, data)
+
+    async def __aexit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        """Replace the target on success; discard the temporary file if not."""
+        if exc_type is None:
+            await self.drain()
+        await self._run(self._atomic.__exit__, exc_type, exc, traceback)
+
+    async def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Call ``function`` on the executor; if cancelled, once it returns."""
+        loop = asyncio.get_running_loop()
+        call = loop.run_in_executor(self._executor, function, *args)
+        try:
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            await _settle(call)
+            raise
+
+
+async def _settle(call: "asyncio.Future[Any]") -> None:
+    """Wait for an executor call to return, even if cancelled meanwhile.
+
+    Cancelling the task awaiting a call does not stop the call: until it
+    returns, whatever it uses must be left open.
+    """
+    while not call.done():
+        try:
+            await asyncio.wait([call])
+        except asyncio.CancelledError:
+            pass
+    if not call.cancelled():
+        # Retrieved so it is not logged: the cancellation is what is raised
+        call.exception()
+
+
+def _until_cancelled(
+    messages: Iterable[Message], cancelled: threading.Event
+) -> Iterator[Message]:
+    """Yield ``messages`` until ``cancelled`` is set."""
+    for message in messages:
+        if cancelled.is_set():
+            raise _ConversionCancelled()
+        yield message
+
+
+def _render_batch(chunks: Iterator[str]) -> Tuple[bytes, bool]:
+    """Render about RENDER_BATCH_BYTES of Markdown; flag the end of it."""
+    parts = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= RENDER_BATCH_BYTES:
+            return b"".join(parts), False
+    return b"".join(parts), True
+
+
+async def _render_to(
+    messages: Iterable[Message],
+    writer: AsyncWriter,
+    generator: MarkdownGenerator,
+    metadata: Optional[Dict[str, Any]],
+    executor: Optional[Executor],
+    registry: Optional[MetricsRegistry],
+    on_finished: Optional[Callable[[ConversionMetrics], None]] = None,
+) -> ConversionMetrics:
+    """Render on the executor, write on the loop; see agenerate_to."""
+    loop = asyncio.get_running_loop()
+    collector = generator.metrics_collector
+    # Successive batches may run on different executor threads, and the
+    # collector keeps the conversion in a context variable: every batch
+    # runs in this one context, which starts with no conversion in it
+    context = contextvars.copy_context()
+    context.run(setattr, collector, "current_metrics", None)
+    cancelled = threading.Event()
+    chunks = generator.generate_stream(_until_cancelled(messages, cancelled), metadata)
+    write_stage = StageMetrics(name="write")
+    batch: "Optional[asyncio.Future[Tuple[bytes, bool]]]" = None
+
+    try:
+        done = False
+        while not done:
+            batch = loop.run_in_executor(executor, context.run, _render_batch, chunks)
+            data, done = await asyncio.shield(batch)
+            batch = None
+            if data:
+                started = time.perf_counter()
+                writer.write(data)
+                await writer.drain()
+                write_stage.duration_seconds += time.perf_counter() - started
+                write_stage.bytes_processed += len(data)
+    except asyncio.CancelledError:
+        # A batch still rendering stops at its next message, and may be
+        # reading the input until then: wait for it before closing anything
+        cancelled.set()
+        if batch is not None:
+            await _settle(batch)
+        context.run(chunks.close)
+        if registry is not None:
+            registry.observe_failure()
+        raise
+    except Exception:
+        if registry is not None:
+            context.run(observe_failure, registry, generator, None)
+        raise
+
+    metrics = context.run(lambda: collector.current_metrics)
+    metrics.record_stage(write_stage)
+    if on_finished is not None:
+        on_finished(metrics)
+    if registry is not None:
+        registry.observe(metrics)
+    return metrics
+
+
+async def agenerate_to(
+    conversation: Union[Conversation, Iterable[Message]],
+    writer: AsyncWriter,
+    *,
+    generator: Optional[MarkdownGenerator] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    executor: Optional[Executor] = None,
+    registry: Optional[MetricsRegistry] = None,
+) -> ConversionMetrics:
+    """Render a conversation on an executor and write it asynchronously.
+
+    The output is identical to MarkdownGenerator.generate's. Rendering runs
+    a batch of messages at a time on ``executor``, so the event loop stays
+    free for other tasks; each batch is written and drained before the next
+    is rendered, so a slow reader holds the conversion back rather than
+    letting it buffer. As with convert_stream, what was written before an
+    invalid message stays written.
+
+    Args:
+        conversation: A Conversation, or its messages, e.g. from
+            JSONConverter.iter_messages
+        writer: Where the UTF-8 Markdown goes, e.g. an asyncio.StreamWriter
+            or an AsyncFileWriter
+        generator: Generator to render with; a default one if omitted
+        metadata: Optional metadata to include as YAML frontmatter
+        executor: Executor to render on; the loop's default executor if
+            omitted. A process pool cannot be used: batches share state.
+        registry: Optional registry to fold the conversion's metrics into
+
+    Returns:
+        The conversion metrics, including the write stage
+
+    Raises:
+        asyncio.CancelledError: If the task is cancelled; the conversion
+            stops before its next message
+        OSError: If writing fails
+        MarkdownGenerationError: If Markdown generation fails
+    """
+    if isinstance(conversation, Conversation):
+        messages: Iterable[Message] = conversation.messages
+    else:
+        messages = conversation
+    return await _render_to(
+        messages,
+        writer,
+        generator or MarkdownGenerator(),
+        metadata,
+        executor,
+        registry,
+    )
+
+
+async def aconvert(
+    input_path: Path,
+    output_path: Path,
+    *,
+    generator: Optional[MarkdownGenerator] = None,
+    converter: Optional[JSONConverter] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    executor: Optional[Executor] = None,
+    registry: Optional[MetricsRegistry] = None,
+) -> ConversionResult:
+    """Convert a JSON conversation file to a Markdown file asynchronously.
+
+    The async counterpart of convert_file: the input is parsed as it is
+    rendered, both on ``executor``, and the output is written through an
+    AsyncFileWriter, so it appears only once the conversion succeeds.
+
+    Args:
+        input_path: JSON conversation file to read
+        output_path: Markdown file to write
+        generator: Generator to render with; a default one if omitted
+        converter: JSON converter to parse with; a default one if omitted
+        metadata: Optional metadata to include as YAML frontmatter
+        executor: Executor to read, parse, render and write on; the loop's
+            default executor if omitted
+        registry: Optional registry to fold the conversion's metrics into
+
+    Returns:
+        Where the output was written and the conversion metrics, including
+        parse and write stages
+
+    Raises:
+        asyncio.CancelledError: If the task is cancelled; the conversion
+            stops before its next message and the output is not written
+        OSError: If the input cannot be read or the output cannot be written
+        UnicodeDecodeError: If the input is not UTF-8
+        ConversationParseError: When conversation data is invalid
+        json.JSONDecodeError: When JSON is malformed
+        KeyError: When required fields are missing
+        MarkdownGenerationError: If Markdown generation fails
+    """
+    converter = converter or JSONConverter()
+    loop = asyncio.get_running_loop()
+    parse_stage = StageMetrics(name="parse")
+
+    input_file = await loop.run_in_executor(executor, open, input_path, "rb")
+    try:
+        reader = DecodingReader(input_file)
+        messages = timed_messages(converter.iter_messages(reader), parse_stage)
+
+        def on_finished(metrics: ConversionMetrics) -> None:
+            parse_stage.bytes_processed = reader.bytes_read
+            metrics.record_stage(parse_stage)
+
+        async with AsyncFileWriter(output_path, executor) as writer:
+            metrics = await _render_to(
+                messages,
+                writer,
+                generator or MarkdownGenerator(),
+                metadata,
+                executor,
+                registry,
+                on_finished,
+            )
+    finally:
+        input_file.close()
+    return ConversionResult(output_path=output_path, metrics=metrics)
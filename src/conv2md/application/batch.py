@@ -0,0 +1,422 @@
+"""Batch conversion use case: convert many conversation files in one process.
+
+Starting the interpreter costs far more than converting a typical file, so
+converting a tree of files one process at a time is dominated by startup.
+This module expands directories and glob patterns into a work list and
+converts it either in-process or on a pool of worker processes.
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from conv2md.markdown.generator import MarkdownGenerator
+    from conv2md.markdown.metrics import ConversionMetrics
+    from conv2md.markdown.registry import MetricsRegistry
+
+# The conversion code is imported by the functions that convert. Planning,
+# walking and digests are also used by the CLI's input validation and the
+# daemon client, which should start without loading the converters.
+
+logger = logging.getLogger(__name__)
+
+# Files picked up when walking a directory. Glob patterns match whatever the
+# caller asked for.
+CONVERSATION_SUFFIX = ".json"
+GLOB_CHARACTERS = frozenset("*?[")
+
+# Files per task sent to a worker. Batching amortises the pickling round
+# trip for small files; the cap keeps the tail of the run balanced.
+MAX_TASK_FILES = 32
+TASKS_PER_WORKER = 4
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One file to convert and where its Markdown goes."""
+
+    input_path: Path
+    output_path: Path
+    size: int
+
+
+@dataclass
+class FileOutcome:
+    """Result of converting one file in a batch."""
+
+    item: BatchItem
+    metrics: "Optional[ConversionMetrics]" = None
+    # "<ExceptionType>: <message>" when the conversion failed
+    error: Optional[str] = None
+    # The input's content digest and (size, mtime_ns) as read for this
+    # conversion, when the batch was asked to record them
+    input_digest: Optional[str] = None
+    input_stat: Optional[Tuple[int, int]] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the file was converted."""
+        return self.error is None
+
+
+@dataclass
+class BatchSummary:
+    """Per-file outcomes and aggregate throughput of a batch run."""
+
+    outcomes: List[FileOutcome] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+    jobs: int = 1
+    # Files left out of the run because their output was up to date
+    skipped: int = 0
+
+    @property
+    def succeeded(self) -> int:
+        """Number of files converted."""
+        return sum(1 for outcome in self.outcomes if outcome.ok)
+
+    @property
+    def failed(self) -> int:
+        """Number of files that could not be converted."""
+        return len(self.outcomes) - self.succeeded
+
+    @property
+    def bytes_processed(self) -> int:
+        """Input bytes of every file attempted."""
+        return sum(outcome.item.size for outcome in self.outcomes)
+
+    @property
+    def throughput_bytes_per_sec(self) -> Optional[float]:
+        """Input bytes per second of wall time, or None if nothing ran."""
+        if self.elapsed_seconds > 0 and self.bytes_processed > 0:
+            return self.bytes_processed / self.elapsed_seconds
+        return None
+
+    @property
+    def files_per_sec(self) -> Optional[float]:
+        """Files per second of wall time, or None if nothing ran."""
+        if self.elapsed_seconds > 0 and self.outcomes:
+            return len(self.outcomes) / self.elapsed_seconds
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the summary to a dictionary for logging/export."""
+        return {
+            "files": len(self.outcomes),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "jobs": self.jobs,
+            "elapsed_seconds": self.elapsed_seconds,
+            "bytes_processed": self.bytes_processed,
+            "throughput_bytes_per_sec": self.throughput_bytes_per_sec,
+            "files_per_sec": self.files_per_sec,
+            "failures": {
+                str(outcome.item.input_path): outcome.error
+                for outcome in self.outcomes
+                if not outcome.ok
+            },
+        }
+
+
+def is_glob(pattern: str) -> bool:
+    """Return whether ``pattern`` contains glob wildcards."""
+    return any(character in GLOB_CHARACTERS for character in pattern)
+
+
+def walk_conversation_files(directory: Path) -> Iterator[Tuple[Path, int]]:
+    """Yield every conversation file under ``directory`` with its size.
+
+    Uses os.scandir, whose entries carry the file type from the directory
+    listing itself, so only the size needs a stat call. Hidden directories
+    (``.git`` and the like) and symlinked directories are not descended into,
+    the latter so a link cycle cannot make the walk endless.
+
+    Args:
+        directory: Root of the tree to walk
+
+    Yields:
+        (path, size in bytes) of each ``*.json`` file, in no particular order
+    """
+    pending = [os.fspath(directory)]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if is_walked_directory(entry.name):
+                            pending.append(entry.path)
+                    elif is_conversation_file(entry.name):
+                        try:
+                            if entry.is_file():
+                                yield Path(entry.path), entry.stat().st_size
+                        except OSError:
+                            # Deleted between listing and stat
+                            continue
+        except OSError as e:
+            # One unreadable directory should not abort a walk of thousands
+            logger.warning(f"Skipping unreadable directory {current}: {e}")
+
+
+def is_walked_directory(name: str) -> bool:
+    """Return whether a directory walk descends into a directory ``name``."""
+    return not name.startswith(".")
+
+
+def is_conversation_file(name: str) -> bool:
+    """Return whether a directory walk picks up a file called ``name``."""
+    return name.lower().endswith(CONVERSATION_SUFFIX)
+
+
+def file_digest(path: Any) -> str:
+    """Return a content digest of the file at ``path``.
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(DIGEST_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def expand_inputs(inputs: Iterable[Any]) -> Tuple[List[Tuple[Path, int]], Path]:
+    """Expand files, directories and glob patterns into a deduplicated list.
+
+    Args:
+        inputs: File or directory paths, or glob pattern strings
+
+    Returns:
+        The (path, size) of each file found, and the deepest directory
+        containing all of them, against which output paths are mirrored
+
+    Raises:
+        ValueError: If an input matches no file
+    """
+    found: Dict[Path, Tuple[Path, int]] = {}
+    roots: List[str] = []
+
+    for spec in inputs:
+        spec_str = os.fspath(spec)
+        if os.path.isdir(spec_str):
+            matches = list(walk_conversation_files(Path(spec_str)))
+            root = os.path.abspath(spec_str)
+        elif is_glob(spec_str) and not os.path.exists(spec_str):
+            matches = [
+                (Path(match), os.stat(match).st_size)
+                for match in glob.iglob(spec_str, recursive=True)
+                if os.path.isfile(match)
+            ]
+            root = None
+        else:
+            matches = [(Path(spec_str), os.stat(spec_str).st_size)]
+            root = None
+
+        if not matches:
+            raise ValueError(f"No conversation files found for '{spec_str}'")
+
+        for path, size in matches:
+            resolved = path.resolve()
+            found.setdefault(resolved, (resolved, size))
+            if root is None:
+                roots.append(str(resolved.parent))
+        if root is not None:
+            roots.append(str(Path(root).resolve()))
+
+    return list(found.values()), Path(os.path.commonpath(roots))
+
+
+def plan_batch(
+    files: List[Tuple[Path, int]], root: Path, out_dir: Path
+) -> List[BatchItem]:
+    """Pair each file with its output path, largest first.
+
+    Outputs mirror each file's location relative to ``root``, so files with
+    the same name in different directories do not overwrite each other.
+    Largest-first ordering keeps one huge file from starting last and
+    leaving every other worker idle while it finishes.
+    """
+    items = [
+        BatchItem(
+            input_path=path,
+            output_path=mirrored_output_path(path, root, out_dir),
+            size=size,
+        )
+        for path, size in files
+    ]
+    # Ties broken by path so the order, and therefore the output, is stable
+    items.sort(key=lambda item: (-item.size, str(item.input_path)))
+    return items
+
+
+def mirrored_output_path(input_path: Path, root: Path, out_dir: Path) -> Path:
+    """Return ``out_dir`` plus the input's path under ``root``, as Markdown."""
+    relative = input_path.relative_to(root)
+    from conv2md.application.convert import MARKDOWN_SUFFIX
+
+    return out_dir / relative.parent / f"{relative.stem}{MARKDOWN_SUFFIX}"
+
+
+# Each worker process builds its generator once, not once per file
+_worker_generator: "Optional[MarkdownGenerator]" = None
+_worker_records_digests = False
+
+
+def _init_worker(use_plugins: bool, track_memory: bool, record_digests: bool) -> None:
+    """Build the generator this process converts with."""
+    from conv2md.markdown.generator import MarkdownGenerator
+    from conv2md.markdown.pipeline import ContentProcessingPipeline
+
+    global _worker_generator, _worker_records_digests
+    _worker_generator = MarkdownGenerator(
+        pipeline=ContentProcessingPipeline(use_plugins=use_plugins),
+        track_memory=track_memory,
+    )
+    _worker_records_digests = record_digests
+
+
+def _convert_item(item: BatchItem) -> FileOutcome:
+    """Convert one file with this process's generator."""
+    return convert_item(item, _worker_generator, _worker_records_digests)
+
+
+def convert_item(
+    item: BatchItem,
+    generator: "Optional[MarkdownGenerator]",
+    record_digests: bool = False,
+) -> FileOutcome:
+    """Convert one batch file, capturing failure in the outcome.
+
+    Args:
+        item: File to convert and where its Markdown goes
+        generator: Generator to render with; a default one if None
+        record_digests: Also set the outcome's input_digest and input_stat
+
+    Returns:
+        The outcome, with metrics on success or the error on failure
+    """
+    from conv2md.application.convert import convert_file
+
+    outcome = FileOutcome(item=item)
+    try:
+        if record_digests:
+            # Stat and hash before converting: if the file changes while it
+            # is converted, the next run sees a new digest and converts again
+            stat = os.stat(item.input_path)
+            outcome.input_stat = (stat.st_size, stat.st_mtime_ns)
+            outcome.input_digest = file_digest(item.input_path)
+        result = convert_file(item.input_path, item.output_path, generator=generator)
+    except Exception as e:
+        # Any failure is confined to its file: one bad input in a batch of
+        # thousands must not discard the rest
+        logger.debug(f"Failed to convert {item.input_path}", exc_info=True)
+        outcome.error = f"{type(e).__name__}: {e}"
+        return outcome
+    outcome.metrics = result.metrics
+    return outcome
+
+
+def _convert_items(items: List[BatchItem]) -> List[FileOutcome]:
+    """Convert a task's worth of files in a worker process."""
+    return [_convert_item(item) for item in items]
+
+
+def _tasks(items: List[BatchItem], jobs: int) -> Iterator[List[BatchItem]]:
+    """Deal the largest-first work list out to worker tasks.
+
+    Items are dealt round-robin, item ``i`` to task ``i % n_tasks``, rather
+    than cut into consecutive slices: slices would put the largest files
+    together in the first task, on one worker, which would then finish
+    last. Dealt, the largest files start first, on different workers, and
+    every task gets a similar share of the bytes.
+    """
+    size = max(1, min(MAX_TASK_FILES, len(items) // (jobs * TASKS_PER_WORKER)))
+    n_tasks = -(-len(items) // size)
+    for task in range(n_tasks):
+        yield items[task::n_tasks]
+
+
+def run_batch(
+    items: List[BatchItem],
+    *,
+    jobs: int = 1,
+    use_plugins: bool = False,
+    track_memory: bool = False,
+    registry: "Optional[MetricsRegistry]" = None,
+    on_outcome: Optional[Callable[[FileOutcome], None]] = None,
+    record_digests: bool = False,
+) -> BatchSummary:
+    """Convert every item, in this process or on a pool of workers.
+
+    Args:
+        items: Work list, normally from plan_batch
+        jobs: Worker processes; 1 converts in this process with no pool
+        use_plugins: Enable installed content processor plugins
+        track_memory: Record memory metrics for each conversion
+        registry: Optional registry every outcome is reported to
+        on_outcome: Called in this process as each file finishes, in
+            completion order
+        record_digests: Set each outcome's input_digest and input_stat,
+            computed by the worker that converts the file
+
+    Returns:
+        Outcomes in completion order, with the run's wall time
+    """
+    summary = BatchSummary(jobs=jobs)
+    start = time.perf_counter()
+
+    def record(outcome: FileOutcome) -> None:
+        summary.outcomes.append(outcome)
+        if registry is not None:
+            if outcome.metrics is not None:
+                registry.observe(outcome.metrics)
+            else:
+                registry.observe_failure()
+        if on_outcome is not None:
+            on_outcome(outcome)
+
+    if jobs <= 1:
+        _init_worker(use_plugins, track_memory, record_digests)
+        for item in items:
+            record(_convert_item(item))
+    else:
+        # Only batches on several workers pay for importing multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(use_plugins, track_memory, record_digests),
+        ) as executor:
+            futures = [
+                executor.submit(_convert_items, task) for task in _tasks(items, jobs)
+            ]
+            for future in as_completed(futures):
+                for outcome in future.result():
+                    record(outcome)
+
+    summary.elapsed_seconds = time.perf_counter() - start
+    logger.info(
+        f"Batch finished: {summary.succeeded} converted, {summary.failed} failed "
+        f"in {summary.elapsed_seconds:.2f}s"
+    )
+    return summary
@@ -0,0 +1,356 @@
+"""Conversion use case: read a conversation file and write its Markdown."""
+
+import codecs
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, TextIO
+
+from conv2md.application.profiling import profile_path_for, profiled
+from conv2md.converters.json_conv import ConversationParseError, JSONConverter
+from conv2md.markdown.exceptions import MarkdownGenerationError
+from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.metrics import (
+    ConversionMetrics,
+    ConversionStatus,
+    StageMetrics,
+    current_rss_bytes,
+    max_known,
+    measure_stage,
+    memory_tracing,
+    peak_rss_bytes,
+)
+from conv2md.markdown.registry import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_SUFFIX = ".md"
+
+# Failures of the input rather than of conv2md: callers report these as a
+# clean error instead of a traceback
+CONVERSION_ERRORS = (
+    OSError,
+    UnicodeDecodeError,
+    json.JSONDecodeError,
+    KeyError,
+    ConversationParseError,
+    MarkdownGenerationError,
+)
+
+# Streamed output is flushed after the first chunk, then at most this often:
+# readers downstream in a pipeline see progress without a syscall per message.
+STREAM_FLUSH_INTERVAL_SECONDS = 0.1
+
+
+@dataclass
+class ConversionResult:
+    """Outcome of converting one input file."""
+
+    output_path: Path
+    metrics: ConversionMetrics
+    profile_path: Optional[Path] = None
+
+
+def output_path_for(input_path: Path, out_dir: Path) -> Path:
+    """Return where the Markdown for ``input_path`` is written in ``out_dir``."""
+    return out_dir / f"{input_path.stem}{MARKDOWN_SUFFIX}"
+
+
+def write_output(output_path: Path, data: bytes) -> None:
+    """Write ``data`` to ``output_path`` atomically.
+
+    The bytes go to a temporary file in the destination directory which then
+    replaces the target, so a reader never sees a partially written file and
+    an interrupted run never leaves one behind.
+    """
+    with open_atomic(output_path, "wb") as output_file:
+        output_file.write(data)
+
+
+@contextmanager
+def open_atomic(output_path: Path, mode: str = "w") -> Iterator[Any]:
+    """Open a temporary file that replaces ``output_path`` on success.
+
+    Args:
+        output_path: File to create or replace
+        mode: ``"w"`` for UTF-8 text or ``"wb"`` for bytes
+
+    Yields:
+        The open temporary file
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(
+        dir=output_path.parent, prefix=f".{output_path.name}.", suffix=".tmp"
+    )
+    try:
+        encoding = None if "b" in mode else "utf-8"
+        with os.fdopen(fd, mode, encoding=encoding) as temp_file:
+            yield temp_file
+        os.replace(temp_name, output_path)
+    except BaseException:
+        # Best effort: the original error matters more than cleanup failing
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+def convert_file(
+    input_path: Path,
+    output_path: Path,
+    *,
+    generator: Optional[MarkdownGenerator] = None,
+    converter: Optional[JSONConverter] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    registry: Optional[MetricsRegistry] = None,
+    profile: bool = False,
+) -> ConversionResult:
+    """Convert a JSON conversation file to a Markdown file.
+
+    Parse and write are timed alongside the generator's own stages, so the
+    returned metrics cover every stage of the conversion.
+
+    Args:
+        input_path: JSON conversation file to read
+        output_path: Markdown file to write
+        generator: Generator to render with; a default one if omitted
+        converter: JSON converter to parse with; a default one if omitted
+        metadata: Optional metadata to include as YAML frontmatter
+        registry: Optional registry to fold the conversion's metrics into,
+            whether it succeeds or fails
+        profile: Run the conversion under cProfile and save the stats next to
+            the output as ``<output>.pstats``
+
+    Returns:
+        Where the output (and profile, if any) was written and the
+        conversion metrics
+
+    Raises:
+        OSError: If the input cannot be read or the output cannot be written
+        UnicodeDecodeError: If the input is not UTF-8
+        ConversationParseError: When conversation data is invalid
+        json.JSONDecodeError: When JSON is malformed
+        KeyError: When required fields are missing
+        MarkdownGenerationError: If Markdown generation fails
+    """
+    generator = generator or MarkdownGenerator()
+    converter = converter or JSONConverter()
+    track_memory = generator.metrics_collector.track_memory
+
+    logger.info(f"Converting {input_path} to {output_path}")
+
+    previous_metrics = generator.metrics_collector.current_metrics
+    profile_path = profile_path_for(output_path) if profile else None
+    profiling = profiled(profile_path) if profile_path else nullcontext()
+    try:
+        with profiling:
+            result = _convert(
+                input_path, output_path, generator, converter, metadata, track_memory
+            )
+    except Exception:
+        if registry is not None:
+            observe_failure(registry, generator, previous_metrics)
+        raise
+
+    if registry is not None:
+        registry.observe(result.metrics)
+    result.profile_path = profile_path
+    return result
+
+
+def _convert(
+    input_path: Path,
+    output_path: Path,
+    generator: MarkdownGenerator,
+    converter: JSONConverter,
+    metadata: Optional[Dict[str, Any]],
+    track_memory: bool,
+) -> ConversionResult:
+    """Run the parse, generate and write stages of convert_file."""
+    # Trace across every stage, not just the generator's: parse and write
+    # run outside it and are often where the memory goes.
+    with memory_tracing(enabled=track_memory):
+        rss_before = current_rss_bytes() if track_memory else None
+
+        with measure_stage("parse", track_memory=track_memory) as parse_stage:
+            raw = input_path.read_bytes()
+            parse_stage.bytes_processed = len(raw)
+            conversation = converter.parse(raw.decode("utf-8"))
+
+        generated = generator.generate_with_metrics(conversation, metadata)
+        metrics = generated.metrics
+        metrics.record_stage(parse_stage)
+
+        with measure_stage("write", track_memory=track_memory) as write_stage:
+            data = generated.markdown.encode("utf-8")
+            write_stage.bytes_processed = len(data)
+            write_output(output_path, data)
+        metrics.record_stage(write_stage)
+
+        if metrics.memory_tracked:
+            _extend_memory_metrics(metrics, rss_before, parse_stage, write_stage)
+
+    logger.debug(f"Conversion stages: {metrics.to_dict()['stages']}")
+
+    return ConversionResult(output_path=output_path, metrics=metrics)
+
+
+def convert_stream(
+    input_stream: BinaryIO,
+    output: TextIO,
+    *,
+    generator: Optional[MarkdownGenerator] = None,
+    converter: Optional[JSONConverter] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    registry: Optional[MetricsRegistry] = None,
+) -> ConversionMetrics:
+    """Convert a JSON conversation stream, writing Markdown as it is produced.
+
+    Messages are parsed, converted and written one at a time, so conversion
+    starts before the input has been fully read and memory stays bounded by
+    the largest message. The output is identical to convert_file's. If the
+    input turns out to be invalid part way through, what was written before
+    that point stays written.
+
+    Args:
+        input_stream: Binary stream of UTF-8 JSON, e.g. stdin's buffer
+        output: Text stream the Markdown is written to, e.g. stdout
+        generator: Generator to render with; a default one if omitted
+        converter: JSON converter to parse with; a default one if omitted
+        metadata: Optional metadata to include as YAML frontmatter
+        registry: Optional registry to fold the conversion's metrics into
+
+    Returns:
+        The conversion metrics, including parse and write stages
+
+    Raises:
+        OSError: If reading or writing fails
+        UnicodeDecodeError: If the input is not UTF-8
+        ConversationParseError: When conversation data is invalid
+        json.JSONDecodeError: When JSON is malformed
+        KeyError: When required fields are missing
+        MarkdownGenerationError: If Markdown generation fails
+    """
+    generator = generator or MarkdownGenerator()
+    converter = converter or JSONConverter()
+
+    collector = generator.metrics_collector
+    previous_metrics = collector.current_metrics
+    metrics: Optional[ConversionMetrics] = None
+    reader = DecodingReader(input_stream)
+    parse_stage = StageMetrics(name="parse")
+    write_stage = StageMetrics(name="write")
+
+    try:
+        messages = timed_messages(converter.iter_messages(reader), parse_stage)
+        last_flush = None
+        for chunk in generator.generate_stream(messages, metadata):
+            if metrics is None:
+                # The stream started its conversion on this thread just before
+                # its first chunk. By the last chunk another conversion may
+                # have become the collector's current one.
+                metrics = collector.current_metrics
+            started = time.perf_counter()
+            output.write(chunk)
+            if last_flush is None or (
+                started - last_flush >= STREAM_FLUSH_INTERVAL_SECONDS
+            ):
+                output.flush()
+                last_flush = started
+            write_stage.duration_seconds += time.perf_counter() - started
+            write_stage.bytes_processed += len(chunk.encode("utf-8"))
+        output.flush()
+    except Exception:
+        if registry is not None:
+            observe_failure(registry, generator, previous_metrics, metrics)
+        raise
+
+    # generate_stream raises rather than yield nothing, so metrics is set
+    parse_stage.bytes_processed = reader.bytes_read
+    metrics.record_stage(parse_stage)
+    metrics.record_stage(write_stage)
+    if registry is not None:
+        registry.observe(metrics)
+    return metrics
+
+
+class DecodingReader:
+    """Text view of a binary stream that counts the bytes it decodes."""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.bytes_read = 0
+
+    def read(self, size: int) -> str:
+        """Return up to about ``size`` characters; "" at the end."""
+        while True:
+            data = self._stream.read(size)
+            self.bytes_read += len(data)
+            # Raises UnicodeDecodeError on invalid or truncated UTF-8
+            text = self._decoder.decode(data, final=not data)
+            # A read that ends mid-character decodes to nothing; keep going
+            if text or not data:
+                return text
+
+
+def timed_messages(messages: Iterator[Any], stage: StageMetrics) -> Iterator[Any]:
+    """Yield from ``messages``, adding the time spent in each step to ``stage``."""
+    while True:
+        started = time.perf_counter()
+        try:
+            message = next(messages)
+        except StopIteration:
+            stage.duration_seconds += time.perf_counter() - started
+            return
+        stage.duration_seconds += time.perf_counter() - started
+        yield message
+
+
+def observe_failure(
+    registry: MetricsRegistry,
+    generator: MarkdownGenerator,
+    previous_metrics: Optional[ConversionMetrics],
+    metrics: Optional[ConversionMetrics] = None,
+) -> None:
+    """Count a failed conversion, with its metrics if the generator got that far.
+
+    A failure while parsing leaves the collector holding the previous
+    conversion's metrics, which must not be counted a second time.
+
+    Args:
+        registry: Registry to count the failure in
+        generator: Generator that ran the conversion
+        previous_metrics: The collector's current conversion before this one
+        metrics: The conversion's own metrics, if known; the collector's
+            current ones otherwise
+    """
+    if metrics is None:
+        metrics = generator.metrics_collector.current_metrics
+    if metrics is not previous_metrics and metrics.status == ConversionStatus.ERROR:
+        registry.observe(metrics)
+    else:
+        registry.observe_failure()
+
+
+def _extend_memory_metrics(
+    metrics: ConversionMetrics,
+    rss_before: Optional[int],
+    *stages: StageMetrics,
+) -> None:
+    """Widen the generator's memory figures to cover parse and write too."""
+    metrics.rss_before_bytes = rss_before
+    metrics.rss_after_bytes = current_rss_bytes()
+    metrics.rss_peak_bytes = max_known(
+        peak_rss_bytes(), metrics.rss_before_bytes, metrics.rss_after_bytes
+    )
+    metrics.traced_peak_bytes = max(
+        [metrics.traced_peak_bytes or 0]
+        + [stage.memory_peak_bytes or 0 for stage in stages]
+    )
@@ -0,0 +1,747 @@
+"""URL fetch use case: download many URLs concurrently, politely, and convert them.
+
+Downloading is I/O-bound and converting is CPU-bound, so the two overlap:
+FetchScheduler runs the downloads on an asyncio loop, with blocking
+fetcher calls on a thread pool, and convert_urls hands each document to
+the converter as soon as it arrives while later downloads continue.
+
+Politeness and robustness are the scheduler's job:
+
+- at most ``max_per_host`` requests to one host at a time, with hosts
+  served round-robin so one large site does not starve the rest
+- an optional global token-bucket rate limit on requests
+- retries of connection failures and transient statuses with jittered
+  exponential backoff, honouring Retry-After
+- a cap on body size, enforced while reading
+- with a RobotsCache, each URL checked against its host's robots.txt
+
+HTML pages are converted while they download: the body is streamed from
+the socket into HTMLConverter on the fetch thread, so a page is never held
+whole and pages over MAX_HTML_SIZE are cut off rather than refused. By
+default only each page's main content is kept. The body is hashed as it
+streams, so the Markdown can be cached under the page's digest; a page
+served from an HTTP cache has a known digest before it is read, and is not
+converted again when its Markdown is cached too.
+
+Memory stays bounded by the requests in flight plus a queue of the same
+size: when conversion falls behind, downloading waits for it.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from conv2md.application.convert import MARKDOWN_SUFFIX, write_output
+from conv2md.markdown.constants import MAX_TOTAL_CONVERSATION_SIZE
+from conv2md.ports.cache import ConversionCache, content_digest, content_hasher
+from conv2md.ports.fetcher import ContentFetcher, FetchError
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from conv2md.application.robots import RobotsCache
+    from conv2md.markdown.metrics import ConversionMetrics, StageMetrics
+    from conv2md.markdown.registry import MetricsRegistry
+    from conv2md.ports.fetcher import FetchResponse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+# Statuses that say "try again later" rather than "no"
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+READ_CHUNK_SIZE = 64 * 1024
+
+_SLUG_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+MAX_SLUG_LENGTH = 80
+
+
+class ResponseTooLarge(FetchError):
+    """Raised when a response body exceeds the size limit."""
+
+
+@dataclass
+class ConvertedPage:
+    """An HTML page's UTF-8 Markdown, converted as it downloaded."""
+
+    markdown: bytes
+    # Conversion cache key; None for a page cut off before its end
+    digest: Optional[str] = None
+    metrics: "Optional[ConversionMetrics]" = None
+    # Taken from the conversion cache rather than converted
+    reused: bool = False
+
+
+@dataclass
+class FetchedDocument:
+    """One URL's download: its body, or why there is none."""
+
+    url: str
+    status: Optional[int] = None
+    content_type: str = ""
+    body: Optional[bytes] = None
+    attempts: int = 0
+    error: Optional[str] = None
+    elapsed_seconds: float = 0.0
+    # Set instead of body for HTML, converted as it was read
+    page: Optional[ConvertedPage] = None
+
+
+class TokenBucket:
+    """Token-bucket rate limiter for asyncio tasks.
+
+    Tokens accrue at ``rate`` per second up to ``burst``; each acquire
+    takes one, waiting until one is available.
+    """
+
+    def __init__(
+        self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic
+    ):
+        """Start with a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Most tokens the bucket holds, i.e. the largest burst
+            clock: Monotonic time source
+        """
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    async def acquire(self) -> None:
+        """Take a token, waiting for one if the bucket is empty."""
+        while True:
+            now = self._clock()
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FetchScheduler:
+    """Downloads URLs concurrently under per-host and global limits."""
+
+    def __init__(
+        self,
+        fetcher: ContentFetcher,
+        *,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        rate_limit: Optional[float] = None,
+        retries: int = DEFAULT_RETRIES,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+        max_bytes: int = MAX_TOTAL_CONVERSATION_SIZE,
+        robots: "Optional[RobotsCache]" = None,
+        main_content: bool = True,
+        jitter: Callable[[], float] = random.random,
+    ):
+        """Configure the scheduler.
+
+        Args:
+            fetcher: Fetcher the downloads go through; its own timeouts
+                apply to each request
+            max_per_host: Requests in flight to one host at once
+            max_connections: Requests in flight in total
+            rate_limit: Requests started per second across all hosts, with
+                bursts of up to ``max_per_host``; unlimited if None
+            retries: Further attempts after a connection failure or a
+                retryable status
+            backoff_seconds: Base of the exponential backoff between attempts
+            max_bytes: Largest body accepted
+            robots: robots.txt rules each URL is checked against before it
+                is requested; URLs are not checked if omitted
+            main_content: Convert only the main content of HTML pages,
+                leaving out navigation, sidebars and footers
+            jitter: Returns a float in [0, 1) scaling each backoff delay
+        """
+        self.fetcher = fetcher
+        self.max_per_host = max_per_host
+        self.max_connections = max_connections
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_bytes = max_bytes
+        self.robots = robots
+        self.main_content = main_content
+        self._jitter = jitter
+
+    async def fetch_all(
+        self, urls: Iterable[str], *, cache: Optional[ConversionCache] = None
+    ) -> AsyncIterator[FetchedDocument]:
+        """Download every URL, yielding each document as it completes.
+
+        Args:
+            urls: URLs to download; duplicates are downloaded once
+            cache: Optional cache of Markdown by content digest: HTML pages
+                it has Markdown for are not converted again
+
+        Yields:
+            One FetchedDocument per distinct URL, in completion order
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        by_host: "OrderedDict[str, Deque[str]]" = OrderedDict()
+        for url in dict.fromkeys(urls):
+            by_host.setdefault(_host_of(url), deque()).append(url)
+
+        results: "asyncio.Queue[Optional[FetchedDocument]]" = asyncio.Queue(
+            maxsize=self.max_connections
+        )
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_connections, thread_name_prefix="conv2md-fetch"
+        )
+        bucket = (
+            TokenBucket(self.rate_limit, burst=self.max_per_host)
+            if self.rate_limit
+            else None
+        )
+        dispatcher = asyncio.create_task(
+            self._dispatch(by_host, results, executor, bucket, cache)
+        )
+        try:
+            while (document := await results.get()) is not None:
+                yield document
+            await dispatcher
+        finally:
+            dispatcher.cancel()
+            # Threads blocked on the network finish within the read timeout;
+            # nothing waits for them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _dispatch(
+        self,
+        by_host: "OrderedDict[str, Deque[str]]",
+        results: "asyncio.Queue[Optional[FetchedDocument]]",
+        executor: "ThreadPoolExecutor",
+        bucket: Optional[TokenBucket],
+        cache: Optional[ConversionCache],
+    ) -> None:
+        """Start downloads as per-host and global slots free up."""
+        active: Dict[str, int] = {}
+        tasks: Set["asyncio.Task[None]"] = set()
+        wake = asyncio.Event()
+
+        async def fetch_one(host: str, url: str) -> None:
+            try:
+                document = await self._fetch(url, executor, bucket, cache)
+            finally:
+                active[host] -= 1
+                wake.set()
+            await results.put(document)
+
+        def finished(task: "asyncio.Task[None]") -> None:
+            tasks.discard(task)
+            wake.set()
+
+        try:
+            while by_host or tasks:
+                for host in list(by_host):
+                    queued = by_host[host]
+                    while (
+                        queued
+                        and active.get(host, 0) < self.max_per_host
+                        and len(tasks) < self.max_connections
+                    ):
+                        active[host] = active.get(host, 0) + 1
+                        task = asyncio.create_task(fetch_one(host, queued.popleft()))
+                        tasks.add(task)
+                        task.add_done_callback(finished)
+                    if not queued:
+                        del by_host[host]
+                    else:
+                        # Round-robin: hosts that just got a slot go last
+                        by_host.move_to_end(host)
+                wake.clear()
+                if by_host or tasks:
+                    await wake.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+        await results.put(None)
+
+    async def _fetch(
+        self,
+        url: str,
+        executor: "ThreadPoolExecutor",
+        bucket: Optional[TokenBucket],
+        cache: Optional[ConversionCache],
+    ) -> FetchedDocument:
+        """Download one URL, retrying transient failures."""
+        loop = asyncio.get_running_loop()
+        document = FetchedDocument(url=url)
+        started = loop.time()
+        try:
+            _check_url(url)
+        except FetchError as e:
+            document.error = str(e)
+            return document
+        if self.robots is not None:
+            try:
+                allowed = await loop.run_in_executor(executor, self.robots.allowed, url)
+            except Exception as e:
+                logger.exception(f"Unexpected error checking robots.txt for {url}")
+                document.error = f"{type(e).__name__}: {e}"
+                return document
+            if not allowed:
+                document.error = "Disallowed by robots.txt"
+                return document
+
+        while True:
+            document.attempts += 1
+            if bucket is not None:
+                await bucket.acquire()
+            retry_after = None
+            try:
+                download = await loop.run_in_executor(
+                    executor, self._download, url, cache
+                )
+                status, content_type, body, page, retry_after = download
+            except ResponseTooLarge as e:
+                document.error = str(e)
+                break
+            except UnicodeError as e:
+                # The page's charset cannot decode it: asking again won't help
+                document.error = f"Cannot decode {url}: {e}"
+                break
+            except FetchError as e:
+                document.error = str(e)
+            except Exception as e:
+                # Not a network failure, so not retried; but the URL still
+                # gets its outcome rather than taking the task down with it
+                logger.exception(f"Unexpected error fetching {url}")
+                document.error = f"{type(e).__name__}: {e}"
+                break
+            else:
+                document.status = status
+                document.content_type = content_type
+                if status < 400:
+                    document.body = body
+                    document.page = page
+                    document.error = None
+                    break
+                document.error = f"HTTP {status}"
+                if status not in RETRYABLE_STATUSES:
+                    break
+            if document.attempts > self.retries:
+                break
+            delay = self._backoff(document.attempts, retry_after)
+            logger.debug(f"Retrying {url} in {delay:.2f}s: {document.error}")
+            await asyncio.sleep(delay)
+
+        document.elapsed_seconds = loop.time() - started
+        return document
+
+    def _download(
+        self, url: str, cache: Optional[ConversionCache]
+    ) -> Tuple[int, str, Optional[bytes], Optional[ConvertedPage], Optional[str]]:
+        """Fetch ``url`` on an executor thread.
+
+        Returns:
+            The status, Content-Type, body, converted page and Retry-After
+            header. HTML has a page instead of a body; an error status has
+            neither.
+        """
+        with self.fetcher.fetch(url) as response:
+            content_type = response.headers.get("Content-Type", "")
+            retry_after = response.headers.get("Retry-After")
+            if response.status >= 400:
+                return response.status, content_type, None, None, retry_after
+            if _is_html(content_type):
+                page = self._convert_page(url, content_type, response, cache)
+                return response.status, content_type, None, page, retry_after
+            declared = response.headers.get("Content-Length", "")
+            if declared.isdigit() and int(declared) > self.max_bytes:
+                raise ResponseTooLarge(
+                    f"{url} is {declared} bytes; the limit is {self.max_bytes}"
+                )
+            chunks: List[bytes] = []
+            size = 0
+            for chunk in response.iter_chunks(READ_CHUNK_SIZE):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ResponseTooLarge(
+                        f"{url} is over the {self.max_bytes} byte limit"
+                    )
+                chunks.append(chunk)
+            body = b"".join(chunks)
+            return response.status, content_type, body, None, retry_after
+
+    def _convert_page(
+        self,
+        url: str,
+        content_type: str,
+        response: "FetchResponse",
+        cache: Optional[ConversionCache],
+    ) -> ConvertedPage:
+        """Convert an HTML page as it streams in, unless ``cache`` has it.
+
+        The conversion runs here, on the fetch thread, rather than on the
+        converters convert_urls starts: they take whole bodies, and
+        streaming is what keeps a page from being held whole.
+        """
+        from conv2md.markdown.metrics import (
+            ConversionMetrics,
+            ConversionStatus,
+            measure_stage,
+        )
+
+        if cache is not None and response.body_digest is not None:
+            digest = _page_digest(
+                url, content_type, response.body_digest, self.main_content
+            )
+            markdown = cache.get_conversion(digest)
+            if markdown is not None:
+                return ConvertedPage(markdown, digest, reused=True)
+
+        from conv2md.converters.html_conv import HTMLConverter, charset_of
+
+        converter = HTMLConverter(main_content=self.main_content)
+        metrics = ConversionMetrics()
+        hasher = content_hasher()
+        with measure_stage("parse") as stage:
+            chunks = _hashed(response.iter_chunks(READ_CHUNK_SIZE), hasher, stage)
+            text = "".join(
+                converter.iter_markdown(
+                    chunks, url=url, encoding=charset_of(content_type)
+                )
+            )
+        metrics.record_stage(stage)
+        metrics.output_size = len(text)
+        metrics.finish()
+
+        digest = None
+        if stage.bytes_processed > converter.max_bytes:
+            # Cut off: the rest of the body was never read, nor hashed
+            metrics.warnings_issued += 1
+            metrics.status = ConversionStatus.PARTIAL
+        else:
+            digest = _page_digest(
+                url, content_type, hasher.hexdigest(), self.main_content
+            )
+        return ConvertedPage(text.encode("utf-8"), digest, metrics)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        """Return the delay before the next attempt.
+
+        Full jitter: a random share of an exponentially growing cap, so
+        clients that failed together do not retry together. A server's
+        Retry-After, in seconds, is a floor.
+        """
+        cap = min(MAX_BACKOFF_SECONDS, self.backoff_seconds * 2 ** (attempt - 1))
+        delay = cap * self._jitter()
+        if retry_after and retry_after.strip().isdigit():
+            delay = max(delay, min(MAX_BACKOFF_SECONDS, float(retry_after)))
+        return delay
+
+
+@dataclass
+class URLOutcome:
+    """What became of one URL: where its Markdown went, or why it failed."""
+
+    url: str
+    output_path: Optional[Path] = None
+    status: Optional[int] = None
+    attempts: int = 0
+    fetch_seconds: float = 0.0
+    error: Optional[str] = None
+    metrics: "Optional[ConversionMetrics]" = None
+    # Written from cached Markdown rather than converted
+    reused: bool = False
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the URL was downloaded and converted."""
+        return self.error is None
+
+
+@dataclass
+class URLBatchSummary:
+    """Outcomes of a URL run, in completion order, and its wall time."""
+
+    outcomes: List[URLOutcome] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> int:
+        """Number of URLs converted."""
+        return sum(1 for outcome in self.outcomes if outcome.succeeded)
+
+    @property
+    def failed(self) -> int:
+        """Number of URLs that could not be fetched or converted."""
+        return len(self.outcomes) - self.succeeded
+
+    @property
+    def reused(self) -> int:
+        """Number of URLs written from cached Markdown."""
+        return sum(1 for outcome in self.outcomes if outcome.reused)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the summary to a dictionary for logging/export."""
+        return {
+            "urls": len(self.outcomes),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "reused": self.reused,
+            "elapsed_seconds": self.elapsed_seconds,
+            "attempts": sum(outcome.attempts for outcome in self.outcomes),
+            "failures": {
+                outcome.url: outcome.error
+                for outcome in self.outcomes
+                if not outcome.succeeded
+            },
+        }
+
+
+def read_url_list(lines: Iterable[str]) -> List[str]:
+    """Return the URLs of a list file: one per line, # comments and blanks skipped."""
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.append(line)
+    return urls
+
+
+def url_output_path(url: str, out_dir: Path) -> Path:
+    """Return where the Markdown for ``url`` is written in ``out_dir``.
+
+    Named ``<host>-<path slug>.md``, so a page lands in the same file on
+    every run. URLs with a query also get a short digest of the whole URL,
+    since pages differing only in their query would otherwise collide.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "unknown").lower()
+    slug = _SLUG_UNSAFE.sub("-", parts.path).strip("-")[:MAX_SLUG_LENGTH] or "index"
+    name = f"{host}-{slug}"
+    if parts.query:
+        name += "-" + hashlib.blake2b(url.encode(), digest_size=4).hexdigest()
+    return out_dir / f"{name}{MARKDOWN_SUFFIX}"
+
+
+def _host_of(url: str) -> str:
+    """Return the host:port requests to ``url`` count against."""
+    try:
+        return urlsplit(url).netloc.lower()
+    except ValueError:
+        return ""
+
+
+def _check_url(url: str) -> None:
+    """Raise FetchError unless ``url`` is an absolute http(s) URL."""
+    try:
+        parts = urlsplit(url)
+    except ValueError as e:
+        raise FetchError(f"Invalid URL {url}: {e}") from e
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        raise FetchError(f"Not an http or https URL: {url}")
+
+
+def _cached_conversion(
+    cache: ConversionCache, body: bytes
+) -> Tuple[str, Optional[bytes]]:
+    """Return the body's digest and the Markdown cached for it, if any."""
+    digest = content_digest(body)
+    return digest, cache.get_conversion(digest)
+
+
+def _hashed(
+    chunks: Iterable[bytes], hasher: Any, stage: "StageMetrics"
+) -> Iterator[bytes]:
+    """Yield ``chunks``, hashing them and counting their bytes on the way."""
+    for chunk in chunks:
+        hasher.update(chunk)
+        stage.bytes_processed += len(chunk)
+        yield chunk
+
+
+def _page_digest(
+    url: str, content_type: str, body_digest: str, main_content: bool
+) -> str:
+    """Return the digest an HTML page's Markdown is cached under.
+
+    The Markdown depends on more than the body: the URL is in the
+    frontmatter and resolves relative links, the charset decodes the body,
+    and the main content may be all that is kept.
+    """
+    key = "\n".join((url, content_type, body_digest, str(main_content)))
+    return content_digest(key.encode("utf-8"))
+
+
+def _is_html(content_type: str) -> bool:
+    """Whether a Content-Type is an HTML page."""
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type in ("text/html", "application/xhtml+xml")
+
+
+def _is_convertible(document: FetchedDocument) -> bool:
+    """Whether the document is in a format a converter exists for."""
+    if document.page is not None:
+        return True
+    media_type = document.content_type.split(";", 1)[0].strip().lower()
+    return media_type.endswith(("/json", "+json")) or (
+        media_type in ("", "text/plain", "application/octet-stream")
+        and urlsplit(document.url).path.endswith(".json")
+    )
+
+
+async def convert_urls(
+    urls: Iterable[str],
+    out_dir: Path,
+    scheduler: FetchScheduler,
+    *,
+    jobs: int = 1,
+    use_plugins: bool = False,
+    track_memory: bool = False,
+    registry: "Optional[MetricsRegistry]" = None,
+    cache: Optional[ConversionCache] = None,
+    on_outcome: Optional[Callable[[URLOutcome], None]] = None,
+) -> URLBatchSummary:
+    """Download URLs and convert each document as soon as it arrives.
+
+    With a ``cache``, a document whose content was converted before, under
+    the same version and options, is written from the cached Markdown
+    instead of being converted again.
+
+    HTML pages are converted by the scheduler as they download, on its
+    fetch threads, and are looked up in the cache there; only the other
+    documents go to the ``jobs`` converters.
+
+    Args:
+        urls: URLs to convert
+        out_dir: Directory the Markdown files are written to
+        scheduler: Scheduler the downloads go through
+        jobs: Worker processes converting documents other than HTML; 1
+            converts on a thread of this process, still overlapping with
+            the downloads
+        use_plugins: Enable installed content processor plugins
+        track_memory: Record memory metrics for each conversion
+        registry: Optional registry to fold each conversion's metrics into;
+            URLs that fail to download are not conversions and are not counted
+        cache: Optional cache of Markdown by content digest, consulted
+            before converting and updated after
+        on_outcome: Called as each URL finishes, in completion order
+
+    Returns:
+        Every URL's outcome, in completion order, with the run's wall time
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    from conv2md.application.many import convert_sources, init_worker
+
+    loop = asyncio.get_running_loop()
+    summary = URLBatchSummary()
+    started = time.perf_counter()
+    executor_type = ProcessPoolExecutor if jobs > 1 else ThreadPoolExecutor
+    # Documents waiting to convert hold their bodies: no more than the
+    # converters can take, plus one each queued
+    converting = asyncio.Semaphore(2 * jobs)
+    tasks: Set["asyncio.Task[None]"] = set()
+
+    def record(outcome: URLOutcome) -> None:
+        summary.outcomes.append(outcome)
+        if on_outcome is not None:
+            on_outcome(outcome)
+
+    async def convert(document: FetchedDocument, outcome: URLOutcome) -> None:
+        error = None
+        try:
+            digest, data = None, None
+            if document.page is not None:
+                # Converted, or found in the cache, as it downloaded
+                digest, data = document.page.digest, document.page.markdown
+                outcome.metrics = document.page.metrics
+                outcome.reused = document.page.reused
+            elif cache is not None:
+                digest, data = await loop.run_in_executor(
+                    None, _cached_conversion, cache, document.body
+                )
+                outcome.reused = data is not None
+            if data is None:
+                ((markdown, error, metrics),) = await loop.run_in_executor(
+                    executor, convert_sources, [document.body]
+                )
+                if error is None:
+                    data = markdown.encode("utf-8")
+                    outcome.metrics = metrics
+            if data is not None:
+                output_path = url_output_path(document.url, out_dir)
+                await loop.run_in_executor(None, write_output, output_path, data)
+                outcome.output_path = output_path
+                if cache is not None and digest is not None and not outcome.reused:
+                    await loop.run_in_executor(None, cache.put_conversion, digest, data)
+        except OSError as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            converting.release()
+        outcome.error = error
+        if registry is not None:
+            # Reused Markdown was not converted this run: nothing to count
+            if outcome.metrics is not None:
+                registry.observe(outcome.metrics)
+            elif error is not None:
+                registry.observe_failure()
+        record(outcome)
+
+    with executor_type(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(use_plugins, track_memory),
+    ) as executor:
+        async for document in scheduler.fetch_all(urls, cache=cache):
+            outcome = URLOutcome(
+                url=document.url,
+                status=document.status,
+                attempts=document.attempts,
+                fetch_seconds=document.elapsed_seconds,
+                error=document.error,
+            )
+            if outcome.error is None and not _is_convertible(document):
+                outcome.error = (
+                    f"Unsupported content type {document.content_type or 'unknown'}"
+                )
+            if outcome.error is not None:
+                record(outcome)
+                continue
+            await converting.acquire()
+            task = asyncio.create_task(convert(document, outcome))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    summary.elapsed_seconds = time.perf_counter() - started
+    logger.info(
+        f"URL batch finished: {summary.succeeded} converted, {summary.failed} "
+        f"failed in {summary.elapsed_seconds:.2f}s"
+    )
+    return summary
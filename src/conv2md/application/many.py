@@ -0,0 +1,219 @@
+"""Library use case: convert many conversations, yielding results as they finish.
+
+convert_many is the library counterpart of a batch run: it takes paths or
+raw JSON bytes instead of a directory tree, returns the Markdown instead of
+writing it, and accepts any iterable, including one too large to hold in
+memory. Sources are drawn from the iterable only as workers free up, so the
+work in flight, and with it memory, stays bounded however many sources
+there are.
+"""
+
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from conv2md.application.batch import TASKS_PER_WORKER
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from conv2md.converters.json_conv import JSONConverter
+    from conv2md.markdown.generator import MarkdownGenerator
+    from conv2md.markdown.metrics import ConversionMetrics
+
+logger = logging.getLogger(__name__)
+
+Source = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview]
+
+# Sources per task sent to a worker: enough to amortise the pickling round
+# trip for short conversations, few enough to keep results flowing
+DEFAULT_CHUNK_SIZE = 8
+
+
+@dataclass
+class ConvertedSource:
+    """Result of converting one source passed to convert_many."""
+
+    source: Source
+    markdown: Optional[str] = None
+    error: Optional[str] = None
+    metrics: "Optional[ConversionMetrics]" = None
+
+    @property
+    def succeeded(self) -> bool:
+        """Whether the source was converted."""
+        return self.error is None
+
+
+# What a worker sends back per source, as (markdown, error, metrics): the
+# parent pairs it with the source it kept, so large byte sources are not
+# pickled a second time
+SourceResult = Tuple[Optional[str], Optional[str], "Optional[ConversionMetrics]"]
+
+_worker_generator: "Optional[MarkdownGenerator]" = None
+_worker_converter: "Optional[JSONConverter]" = None
+
+
+def _build(
+    use_plugins: bool, track_memory: bool
+) -> "Tuple[JSONConverter, MarkdownGenerator]":
+    """Return a converter and generator for the options."""
+    from conv2md.converters.json_conv import JSONConverter
+    from conv2md.markdown.generator import MarkdownGenerator
+    from conv2md.markdown.pipeline import ContentProcessingPipeline
+
+    generator = MarkdownGenerator(
+        pipeline=ContentProcessingPipeline(use_plugins=use_plugins),
+        track_memory=track_memory,
+    )
+    return JSONConverter(), generator
+
+
+def init_worker(use_plugins: bool, track_memory: bool) -> None:
+    """Build the converter and generator this process converts with.
+
+    The initializer of any executor that runs convert_sources, in worker
+    processes or threads.
+    """
+    global _worker_generator, _worker_converter
+    _worker_converter, _worker_generator = _build(use_plugins, track_memory)
+
+
+def _convert_source(
+    source: Source, converter: "JSONConverter", generator: "MarkdownGenerator"
+) -> SourceResult:
+    """Convert one source, capturing failure in the result."""
+    from conv2md.markdown.metrics import measure_stage
+
+    try:
+        track_memory = generator.metrics_collector.track_memory
+        with measure_stage("parse", track_memory=track_memory) as parse_stage:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                raw = bytes(source)
+            else:
+                with open(source, "rb") as source_file:
+                    raw = source_file.read()
+            parse_stage.bytes_processed = len(raw)
+            conversation = converter.parse(raw.decode("utf-8"))
+        generated = generator.generate_with_metrics(conversation)
+    except Exception as e:
+        # As in a batch, one bad source must not stop the rest
+        logger.debug("Failed to convert a source", exc_info=True)
+        return None, f"{type(e).__name__}: {e}", None
+    generated.metrics.record_stage(parse_stage)
+    return generated.markdown, None, generated.metrics
+
+
+def convert_sources(sources: List[Source]) -> List[SourceResult]:
+    """Convert a task's worth of sources in a worker set up by init_worker."""
+    return [
+        _convert_source(source, _worker_converter, _worker_generator)
+        for source in sources
+    ]
+
+
+def _chunks(sources: Iterable[Source], size: int) -> Iterator[List[Source]]:
+    """Draw consecutive lists of up to ``size`` sources, lazily."""
+    iterator = iter(sources)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def convert_many(
+    sources: Iterable[Source],
+    *,
+    jobs: int = 1,
+    ordered: bool = False,
+    use_plugins: bool = False,
+    track_memory: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[ConvertedSource]:
+    """Convert JSON conversations to Markdown, yielding each result.
+
+    Sources that fail are reported in their result rather than raised, so
+    one bad conversation does not end the iteration. At most
+    ``jobs * TASKS_PER_WORKER`` tasks of ``chunk_size`` sources are in
+    flight at once; sources are drawn from the iterable as tasks finish.
+
+    Args:
+        sources: Paths to JSON conversation files, or their raw UTF-8 bytes
+        jobs: Worker processes; 1 converts in this process with no pool
+        ordered: Yield results in input order rather than completion order.
+            A slow source then holds back the results queued behind it.
+        use_plugins: Enable installed content processor plugins
+        track_memory: Record memory metrics for each conversion
+        chunk_size: Sources sent to a worker at a time
+
+    Yields:
+        One result per source, with the Markdown and metrics on success or
+        the error on failure
+    """
+    if jobs <= 1:
+        # Results come back in input order either way
+        converter, generator = _build(use_plugins, track_memory)
+        for source in sources:
+            yield ConvertedSource(
+                source, *_convert_source(source, converter, generator)
+            )
+        return
+
+    # Only conversions on several workers pay for importing multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_in_flight = jobs * TASKS_PER_WORKER
+    chunks = _chunks(sources, max(1, chunk_size))
+    executor = ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(use_plugins, track_memory),
+    )
+    # Submission order, for ordered results; the chunk travels with its
+    # future so the results can be paired with the caller's sources
+    in_flight: "Deque[Tuple[Future[List[SourceResult]], List[Source]]]" = deque()
+    try:
+        for chunk in chunks:
+            in_flight.append((executor.submit(convert_sources, chunk), chunk))
+            if len(in_flight) < max_in_flight:
+                continue
+            yield from _drain(in_flight, ordered)
+        while in_flight:
+            yield from _drain(in_flight, ordered)
+    finally:
+        # Also reached when the caller stops iterating early: abandon the
+        # tasks nobody will read
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _drain(
+    in_flight: "Deque[Tuple[Future[List[SourceResult]], List[Source]]]",
+    ordered: bool,
+) -> Iterator[ConvertedSource]:
+    """Yield the results of at least one finished task, freeing its slot."""
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    if ordered:
+        future, chunk = in_flight.popleft()
+        done_tasks = [(future, chunk)]
+    else:
+        done: "Set[Future[List[SourceResult]]]" = wait(
+            [future for future, _ in in_flight], return_when=FIRST_COMPLETED
+        ).done
+        done_tasks = [task for task in in_flight if task[0] in done]
+        for task in done_tasks:
+            in_flight.remove(task)
+    for future, chunk in done_tasks:
+        for source, result in zip(chunk, future.result()):
+            yield ConvertedSource(source, *result)
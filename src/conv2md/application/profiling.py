@@ -0,0 +1,85 @@
+"""Optional cProfile instrumentation for conversions.
+
+cProfile and pstats are imported only when a profile is taken or reported:
+the CLI imports this module for its option defaults on every start.
+"""
+
+import io
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence
+
+if TYPE_CHECKING:  # pragma: no cover
+    import cProfile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".pstats"
+DEFAULT_PROFILE_TOP = 20
+# Cumulative time finds the expensive call paths, self time the hot functions
+DEFAULT_PROFILE_SORTS = ("cumulative", "tottime")
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "ncalls", "pcalls", "filename")
+
+
+def profile_path_for(output_path: Path) -> Path:
+    """Return where the profile of the run producing ``output_path`` goes.
+
+    The suffix is appended rather than substituted, so ``chat.md`` profiles to
+    ``chat.md.pstats`` and sorts right next to its output.
+    """
+    return output_path.with_name(output_path.name + PROFILE_SUFFIX)
+
+
+@contextmanager
+def profiled(profile_path: Path) -> Iterator["cProfile.Profile"]:
+    """Profile the enclosed block and save the stats to ``profile_path``.
+
+    The stats are saved even when the block raises, since a profile of a
+    failing conversion is often the one that is needed.
+
+    Raises:
+        ValueError: If another profiler is already active in this thread
+    """
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile_path))
+        logger.info(f"Saved profile to {profile_path}")
+
+
+def format_profile_report(
+    profile_path: Path,
+    top: int = DEFAULT_PROFILE_TOP,
+    sort_keys: Sequence[str] = DEFAULT_PROFILE_SORTS,
+    restrict: Optional[str] = None,
+) -> str:
+    """Render the top functions of a saved profile, one table per sort key.
+
+    Args:
+        profile_path: A ``.pstats`` file written by :func:`profiled`
+        top: How many functions to list per table
+        sort_keys: pstats sort keys, e.g. ``cumulative`` or ``tottime``
+        restrict: Optional regular expression matched against
+            ``file:line(function)``; ``conv2md`` keeps only this package
+
+    Returns:
+        The report text
+    """
+    import pstats
+
+    stream = io.StringIO()
+    stats = pstats.Stats(str(profile_path), stream=stream)
+    for sort_key in sort_keys:
+        stream.write(f"Top {top} functions by {sort_key}:\n")
+        stats.sort_stats(sort_key)
+        # pstats applies restrictions in order: filter first, then truncate
+        restrictions = ([restrict] if restrict else []) + [top]
+        stats.print_stats(*restrictions)
+    return stream.getvalue()
@@ -0,0 +1,214 @@
+"""robots.txt rules, fetched once per host and shared by every download.
+
+Checking robots.txt naively costs a request and a parse per URL. Here each
+host's rules are fetched once and kept, parsed, for ``ttl_seconds``: every
+fetch thread of a run asks the same RobotsCache, and threads asking for a
+host whose robots.txt is already being fetched wait for that fetch rather
+than sending their own. With a ``path``, the rules also outlive the run.
+
+Responses are interpreted as urllib.robotparser does: rules from a 2xx,
+everything allowed on other 4xx, everything disallowed on 401 and 403.
+A server error or no answer at all disallows everything too, as RFC 9309
+asks, but only for ERROR_TTL_SECONDS so the host gets another chance soon.
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.robotparser
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from conv2md.application.convert import write_output
+from conv2md.ports.fetcher import ContentFetcher, FetchError
+
+logger = logging.getLogger(__name__)
+
+# Product token matched against User-agent lines
+ROBOTS_USER_AGENT = "conv2md"
+DEFAULT_ROBOTS_TTL_SECONDS = 24 * 60 * 60
+ERROR_TTL_SECONDS = 5 * 60
+# Crawlers must read at least the first 500 KiB of a robots.txt (RFC 9309)
+MAX_ROBOTS_BYTES = 500 * 1024
+STORE_VERSION = 1
+
+RULES = "rules"
+ALLOW_ALL = "allow_all"
+DISALLOW_ALL = "disallow_all"
+
+
+@dataclass
+class RobotsStats:
+    """Counts of how robots.txt lookups were answered."""
+
+    fetched: int = 0
+    # Answered from rules already known
+    cached: int = 0
+    # Answered by waiting for another thread's fetch of the same host
+    coalesced: int = 0
+
+
+class _HostRules:
+    """One host's robots.txt outcome, parsed once."""
+
+    __slots__ = ("access", "text", "expires_at", "parser")
+
+    def __init__(self, access: str, text: Optional[str], expires_at: float):
+        self.access = access
+        self.text = text
+        self.expires_at = expires_at
+        self.parser = urllib.robotparser.RobotFileParser()
+        if access == RULES:
+            self.parser.parse((text or "").splitlines())
+        elif access == ALLOW_ALL:
+            self.parser.allow_all = True
+        else:
+            self.parser.disallow_all = True
+
+
+class RobotsCache:
+    """Per-host robots.txt rules with a TTL, safe to share between threads."""
+
+    def __init__(
+        self,
+        fetcher: ContentFetcher,
+        *,
+        ttl_seconds: float = DEFAULT_ROBOTS_TTL_SECONDS,
+        path: Optional[Path] = None,
+        user_agent: str = ROBOTS_USER_AGENT,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Create the cache, loading rules kept at ``path`` if there are any.
+
+        Args:
+            fetcher: Fetcher robots.txt files are downloaded with
+            ttl_seconds: How long a host's rules are used before refetching
+            path: JSON file the rules are loaded from and saved to; rules
+                are kept for this run only if omitted
+            user_agent: Product token the rules are checked for
+            clock: Wall-clock time source; saved rules outlive the process
+        """
+        self.fetcher = fetcher
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.user_agent = user_agent
+        self.stats = RobotsStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostRules] = {}
+        # Hosts whose robots.txt is being fetched, set once it has been
+        self._pending: Dict[str, threading.Event] = {}
+        if path is not None:
+            self._load(path)
+
+    def allowed(self, url: str) -> bool:
+        """Return whether the host's robots.txt lets conv2md fetch ``url``.
+
+        Blocks while the host's robots.txt is fetched, by this thread or,
+        coalesced, by another.
+        """
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        return self._rules(origin).parser.can_fetch(self.user_agent, url)
+
+    def _rules(self, origin: str) -> _HostRules:
+        """Return the origin's rules, fetching them if none are current."""
+        while True:
+            with self._lock:
+                rules = self._current(origin)
+                if rules is not None:
+                    self.stats.cached += 1
+                    return rules
+                pending = self._pending.get(origin)
+                if pending is None:
+                    pending = self._pending[origin] = threading.Event()
+                    break
+                self.stats.coalesced += 1
+            pending.wait()
+            with self._lock:
+                rules = self._current(origin)
+            if rules is not None:
+                return rules
+            # The fetch failed outright: try again, perhaps as the fetcher
+
+        try:
+            rules = self._fetch(origin)
+            with self._lock:
+                self._hosts[origin] = rules
+                self.stats.fetched += 1
+            return rules
+        finally:
+            with self._lock:
+                del self._pending[origin]
+            pending.set()
+
+    def _current(self, origin: str) -> Optional[_HostRules]:
+        """Return the origin's rules if unexpired. Caller holds the lock."""
+        rules = self._hosts.get(origin)
+        if rules is not None and rules.expires_at > self._clock():
+            return rules
+        return None
+
+    def _fetch(self, origin: str) -> _HostRules:
+        """Download and interpret the origin's robots.txt."""
+        now = self._clock()
+        try:
+            with self.fetcher.fetch(origin + "/robots.txt") as response:
+                status = response.status
+                body = response.read(MAX_ROBOTS_BYTES) if status < 300 else b""
+        except FetchError as e:
+            logger.warning(f"Cannot fetch {origin}/robots.txt, assuming no access: {e}")
+            return _HostRules(DISALLOW_ALL, None, now + ERROR_TTL_SECONDS)
+
+        if 200 <= status < 300:
+            text = body.decode("utf-8", errors="replace")
+            return _HostRules(RULES, text, now + self.ttl_seconds)
+        if status in (401, 403):
+            return _HostRules(DISALLOW_ALL, None, now + self.ttl_seconds)
+        if 400 <= status < 500:
+            return _HostRules(ALLOW_ALL, None, now + self.ttl_seconds)
+        logger.warning(f"{origin}/robots.txt answered {status}, assuming no access")
+        return _HostRules(DISALLOW_ALL, None, now + ERROR_TTL_SECONDS)
+
+    def save(self) -> None:
+        """Write the unexpired rules to ``path``, atomically.
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            now = self._clock()
+            hosts = {
+                origin: {
+                    "access": rules.access,
+                    "text": rules.text,
+                    "expires_at": rules.expires_at,
+                }
+                for origin, rules in self._hosts.items()
+                if rules.expires_at > now
+            }
+        data = json.dumps({"version": STORE_VERSION, "hosts": hosts}).encode("utf-8")
+        write_output(self.path, data)
+
+    def _load(self, path: Path) -> None:
+        """Load saved rules; an unreadable file is treated as empty."""
+        try:
+            with open(path, "rb") as f:
+                saved = json.load(f)
+            if saved.get("version") != STORE_VERSION:
+                return
+            now = self._clock()
+            for origin, entry in saved["hosts"].items():
+                if entry["expires_at"] > now:
+                    self._hosts[origin] = _HostRules(
+                        entry["access"], entry["text"], entry["expires_at"]
+                    )
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring the saved robots.txt rules in {path}: {e}")
@@ -0,0 +1,214 @@
+"""Conversion service use cases: converters kept ready between requests.
+
+Starting an interpreter and importing the converters costs far more than
+converting a short conversation. A service pays that once and then converts
+for as long as it runs: ConversionService on warm worker processes, for
+files, and ConverterPool on converter instances shared by the threads of a
+server, for conversations received in memory.
+"""
+
+import logging
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from conv2md.application.batch import BatchItem, FileOutcome, convert_item
+from conv2md.converters.json_conv import JSONConverter
+from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.pipeline import ContentProcessingPipeline
+
+logger = logging.getLogger(__name__)
+
+# Each worker keeps one generator per combination of options it has been
+# asked for, keyed by (use_plugins, track_memory)
+_worker_generators: Dict[Tuple[bool, bool], MarkdownGenerator] = {}
+
+
+def _generator_for(use_plugins: bool, track_memory: bool) -> MarkdownGenerator:
+    """Return this worker's generator for the options, building it once."""
+    key = (use_plugins, track_memory)
+    generator = _worker_generators.get(key)
+    if generator is None:
+        generator = MarkdownGenerator(
+            pipeline=ContentProcessingPipeline(use_plugins=use_plugins),
+            track_memory=track_memory,
+        )
+        _worker_generators[key] = generator
+    return generator
+
+
+def _warm_worker() -> None:
+    """Build the default generator as the worker starts, not on its first job."""
+    # Stopping is the service owner's job. Ctrl+C reaches the whole process
+    # group and a forked worker inherits the owner's SIGTERM handler; either
+    # would otherwise kill a worker mid-job with a traceback.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    _generator_for(use_plugins=False, track_memory=False)
+
+
+def _worker_pid() -> int:
+    """Return the worker's process id; a task that forces the worker to start."""
+    return os.getpid()
+
+
+def _convert_job(item: BatchItem, use_plugins: bool, track_memory: bool) -> FileOutcome:
+    """Convert one file in a service worker."""
+    return convert_item(item, _generator_for(use_plugins, track_memory))
+
+
+class ConversionService:
+    """Converts files on a pool of worker processes kept warm between jobs.
+
+    Thread-safe: any number of threads may submit jobs concurrently, and
+    jobs are spread across the workers as they become free.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """Start the workers and wait until every one is ready.
+
+        Args:
+            workers: Worker processes; the CPU count if omitted
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_warm_worker
+        )
+        # The pool starts a worker per submitted task while none is idle, so
+        # one task per worker starts them all now
+        started = [self._executor.submit(_worker_pid) for _ in range(self.workers)]
+        wait(started)
+        logger.info(f"Conversion service ready with {self.workers} workers")
+
+    def submit(
+        self, item: BatchItem, *, use_plugins: bool = False, track_memory: bool = False
+    ) -> "Future[FileOutcome]":
+        """Queue one file for conversion.
+
+        Args:
+            item: File to convert and where its Markdown goes
+            use_plugins: Enable installed content processor plugins
+            track_memory: Record memory metrics for the conversion
+
+        Returns:
+            A future for the outcome; conversion failures are reported in the
+            outcome rather than raised
+        """
+        return self._executor.submit(_convert_job, item, use_plugins, track_memory)
+
+    def close(self) -> None:
+        """Stop the workers, abandoning jobs that have not started."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ConversionService":
+        """Return the running service."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop the workers."""
+        self.close()
+
+
+class PoolSaturated(Exception):
+    """Raised when every converter is busy and no more callers may wait."""
+
+
+class ConverterPool:
+    """A fixed set of converter and generator pairs shared by many threads.
+
+    At most ``size`` conversions run at once and at most ``max_waiting``
+    callers wait for a free pair. Callers beyond that are turned away at
+    once, so a server under more load than it can convert sheds it instead
+    of queueing without bound.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_waiting: int,
+        *,
+        use_plugins: bool = False,
+        track_memory: bool = False,
+    ):
+        """Build every pair up front.
+
+        Args:
+            size: Number of pairs, and so of concurrent conversions
+            max_waiting: Callers allowed to wait when every pair is in use
+            use_plugins: Enable installed content processor plugins
+            track_memory: Record memory metrics for each conversion
+        """
+        self.size = size
+        self.max_waiting = max_waiting
+        # Last in, first out: the most recently used pair has the warmest
+        # caches
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        for _ in range(size):
+            generator = MarkdownGenerator(
+                pipeline=ContentProcessingPipeline(use_plugins=use_plugins),
+                track_memory=track_memory,
+            )
+            self._idle.put((JSONConverter(), generator))
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self.rejected = 0
+
+    @property
+    def in_use(self) -> int:
+        """Number of pairs currently converting."""
+        return self.size - self._idle.qsize()
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers waiting for a pair."""
+        return self._waiting
+
+    @contextmanager
+    def acquire(
+        self, timeout: Optional[float] = None
+    ) -> Iterator[Tuple[JSONConverter, MarkdownGenerator]]:
+        """Borrow a converter and generator for the duration of the block.
+
+        Args:
+            timeout: Longest wait for a free pair, in seconds; None waits
+                as long as it takes
+
+        Yields:
+            A (converter, generator) pair used by no other thread meanwhile
+
+        Raises:
+            PoolSaturated: If the wait queue is full or the wait timed out
+        """
+        try:
+            pair = self._idle.get_nowait()
+        except queue.Empty:
+            pair = self._wait(timeout)
+        try:
+            yield pair
+        finally:
+            self._idle.put(pair)
+
+    def _wait(
+        self, timeout: Optional[float]
+    ) -> Tuple[JSONConverter, MarkdownGenerator]:
+        """Queue for a pair, if the queue has room."""
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                self.rejected += 1
+                raise PoolSaturated(
+                    f"All {self.size} converters busy and {self._waiting} waiting"
+                )
+            self._waiting += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(f"No converter free within {timeout}s") from None
+        finally:
+            with self._lock:
+                self._waiting -= 1
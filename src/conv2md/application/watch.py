@@ -0,0 +1,319 @@
+"""Watch use case: reconvert the conversation files in a directory as they change.
+
+The watcher polls rather than relying on OS notification APIs, which differ
+per platform and need third-party bindings. To keep an idle poll over tens
+of thousands of files cheap, it relies on directory modification times:
+creating, deleting or renaming a file changes its directory's mtime, so a
+directory whose mtime has not moved costs one stat call and its files are
+not looked at. After start-up, file contents are read only when a file's
+size or mtime moves, and only to confirm that the content really changed.
+
+Rewriting a file in place does not touch its directory. Those changes are
+picked up by a full scan every ``full_scan_every`` polls; files written to a
+temporary name and renamed into place, as most exporters do, are seen on
+the next poll.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from conv2md.application.batch import (
+    file_digest,
+    is_conversation_file,
+    is_walked_directory,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCH_INTERVAL_SECONDS = 2.0
+# A file is converted once its size and mtime have held still this long, so
+# a file still being written is converted once, when it is complete.
+DEFAULT_DEBOUNCE_SECONDS = 1.0
+# Every this many polls, stat every file to catch in-place rewrites
+DEFAULT_FULL_SCAN_EVERY = 30
+# A directory modified this recently may be modified again within the same
+# mtime tick on coarse-grained file systems, so its mtime proves nothing yet.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+@dataclass
+class FileState:
+    """What the watcher last knew about one file."""
+
+    mtime_ns: int
+    size: int
+    # None only if the content could not be read when the file was indexed
+    digest: Optional[str] = None
+
+
+@dataclass
+class DirectoryState:
+    """One scanned directory: its mtime and what it contained."""
+
+    mtime_ns: int
+    files: List[str] = field(default_factory=list)
+    subdirectories: List[str] = field(default_factory=list)
+
+    @property
+    def racy(self) -> bool:
+        """Whether the mtime is too recent to prove the listing current."""
+        return time.time_ns() - self.mtime_ns < RACY_WINDOW_NS
+
+
+@dataclass
+class PendingChange:
+    """A file whose stat moved and that is waiting to settle."""
+
+    mtime_ns: int
+    size: int
+    # Clock reading when the stat last moved
+    changed_at: float
+
+
+class DirectoryWatcher:
+    """Detects conversation files in a directory tree whose content changed.
+
+    Changes are debounced: a file is reported only after its stat has held
+    still for ``debounce_seconds``. They are also coalesced: every file that
+    settles between two polls is reported in one list, so a burst of writes
+    becomes one batch of conversions.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        debounce_seconds: float = DEFAULT_DEBOUNCE_SECONDS,
+        full_scan_every: int = DEFAULT_FULL_SCAN_EVERY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize a watcher with an empty index.
+
+        Args:
+            directory: Root of the tree to watch
+            debounce_seconds: How long a file must be unchanged before it is
+                reported
+            full_scan_every: Stat every file on every this many polls, to
+                catch files rewritten in place; 1 stats every file every time
+            clock: Monotonic clock, injectable for tests
+        """
+        self.directory = directory
+        self.debounce_seconds = debounce_seconds
+        self.full_scan_every = max(1, full_scan_every)
+        self._clock = clock
+        self._polls = 0
+        self._directories: Dict[str, DirectoryState] = {}
+        self._index: Dict[str, FileState] = {}
+        self._pending: Dict[str, PendingChange] = {}
+
+    @property
+    def file_count(self) -> int:
+        """Number of files currently indexed."""
+        return len(self._index)
+
+    def prime(self) -> List[Tuple[Path, int]]:
+        """Index the tree as it is now, with the digest of every file.
+
+        The digests let the first touch that leaves a file's content as it
+        was go unreported, like any later one. Reading every file once costs
+        about what the initial conversion's own reads do.
+
+        Returns:
+            (path, size) of every file found, for an initial conversion
+        """
+        self._directories.clear()
+        self._index.clear()
+        self._pending.clear()
+        self._walk(full=True, on_file=self._index_file)
+        logger.info(f"Watching {len(self._index)} files under {self.directory}")
+        return [(Path(path), state.size) for path, state in self._index.items()]
+
+    def poll(self) -> List[Tuple[Path, int]]:
+        """Scan once and return the files whose content changed and settled.
+
+        New files count as changed. Deleted files are dropped from the index;
+        their Markdown is left in place.
+
+        Returns:
+            (path, size) of each file to reconvert, sorted by path
+        """
+        now = self._clock()
+        self._polls += 1
+        full = self._polls % self.full_scan_every == 0
+
+        observed = self._walk(
+            full=full,
+            on_file=lambda path, stat: self._observe(path, stat, now),
+        )
+
+        # Files still settling may be written in place, where no directory
+        # mtime would reveal it: check them directly, whatever the walk did.
+        for path in [path for path in self._pending if path not in observed]:
+            try:
+                self._observe(path, os.stat(path), now)
+            except OSError:
+                self._forget(path)
+
+        return self._settle(now)
+
+    def _walk(self, full: bool, on_file: Callable[[str, os.stat_result], None]):
+        """Walk the tree, listing and statting only directories that changed.
+
+        Args:
+            full: List and stat every directory whatever its mtime
+            on_file: Called with each file's path and stat in a listed
+                directory
+
+        Returns:
+            Set of the file paths passed to ``on_file``
+        """
+        observed = set()
+        seen_directories = set()
+        pending = [os.fspath(self.directory)]
+
+        while pending:
+            current = pending.pop()
+            seen_directories.add(current)
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+
+            cached = self._directories.get(current)
+            if (
+                not full
+                and cached is not None
+                and cached.mtime_ns == mtime_ns
+                and not cached.racy
+            ):
+                # Nothing was added, removed or renamed here
+                pending.extend(cached.subdirectories)
+                continue
+
+            state = self._list_directory(current, mtime_ns, on_file)
+            self._directories[current] = state
+            observed.update(state.files)
+            pending.extend(state.subdirectories)
+            if cached is not None:
+                for path in set(cached.files).difference(state.files):
+                    self._forget(path)
+
+        for gone in set(self._directories).difference(seen_directories):
+            for path in self._directories.pop(gone).files:
+                self._forget(path)
+        return observed
+
+    def _list_directory(
+        self,
+        directory: str,
+        mtime_ns: int,
+        on_file: Callable[[str, os.stat_result], None],
+    ) -> DirectoryState:
+        """List one directory, passing each conversation file to ``on_file``."""
+        state = DirectoryState(mtime_ns=mtime_ns)
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if is_walked_directory(entry.name):
+                            state.subdirectories.append(entry.path)
+                    elif is_conversation_file(entry.name):
+                        try:
+                            if entry.is_file():
+                                on_file(entry.path, entry.stat())
+                                state.files.append(entry.path)
+                        except OSError:
+                            # Deleted between listing and stat
+                            continue
+        except OSError as e:
+            logger.warning(f"Skipping unreadable directory {directory}: {e}")
+        return state
+
+    def _index_file(self, path: str, stat: os.stat_result) -> None:
+        """Record a file's stat and content digest as the known state."""
+        try:
+            digest: Optional[str] = file_digest(path)
+        except OSError as e:
+            # Reported as changed when it next moves, like a new file
+            logger.warning(f"Cannot read {path}: {e}")
+            digest = None
+        self._index[path] = FileState(stat.st_mtime_ns, stat.st_size, digest)
+
+    def _observe(self, path: str, stat: os.stat_result, now: float) -> None:
+        """Compare a file's stat with the index and queue it if it moved."""
+        known = self._index.get(path)
+        if (
+            known is not None
+            and known.mtime_ns == stat.st_mtime_ns
+            and known.size == stat.st_size
+        ):
+            self._pending.pop(path, None)
+            return
+        pending = self._pending.get(path)
+        if (
+            pending is None
+            or pending.mtime_ns != stat.st_mtime_ns
+            or pending.size != stat.st_size
+        ):
+            # New, or changed again since last seen: restart its quiet period
+            self._pending[path] = PendingChange(
+                stat.st_mtime_ns, stat.st_size, changed_at=now
+            )
+
+    def _forget(self, path: str) -> None:
+        """Drop a deleted file from the index."""
+        self._index.pop(path, None)
+        self._pending.pop(path, None)
+
+    def _settle(self, now: float) -> List[Tuple[Path, int]]:
+        """Hash the pending files that have settled and report real changes."""
+        changed = []
+        for path, pending in sorted(self._pending.items()):
+            if now - pending.changed_at < self.debounce_seconds:
+                continue
+            del self._pending[path]
+            try:
+                digest = file_digest(path)
+            except OSError as e:
+                logger.warning(f"Cannot read {path}: {e}")
+                continue
+
+            known = self._index.get(path)
+            self._index[path] = FileState(pending.mtime_ns, pending.size, digest)
+            if known is not None and known.digest == digest:
+                # Touched or rewritten with the same content
+                logger.debug(f"Unchanged content: {path}")
+                continue
+            changed.append((Path(path), pending.size))
+
+        if changed:
+            logger.info(f"{len(changed)} changed files under {self.directory}")
+        return changed
+
+    def watch(
+        self,
+        interval_seconds: float = DEFAULT_WATCH_INTERVAL_SECONDS,
+        stop: Optional[threading.Event] = None,
+    ) -> Iterator[List[Tuple[Path, int]]]:
+        """Poll every ``interval_seconds`` and yield each non-empty change set.
+
+        Args:
+            interval_seconds: Time between the start of consecutive polls
+            stop: Optional event that ends the watch when set
+
+        Yields:
+            Lists of (path, size), as returned by poll
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            started = time.monotonic()
+            changed = self.poll()
+            if changed:
+                yield changed
+            # Time spent converting counts toward the interval
+            elapsed = time.monotonic() - started
+            stop.wait(max(0.0, interval_seconds - elapsed))
@@ -1,13 +1,50 @@
 """CLI module for conv2md - Converts conversations and websites to Markdown."""
 
+import io
+import os
+import sys
 import click
+from contextlib import ExitStack
 from pathlib import Path
 
+from conv2md import __version__
+from conv2md.application.profiling import (
+    DEFAULT_PROFILE_SORTS,
+    DEFAULT_PROFILE_TOP,
+    PROFILE_SORT_KEYS,
+)
+
+# Everything else is imported inside the code path that needs it: --help and
+# --version run for every invocation from scripts and find -exec, and should
+# not pay for the converters, the generator or a process pool.
+
+# --input value meaning "read the conversation from standard input", and the
+# name its Markdown gets when written to --out rather than --stdout
+STDIN_INPUT = "-"
+STDIN_OUTPUT_PATH = Path("stdin.json")
+# File in --cache-dir keeping robots.txt rules between runs
+ROBOTS_CACHE_NAME = "robots.json"
+
+
+def validate_input(ctx, param, values):
+    """Validate every --input value - URLs, files, directories and globs."""
+    return tuple(_validate_input_value(ctx, param, value) for value in values)
+
 
-def validate_input(ctx, param, value):
-    """Validate input parameter - handle URLs and file paths."""
-    # Pass through URLs untouched
-    if value.startswith(("http://", "https://")):
+def _validate_input_value(ctx, param, value):
+    """Validate one input value.
+
+    URLs, glob patterns and "-" (stdin) pass through as strings; files and directories
+    become resolved Path objects.
+    """
+    # Pass through URLs and stdin untouched
+    if value.startswith(("http://", "https://")) or value == STDIN_INPUT:
+        return value
+
+    from conv2md.application.batch import is_glob
+
+    # Patterns are expanded later, by the batch planner
+    if is_glob(value) and not Path(value).exists():
         return value
 
     # Use click.Path for file validation
@@ -16,7 +53,7 @@ def validate_input(ctx, param, value):
         validated_path = click.Path(
             exists=True,
             file_okay=True,
-            dir_okay=False,
+            dir_okay=True,
             readable=True,
             resolve_path=True,
         ).convert(value, param, ctx)
@@ -25,18 +62,22 @@ def validate_input(ctx, param, value):
         # Re-raise with our custom message for consistency
         if not Path(value).exists():
             raise click.BadParameter(f"Input file '{value}' not found")
-        elif Path(value).is_dir():
-            raise click.BadParameter(f"Input '{value}' is a directory, not a file")
         else:
             raise click.BadParameter(f"Input '{value}' is not readable")
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option(
     "--input",
-    required=True,
+    multiple=True,
     callback=validate_input,
-    help="Input file or URL to convert",
+    help="Input file, directory, glob pattern or URL to convert, or - for "
+    "stdin; repeatable",
+)
+@click.option(
+    "--input-list",
+    type=click.File("r", encoding="utf-8"),
+    help="File of URLs to download and convert, one per line; - for stdin",
 )
 @click.option(
     "--out",
@@ -45,28 +86,961 @@ def validate_input(ctx, param, value):
     type=click.Path(file_okay=False, dir_okay=True, writable=True),
     help="Output directory",
 )
-@click.version_option()
-def main(input, out):
+@click.option(
+    "--stdout",
+    "to_stdout",
+    is_flag=True,
+    help="Stream the Markdown to stdout as it is produced instead of --out",
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Worker processes for converting several files",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Send the conversion to the daemon started by 'conv2md serve' on "
+    "this socket",
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Keep a manifest in --out and skip inputs whose output is up to date",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Finish the interrupted --incremental run in --out; takes no --input",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and reconvert files in the input directory as they change",
+)
+@click.option(
+    "--watch-interval",
+    type=click.FloatRange(min=0.1),
+    help="Seconds between scans of the watched directory [default: 2]",
+)
+@click.option(
+    "--watch-debounce",
+    type=click.FloatRange(min=0),
+    help="Seconds a file must be unchanged before it is reconverted [default: 1]",
+)
+@click.option(
+    "--max-per-host",
+    type=click.IntRange(min=1),
+    help="Downloads in flight to one host at a time [default: 4]",
+)
+@click.option(
+    "--rate-limit",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Most downloads started per second, across all hosts [default: none]",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    help="Retries of a download that fails or gets 429 or 5xx [default: 3]",
+)
+@click.option(
+    "--connect-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds to wait for a connection to a host [default: 10]",
+)
+@click.option(
+    "--read-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds to wait for a host to send more of a response [default: 30]",
+)
+@click.option(
+    "--ignore-robots",
+    is_flag=True,
+    help="Download --input-list URLs even where robots.txt disallows it",
+)
+@click.option(
+    "--full-page",
+    is_flag=True,
+    help="Convert whole --input-list HTML pages, not just their main content",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Keep downloads and their Markdown here; unchanged pages are "
+    "revalidated instead of downloaded and not converted again",
+)
+@click.option(
+    "--cache-max-mb",
+    type=click.IntRange(min=1),
+    help="Size the --cache-dir is trimmed to after a run [default: 1024]",
+)
+@click.option(
+    "--use-plugins",
+    is_flag=True,
+    help="Enable installed content processor plugins",
+)
+@click.option(
+    "--metrics",
+    "show_metrics",
+    is_flag=True,
+    help="Print conversion metrics, including per-stage timings, as JSON",
+)
+@click.option(
+    "--track-memory",
+    is_flag=True,
+    help="Also measure RSS and traced allocation per stage (slower)",
+)
+@click.option(
+    "--metrics-textfile",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Write aggregated metrics for the node exporter's textfile collector",
+)
+@click.option(
+    "--metrics-jsonl",
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Append each conversion's metrics to this file as one JSON line",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Run under cProfile, save <output>.pstats and print the hottest functions",
+)
+@click.option(
+    "--profile-sort",
+    type=click.Choice(PROFILE_SORT_KEYS),
+    help="Sort the profile report by this key only "
+    "[default: cumulative, then tottime]",
+)
+@click.option(
+    "--profile-top",
+    type=click.IntRange(min=1),
+    default=DEFAULT_PROFILE_TOP,
+    show_default=True,
+    help="Number of functions listed in the profile report",
+)
+@click.option(
+    "--profile-filter",
+    metavar="REGEX",
+    help="Only report functions whose location matches REGEX, e.g. conv2md",
+)
+# An explicit version skips click's importlib.metadata lookup
+@click.version_option(version=__version__)
+@click.pass_context
+def main(
+    ctx,
+    input,
+    input_list,
+    out,
+    to_stdout,
+    jobs,
+    socket_path,
+    incremental,
+    resume,
+    watch,
+    watch_interval,
+    watch_debounce,
+    max_per_host,
+    rate_limit,
+    retries,
+    connect_timeout,
+    read_timeout,
+    ignore_robots,
+    full_page,
+    cache_dir,
+    cache_max_mb,
+    use_plugins,
+    show_metrics,
+    track_memory,
+    metrics_textfile,
+    metrics_jsonl,
+    profile,
+    profile_sort,
+    profile_top,
+    profile_filter,
+):
     """conv2md: Convert conversations, transcripts, and websites to Markdown.
 
     Supports JSON conversations, websites, and HTML files with deterministic
     output and comprehensive security validation.
 
+    \b
     Examples:
         conv2md --input conversation.json --out ./output
-        conv2md --input https://example.com/article --out ./docs
+        conv2md --input ./exports --out ./output --jobs 8
+        conv2md --input ./exports --out ./output --incremental
+        conv2md --out ./output --resume
+        conv2md --input 'exports/**/*.json' --out ./output
+        conv2md --input ./exports --out ./output --watch
+        conv2md serve --socket /tmp/conv2md.sock &
+        conv2md --socket /tmp/conv2md.sock --input chat.json --out ./output
+        zcat export.json.gz | conv2md --input - --stdout | less
+        conv2md --input-list urls.txt --out ./docs --max-per-host 2
         conv2md --input transcript.json
+    """
+    if ctx.invoked_subcommand is not None:
+        return
+
+    # Input validation is handled by the validate_input callback: each
+    # input is a str (URL or glob pattern) or a resolved Path object
+    if input_list is not None:
+        url_incompatible = {
+            "--input": input,
+            "--stdout": to_stdout,
+            "--socket": socket_path is not None,
+            "--watch": watch,
+            "--incremental or --resume": incremental or resume,
+            "--profile": profile,
+        }
+        for flags, given in url_incompatible.items():
+            if given:
+                raise click.UsageError(f"--input-list cannot be combined with {flags}")
+        registry = None
+        if metrics_textfile or metrics_jsonl:
+            from conv2md.markdown.registry import MetricsRegistry
+
+            registry = MetricsRegistry(jsonl_path=metrics_jsonl)
+        try:
+            _convert_urls(
+                input_list,
+                Path(out),
+                jobs=jobs,
+                max_per_host=max_per_host,
+                rate_limit=rate_limit,
+                retries=retries,
+                connect_timeout=connect_timeout,
+                read_timeout=read_timeout,
+                ignore_robots=ignore_robots,
+                full_page=full_page,
+                cache_dir=cache_dir,
+                cache_max_mb=cache_max_mb,
+                use_plugins=use_plugins,
+                show_metrics=show_metrics,
+                track_memory=track_memory,
+                registry=registry,
+            )
+        finally:
+            if metrics_textfile:
+                registry.write_textfile(metrics_textfile)
+        return
+    if cache_dir is not None:
+        raise click.UsageError("--cache-dir caches downloads of --input-list URLs")
+    if resume:
+        if input:
+            raise click.UsageError(
+                "--resume converts what the interrupted run had left; "
+                "it takes no --input"
+            )
+    elif not input:
+        raise click.UsageError("Missing option '--input'.")
+    for value in input:
+        if isinstance(value, str) and value.startswith(("http://", "https://")):
+            raise click.ClickException(
+                f"Cannot convert '{value}': URLs are not supported by --input; "
+                "list them in a file and pass it with --input-list"
+            )
+
+    if socket_path is not None:
+        # Checked before anything else is imported: the client should start
+        # as fast as the daemon converts
+        local_only = {
+            "--stdout or --input -": to_stdout or STDIN_INPUT in input,
+            "--jobs": jobs != 1,
+            "--watch": watch,
+            "--incremental or --resume": incremental or resume,
+            "--profile": profile,
+            "--metrics-textfile or --metrics-jsonl": metrics_textfile or metrics_jsonl,
+        }
+        for flags, given in local_only.items():
+            if given:
+                raise click.UsageError(f"--socket cannot be combined with {flags}")
+        _convert_via_daemon(
+            socket_path,
+            input,
+            out,
+            use_plugins=use_plugins,
+            show_metrics=show_metrics,
+            track_memory=track_memory,
+        )
+        return
+
+    registry = None
+    if metrics_textfile or metrics_jsonl:
+        from conv2md.markdown.registry import MetricsRegistry
+
+        registry = MetricsRegistry(jsonl_path=metrics_jsonl)
+
+    streaming = to_stdout or STDIN_INPUT in input
+    single_file = len(input) == 1 and isinstance(input[0], Path) and input[0].is_file()
+    if streaming and not (single_file or input == (STDIN_INPUT,)):
+        raise click.UsageError("--stdout and --input - take exactly one input file")
+    if profile and (streaming or not single_file):
+        raise click.UsageError("--profile converts a single input file to --out")
+    if watch and (
+        streaming or len(input) != 1 or not isinstance(input[0], Path) or single_file
+    ):
+        raise click.UsageError("--watch takes exactly one input directory")
+    if (incremental or resume) and (streaming or profile):
+        raise click.UsageError("--incremental and --resume convert files to --out")
+
+    try:
+        if resume or (incremental and not watch):
+            _convert_batch(
+                input,
+                Path(out),
+                jobs=jobs,
+                use_plugins=use_plugins,
+                show_metrics=show_metrics,
+                track_memory=track_memory,
+                registry=registry,
+                incremental=True,
+                resume=resume,
+            )
+        elif watch:
+            _convert_watch(
+                input[0],
+                Path(out),
+                interval_seconds=watch_interval,
+                debounce_seconds=watch_debounce,
+                jobs=jobs,
+                use_plugins=use_plugins,
+                show_metrics=show_metrics,
+                track_memory=track_memory,
+                registry=registry,
+                metrics_textfile=metrics_textfile,
+                incremental=incremental,
+            )
+        elif streaming:
+            _convert_streaming(
+                input[0],
+                Path(out),
+                to_stdout=to_stdout,
+                use_plugins=use_plugins,
+                show_metrics=show_metrics,
+                track_memory=track_memory,
+                registry=registry,
+            )
+        elif single_file:
+            _convert_single(
+                input[0],
+                Path(out),
+                use_plugins=use_plugins,
+                show_metrics=show_metrics,
+                track_memory=track_memory,
+                registry=registry,
+                profile=profile,
+                profile_sort=profile_sort,
+                profile_top=profile_top,
+                profile_filter=profile_filter,
+            )
+        else:
+            _convert_batch(
+                input,
+                Path(out),
+                jobs=jobs,
+                use_plugins=use_plugins,
+                show_metrics=show_metrics,
+                track_memory=track_memory,
+                registry=registry,
+                incremental=False,
+                resume=False,
+            )
+    finally:
+        # Failures are exported too: the error count is what alerts watch
+        if metrics_textfile:
+            registry.write_textfile(metrics_textfile)
+
+
+def _parse_http_address(ctx, param, value):
+    """Split a --http HOST:PORT value into (host, port)."""
+    if value is None:
+        return None
+    host, sep, port = value.rpartition(":")
+    if not sep or not port.isdigit() or int(port) > 65535:
+        raise click.BadParameter("expected HOST:PORT, e.g. 127.0.0.1:8080")
+    # [::1]:8080 names an IPv6 host
+    return host.strip("[]") or "127.0.0.1", int(port)
+
+
+@main.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Unix socket to listen on for 'conv2md --socket' clients",
+)
+@click.option(
+    "--http",
+    "http_address",
+    metavar="HOST:PORT",
+    callback=_parse_http_address,
+    help="Serve POST /convert and GET /metrics over HTTP on this address",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Worker processes kept warm, or with --http concurrent conversions "
+    "[default: CPU count]",
+)
+@click.option(
+    "--max-queue",
+    type=click.IntRange(min=0),
+    help="With --http, requests allowed to wait for a converter before the "
+    "rest are answered 503 [default: 64]",
+)
+def serve(socket_path, http_address, workers, max_queue):
+    """Run a service converting the jobs sent by 'conv2md --socket' or HTTP.
 
-    This is the foundation CLI interface. Full functionality will be implemented
-    in Milestone 1 development phase.
+    The converters are built once, at start-up, so each job costs only its
+    conversion. Exactly one of --socket and --http is required. Stop the
+    service with Ctrl+C or SIGTERM.
     """
-    # Input validation is now handled by the validate_input callback
-    # input is either a str (URL) or a resolved Path object
-    click.echo(f"Input: {input}")
-    click.echo(f"Output: {out}")
-    click.echo("conv2md CLI - Foundation Phase")
-    click.echo("Full functionality coming in Milestone 1!")
-    click.echo("Use --help for available options.")
+    import signal
+
+    if (socket_path is None) == (http_address is None):
+        raise click.UsageError("Give exactly one of --socket and --http.")
+    if max_queue is not None and http_address is None:
+        raise click.UsageError("--max-queue only applies to --http.")
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        if http_address is not None:
+            _serve_http(http_address, workers, max_queue)
+        else:
+            from conv2md.adapters.socket_server import serve as serve_socket
+
+            serve_socket(
+                socket_path,
+                workers,
+                on_ready=lambda: click.echo(f"Serving on {socket_path}", err=True),
+            )
+    except KeyboardInterrupt:
+        click.echo("Stopped", err=True)
+    except OSError as e:
+        where = socket_path if socket_path is not None else "%s:%d" % http_address
+        raise click.ClickException(f"Cannot serve on {where}: {e}") from e
+
+
+def _serve_http(http_address, workers, max_queue):
+    """Serve conversions over HTTP until interrupted."""
+    from conv2md.adapters.http_server import DEFAULT_MAX_QUEUE, serve_http
+
+    host, port = http_address
+
+    def ready(server):
+        click.echo(f"Serving HTTP on {host}:{server.server_address[1]}", err=True)
+
+    serve_http(
+        host,
+        port,
+        workers or os.cpu_count() or 1,
+        DEFAULT_MAX_QUEUE if max_queue is None else max_queue,
+        on_ready=ready,
+    )
+
+
+def _convert_via_daemon(
+    socket_path, inputs, out_dir, *, use_plugins, show_metrics, track_memory
+):
+    """Have the daemon on ``socket_path`` convert the inputs; report each file.
+
+    Exits with status 1 when any file fails.
+    """
+    import time
+
+    from conv2md.adapters.socket_client import DaemonUnavailable, submit_jobs
+
+    options = {"use_plugins": use_plugins, "track_memory": track_memory}
+    # The daemon resolves paths from its own working directory, not ours
+    jobs = [
+        {
+            "input": os.path.abspath(value),
+            "out_dir": os.path.abspath(out_dir),
+            "options": options,
+        }
+        for value in inputs
+    ]
+
+    started = time.perf_counter()
+    converted = failed = 0
+    try:
+        for result in submit_jobs(os.fspath(socket_path), jobs):
+            if result.get("error") is None:
+                converted += 1
+                click.echo(f"Wrote {result['output']}")
+                if show_metrics:
+                    _echo_json(result["metrics"])
+            else:
+                failed += 1
+                click.echo(
+                    f"Failed to convert '{result.get('input')}': {result['error']}",
+                    err=True,
+                )
+    except DaemonUnavailable as e:
+        raise click.ClickException(str(e)) from e
+    except OSError as e:
+        raise click.ClickException(f"Lost the daemon on {socket_path}: {e}") from e
+
+    click.echo(
+        f"Converted {converted} of {converted + failed} files ({failed} failed) "
+        f"in {time.perf_counter() - started:.3f}s",
+        err=True,
+    )
+    if failed:
+        raise click.exceptions.Exit(1)
+
+
+def _make_generator(use_plugins, track_memory):
+    """Build the generator a conversion renders with."""
+    from conv2md.markdown.generator import MarkdownGenerator
+    from conv2md.markdown.pipeline import ContentProcessingPipeline
+
+    return MarkdownGenerator(
+        pipeline=ContentProcessingPipeline(use_plugins=use_plugins),
+        track_memory=track_memory,
+    )
+
+
+def _echo_json(data):
+    """Print ``data`` as indented JSON on stderr."""
+    import json
+
+    click.echo(json.dumps(data, indent=2), err=True)
+
+
+def _convert_streaming(
+    source, out_dir, *, to_stdout, use_plugins, show_metrics, track_memory, registry
+):
+    """Convert stdin or one file message by message, to stdout or ``out_dir``."""
+    from conv2md.application.convert import (
+        CONVERSION_ERRORS,
+        convert_stream,
+        open_atomic,
+        output_path_for,
+    )
+
+    generator = _make_generator(use_plugins, track_memory)
+    output_path = None
+    if not to_stdout:
+        name = STDIN_OUTPUT_PATH if source == STDIN_INPUT else source
+        output_path = output_path_for(name, out_dir)
+
+    try:
+        with ExitStack() as stack:
+            if source == STDIN_INPUT:
+                input_stream = sys.stdin.buffer
+            else:
+                input_stream = stack.enter_context(open(source, "rb"))
+            if to_stdout:
+                # Detached rather than closed afterwards, leaving stdout open
+                output = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
+                stack.callback(output.detach)
+            else:
+                output = stack.enter_context(open_atomic(output_path))
+            metrics = convert_stream(
+                input_stream, output, generator=generator, registry=registry
+            )
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`): nothing left to write to.
+        # Point stdout at devnull so the interpreter's final flush is silent.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        raise click.exceptions.Exit(1)
+    except CONVERSION_ERRORS as e:
+        name = "stdin" if source == STDIN_INPUT else f"'{source}'"
+        raise click.ClickException(f"Failed to convert {name}: {e}") from e
+
+    if output_path is not None:
+        click.echo(f"Wrote {output_path}")
+    if show_metrics:
+        _echo_json(metrics.to_dict())
+
+
+def _convert_single(
+    input_path,
+    out_dir,
+    *,
+    use_plugins,
+    show_metrics,
+    track_memory,
+    registry,
+    profile,
+    profile_sort,
+    profile_top,
+    profile_filter,
+):
+    """Convert one file into ``out_dir`` and report it."""
+    from conv2md.application.convert import (
+        CONVERSION_ERRORS,
+        convert_file,
+        output_path_for,
+    )
+    from conv2md.application.profiling import format_profile_report
+
+    generator = _make_generator(use_plugins, track_memory)
+    output_path = output_path_for(input_path, out_dir)
+
+    try:
+        result = convert_file(
+            input_path,
+            output_path,
+            generator=generator,
+            registry=registry,
+            profile=profile,
+        )
+    except CONVERSION_ERRORS as e:
+        raise click.ClickException(f"Failed to convert '{input_path}': {e}") from e
+
+    click.echo(f"Wrote {result.output_path}")
+    if show_metrics:
+        _echo_json(result.metrics.to_dict())
+    if result.profile_path:
+        click.echo(f"Wrote profile {result.profile_path}", err=True)
+        report = format_profile_report(
+            result.profile_path,
+            top=profile_top,
+            sort_keys=(profile_sort,) if profile_sort else DEFAULT_PROFILE_SORTS,
+            restrict=profile_filter,
+        )
+        click.echo(report, err=True)
+
+
+def _convert_batch(
+    inputs,
+    out_dir,
+    *,
+    jobs,
+    use_plugins,
+    show_metrics,
+    track_memory,
+    registry,
+    incremental,
+    resume,
+):
+    """Convert every file the inputs expand to and report each one.
+
+    Exits with status 1 when any file fails, after converting the rest.
+    """
+    from conv2md.application.batch import expand_inputs, plan_batch
+
+    with _open_manifest(out_dir, use_plugins, enabled=incremental) as manifest:
+        if resume:
+            items = manifest.resume()
+            if items is None:
+                raise click.ClickException(f"No interrupted run to resume in {out_dir}")
+            # Finish the run with the options it was started with
+            use_plugins = manifest.options["use_plugins"]
+            click.echo(f"Resuming: {len(items)} files left", err=True)
+        else:
+            try:
+                files, root = expand_inputs(inputs)
+            except (OSError, ValueError) as e:
+                raise click.ClickException(str(e)) from e
+            items = plan_batch(files, root, out_dir)
+
+        summary = _run_planned(
+            items,
+            manifest=manifest,
+            jobs=jobs,
+            use_plugins=use_plugins,
+            track_memory=track_memory,
+            registry=registry,
+        )
+
+    click.echo(_format_summary(summary), err=True)
+    if show_metrics:
+        _echo_json(summary.to_dict())
+    if summary.failed:
+        raise click.exceptions.Exit(1)
+
+
+def _convert_urls(
+    url_file,
+    out_dir,
+    *,
+    jobs,
+    max_per_host,
+    rate_limit,
+    retries,
+    connect_timeout,
+    read_timeout,
+    ignore_robots,
+    full_page,
+    cache_dir,
+    cache_max_mb,
+    use_plugins,
+    show_metrics,
+    track_memory,
+    registry,
+):
+    """Download every URL in the list, converting each as it arrives.
+
+    robots.txt is respected unless ``ignore_robots``; with a ``cache_dir``
+    its rules are kept there for the next run. HTML pages are cut down to
+    their main content unless ``full_page``. Exits with status 1 when any
+    URL fails or is disallowed, after converting the rest.
+    """
+    import asyncio
+
+    from conv2md.adapters.http_pool import (
+        DEFAULT_CONNECT_TIMEOUT_SECONDS,
+        DEFAULT_READ_TIMEOUT_SECONDS,
+        HTTPConnectionPool,
+    )
+    from conv2md.application.fetch import (
+        DEFAULT_MAX_PER_HOST,
+        DEFAULT_RETRIES,
+        FetchScheduler,
+        convert_urls,
+        read_url_list,
+    )
+
+    # The defaults live with the scheduler and pool, which --help does not import
+    if max_per_host is None:
+        max_per_host = DEFAULT_MAX_PER_HOST
+    if retries is None:
+        retries = DEFAULT_RETRIES
+    urls = read_url_list(url_file)
+    if not urls:
+        raise click.ClickException(f"No URLs in {url_file.name}")
+
+    def on_outcome(outcome):
+        if outcome.succeeded:
+            click.echo(f"Wrote {outcome.output_path}")
+        else:
+            click.echo(f"Failed to convert '{outcome.url}': {outcome.error}", err=True)
+
+    pool = HTTPConnectionPool(
+        max_per_host=max_per_host,
+        connect_timeout=connect_timeout or DEFAULT_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=read_timeout or DEFAULT_READ_TIMEOUT_SECONDS,
+    )
+    robots = None
+    if not ignore_robots:
+        from conv2md.application.robots import RobotsCache
+
+        # Its own TTL decides when rules are refetched, so robots.txt goes
+        # straight to the pool rather than through the HTTP cache
+        robots_path = cache_dir / ROBOTS_CACHE_NAME if cache_dir else None
+        robots = RobotsCache(pool, path=robots_path)
+    with _open_http_cache(pool, cache_dir, cache_max_mb, use_plugins) as fetcher:
+        cache = fetcher if cache_dir is not None else None
+        scheduler = FetchScheduler(
+            fetcher,
+            max_per_host=max_per_host,
+            rate_limit=rate_limit,
+            retries=retries,
+            robots=robots,
+            main_content=not full_page,
+        )
+        summary = asyncio.run(
+            convert_urls(
+                urls,
+                out_dir,
+                scheduler,
+                jobs=jobs,
+                use_plugins=use_plugins,
+                track_memory=track_memory,
+                registry=registry,
+                cache=cache,
+                on_outcome=on_outcome,
+            )
+        )
+        if robots is not None:
+            try:
+                robots.save()
+            except OSError as e:
+                click.echo(f"Warning: cannot save robots.txt rules: {e}", err=True)
+    if registry is not None:
+        pool.publish(registry)
+        if cache is not None:
+            cache.publish(registry)
+
+    line = (
+        f"Converted {summary.succeeded} of {len(summary.outcomes)} URLs "
+        f"({summary.failed} failed) in {summary.elapsed_seconds:.2f}s"
+    )
+    if cache is not None:
+        stats = cache.stats
+        line += (
+            f"; cache: {stats.hits} fresh, {stats.revalidated} revalidated, "
+            f"{stats.misses} downloaded, {summary.reused} conversions reused"
+        )
+    click.echo(line, err=True)
+    if show_metrics:
+        _echo_json(summary.to_dict())
+    if summary.failed:
+        raise click.exceptions.Exit(1)
+
+
+def _open_http_cache(fetcher, cache_dir, cache_max_mb, use_plugins):
+    """Wrap ``fetcher`` in the HTTP cache in ``cache_dir``, if there is one."""
+    if cache_dir is None:
+        return fetcher
+
+    import sqlite3
+
+    from conv2md.adapters.http_cache import (
+        DEFAULT_MAX_CACHE_BYTES,
+        CacheError,
+        HTTPCache,
+    )
+
+    max_bytes = cache_max_mb * 1024 * 1024 if cache_max_mb else DEFAULT_MAX_CACHE_BYTES
+    try:
+        return HTTPCache(
+            fetcher, cache_dir, {"use_plugins": use_plugins}, max_bytes=max_bytes
+        )
+    except (CacheError, sqlite3.Error, OSError) as e:
+        fetcher.close()
+        raise click.ClickException(f"Cannot open the cache in {cache_dir}: {e}")
+
+
+def _open_manifest(out_dir, use_plugins, *, enabled):
+    """Open the manifest in ``out_dir``, or a stand-in None when not enabled."""
+    from contextlib import nullcontext
+
+    if not enabled:
+        return nullcontext()
+
+    import sqlite3
+
+    from conv2md.adapters.manifest import ConversionManifest, ManifestError
+
+    try:
+        return ConversionManifest(out_dir, options={"use_plugins": use_plugins})
+    except (ManifestError, sqlite3.Error, OSError) as e:
+        raise click.ClickException(f"Cannot open the manifest in {out_dir}: {e}")
+
+
+def _run_planned(items, *, manifest, jobs, use_plugins, track_memory, registry):
+    """Run a planned batch, through the manifest when there is one.
+
+    Without a resumed run to continue, up-to-date files are left out and the
+    rest journalled before converting starts. The run is marked finished
+    only if it is not interrupted.
+    """
+    from conv2md.application.batch import run_batch
+
+    skipped = 0
+    if manifest is not None and manifest.run_id is None:
+        items, skipped = manifest.select_stale(items)
+        manifest.start_run(items)
+
+    def on_outcome(outcome):
+        _report_outcome(outcome)
+        if manifest is not None:
+            manifest.record(outcome)
+
+    summary = run_batch(
+        items,
+        jobs=jobs,
+        use_plugins=use_plugins,
+        track_memory=track_memory,
+        registry=registry,
+        on_outcome=on_outcome,
+        record_digests=manifest is not None,
+    )
+    summary.skipped = skipped
+    if manifest is not None:
+        manifest.finish_run()
+    return summary
+
+
+def _convert_watch(
+    directory,
+    out_dir,
+    *,
+    interval_seconds,
+    debounce_seconds,
+    jobs,
+    use_plugins,
+    show_metrics,
+    track_memory,
+    registry,
+    metrics_textfile,
+    incremental,
+):
+    """Convert a directory, then reconvert its files as they change until ^C.
+
+    Failures are reported and the watch carries on: a file that fails is
+    retried when it next changes. With ``incremental``, the first pass
+    skips files the manifest shows are up to date.
+    """
+    from conv2md.application.batch import plan_batch
+    from conv2md.application.watch import (
+        DEFAULT_DEBOUNCE_SECONDS,
+        DEFAULT_WATCH_INTERVAL_SECONDS,
+        DirectoryWatcher,
+    )
+
+    # The defaults live with the watcher, which --help does not import
+    if interval_seconds is None:
+        interval_seconds = DEFAULT_WATCH_INTERVAL_SECONDS
+    if debounce_seconds is None:
+        debounce_seconds = DEFAULT_DEBOUNCE_SECONDS
+    watcher = DirectoryWatcher(directory, debounce_seconds=debounce_seconds)
+
+    def convert(files):
+        summary = _run_planned(
+            plan_batch(files, directory, out_dir),
+            manifest=manifest,
+            jobs=jobs,
+            use_plugins=use_plugins,
+            track_memory=track_memory,
+            registry=registry,
+        )
+        click.echo(_format_summary(summary), err=True)
+        if show_metrics:
+            _echo_json(summary.to_dict())
+        # Exported every cycle, as a long-running watch never reaches exit
+        if metrics_textfile:
+            registry.write_textfile(metrics_textfile)
+
+    with _open_manifest(out_dir, use_plugins, enabled=incremental) as manifest:
+        try:
+            convert(watcher.prime())
+            click.echo(
+                f"Watching {watcher.file_count} files in {directory}; "
+                "press Ctrl+C to stop",
+                err=True,
+            )
+            for changed in watcher.watch(interval_seconds):
+                convert(changed)
+        except KeyboardInterrupt:
+            click.echo("Stopped watching", err=True)
+
+
+def _report_outcome(outcome):
+    """Print where a batch file was written, or why it failed."""
+    if outcome.ok:
+        click.echo(f"Wrote {outcome.item.output_path}")
+    else:
+        click.echo(
+            f"Failed to convert '{outcome.item.input_path}': {outcome.error}",
+            err=True,
+        )
+
+
+def _format_summary(summary):
+    """Return the one-line batch summary."""
+    line = (
+        f"Converted {summary.succeeded} of {len(summary.outcomes)} files "
+        f"({summary.failed} failed) in {summary.elapsed_seconds:.2f}s"
+    )
+    if summary.skipped:
+        line += f", {summary.skipped} unchanged skipped"
+    if summary.throughput_bytes_per_sec is not None:
+        line += (
+            f", {summary.throughput_bytes_per_sec / 1_000_000:.2f} MB/s"
+            f", {summary.files_per_sec:.1f} files/s"
+        )
+    return line
 
 
 if __name__ == "__main__":
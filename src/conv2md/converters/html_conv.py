@@ -0,0 +1,664 @@
+"""HTML converter: a web page to Markdown, streamed as it downloads.
+
+html.parser reports tags and text as events, so the page is fed in chunks
+as they arrive and each block's Markdown is emitted as soon as its element
+closes: neither the whole page nor a tree of it is held, only the block
+being built. <script>, <style> and other non-content elements are dropped
+as they open, without keeping what is inside them.
+
+Pages larger than MAX_HTML_SIZE are cut off rather than rejected: reading
+stops at the limit, open elements are closed, and the Markdown ends with a
+note saying where it was truncated.
+
+With ``main_content``, the same pass also picks out the page's main
+content (see conv2md.converters.main_content) and only its blocks are
+kept; the Markdown then comes once the page has been read.
+"""
+
+import codecs
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from conv2md.converters.main_content import MainContentExtractor
+from conv2md.markdown.blocks import create_code_block, determine_fence_length
+from conv2md.markdown.constants import MAX_HTML_SIZE
+from conv2md.markdown.security import sanitize_yaml_metadata
+
+logger = logging.getLogger(__name__)
+
+# Dropped with everything inside them as soon as they open
+DROPPED_TAGS = frozenset(
+    {
+        "button",
+        "canvas",
+        "iframe",
+        "noscript",
+        "object",
+        "script",
+        "select",
+        "style",
+        "svg",
+        "template",
+    }
+)
+# Elements whose start and end separate blocks of text
+BLOCK_TAGS = frozenset(
+    {
+        "address",
+        "article",
+        "aside",
+        "body",
+        "caption",
+        "dd",
+        "details",
+        "dialog",
+        "div",
+        "dl",
+        "dt",
+        "fieldset",
+        "figcaption",
+        "figure",
+        "footer",
+        "form",
+        "header",
+        "hgroup",
+        "main",
+        "nav",
+        "p",
+        "section",
+        "summary",
+    }
+)
+HEADING_LEVELS = {f"h{level}": level for level in range(1, 7)}
+EMPHASIS_MARKERS = {
+    "b": "**",
+    "strong": "**",
+    "em": "_",
+    "i": "_",
+    "del": "~~",
+    "s": "~~",
+    "strike": "~~",
+}
+# Link and image targets with other schemes (javascript:, data:) are dropped
+SAFE_URL_SCHEMES = frozenset({"", "http", "https", "mailto"})
+TRUNCATION_NOTE = "<!-- conv2md: truncated after {} bytes of HTML -->"
+
+# A line break inside a paragraph, kept through whitespace collapsing
+_HARD_BREAK = "\ue000"
+_WHITESPACE = re.compile(r"[ \t\n\r\f\v]+")
+_INLINE_SPECIAL = re.compile(r"([\\`*_\[\]<>~])")
+# Text that would open a heading, list or quote at the start of a line
+_BLOCK_OPENER = re.compile(r"(?:[#>+=-]|\d+[.)](?= |$))")
+
+# A finished block: its Markdown; whether it is a list item, which is
+# separated from a neighbouring item by a newline rather than a blank line;
+# and how deep in blockquotes it is, which the blank line must keep
+_Block = Tuple[str, bool, int]
+
+
+class _ListState:
+    """An open <ul> or <ol>: its numbering and its items' content indent."""
+
+    __slots__ = ("ordered", "number", "indent")
+
+    def __init__(self, ordered: bool, indent: str):
+        self.ordered = ordered
+        self.number = 1
+        self.indent = indent
+
+
+class _MarkdownParser(HTMLParser):
+    """Turns HTML events into finished Markdown blocks.
+
+    Completed blocks collect in ``blocks`` for the caller to take after each
+    feed. Only the text of the block being built is kept. With an
+    ``extractor``, blocks go to it instead and ``blocks`` is only filled,
+    with the main content's, by ``finish``.
+    """
+
+    def __init__(
+        self, base_url: Optional[str], extractor: Optional[MainContentExtractor]
+    ):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.extractor = extractor
+        self.blocks: List[_Block] = []
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+
+        self._parts: List[str] = []
+        # Open inline elements: tag, where their text starts in _parts, and
+        # the link target for <a>
+        self._inline: List[Tuple[str, int, Optional[str]]] = []
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._title_parts: Optional[List[str]] = None
+        self._heading = 0
+        self._quote_depth = 0
+        self._lists: List[_ListState] = []
+        self._item_marker: Optional[str] = None
+        self._code_depth = 0
+        self._pre_depth = 0
+        self._pre_parts: List[str] = []
+        self._pre_language: Optional[str] = None
+        self._table_depth = 0
+        self._rows: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        self._cell_outer: Optional[List[str]] = None
+
+    # Events
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        if self._skip_depth:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in DROPPED_TAGS:
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        self._start(tag, {name: value or "" for name, value in attrs})
+        # Told after the text before the element has been emitted
+        if self.extractor is not None:
+            self.extractor.start(tag)
+
+    def handle_endtag(self, tag: str):
+        if self._skip_depth:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+            return
+        self._end(tag)
+        # Told after the element's own text has been emitted
+        if self.extractor is not None:
+            self.extractor.end(tag)
+
+    def handle_data(self, data: str):
+        if self._skip_depth:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+            return
+        if self.extractor is not None:
+            self.extractor.text(data)
+        if self._pre_depth:
+            self._pre_parts.append(data)
+        elif self._code_depth:
+            self._parts.append(data)
+        else:
+            self._parts.append(_INLINE_SPECIAL.sub(r"\\\1", data))
+
+    def finish(self, complete: bool = True) -> None:
+        """Emit whatever is still open, as if every element were closed.
+
+        Args:
+            complete: False if the HTML was cut off, so markup left
+                unfinished at the cut is dropped rather than kept as text
+        """
+        if complete:
+            self.close()
+        if self._pre_depth:
+            self._pre_depth = 0
+            self._finish_pre()
+        if self._table_depth:
+            self._table_depth = 1
+            self._table_end("table")
+        self._flush()
+        if self.extractor is not None:
+            self.blocks = self.extractor.finish()
+
+    # Elements
+
+    def _start(self, tag: str, attributes: Dict[str, str]) -> None:
+        """Open an element: end the block before it or start its markup."""
+        if self._pre_depth:
+            if tag == "pre":
+                self._pre_depth += 1
+            elif tag == "code" and self._pre_language is None:
+                self._pre_language = _language(attributes.get("class", ""))
+            elif tag == "br":
+                self._pre_parts.append("\n")
+            return
+
+        if tag == "title":
+            self._title_parts = []
+        elif tag == "meta":
+            if attributes.get("name", "").lower() == "description":
+                self.description = _collapse(attributes.get("content", ""))
+        elif tag in BLOCK_TAGS:
+            self._boundary()
+        elif tag in HEADING_LEVELS:
+            self._boundary()
+            self._heading = HEADING_LEVELS[tag]
+        elif tag in EMPHASIS_MARKERS or tag == "a":
+            self._inline.append((tag, len(self._parts), attributes.get("href")))
+        elif tag == "code":
+            self._inline.append((tag, len(self._parts), None))
+            self._code_depth += 1
+        elif tag == "br":
+            self._parts.append(" " if self._cell_outer is not None else _HARD_BREAK)
+        elif tag == "img":
+            self._image(attributes)
+        elif tag == "hr":
+            self._boundary()
+            self._emit(["---"])
+        elif tag == "blockquote":
+            self._boundary()
+            self._quote_depth += 1
+        elif tag in ("ul", "ol"):
+            self._boundary()
+            self._lists.append(_ListState(tag == "ol", self._content_indent()))
+            self._item_marker = None
+        elif tag == "li":
+            self._start_item()
+        elif tag == "pre":
+            self._boundary()
+            self._pre_depth = 1
+            self._pre_parts = []
+            self._pre_language = None
+        elif tag == "table" or self._table_depth:
+            self._table_start(tag)
+
+    def _end(self, tag: str) -> None:
+        """Close an element: end its block or finish its markup."""
+        if self._pre_depth:
+            if tag == "pre":
+                self._pre_depth -= 1
+                if not self._pre_depth:
+                    self._finish_pre()
+            return
+
+        if tag == "title" and self._title_parts is not None:
+            self.title = _collapse("".join(self._title_parts))
+            self._title_parts = None
+        elif tag in BLOCK_TAGS:
+            self._boundary()
+        elif tag in HEADING_LEVELS:
+            self._boundary()
+            self._heading = 0
+        elif tag in EMPHASIS_MARKERS or tag in ("a", "code"):
+            self._close_inline(tag)
+        elif tag == "blockquote" and self._quote_depth:
+            self._boundary()
+            self._quote_depth -= 1
+        elif tag in ("ul", "ol") and self._lists:
+            self._boundary()
+            self._lists.pop()
+            self._item_marker = None
+        elif tag == "li":
+            self._boundary()
+            self._item_marker = None
+        elif self._table_depth:
+            self._table_end(tag)
+
+    # Blocks
+
+    def _boundary(self) -> None:
+        """End the current block, or separate words inside a table cell."""
+        if self._cell_outer is not None:
+            self._parts.append(" ")
+        else:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Emit the text collected so far as a block."""
+        text = "".join(self._parts)
+        self._parts = []
+        self._inline.clear()
+        lines = [_collapse(line) for line in text.split(_HARD_BREAK)]
+        lines = [line for line in lines if line]
+        if not lines:
+            return
+        if _BLOCK_OPENER.match(lines[0]):
+            lines[0] = "\\" + lines[0]
+        if self._heading:
+            lines = ["#" * self._heading + " " + " ".join(lines)]
+        else:
+            # A backslash at the end of a line is a hard line break
+            lines = [line + "\\" for line in lines[:-1]] + lines[-1:]
+        self._emit(lines)
+
+    def _emit(self, lines: List[str]) -> None:
+        """Add a block, indented for the list and quoted for the quote it is in."""
+        quote = "> " * self._quote_depth
+        indent = self._content_indent()
+        first = indent
+        is_item = self._item_marker is not None
+        if is_item:
+            first = self._lists[-2].indent if len(self._lists) > 1 else ""
+            first += self._item_marker
+            self._item_marker = None
+        prefixed = [
+            (quote + (first if i == 0 else indent) + line).rstrip()
+            for i, line in enumerate(lines)
+        ]
+        block = ("\n".join(prefixed), is_item, self._quote_depth)
+        if self.extractor is not None:
+            self.extractor.add(block)
+        else:
+            self.blocks.append(block)
+
+    def _content_indent(self) -> str:
+        """Return the indent of content inside the innermost list item."""
+        return self._lists[-1].indent if self._lists else ""
+
+    def _start_item(self) -> None:
+        """Open a list item: its marker goes on its first line."""
+        self._boundary()
+        if not self._lists:
+            self._lists.append(_ListState(False, ""))
+        state = self._lists[-1]
+        if state.ordered:
+            marker = f"{state.number}. "
+            state.number += 1
+        else:
+            marker = "- "
+        outer = self._lists[-2].indent if len(self._lists) > 1 else ""
+        state.indent = outer + " " * len(marker)
+        self._item_marker = marker
+
+    def _finish_pre(self) -> None:
+        """Emit the preformatted text collected as a fenced code block."""
+        content = "".join(self._pre_parts)
+        self._pre_parts = []
+        # A newline straight after <pre> is not part of the content
+        if content.startswith("\n"):
+            content = content[1:]
+        content = content.rstrip()
+        if content:
+            self._emit(create_code_block(content, self._pre_language).split("\n"))
+
+    # Inline elements
+
+    def _close_inline(self, tag: str) -> None:
+        """Wrap the text of the innermost open ``tag`` in its Markdown."""
+        for position in range(len(self._inline) - 1, -1, -1):
+            if self._inline[position][0] == tag:
+                break
+        else:
+            return
+        _, start, href = self._inline[position]
+        # Inline elements opened inside it and left open close with it
+        del self._inline[position:]
+        if tag == "code":
+            self._code_depth -= 1
+        inner = "".join(self._parts[start:])
+        core = inner.strip()
+        if not core:
+            return
+        lead = inner[: len(inner) - len(inner.lstrip())]
+        trail = inner[len(inner.rstrip()) :]
+        if tag == "a":
+            target = self._resolve(href)
+            wrapped = f"[{core}]({target})" if target else core
+        elif tag == "code":
+            fence = "`" * determine_fence_length(core, min_length=1)
+            pad = " " if core.startswith("`") or core.endswith("`") else ""
+            wrapped = f"{fence}{pad}{core}{pad}{fence}"
+        else:
+            marker = EMPHASIS_MARKERS[tag]
+            wrapped = f"{marker}{core}{marker}"
+        self._parts[start:] = [lead, wrapped, trail]
+
+    def _image(self, attributes: Dict[str, str]) -> None:
+        """Add an image, or its alt text when its source cannot be linked."""
+        alt = _INLINE_SPECIAL.sub(r"\\\1", _collapse(attributes.get("alt", "")))
+        target = self._resolve(attributes.get("src"))
+        self._parts.append(f"![{alt}]({target})" if target else alt)
+
+    def _resolve(self, url: Optional[str]) -> Optional[str]:
+        """Return ``url`` made absolute and safe to put in a Markdown link."""
+        if not url:
+            return None
+        url = url.strip()
+        if self.base_url:
+            url = urljoin(self.base_url, url)
+        try:
+            scheme = urlsplit(url).scheme.lower()
+        except ValueError:
+            return None
+        if scheme not in SAFE_URL_SCHEMES:
+            return None
+        # Characters that would end the link destination early
+        return url.replace(" ", "%20").replace("(", "%28").replace(")", "%29")
+
+    # Tables
+
+    def _table_start(self, tag: str) -> None:
+        """Track the rows and cells of the outermost table."""
+        if tag == "table":
+            self._table_depth += 1
+            if self._table_depth == 1:
+                self._flush()
+                self._rows = []
+                self._row = None
+            else:
+                self._parts.append(" ")
+        elif self._table_depth > 1:
+            if tag in ("td", "th", "tr"):
+                self._parts.append(" ")
+        elif tag == "tr":
+            self._end_cell()
+            self._end_row()
+            self._row = []
+        elif tag in ("td", "th"):
+            self._end_cell()
+            if self._row is None:
+                self._row = []
+            self._cell_outer, self._parts = self._parts, []
+            self._inline.clear()
+
+    def _table_end(self, tag: str) -> None:
+        """Close cells, rows and, at the outermost </table>, emit the table."""
+        if tag == "table":
+            self._table_depth -= 1
+            if self._table_depth:
+                self._parts.append(" ")
+                return
+            self._end_cell()
+            self._end_row()
+            self._emit_table()
+        elif self._table_depth == 1:
+            if tag in ("td", "th"):
+                self._end_cell()
+            elif tag == "tr":
+                self._end_cell()
+                self._end_row()
+
+    def _end_cell(self) -> None:
+        if self._cell_outer is None:
+            return
+        text = _collapse("".join(self._parts).replace(_HARD_BREAK, " "))
+        self._parts, self._cell_outer = self._cell_outer, None
+        self._inline.clear()
+        if self._row is not None:
+            self._row.append(text.replace("|", "\\|"))
+
+    def _end_row(self) -> None:
+        if self._row:
+            self._rows.append(self._row)
+        self._row = None
+
+    def _emit_table(self) -> None:
+        """Emit the rows as a GFM table, the first row as its header."""
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+        width = max(len(row) for row in rows)
+        rows = [row + [""] * (width - len(row)) for row in rows]
+        lines = ["| " + " | ".join(rows[0]) + " |", "|" + " --- |" * width]
+        lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+        self._emit(lines)
+
+
+class HTMLConverter:
+    """Converts HTML to Markdown, incrementally."""
+
+    def __init__(self, max_bytes: int = MAX_HTML_SIZE, main_content: bool = False):
+        """Initialize the converter.
+
+        Args:
+            max_bytes: Bytes of HTML read from a page; the rest is cut off
+            main_content: Keep only the page's main content, as
+                MainContentExtractor picks it, rather than the whole page.
+                The winner is only known at the end, so the Markdown is
+                then yielded at once when the page has been read.
+        """
+        self.max_bytes = max_bytes
+        self.main_content = main_content
+
+    def convert(self, html: str, url: Optional[str] = None) -> str:
+        """Convert a complete HTML document to Markdown.
+
+        Args:
+            html: The document
+            url: Where it came from: relative links are resolved against it
+                and it is recorded in the frontmatter
+
+        Returns:
+            The Markdown, frontmatter first
+        """
+        return "".join(self.iter_markdown([html.encode("utf-8")], url=url))
+
+    def iter_markdown(
+        self,
+        chunks: Iterable[bytes],
+        *,
+        url: Optional[str] = None,
+        encoding: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Convert HTML arriving in chunks, yielding Markdown as blocks close.
+
+        Chunks are drawn only as the Markdown is consumed, and no more are
+        drawn once ``max_bytes`` have been read, so a response being
+        iterated is read no further than the limit.
+
+        Args:
+            chunks: The HTML, e.g. FetchResponse.iter_chunks()
+            url: Where the HTML came from: relative links are resolved
+                against it and it is recorded in the frontmatter
+            encoding: Charset from the Content-Type; UTF-8 if omitted,
+                unknown or not a text encoding. Undecodable bytes are
+                replaced, not raised.
+
+        Yields:
+            Pieces of the Markdown document, in order: joined, they are the
+            whole document
+
+        Raises:
+            UnicodeError: If the charset cannot decode the page at all, as
+                UTF-16 cannot without a byte order mark
+        """
+        extractor = MainContentExtractor() if self.main_content else None
+        parser = _MarkdownParser(url, extractor)
+        decoder = codecs.getincrementaldecoder(_codec(encoding))(errors="replace")
+        writer = _DocumentWriter(parser, url)
+        size = 0
+        truncated = False
+
+        for chunk in chunks:
+            if len(chunk) > self.max_bytes - size:
+                chunk = chunk[: self.max_bytes - size]
+                truncated = True
+            size += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            yield from writer.drain()
+            if truncated:
+                break
+
+        parser.feed(decoder.decode(b"", final=True))
+        parser.finish(complete=not truncated)
+        yield from writer.drain(final=True)
+        if truncated:
+            logger.warning(
+                f"{url or 'HTML'} is larger than {self.max_bytes} bytes; "
+                "converted up to the limit"
+            )
+            yield writer.separator(False) + TRUNCATION_NOTE.format(size)
+
+
+class _DocumentWriter:
+    """Joins the parser's blocks into a document behind its frontmatter."""
+
+    def __init__(self, parser: _MarkdownParser, url: Optional[str]):
+        self._parser = parser
+        self._url = url
+        self._started = False
+        self._previous: Optional[Tuple[bool, int]] = None
+
+    def drain(self, final: bool = False) -> Iterator[str]:
+        """Yield the blocks finished since the last drain."""
+        blocks, self._parser.blocks = self._parser.blocks, []
+        if not self._started and (blocks or final):
+            # The head, and with it the title, comes before the first block
+            self._started = True
+            yield self._frontmatter()
+        for text, is_item, quote_depth in blocks:
+            yield self.separator(is_item, quote_depth) + text
+
+    def separator(self, is_item: bool, quote_depth: int = 0) -> str:
+        """Return what goes before the next block."""
+        previous, self._previous = self._previous, (is_item, quote_depth)
+        if previous is None:
+            return ""
+        if previous[0] and is_item:
+            return "\n"
+        # A blank line inside a blockquote keeps its ">" to stay inside it
+        return "\n" + ">" * min(previous[1], quote_depth) + "\n"
+
+    def _frontmatter(self) -> str:
+        """Return the YAML frontmatter, in the generator's format."""
+        metadata = {"source": "url" if self._url else "html"}
+        if self._url:
+            metadata["url"] = self._url
+        if self._parser.title:
+            metadata["title"] = self._parser.title
+        if self._parser.description:
+            metadata["description"] = self._parser.description
+        safe_metadata = sanitize_yaml_metadata(metadata)
+        lines = ["---"]
+        lines.extend(f"{key}: {safe_metadata[key]}" for key in sorted(safe_metadata))
+        lines.append("---")
+        return "\n".join(lines) + "\n\n"
+
+
+def _collapse(text: str) -> str:
+    """Collapse runs of whitespace to single spaces and strip the ends."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _language(class_attribute: str) -> Optional[str]:
+    """Return the language of a ``language-*`` or ``lang-*`` class, if any."""
+    for name in class_attribute.split():
+        for prefix in ("language-", "lang-"):
+            if name.startswith(prefix):
+                return name[len(prefix) :]
+    return None
+
+
+def _codec(encoding: Optional[str]) -> str:
+    """Return a codec name for a declared charset, UTF-8 if unknown.
+
+    Only text encodings are accepted: codecs.lookup also knows bytes-to-bytes
+    codecs such as hex and zlib, whose decoders do not return text.
+    """
+    if encoding:
+        try:
+            codec = codecs.lookup(encoding)
+        except LookupError:
+            logger.debug(f"Unknown charset {encoding!r}; decoding as UTF-8")
+        else:
+            if codec._is_text_encoding:
+                return codec.name
+            logger.debug(f"{encoding!r} is not a text charset; decoding as UTF-8")
+    return "utf-8"
+
+
+def charset_of(content_type: str) -> Optional[str]:
+    """Return the charset parameter of a Content-Type header, if any."""
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip('"') or None
+    return None
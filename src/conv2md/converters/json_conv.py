@@ -2,11 +2,25 @@
 
 import json
 import logging
+import re
+from typing import Any, Iterator, TextIO
 
 from conv2md.domain.models import Conversation, Message
 
 logger = logging.getLogger(__name__)
 
+# Streaming reads start small so the first message is converted after
+# reading little more than itself, then double whenever a value does not fit
+# in what has been read, so a large value costs a logarithmic number of
+# re-decodes rather than one per chunk.
+STREAM_INITIAL_CHUNK_SIZE = 64 * 1024
+STREAM_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+# A single JSON value larger than the whole-conversation limit can never be
+# converted; stop buffering it rather than reading the stream to the end.
+MAX_STREAM_VALUE_SIZE = 100 * 1024 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
 
 class ConversationParseError(Exception):
     """Raised when conversation data cannot be parsed."""
@@ -14,6 +28,92 @@ class ConversationParseError(Exception):
     pass
 
 
+class _JSONStreamReader:
+    """Decodes JSON values one at a time from a text stream.
+
+    Only the value being decoded and the unread remainder of the last chunk
+    are held in memory.
+    """
+
+    def __init__(self, stream: TextIO, chunk_size: int = STREAM_INITIAL_CHUNK_SIZE):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, grow: bool = False) -> bool:
+        """Read the next chunk, dropping text already consumed.
+
+        Returns:
+            False at the end of the stream
+        """
+        if self._eof:
+            return False
+        if grow:
+            if len(self._buffer) - self._pos > MAX_STREAM_VALUE_SIZE:
+                raise ConversationParseError(
+                    f"JSON value exceeds {MAX_STREAM_VALUE_SIZE} characters"
+                )
+            self._chunk_size = min(self._chunk_size * 2, STREAM_MAX_CHUNK_SIZE)
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or "" at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, *characters: str) -> str:
+        """Consume the next character, which must be one of ``characters``.
+
+        Raises:
+            json.JSONDecodeError: If it is anything else
+        """
+        character = self.peek()
+        if character == "" or character not in characters:
+            expected = " or ".join(repr(c) for c in characters)
+            raise json.JSONDecodeError(f"Expecting {expected}", self._buffer, self._pos)
+        self._pos += 1
+        return character
+
+    def expect_end(self) -> None:
+        """Raise unless only whitespace remains, as json.loads does."""
+        if self.peek() != "":
+            raise json.JSONDecodeError("Extra data", self._buffer, self._pos)
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value.
+
+        Raises:
+            json.JSONDecodeError: If the value is malformed or truncated
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk
+                if self._fill(grow=True):
+                    continue
+                raise
+            # A number that ends the buffer may have more digits still unread
+            if end == len(self._buffer) and self._fill(grow=True):
+                continue
+            self._pos = end
+            return value
+
+
 class JSONConverter:
     """Converts JSON conversations to structured conversation objects."""
 
@@ -72,31 +172,123 @@ class JSONConverter:
 
         logger.debug(f"Found {len(data['messages'])} messages to process")
 
-        messages = []
-        for i, msg_data in enumerate(data["messages"]):
-            # Validate message fields exist and have correct types
-            try:
-                speaker = msg_data["speaker"]
-                content = msg_data["content"]
-                logger.debug(f"Processing message {i + 1}: speaker='{speaker}'")
-            except KeyError as e:
-                logger.error(f"Message {i} missing required field: {e}")
-                raise
-
-            # Validate field types (stdlib-only approach)
-            # NOTE: Could be simplified with pydantic in future plugin architecture
-            self._validate_field_type(speaker, "speaker", str, i)
-            self._validate_field_type(content, "content", str, i)
-
-            # Validate non-empty strings
-            self._validate_non_empty_string(speaker, "speaker", i)
-            self._validate_non_empty_string(content, "content", i)
-
-            message = Message(speaker=speaker, content=content)
-            messages.append(message)
+        messages = [
+            self._message_from_data(i, msg_data)
+            for i, msg_data in enumerate(data["messages"])
+        ]
 
         logger.info(f"Parsed {len(messages)} messages successfully")
         conversation = Conversation(messages=messages)
         logger.info("JSON parsing completed")
 
         return conversation
+
+    def iter_messages(self, stream: TextIO) -> Iterator[Message]:
+        """Parse a JSON conversation from a stream, one message at a time.
+
+        Accepts the same documents as ``parse`` and validates each message the
+        same way, but yields every message as soon as it has been read. A
+        conversation can therefore be converted while it is still arriving,
+        in memory proportional to its largest message.
+
+        Errors in the document after a message are only detected once that
+        message has been yielded.
+
+        Args:
+            stream: Text stream holding one JSON conversation object
+
+        Yields:
+            Each message of the conversation, in order
+
+        Raises:
+            ConversationParseError: When conversation data is invalid
+            json.JSONDecodeError: When JSON is malformed
+            KeyError: When required fields are missing
+        """
+        logger.info("Starting streaming JSON conversation parsing")
+        reader = _JSONStreamReader(stream)
+
+        if reader.peek() != "{":
+            # Not an object: decode it anyway, so malformed input fails the
+            # way parse() fails, then report the missing field
+            reader.value()
+            raise KeyError("Required field 'messages' not found in conversation data")
+
+        reader.expect("{")
+        found_messages = False
+        if reader.peek() == "}":
+            reader.expect("}")
+        else:
+            while True:
+                if reader.peek() != '"':
+                    reader.expect('"')
+                key = reader.value()
+                reader.expect(":")
+                if key == "messages" and not found_messages:
+                    found_messages = True
+                    yield from self._iter_message_array(reader)
+                else:
+                    reader.value()
+                if reader.expect(",", "}") == "}":
+                    break
+
+        reader.expect_end()
+
+        if not found_messages:
+            logger.error("Missing required 'messages' field in JSON data")
+            raise KeyError("Required field 'messages' not found in conversation data")
+
+        logger.info("Streaming JSON parsing completed")
+
+    def _iter_message_array(self, reader: _JSONStreamReader) -> Iterator[Message]:
+        """Yield the messages of the ``messages`` array as they are decoded."""
+        if reader.peek() != "[":
+            # Only an empty value can be valid here, as in parse()
+            if not reader.value():
+                raise ConversationParseError(
+                    "Conversation messages list cannot be empty"
+                )
+            raise ConversationParseError("Conversation messages must be a list")
+
+        reader.expect("[")
+        count = 0
+        if reader.peek() == "]":
+            reader.expect("]")
+        else:
+            while True:
+                yield self._message_from_data(count, reader.value())
+                count += 1
+                if reader.expect(",", "]") == "]":
+                    break
+
+        if not count:
+            logger.error("Validation error: Messages list is empty")
+            raise ConversationParseError("Conversation messages list cannot be empty")
+        logger.info(f"Parsed {count} messages successfully")
+
+    def _message_from_data(self, i: int, msg_data: Any) -> Message:
+        """Validate one decoded message object and build its Message.
+
+        Raises:
+            ConversationParseError: When a field has the wrong type or is empty
+            KeyError: When a required field is missing
+        """
+        # Validate message fields exist and have correct types
+        try:
+            speaker = msg_data["speaker"]
+            content = msg_data["content"]
+            logger.debug(f"Processing message {i + 1}: speaker='{speaker}'")
+        except KeyError as e:
+            logger.error(f"Message {i} missing required field: {e}")
+            raise
+
+        # Validate field types (stdlib-only approach)
+        # NOTE: Could be simplified with pydantic in future plugin architecture
+        self._validate_field_type(speaker, "speaker", str, i)
+        self._validate_field_type(content, "content", str, i)
+
+        # Validate non-empty strings
+        self._validate_non_empty_string(speaker, "speaker", i)
+        self._validate_non_empty_string(content, "content", i)
+
+        return Message(speaker=speaker, content=content)
@@ -0,0 +1,198 @@
+"""Main-content extraction: picks a page's article out of its boilerplate.
+
+The heuristic is the spec's: prefer <article>, then <main>, then the
+element with the densest text. Density is scored the way readability
+scores candidates: each paragraph adds points to its parent and half as
+many to its grandparent, and a candidate's points are discounted by the
+share of its text that is link text, so navigation and link lists lose.
+Ties go to the candidate with the most text per tag.
+
+Scoring every element by walking its subtree is quadratic on deeply
+nested pages. Here it happens in the one pass HTMLConverter makes over
+the page: elements are tracked on a stack, text and link-text lengths
+and tag counts accumulate on the innermost open element and are added to
+its parent when it closes. Every element's totals are therefore known
+when it closes, at constant cost per event, and the best candidate so far
+is kept as the page goes by.
+
+Only Markdown blocks that may still end up in the winner are kept: those
+of the best closed candidate and those of candidates still open. Blocks
+outside every candidate, such as navigation and footers, are dropped
+once there is a winner.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Elements that may be chosen as the main content
+CANDIDATE_TAGS = frozenset({"article", "div", "main", "section"})
+# Preferred to any density score, in this order, when they hold enough text
+PREFERRED_TAGS = {"article": 2, "main": 1}
+MIN_PREFERRED_TEXT = 200
+# Elements whose text scores as a paragraph, and the least text that does
+PARAGRAPH_TAGS = frozenset({"blockquote", "p", "pre", "td"})
+MIN_PARAGRAPH_TEXT = 25
+# Elements that never have content or an end tag
+VOID_TAGS = frozenset(
+    {
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    }
+)
+# Elements an opening tag closes when one is innermost, for end tags HTML
+# lets pages leave out
+IMPLIED_ENDS = {
+    "p": frozenset({"p"}),
+    "li": frozenset({"li", "p"}),
+    "td": frozenset({"td", "th", "p"}),
+    "th": frozenset({"td", "th", "p"}),
+    "tr": frozenset({"tr", "td", "th", "p"}),
+}
+
+
+class _Element:
+    """An open element's totals so far, its descendants' included."""
+
+    __slots__ = ("tag", "start", "text", "link_text", "commas", "tags", "points")
+
+    def __init__(self, tag: str, start: Optional[int]):
+        self.tag = tag
+        # Where a candidate's blocks begin among the kept blocks
+        self.start = start
+        self.text = 0
+        self.link_text = 0
+        self.commas = 0
+        self.tags = 0
+        self.points = 0.0
+
+
+class MainContentExtractor:
+    """Keeps the Markdown blocks of a page's main content, in one pass.
+
+    The converter reports each tag, each piece of text and each finished
+    block as it goes; ``finish`` returns the blocks of the winning element,
+    or every block if no element qualifies.
+    """
+
+    def __init__(self) -> None:
+        self._stack: List[_Element] = []
+        # Open elements by tag, so an end tag with no open element is
+        # ignored without searching the stack
+        self._open: Dict[str, int] = {}
+        self._links = 0
+        self._candidates = 0
+        # Blocks since the outermost open candidate began, or since the
+        # page began while there is no winner yet
+        self._pending: List[Any] = []
+        self._best_key: Optional[Tuple[int, float, float]] = None
+        # The winner's blocks: a range of _pending while it is in there
+        self._best_range: Optional[Tuple[int, int]] = None
+        self._best_blocks: List[Any] = []
+
+    def start(self, tag: str) -> None:
+        """Record an element opening."""
+        if tag in VOID_TAGS:
+            if self._stack:
+                self._stack[-1].tags += 1
+            return
+        implied = IMPLIED_ENDS.get(tag)
+        while implied and self._stack and self._stack[-1].tag in implied:
+            self._close()
+        start = None
+        if tag in CANDIDATE_TAGS:
+            start = len(self._pending)
+            self._candidates += 1
+        if tag == "a":
+            self._links += 1
+        self._open[tag] = self._open.get(tag, 0) + 1
+        self._stack.append(_Element(tag, start))
+
+    def end(self, tag: str) -> None:
+        """Record an element closing, with any left open inside it."""
+        if not self._open.get(tag):
+            return
+        while self._close().tag != tag:
+            pass
+
+    def text(self, data: str) -> None:
+        """Record text inside the innermost open element."""
+        if not self._stack:
+            return
+        element = self._stack[-1]
+        length = len(" ".join(data.split()))
+        element.text += length
+        element.commas += data.count(",")
+        if self._links:
+            element.link_text += length
+
+    def add(self, block: Any) -> None:
+        """Keep a finished block if it may belong to the main content."""
+        if self._candidates or self._best_key is None:
+            self._pending.append(block)
+
+    def finish(self) -> List[Any]:
+        """Close what is still open and return the main content's blocks."""
+        while self._stack:
+            self._close()
+        if self._best_key is None:
+            return self._pending
+        return self._best_blocks
+
+    def _close(self) -> _Element:
+        """Close the innermost element, adding its totals to its parent's."""
+        element = self._stack.pop()
+        self._open[element.tag] -= 1
+        if element.tag == "a":
+            self._links -= 1
+        if self._stack:
+            parent = self._stack[-1]
+            parent.text += element.text
+            parent.link_text += element.link_text
+            parent.commas += element.commas
+            parent.tags += element.tags + 1
+            if element.tag in PARAGRAPH_TAGS and element.text >= MIN_PARAGRAPH_TEXT:
+                points = 1 + element.commas + min(element.text // 100, 3)
+                parent.points += points
+                if len(self._stack) > 1:
+                    self._stack[-2].points += points / 2
+        if element.start is not None:
+            self._candidates -= 1
+            self._consider(element)
+            if not self._candidates and self._best_key is not None:
+                self._settle()
+        return element
+
+    def _consider(self, element: _Element) -> None:
+        """Make a closing candidate the winner if it beats the one so far."""
+        if not element.text:
+            return
+        content = element.text - element.link_text
+        score = element.points * content / element.text
+        rank = 0
+        if content >= MIN_PREFERRED_TEXT:
+            rank = PREFERRED_TAGS.get(element.tag, 0)
+        if not rank and score <= 0:
+            return
+        key = (rank, score, content / (element.tags + 1))
+        if self._best_key is None or key > self._best_key:
+            self._best_key = key
+            self._best_range = (element.start, len(self._pending))
+
+    def _settle(self) -> None:
+        """With no candidate open, keep the winner's blocks and drop the rest."""
+        if self._best_range is not None:
+            start, end = self._best_range
+            self._best_blocks = self._pending[start:end]
+            self._best_range = None
+        self._pending = []
@@ -9,7 +9,16 @@ MAX_TOTAL_CONVERSATION_SIZE = 100 * 1024 * 1024  # 100MB total conversation
 # already passed validation here, so bound sanitization cost without failing.
 MAX_CONTENT_SANITIZATION_SIZE = 100 * 1024  # 100KB content sanitization limit
 
+# Web pages past this size are cut off where the limit falls rather than
+# rejected: what was read converts, and the Markdown notes the truncation.
+MAX_HTML_SIZE = 5 * 1024 * 1024  # 5MB of HTML per page
+
 # Size limits for metadata and fields
 MAX_METADATA_VALUE_LENGTH = 1000  # Maximum length for metadata values
 MAX_SPEAKER_NAME_LENGTH = 100  # Maximum length for speaker names
 MAX_TIMESTAMP_LENGTH = 50  # Maximum length for timestamp strings
+
+# Concurrency for async content processors
+# Bounds in-flight calls to I/O-bound processors (image fetch, OCR, LLM) so a
+# media-heavy conversation cannot open an unbounded number of connections.
+DEFAULT_MAX_PROCESSOR_CONCURRENCY = 8
@@ -23,3 +23,9 @@ class ContentTooLargeError(MarkdownGenerationError):
     """Raised when content exceeds size limits."""
 
     pass
+
+
+class PluginLoadError(MarkdownGenerationError):
+    """Raised when a content processor plugin cannot be loaded."""
+
+    pass
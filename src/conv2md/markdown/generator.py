@@ -1,12 +1,19 @@
 """Markdown generator for conversations."""
 
+import functools
 import logging
-from dataclasses import replace
-from typing import Dict, Any, Optional, List
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Any, Iterable, Iterator, Optional, List, Tuple
 from conv2md.domain.models import Conversation, Message
 from conv2md.markdown.blocks import format_speaker_line
-from conv2md.markdown.pipeline import ContentProcessingPipeline
-from conv2md.markdown.metrics import MetricsCollector
+from conv2md.markdown.pipeline import (
+    ContentProcessingPipeline,
+    MessageProcessingError,
+    ProcessingObserver,
+    is_timed_call,
+)
+from conv2md.markdown.metrics import ConversionMetrics, MetricsCollector, StageMetrics
 from conv2md.markdown.security import (
     sanitize_yaml_metadata,
     sanitize_content,
@@ -19,6 +26,7 @@ from conv2md.markdown.exceptions import (
     ContentTooLargeError,
 )
 from conv2md.markdown.constants import (
+    DEFAULT_MAX_PROCESSOR_CONCURRENCY,
     MAX_CONTENT_SANITIZATION_SIZE,
     MAX_MESSAGE_CONTENT_SIZE,
     MAX_TOTAL_CONVERSATION_SIZE,
@@ -27,17 +35,43 @@ from conv2md.markdown.constants import (
 logger = logging.getLogger(__name__)
 
 
-class MarkdownGenerator:
-    """Generates Markdown from conversation data."""
+@dataclass
+class GenerationResult:
+    """Markdown produced by one generate call and that call's metrics."""
+
+    markdown: str
+    metrics: ConversionMetrics
 
-    def __init__(self, pipeline: Optional[ContentProcessingPipeline] = None):
+
+class MarkdownGenerator:
+    """Generates Markdown from conversation data.
+
+    Per-conversion state lives in the call and in the metrics collector's
+    context, so one generator can serve several threads or asyncio tasks at
+    once. Use generate_with_metrics to get each call's own metrics.
+    """
+
+    def __init__(
+        self,
+        pipeline: Optional[ContentProcessingPipeline] = None,
+        collect_timings: bool = True,
+        track_memory: bool = False,
+    ):
         """Initialize the markdown generator.
 
         Args:
             pipeline: Optional custom content processing pipeline
+            collect_timings: Record per-processor and per-content-type
+                processing time histograms in the conversion metrics. Long
+                conversations have a sample of their processor calls timed;
+                see is_timed_call.
+            track_memory: Record RSS and tracemalloc allocation per conversion
+                and per stage in the conversion metrics
         """
         self.pipeline = pipeline or ContentProcessingPipeline()
-        self.metrics_collector = MetricsCollector()
+        self.metrics_collector = MetricsCollector(
+            collect_timings=collect_timings, track_memory=track_memory
+        )
 
     def generate(
         self, conversation: Conversation, metadata: Optional[Dict[str, Any]] = None
@@ -51,6 +85,26 @@ class MarkdownGenerator:
         Returns:
             Markdown formatted string
 
+        Raises:
+            InvalidContentError: If conversation data is invalid
+            EncodingError: If content has encoding issues
+            ContentTooLargeError: If content exceeds size limits
+        """
+        return self.generate_with_metrics(conversation, metadata).markdown
+
+    def generate_with_metrics(
+        self, conversation: Conversation, metadata: Optional[Dict[str, Any]] = None
+    ) -> GenerationResult:
+        """Generate Markdown and return it with this conversion's metrics.
+
+        Args:
+            conversation: Conversation object to convert
+            metadata: Optional metadata to include as YAML frontmatter
+
+        Returns:
+            The Markdown and the metrics of this call alone, even when other
+            threads or tasks are using the same generator
+
         Raises:
             InvalidContentError: If conversation data is invalid
             EncodingError: If content has encoding issues
@@ -59,7 +113,7 @@ class MarkdownGenerator:
         logger.info("Starting Markdown generation")
 
         # Start metrics collection
-        self.metrics_collector.start_conversion()
+        metrics = self.metrics_collector.start_conversion()
 
         try:
             # Validate input and take the sanitized messages it produces, so
@@ -68,6 +122,258 @@ class MarkdownGenerator:
 
             logger.debug(f"Converting {len(messages)} messages to Markdown")
 
+            with self.metrics_collector.stage("render") as render_stage:
+                render_stage.bytes_processed = _content_bytes(messages)
+                try:
+                    processed_contents = self.pipeline.process_messages(
+                        messages, observer=self._processing_observer(metrics)
+                    )
+                except (ValueError, TypeError, AttributeError):
+                    # A batch failure cannot say which message caused it.
+                    # Leave processing to the per-message path so the error
+                    # names it.
+                    processed_contents = None
+
+            return self._assemble_markdown(messages, processed_contents, metadata)
+
+        except Exception as e:
+            # Record error in metrics before re-raising
+            self.metrics_collector.record_error(e)
+            raise
+
+    async def agenerate(
+        self,
+        conversation: Conversation,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_concurrency: int = DEFAULT_MAX_PROCESSOR_CONCURRENCY,
+    ) -> str:
+        """Generate Markdown, running async processors concurrently.
+
+        Output is identical to ``generate``. Messages handled by an
+        AsyncContentProcessor are awaited concurrently, so I/O-bound content
+        such as fetched images costs roughly the slowest call rather than the
+        sum of all calls.
+
+        Args:
+            conversation: Conversation object to convert
+            metadata: Optional metadata to include as YAML frontmatter
+            max_concurrency: Maximum async processor calls in flight at once
+
+        Returns:
+            Markdown formatted string
+
+        Raises:
+            InvalidContentError: If conversation data is invalid
+            EncodingError: If content has encoding issues
+            ContentTooLargeError: If content exceeds size limits
+        """
+        result = await self.agenerate_with_metrics(
+            conversation, metadata, max_concurrency=max_concurrency
+        )
+        return result.markdown
+
+    async def agenerate_with_metrics(
+        self,
+        conversation: Conversation,
+        metadata: Optional[Dict[str, Any]] = None,
+        max_concurrency: int = DEFAULT_MAX_PROCESSOR_CONCURRENCY,
+    ) -> GenerationResult:
+        """Async counterpart of generate_with_metrics; see agenerate.
+
+        Args:
+            conversation: Conversation object to convert
+            metadata: Optional metadata to include as YAML frontmatter
+            max_concurrency: Maximum async processor calls in flight at once
+
+        Returns:
+            The Markdown and the metrics of this call alone
+
+        Raises:
+            InvalidContentError: If conversation data is invalid
+            EncodingError: If content has encoding issues
+            ContentTooLargeError: If content exceeds size limits
+        """
+        logger.info("Starting async Markdown generation")
+
+        metrics = self.metrics_collector.start_conversion()
+
+        try:
+            messages = self._validate_conversation(conversation)
+
+            logger.debug(f"Converting {len(messages)} messages to Markdown")
+
+            with self.metrics_collector.stage("render") as render_stage:
+                render_stage.bytes_processed = _content_bytes(messages)
+                try:
+                    processed_contents = await self.pipeline.aprocess_messages(
+                        messages,
+                        max_concurrency=max_concurrency,
+                        observer=self._processing_observer(metrics),
+                    )
+                except MessageProcessingError as e:
+                    # The pipeline names the message itself: replaying the
+                    # conversation would repeat every async call before it.
+                    logger.error(f"Error processing message {e.index + 1}: {e}")
+                    raise InvalidContentError(
+                        f"Failed to process message {e.index + 1}: {e}"
+                    ) from e.__cause__
+                except (ValueError, TypeError, AttributeError) as e:
+                    raise InvalidContentError(f"Failed to process messages: {e}") from e
+
+            return self._assemble_markdown(messages, processed_contents, metadata)
+
+        except Exception as e:
+            self.metrics_collector.record_error(e)
+            raise
+
+    def generate_stream(
+        self,
+        messages: Iterable[Message],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Generate Markdown incrementally, one chunk per message.
+
+        Concatenating the chunks gives exactly what ``generate`` returns for
+        the same messages. Each message is validated, sanitized and processed
+        as it arrives, so the first chunk is available as soon as the first
+        message has been read, and memory stays proportional to one message
+        however long the conversation.
+
+        The same limits apply as in ``generate``, but a conversation is only
+        known to be too large, or to contain an invalid message, once that
+        point is reached: by then the chunks before it have been yielded.
+
+        Args:
+            messages: Messages to convert, e.g. from JSONConverter.iter_messages
+            metadata: Optional metadata to include as YAML frontmatter
+
+        Yields:
+            Markdown chunks in document order
+
+        Raises:
+            InvalidContentError: If conversation data is invalid
+            EncodingError: If content has encoding issues
+            ContentTooLargeError: If content exceeds size limits
+        """
+        logger.info("Starting streaming Markdown generation")
+
+        # Everything is recorded into this stream's own metrics: another
+        # stream may start, and become the current conversion, while this
+        # one is suspended between chunks.
+        collector = self.metrics_collector
+        metrics = collector.start_conversion()
+        observer = None
+        if collector.collect_timings:
+            observer = functools.partial(collector.record_processing_time_into, metrics)
+        # Timed inline rather than with collector.stage(): three context
+        # managers per message cost more than converting a short message.
+        # Stage memory is therefore not measured when streaming.
+        stages = {name: StageMetrics(name) for name in ("validate", "sanitize")}
+        render_stage = StageMetrics("render")
+        output_size = 0
+        total_size = 0
+        count = 0
+
+        try:
+            # Frontmatter is joined to the first message by the newline that
+            # separates all lines in generate()
+            prefix = ""
+            started = time.perf_counter()
+            if metadata:
+                prefix = "\n".join(self._build_frontmatter(metadata)) + "\n"
+            render_stage.duration_seconds += time.perf_counter() - started
+
+            for i, message in enumerate(messages):
+                started = time.perf_counter()
+                clean_speaker, clean_timestamp, raw_size = self._validate_message(
+                    i, message
+                )
+                total_size += raw_size
+                if total_size > MAX_TOTAL_CONVERSATION_SIZE:
+                    raise ContentTooLargeError(
+                        f"Total conversation size exceeds limit: {total_size} bytes"
+                    )
+                validated = time.perf_counter()
+
+                message = self._sanitize_message(
+                    i, message, clean_speaker, clean_timestamp, metrics
+                )
+                sanitized = time.perf_counter()
+
+                try:
+                    # One call per message: the stream samples them itself
+                    (processed,) = self.pipeline.process_messages(
+                        [message], observer=observer if is_timed_call(i) else None
+                    )
+                except (ValueError, TypeError, AttributeError) as e:
+                    logger.error(f"Error processing message {i + 1}: {e}")
+                    raise InvalidContentError(
+                        f"Failed to process message {i + 1}: {e}"
+                    ) from e
+                speaker_line = format_speaker_line(message.speaker, message.timestamp)
+                # Messages are separated by a blank line
+                chunk = f"{prefix}{speaker_line}\n{processed}"
+                prefix = "\n\n"
+                rendered = time.perf_counter()
+
+                stages["validate"].duration_seconds += validated - started
+                stages["sanitize"].duration_seconds += sanitized - validated
+                render_stage.duration_seconds += rendered - sanitized
+                render_stage.bytes_processed += len(message.content.encode("utf-8"))
+                collector.record_message_processed(
+                    message.content_type.value, len(str(message.content)), metrics
+                )
+                count += 1
+                output_size += len(chunk)
+                yield chunk
+
+            if not count:
+                raise InvalidContentError("Conversation must have at least one message")
+
+            for stage in stages.values():
+                stage.bytes_processed = total_size
+                metrics.record_stage(stage)
+            metrics.record_stage(render_stage)
+            final_metrics = collector.finish_conversion(output_size, metrics)
+            logger.info(f"Markdown generation completed: {output_size} characters")
+            logger.debug(f"Conversion metrics: {final_metrics.to_dict()}")
+
+        except Exception as e:
+            collector.record_error(e, metrics)
+            raise
+
+    def _processing_observer(
+        self, metrics: ConversionMetrics
+    ) -> Optional[ProcessingObserver]:
+        """Return the pipeline timing callback, or None when timing is off.
+
+        Bound to the conversion's metrics, so recording a call does not look
+        the current conversion up again.
+        """
+        collector = self.metrics_collector
+        if not collector.collect_timings:
+            return None
+        return functools.partial(collector.record_processing_time_into, metrics)
+
+    def _assemble_markdown(
+        self,
+        messages: List[Message],
+        processed_contents: Optional[List[str]],
+        metadata: Optional[Dict[str, Any]],
+    ) -> GenerationResult:
+        """Join frontmatter and message lines and finish metrics collection.
+
+        Args:
+            messages: Sanitized messages to format
+            processed_contents: Pipeline output per message, or None to process
+                each message while building its lines
+            metadata: Optional metadata to include as YAML frontmatter
+
+        Returns:
+            The Markdown and the finished metrics
+        """
+        # Formatting continues the render stage begun by content processing
+        with self.metrics_collector.stage("render"):
             lines = []
 
             # Add YAML frontmatter if metadata provided
@@ -75,27 +381,24 @@ class MarkdownGenerator:
                 lines.extend(self._build_frontmatter(metadata))
 
             # Process all messages
-            lines.extend(self._build_message_lines(messages))
+            lines.extend(self._build_message_lines(messages, processed_contents))
 
             # Remove trailing blank line
             if lines and lines[-1] == "":
                 lines.pop()
 
+        with self.metrics_collector.stage("join") as join_stage:
             result = "\n".join(lines)
-            markdown_length = len(result)
+            join_stage.bytes_processed = len(result.encode("utf-8"))
+        markdown_length = len(result)
 
-            # Finish metrics collection
-            final_metrics = self.metrics_collector.finish_conversion(markdown_length)
+        # Finish metrics collection
+        final_metrics = self.metrics_collector.finish_conversion(markdown_length)
 
-            logger.info(f"Markdown generation completed: {markdown_length} characters")
-            logger.debug(f"Conversion metrics: {final_metrics.to_dict()}")
+        logger.info(f"Markdown generation completed: {markdown_length} characters")
+        logger.debug(f"Conversion metrics: {final_metrics.to_dict()}")
 
-            return result
-
-        except Exception as e:
-            # Record error in metrics before re-raising
-            self.metrics_collector.record_error(e)
-            raise
+        return GenerationResult(markdown=result, metrics=final_metrics)
 
     def _build_frontmatter(self, metadata: Dict[str, Any]) -> List[str]:
         """Build YAML frontmatter lines from metadata.
@@ -120,11 +423,18 @@ class MarkdownGenerator:
 
         return lines
 
-    def _build_message_lines(self, messages: List[Message]) -> List[str]:
+    def _build_message_lines(
+        self,
+        messages: List[Message],
+        processed_contents: Optional[List[str]] = None,
+    ) -> List[str]:
         """Build markdown lines from conversation messages.
 
         Args:
             messages: List of Message objects to process
+            processed_contents: Pipeline output for each message, when it has
+                already been processed in batches. Without it each message is
+                processed individually.
 
         Returns:
             List of markdown lines for all messages
@@ -146,8 +456,11 @@ class MarkdownGenerator:
                 speaker_line = format_speaker_line(message.speaker, message.timestamp)
                 lines.append(speaker_line)
 
-                # Process content using the pipeline
-                processed_content = self.pipeline.process_message(message)
+                # Use the batch output when the caller has it
+                if processed_contents is not None:
+                    processed_content = processed_contents[i]
+                else:
+                    processed_content = self.pipeline.process_message(message)
                 lines.append(processed_content)
 
                 # Record metrics for this message
@@ -192,78 +505,42 @@ class MarkdownGenerator:
             raise InvalidContentError("Conversation must have at least one message")
 
         total_size = 0
-        sanitized_messages: List[Message] = []
-
-        for i, message in enumerate(conversation.messages):
-            if not message.speaker:
-                raise InvalidContentError(f"Message {i} missing speaker")
-
-            if message.content is None:
-                raise InvalidContentError(f"Message {i} has None content")
-
-            # Validate and sanitize speaker name
-            try:
-                clean_speaker = validate_speaker_name(message.speaker)
-            except ValueError as e:
-                raise InvalidContentError(f"Message {i} invalid speaker: {e}") from e
+        validated: List[Tuple[Message, str, Optional[str]]] = []
+
+        # Validate every message before sanitizing any of them: a conversation
+        # that fails validation is rejected without paying for sanitization or
+        # emitting truncation warnings for content that is never output.
+        with self.metrics_collector.stage("validate") as validate_stage:
+            for i, message in enumerate(conversation.messages):
+                clean_speaker, clean_timestamp, raw_content_size = (
+                    self._validate_message(i, message)
+                )
 
-            # Validate timestamp if present
-            clean_timestamp = message.timestamp
-            if message.timestamp:
-                try:
-                    clean_timestamp = validate_timestamp(message.timestamp)
-                except ValueError as e:
-                    raise InvalidContentError(
-                        f"Message {i} invalid timestamp: {e}"
-                    ) from e
+                # Count the raw payload the caller supplied. Sanitized sizes
+                # are capped per message, so accumulating those would measure
+                # message count rather than payload size.
+                total_size += raw_content_size
 
-            # Validate content size BEFORE sanitization to catch large content
-            try:
-                raw_content_bytes = str(message.content).encode("utf-8")
-                raw_content_size = len(raw_content_bytes)
-
-                if raw_content_size > MAX_MESSAGE_CONTENT_SIZE:
+                # Reject as soon as the limit is crossed: the conversation is
+                # already doomed, so checking the remaining messages is waste.
+                if total_size > MAX_TOTAL_CONVERSATION_SIZE:
                     raise ContentTooLargeError(
-                        f"Message {i} content exceeds size limit: "
-                        f"{raw_content_size} bytes"
+                        f"Total conversation size exceeds limit: {total_size} bytes"
                     )
 
-            except UnicodeEncodeError as e:
-                raise EncodingError(f"Message {i} has encoding issues: {e}") from e
+                validated.append((message, clean_speaker, clean_timestamp))
 
-            # Count the raw payload the caller supplied. Sanitized sizes are
-            # capped per message, so accumulating those would measure message
-            # count rather than payload size.
-            total_size += raw_content_size
+            validate_stage.bytes_processed = total_size
 
-            # Reject before sanitizing this message: the conversation is already
-            # doomed, so sanitizing it would burn work and emit a misleading
-            # truncation warning for content that is never emitted.
-            if total_size > MAX_TOTAL_CONVERSATION_SIZE:
-                raise ContentTooLargeError(
-                    f"Total conversation size exceeds limit: {total_size} bytes"
-                )
+        sanitized_messages: List[Message] = []
 
-            # Sanitize content after size validation
-            sanitized_content, content_truncated = sanitize_content(
-                str(message.content)
-            )
-            if content_truncated:
-                # Losing the tail of a message is a degraded conversion, not a
-                # failure: report it and keep the remaining messages.
-                self.metrics_collector.record_warning(
-                    f"Message {i} content truncated to "
-                    f"{MAX_CONTENT_SANITIZATION_SIZE} characters"
+        with self.metrics_collector.stage("sanitize") as sanitize_stage:
+            for i, (message, clean_speaker, clean_timestamp) in enumerate(validated):
+                sanitized_messages.append(
+                    self._sanitize_message(i, message, clean_speaker, clean_timestamp)
                 )
 
-            sanitized_messages.append(
-                replace(
-                    message,
-                    speaker=clean_speaker,
-                    timestamp=clean_timestamp,
-                    content=sanitized_content,
-                )
-            )
+            sanitize_stage.bytes_processed = total_size
 
         logger.debug(
             f"Conversation validation passed: {len(conversation.messages)} "
@@ -271,3 +548,96 @@ class MarkdownGenerator:
         )
 
         return sanitized_messages
+
+    def _sanitize_message(
+        self,
+        i: int,
+        message: Message,
+        clean_speaker: str,
+        clean_timestamp: Optional[str],
+        metrics: Optional[ConversionMetrics] = None,
+    ) -> Message:
+        """Return the message with its validated fields and sanitized content.
+
+        Args:
+            i: Zero-based message index, used in warnings
+            message: Message that passed _validate_message
+            clean_speaker: Speaker returned by _validate_message
+            clean_timestamp: Timestamp returned by _validate_message
+            metrics: Conversion to warn into; the current one if omitted
+
+        Returns:
+            A copy of the message safe to format
+        """
+        # Sanitize content after size validation
+        sanitized_content, content_truncated = sanitize_content(str(message.content))
+        if content_truncated:
+            # Losing the tail of a message is a degraded conversion,
+            # not a failure: report it and keep the remaining messages.
+            self.metrics_collector.record_warning(
+                f"Message {i} content truncated to "
+                f"{MAX_CONTENT_SANITIZATION_SIZE} characters",
+                metrics,
+            )
+
+        return replace(
+            message,
+            speaker=clean_speaker,
+            timestamp=clean_timestamp,
+            content=sanitized_content,
+        )
+
+    def _validate_message(
+        self, i: int, message: Message
+    ) -> Tuple[str, Optional[str], int]:
+        """Validate one message's fields and raw content size.
+
+        Args:
+            i: Zero-based message index, used in error messages
+            message: Message to validate
+
+        Returns:
+            Tuple of (clean speaker, clean timestamp, raw content size in bytes)
+
+        Raises:
+            InvalidContentError: If the message is invalid
+            ContentTooLargeError: If its content exceeds the per-message limit
+            EncodingError: If its content cannot be encoded
+        """
+        if not message.speaker:
+            raise InvalidContentError(f"Message {i} missing speaker")
+
+        if message.content is None:
+            raise InvalidContentError(f"Message {i} has None content")
+
+        # Validate and sanitize speaker name
+        try:
+            clean_speaker = validate_speaker_name(message.speaker)
+        except ValueError as e:
+            raise InvalidContentError(f"Message {i} invalid speaker: {e}") from e
+
+        # Validate timestamp if present
+        clean_timestamp = message.timestamp
+        if message.timestamp:
+            try:
+                clean_timestamp = validate_timestamp(message.timestamp)
+            except ValueError as e:
+                raise InvalidContentError(f"Message {i} invalid timestamp: {e}") from e
+
+        # Validate content size BEFORE sanitization to catch large content
+        try:
+            raw_content_size = len(str(message.content).encode("utf-8"))
+        except UnicodeEncodeError as e:
+            raise EncodingError(f"Message {i} has encoding issues: {e}") from e
+
+        if raw_content_size > MAX_MESSAGE_CONTENT_SIZE:
+            raise ContentTooLargeError(
+                f"Message {i} content exceeds size limit: {raw_content_size} bytes"
+            )
+
+        return clean_speaker, clean_timestamp, raw_content_size
+
+
+def _content_bytes(messages: List[Message]) -> int:
+    """Return the UTF-8 size of the messages' content."""
+    return sum(len(message.content.encode("utf-8")) for message in messages)
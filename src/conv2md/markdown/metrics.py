@@ -1,11 +1,36 @@
 """Metrics and observability for markdown generation."""
 
+import math
+import os
+import sys
 import time
 import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
 from enum import Enum
 
+# Conversion stages in pipeline order. Stage metrics are reported in this
+# order; a stage outside it is reported after them.
+CONVERSION_STAGES = ("parse", "validate", "sanitize", "render", "join", "write")
+
+# Upper bounds (exclusive), in seconds, of the processing-time histogram
+# buckets: powers of two from 1 microsecond to about 67 seconds, plus one
+# overflow bucket. Fixed bounds keep every histogram a short list of counters
+# whatever the number of samples, and let histograms be merged by addition.
+TIMING_BUCKET_BOUNDS = tuple(2**exponent / 1_000_000 for exponent in range(27))
+
+# tracemalloc's peak is process-wide, so a stage can only reset it and read
+# it back as its own while no other stage is measuring memory. Stages that
+# overlap another (conversions on several threads) report no memory figures
+# rather than each other's.
+_memory_lock = threading.Lock()
+_memory_stages_running = 0
+_memory_stages_started = 0
+
 
 class ConversionStatus(Enum):
     """Status of markdown conversion."""
@@ -15,6 +40,215 @@ class ConversionStatus(Enum):
     PARTIAL = "partial"
 
 
+@dataclass
+class TimingHistogram:
+    """Fixed-bucket histogram of processing times.
+
+    Percentiles are reported as the upper bound of the bucket holding the
+    requested rank, capped at the largest sample: within a factor of two of
+    the true value, which is enough to tell a slow processor from a fast one.
+    """
+
+    counts: List[int] = field(
+        default_factory=lambda: [0] * (len(TIMING_BUCKET_BOUNDS) + 1)
+    )
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float, samples: int = 1) -> None:
+        """Record ``samples`` observations of ``seconds`` each.
+
+        A batch processed in one call records its mean per-message time once
+        per message, so batched and per-message processing stay comparable.
+        """
+        # Bucket i holds values below 2**i microseconds: the bit length of the
+        # whole microseconds is exactly that i, with no float math per sample.
+        index = int(seconds * 1_000_000).bit_length()
+        if index > len(TIMING_BUCKET_BOUNDS):
+            index = len(TIMING_BUCKET_BOUNDS)
+
+        self.counts[index] += samples
+        self.count += samples
+        self.total_seconds += seconds * samples
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def merge(self, other: "TimingHistogram") -> None:
+        """Add another histogram's samples to this one."""
+        for index, bucket_count in enumerate(other.counts):
+            self.counts[index] += bucket_count
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Return the bucket bound at or below which ``fraction`` of samples lie.
+
+        Args:
+            fraction: Quantile between 0 and 1, e.g. 0.95
+
+        Returns:
+            Estimated quantile in seconds, or None when nothing was recorded
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(fraction * self.count))
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                if index < len(TIMING_BUCKET_BOUNDS):
+                    return min(TIMING_BUCKET_BOUNDS[index], self.max_seconds)
+                break
+        return self.max_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the histogram summary to a dictionary for logging/export."""
+        return {
+            "count": self.count,
+            "total_seconds": self.total_seconds,
+            "p50_seconds": self.percentile(0.50),
+            "p95_seconds": self.percentile(0.95),
+            "p99_seconds": self.percentile(0.99),
+            "max_seconds": self.max_seconds,
+        }
+
+
+@dataclass
+class StageMetrics:
+    """Timing and volume of one conversion stage."""
+
+    name: str
+    duration_seconds: float = 0.0
+    # UTF-8 size of the data the stage consumed
+    bytes_processed: int = 0
+    # Python heap traced by tracemalloc: the highest point reached during the
+    # stage and the amount still allocated at its end. None unless memory
+    # tracking is enabled.
+    memory_peak_bytes: Optional[int] = None
+    memory_current_bytes: Optional[int] = None
+
+    @property
+    def throughput_bytes_per_sec(self) -> Optional[float]:
+        """Bytes consumed per second, or None if nothing was measured."""
+        if self.duration_seconds > 0 and self.bytes_processed > 0:
+            return self.bytes_processed / self.duration_seconds
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert stage metrics to dictionary for logging/export."""
+        stage_dict = {
+            "duration_seconds": self.duration_seconds,
+            "bytes_processed": self.bytes_processed,
+            "throughput_bytes_per_sec": self.throughput_bytes_per_sec,
+        }
+        if self.memory_peak_bytes is not None:
+            stage_dict["memory_peak_bytes"] = self.memory_peak_bytes
+            stage_dict["memory_current_bytes"] = self.memory_current_bytes
+        return stage_dict
+
+
+@contextmanager
+def measure_stage(name: str, track_memory: bool = False) -> Iterator[StageMetrics]:
+    """Time the enclosed block as one conversion stage.
+
+    The caller sets ``bytes_processed`` on the yielded metrics. The duration
+    is recorded even when the block raises, so a failing stage still shows
+    where the time went.
+
+    Args:
+        name: Stage name, normally one of CONVERSION_STAGES
+        track_memory: Also record the stage's tracemalloc peak and current
+            allocation. Only measured while tracemalloc is tracing, and only
+            if no other stage measures memory while this one runs: the peak
+            is process-wide, so concurrent conversions cannot tell theirs
+            apart.
+    """
+    global _memory_stages_running, _memory_stages_started
+
+    stage = StageMetrics(name=name)
+    measure_memory = track_memory and tracemalloc.is_tracing()
+    if measure_memory:
+        with _memory_lock:
+            _memory_stages_running += 1
+            _memory_stages_started += 1
+            alone = _memory_stages_running == 1
+            started_as = _memory_stages_started
+            if alone:
+                tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield stage
+    finally:
+        stage.duration_seconds = time.perf_counter() - started
+        if measure_memory:
+            with _memory_lock:
+                current, peak = tracemalloc.get_traced_memory()
+                # Another stage that started meanwhile reset the peak too
+                alone = alone and _memory_stages_started == started_as
+                _memory_stages_running -= 1
+            if alone:
+                stage.memory_current_bytes = current
+                stage.memory_peak_bytes = peak
+            else:
+                logging.getLogger(__name__).debug(
+                    f"Not measuring memory for stage {name}: another stage "
+                    "measured memory at the same time"
+                )
+
+
+@contextmanager
+def memory_tracing(enabled: bool = True) -> Iterator[None]:
+    """Keep tracemalloc tracing for the enclosed block.
+
+    Tracing already started elsewhere is left running; tracing started here
+    is stopped on exit, so nothing outside pays its overhead afterwards.
+    """
+    started_here = enabled and not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Return this process's resident set size, or None where unavailable.
+
+    Read from /proc on Linux. Elsewhere the stdlib offers no current RSS
+    reading, only the peak (see peak_rss_bytes).
+    """
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Return this process's peak resident set size, or None where unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows has no resource module
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes everywhere else. The kernel
+    # updates it lazily, so callers should not trust it below a direct reading.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def max_known(*values: Optional[int]) -> Optional[int]:
+    """Return the largest value that is not None, or None if all are."""
+    known = [value for value in values if value is not None]
+    return max(known) if known else None
+
+
 @dataclass
 class ConversionMetrics:
     """Metrics collected during markdown conversion."""
@@ -43,8 +277,72 @@ class ConversionMetrics:
     # Performance metrics
     processing_rate_chars_per_sec: Optional[float] = None
 
+    # Per-message processing time, keyed by (processor class name, content
+    # type value). Recording into one histogram per pair keeps the per-call
+    # cost to a single lookup; the per-processor and per-content-type views
+    # are merged from it on demand. While the conversion runs the keys are the
+    # processor class and ContentType themselves, named once by finish().
+    # Empty when timing collection is off.
+    processing_timings: Dict[Tuple[Any, Any], TimingHistogram] = field(
+        default_factory=dict
+    )
+
+    # Per-stage timing and volume, keyed by stage name
+    stages: Dict[str, StageMetrics] = field(default_factory=dict)
+
+    # Memory metrics, measured only when memory tracking is enabled. RSS is
+    # the whole process as the OS sees it; traced figures are the Python heap
+    # as tracemalloc sees it, over the whole conversion.
+    memory_tracked: bool = False
+    rss_before_bytes: Optional[int] = None
+    rss_after_bytes: Optional[int] = None
+    rss_peak_bytes: Optional[int] = None
+    traced_peak_bytes: Optional[int] = None
+
+    def record_stage(self, stage: StageMetrics) -> None:
+        """Add a measured stage, accumulating into an earlier one of that name."""
+        existing = self.stages.get(stage.name)
+        if existing is None:
+            self.stages[stage.name] = stage
+        else:
+            existing.duration_seconds += stage.duration_seconds
+            existing.bytes_processed += stage.bytes_processed
+            if stage.memory_peak_bytes is not None:
+                existing.memory_peak_bytes = max(
+                    existing.memory_peak_bytes or 0, stage.memory_peak_bytes
+                )
+                existing.memory_current_bytes = stage.memory_current_bytes
+
+    def _ordered_stages(self) -> List[StageMetrics]:
+        """Stages in pipeline order, unknown stage names last."""
+        known = [self.stages[name] for name in CONVERSION_STAGES if name in self.stages]
+        extra = [
+            stage
+            for name, stage in sorted(self.stages.items())
+            if name not in CONVERSION_STAGES
+        ]
+        return known + extra
+
+    @property
+    def processor_timings(self) -> Dict[str, TimingHistogram]:
+        """Processing time histograms keyed by processor class name."""
+        return self._merge_timings(0)
+
+    @property
+    def content_type_timings(self) -> Dict[str, TimingHistogram]:
+        """Processing time histograms keyed by content type value."""
+        return self._merge_timings(1)
+
+    def _merge_timings(self, key_index: int) -> Dict[str, TimingHistogram]:
+        """Merge the pair histograms on one element of their key."""
+        merged: Dict[str, TimingHistogram] = {}
+        for key, histogram in self.processing_timings.items():
+            merged.setdefault(key[key_index], TimingHistogram()).merge(histogram)
+        return merged
+
     def finish(self) -> None:
         """Mark the conversion as finished and calculate final metrics."""
+        self.processing_timings = _name_timing_keys(self.processing_timings)
         self.end_time = time.monotonic()
         self.duration_seconds = self.end_time - self.start_time
 
@@ -67,65 +365,288 @@ class ConversionMetrics:
             "warnings_issued": self.warnings_issued,
             "status": self.status.value,
             "processing_rate_chars_per_sec": self.processing_rate_chars_per_sec,
+            "processor_timings": {
+                name: histogram.to_dict()
+                for name, histogram in sorted(self.processor_timings.items())
+            },
+            "content_type_timings": {
+                name: histogram.to_dict()
+                for name, histogram in sorted(self.content_type_timings.items())
+            },
+            "stages": {stage.name: stage.to_dict() for stage in self._ordered_stages()},
+            **self._memory_dict(),
+        }
+
+    def _memory_dict(self) -> Dict[str, Any]:
+        """Memory figures for to_dict(); empty unless memory was tracked."""
+        if not self.memory_tracked:
+            return {}
+        return {
+            "memory": {
+                "rss_before_bytes": self.rss_before_bytes,
+                "rss_after_bytes": self.rss_after_bytes,
+                "rss_peak_bytes": self.rss_peak_bytes,
+                "traced_peak_bytes": self.traced_peak_bytes,
+            }
         }
 
 
+def _name_timing_keys(
+    timings: Dict[Tuple[Any, Any], TimingHistogram],
+) -> Dict[Tuple[str, str], TimingHistogram]:
+    """Replace (processor class, ContentType) keys with their names."""
+    named: Dict[Tuple[str, str], TimingHistogram] = {}
+    for (processor, content_type), histogram in timings.items():
+        key = (
+            getattr(processor, "__name__", processor),
+            getattr(content_type, "value", content_type),
+        )
+        named.setdefault(key, TimingHistogram()).merge(histogram)
+    return named
+
+
 class MetricsCollector:
-    """Collects and reports metrics during markdown generation."""
+    """Collects and reports metrics during markdown generation.
+
+    The conversion in progress is held in a context variable, so each thread
+    and each asyncio task sees only the conversion it started. One collector,
+    and the generator that owns it, can therefore be shared by a thread pool
+    or an async server without conversions overwriting each other's metrics.
+    """
 
-    def __init__(self):
-        """Initialize metrics collector."""
+    def __init__(self, collect_timings: bool = True, track_memory: bool = False):
+        """Initialize metrics collector.
+
+        Args:
+            collect_timings: Record per-processor and per-content-type
+                processing time histograms. Long conversations time a
+                sample of their processor calls, not every one
+            track_memory: Record process RSS and tracemalloc allocation per
+                conversion and per stage. Tracing slows allocation-heavy
+                code severalfold, so this is opt-in. tracemalloc's peak is
+                process-wide: stages that overlap another conversion's on a
+                different thread report no memory peak.
+        """
         self.logger = logging.getLogger(f"{__name__}.MetricsCollector")
-        self.current_metrics: Optional[ConversionMetrics] = None
+        # One variable per collector: two collectors in the same context
+        # must not see each other's conversions either.
+        self._current: ContextVar[Optional[ConversionMetrics]] = ContextVar(
+            f"conv2md_metrics_{id(self):x}", default=None
+        )
+        self.collect_timings = collect_timings
+        self.track_memory = track_memory
+        # tracemalloc is process-wide: overlapping tracked conversions share
+        # one trace, which stops only when the last of them finishes.
+        self._tracing_lock = threading.Lock()
+        self._traced_conversions: Set[int] = set()
+        self._started_tracing = False
+
+    @property
+    def current_metrics(self) -> Optional[ConversionMetrics]:
+        """Metrics of the conversion running in the current thread or task."""
+        return self._current.get()
+
+    @current_metrics.setter
+    def current_metrics(self, metrics: Optional[ConversionMetrics]) -> None:
+        self._current.set(metrics)
 
     def start_conversion(self) -> ConversionMetrics:
         """Start tracking a new conversion."""
         self.current_metrics = ConversionMetrics()
+        if self.track_memory:
+            self._start_memory_tracking(self.current_metrics)
         self.logger.debug("Started conversion metrics collection")
         return self.current_metrics
 
-    def record_message_processed(self, content_type: str, content_size: int) -> None:
-        """Record that a message was processed."""
-        if not self.current_metrics:
+    def _start_memory_tracking(self, metrics: ConversionMetrics) -> None:
+        """Take the opening RSS reading and make sure tracemalloc is tracing."""
+        metrics.memory_tracked = True
+        metrics.rss_before_bytes = current_rss_bytes()
+        with self._tracing_lock:
+            self._traced_conversions.add(id(metrics))
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+        # The peak is not reset here: other conversions may be measuring it.
+        # Each stage resets it when it can, and the conversion's peak is
+        # taken from its stages.
+
+    def _finish_memory_tracking(self, metrics: ConversionMetrics) -> None:
+        """Take the closing readings and stop tracing if we started it."""
+        with self._tracing_lock:
+            # A failure after finish_conversion records an error as well;
+            # only the first of the two closes the readings.
+            if id(metrics) not in self._traced_conversions:
+                return
+            self._traced_conversions.discard(id(metrics))
+        if tracemalloc.is_tracing():
+            # Stages reset the peak as they start, so the conversion-wide
+            # peak is the largest of theirs and of what is traced now.
+            traced_now = tracemalloc.get_traced_memory()[1]
+            stage_peaks = [
+                stage.memory_peak_bytes
+                for stage in metrics.stages.values()
+                if stage.memory_peak_bytes is not None
+            ]
+            metrics.traced_peak_bytes = max([traced_now, *stage_peaks])
+        metrics.rss_after_bytes = current_rss_bytes()
+        metrics.rss_peak_bytes = max_known(
+            peak_rss_bytes(), metrics.rss_before_bytes, metrics.rss_after_bytes
+        )
+        with self._tracing_lock:
+            if self._started_tracing and not self._traced_conversions:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def record_message_processed(
+        self,
+        content_type: str,
+        content_size: int,
+        metrics: Optional[ConversionMetrics] = None,
+    ) -> None:
+        """Record that a message was processed.
+
+        Args:
+            content_type: The message's content type value
+            content_size: Size of its content
+            metrics: Conversion to record into; the current one if omitted.
+                A stream passes its own, since other streams may be
+                consumed on the same thread in between.
+        """
+        if metrics is None:
+            metrics = self.current_metrics
+        if not metrics:
             return
 
-        self.current_metrics.message_count += 1
-        self.current_metrics.total_content_size += content_size
+        metrics.message_count += 1
+        metrics.total_content_size += content_size
 
         if content_type == "code":
-            self.current_metrics.code_blocks_processed += 1
+            metrics.code_blocks_processed += 1
         elif content_type == "image":
-            self.current_metrics.images_processed += 1
+            metrics.images_processed += 1
         else:
-            self.current_metrics.text_messages_processed += 1
+            metrics.text_messages_processed += 1
+
+    def record_processing_time(
+        self,
+        processor: Any,
+        content_type: Any,
+        seconds: float,
+        message_count: int = 1,
+    ) -> None:
+        """Record the time one processor call took.
+
+        The signature matches the pipeline's ProcessingObserver, so the
+        pipeline calls this directly: it runs once per processor call and an
+        adapter in between would cost as much as the recording itself.
+
+        Args:
+            processor: Processor that did the work
+            content_type: ContentType of the processed messages
+            seconds: Wall time of the call
+            message_count: Messages the call processed; the time is spread
+                evenly across them
+        """
+        self.record_processing_time_into(
+            self.current_metrics, processor, content_type, seconds, message_count
+        )
+
+    def record_processing_time_into(
+        self,
+        metrics: Optional[ConversionMetrics],
+        processor: Any,
+        content_type: Any,
+        seconds: float,
+        message_count: int = 1,
+    ) -> None:
+        """Record the time one processor call took into the given conversion.
 
-    def record_error(self, error: Exception) -> None:
-        """Record an error during conversion."""
-        if not self.current_metrics:
+        Bound to its conversion with functools.partial, this is the
+        pipeline observer of a stream, whose conversion is not necessarily
+        the current one when its messages are processed.
+        """
+        if metrics is None or not self.collect_timings:
             return
 
-        self.current_metrics.errors_encountered += 1
-        self.current_metrics.status = ConversionStatus.ERROR
+        # Keyed by the objects themselves; finish() turns them into names
+        key = (processor.__class__, content_type)
+        histogram = metrics.processing_timings.get(key)
+        if histogram is None:
+            histogram = metrics.processing_timings[key] = TimingHistogram()
+        histogram.record(seconds / message_count, message_count)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """Time the enclosed block as a stage of the current conversion.
+
+        Args:
+            name: Stage name, normally one of CONVERSION_STAGES
+        """
+        try:
+            with measure_stage(name, track_memory=self.track_memory) as stage:
+                yield stage
+        finally:
+            # Recorded after measure_stage has set the duration
+            if self.current_metrics:
+                self.current_metrics.record_stage(stage)
+
+    def record_error(
+        self, error: Exception, metrics: Optional[ConversionMetrics] = None
+    ) -> None:
+        """Record an error during conversion.
+
+        Args:
+            error: The error
+            metrics: Conversion to record into; the current one if omitted
+        """
+        if metrics is None:
+            metrics = self.current_metrics
+        if not metrics:
+            return
+
+        metrics.errors_encountered += 1
+        metrics.status = ConversionStatus.ERROR
+        self._finish_memory_tracking(metrics)
         self.logger.error(f"Conversion error recorded: {error}")
 
-    def record_warning(self, message: str) -> None:
-        """Record a warning during conversion."""
-        if not self.current_metrics:
+    def record_warning(
+        self, message: str, metrics: Optional[ConversionMetrics] = None
+    ) -> None:
+        """Record a warning during conversion.
+
+        Args:
+            message: What was degraded
+            metrics: Conversion to record into; the current one if omitted
+        """
+        if metrics is None:
+            metrics = self.current_metrics
+        if not metrics:
             return
 
-        self.current_metrics.warnings_issued += 1
-        if self.current_metrics.status == ConversionStatus.SUCCESS:
-            self.current_metrics.status = ConversionStatus.PARTIAL
+        metrics.warnings_issued += 1
+        if metrics.status == ConversionStatus.SUCCESS:
+            metrics.status = ConversionStatus.PARTIAL
         self.logger.warning(f"Conversion warning: {message}")
 
-    def finish_conversion(self, output_size: int) -> ConversionMetrics:
-        """Finish tracking conversion and return final metrics."""
-        if not self.current_metrics:
+    def finish_conversion(
+        self, output_size: int, metrics: Optional[ConversionMetrics] = None
+    ) -> ConversionMetrics:
+        """Finish tracking conversion and return final metrics.
+
+        Args:
+            output_size: Size of the Markdown produced
+            metrics: Conversion to finish; the current one if omitted
+        """
+        if metrics is None:
+            metrics = self.current_metrics
+        if not metrics:
             raise ValueError("No conversion in progress")
 
-        self.current_metrics.output_size = output_size
-        self.current_metrics.finish()
+        metrics.output_size = output_size
+        metrics.finish()
+        self._finish_memory_tracking(metrics)
 
         # Caller owns reporting; MarkdownGenerator.generate logs the returned
         # metrics, so logging them here would duplicate every entry.
-        return self.current_metrics
+        return metrics
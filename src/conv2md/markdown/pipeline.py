@@ -1,8 +1,21 @@
 """Content processing pipeline for markdown generation."""
 
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from itertools import groupby
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
 from conv2md.domain.models import Message, ContentType
+from conv2md.markdown.blocks import create_code_block, escape_markdown_content
+from conv2md.markdown.constants import DEFAULT_MAX_PROCESSOR_CONCURRENCY
+
+if TYPE_CHECKING:  # pragma: no cover
+    # asyncio costs more to import than the rest of this package; synchronous
+    # conversions never touch it, so it is imported where it is used.
+    import asyncio
+
+# Joins a run of texts for batch escaping. It is not a Markdown escape character,
+# so it passes through escaping unchanged and splits the result back apart.
+_BATCH_SEPARATOR = "\x00"
 
 
 class ContentProcessor(ABC):
@@ -18,6 +31,73 @@ class ContentProcessor(ABC):
         """Process message content into markdown format."""
         pass
 
+    def process_batch(self, messages: Sequence[Message]) -> List[str]:
+        """Process a run of messages sharing one content type.
+
+        Override to amortize work across messages. The result must match
+        calling ``process`` on each message in order; the default does exactly
+        that.
+        """
+        return [self.process(message) for message in messages]
+
+    def resolve(self) -> "ContentProcessor":
+        """Return the processor that does the work.
+
+        Processors are their own implementation; proxies such as lazily loaded
+        plugins return the processor they stand in for.
+        """
+        return self
+
+
+class AsyncContentProcessor(ContentProcessor):
+    """Base class for I/O-bound processors with a coroutine implementation.
+
+    The async pipeline path awaits ``aprocess`` for many messages at once. The
+    synchronous path still works, one blocking event loop per message, but
+    must not be used from inside a running event loop.
+    """
+
+    @abstractmethod
+    async def aprocess(self, message: Message) -> str:
+        """Process message content into markdown format."""
+        pass
+
+    def process(self, message: Message) -> str:
+        """Process one message by running ``aprocess`` to completion."""
+        import asyncio
+
+        return asyncio.run(self.aprocess(message))
+
+
+class MessageProcessingError(Exception):
+    """A processor failed on one message of a batch; chained from its error.
+
+    Attributes:
+        index: Position of the failed message in the processed messages
+    """
+
+    def __init__(self, index: int, error: Exception):
+        super().__init__(str(error))
+        self.index = index
+
+
+# Notified after each timed processor call with the processor that did the
+# work, the content type it handled, the call's wall time in seconds and the
+# number of messages the call processed.
+ProcessingObserver = Callable[[ContentProcessor, ContentType, float, int], None]
+
+# Timing and recording a call costs about as much as processing a short
+# message, so only a sample of a conversion's calls is timed: all of the first
+# FULLY_TIMED_CALLS, which covers most conversations, then one call in
+# TIMING_SAMPLE_INTERVAL.
+FULLY_TIMED_CALLS = 64
+TIMING_SAMPLE_INTERVAL = 16
+
+
+def is_timed_call(index: int) -> bool:
+    """Whether a conversion's processor call number ``index`` is timed."""
+    return index < FULLY_TIMED_CALLS or index % TIMING_SAMPLE_INTERVAL == 0
+
 
 class TextContentProcessor(ContentProcessor):
     """Processor for text content."""
@@ -28,10 +108,29 @@ class TextContentProcessor(ContentProcessor):
 
     def process(self, message: Message) -> str:
         """Process text content into escaped markdown."""
-        from conv2md.markdown.blocks import escape_markdown_content
-
         return escape_markdown_content(str(message.content))
 
+    def process_batch(self, messages: Sequence[Message]) -> List[str]:
+        """Escape a run of text messages in one pass over their joined content.
+
+        Escaping is per character, so one pass over the joined texts equals one
+        pass per text, while paying each replacement's per-call cost once per
+        run instead of once per message.
+        """
+        # A subclass customizing process() must not be bypassed by the
+        # combined pass, which only reproduces the stock escaping.
+        if type(self).process is not TextContentProcessor.process:
+            return super().process_batch(messages)
+
+        texts = [str(message.content) for message in messages]
+        joined = _BATCH_SEPARATOR.join(texts)
+        # The separator is a control character sanitization strips, but the
+        # pipeline can be driven with unsanitized messages: never split on a
+        # separator the caller supplied.
+        if joined.count(_BATCH_SEPARATOR) != len(texts) - 1:
+            return [escape_markdown_content(text) for text in texts]
+        return escape_markdown_content(joined).split(_BATCH_SEPARATOR)
+
 
 class CodeContentProcessor(ContentProcessor):
     """Processor for code content."""
@@ -42,8 +141,6 @@ class CodeContentProcessor(ContentProcessor):
 
     def process(self, message: Message) -> str:
         """Process code content into fenced code blocks."""
-        from conv2md.markdown.blocks import create_code_block
-
         return create_code_block(message.content, message.language)
 
 
@@ -56,26 +153,88 @@ class ImageContentProcessor(ContentProcessor):
 
     def process(self, message: Message) -> str:
         """Process image content into markdown image format."""
-        from conv2md.markdown.blocks import escape_markdown_content
-
         alt_text = escape_markdown_content(str(message.content))
         return f"![Image]({alt_text})"
 
 
 class ContentProcessingPipeline:
-    """Pipeline for processing different content types."""
+    """Pipeline for processing different content types.
 
-    def __init__(self):
-        """Initialize pipeline with default processors."""
-        self.processors: List[ContentProcessor] = [
-            TextContentProcessor(),
-            CodeContentProcessor(),
-            ImageContentProcessor(),
-        ]
+    Processors are consulted in registration order and the first one whose
+    ``can_process`` accepts a content type handles it. That answer is fixed
+    for a given processor list, so it is resolved once per ``ContentType`` into
+    a dispatch table rather than rescanned for every message.
+    """
+
+    def __init__(self, use_plugins: bool = False):
+        """Initialize pipeline with default processors.
+
+        Args:
+            use_plugins: Register installed processor plugins ahead of the
+                defaults. Plugins are discovered from package metadata and
+                imported only when a message of their content type arrives.
+        """
+        # Shared fallback for content types no processor claims. Processors
+        # are stateless, so one instance serves every unclaimed message.
+        self._fallback: ContentProcessor = TextContentProcessor()
+
+        processors: List[ContentProcessor] = []
+        if use_plugins:
+            # Imported here: the plugins module builds on this one
+            from conv2md.markdown.plugins import discover_processors
+
+            processors.extend(discover_processors())
+
+        processors.extend(
+            [
+                TextContentProcessor(),
+                CodeContentProcessor(),
+                ImageContentProcessor(),
+            ]
+        )
+        self.processors = processors
+
+    @property
+    def processors(self) -> List[ContentProcessor]:
+        """Registered processors, in precedence order."""
+        return self._processors
+
+    @processors.setter
+    def processors(self, processors: List[ContentProcessor]) -> None:
+        """Replace the registered processors and rebuild the dispatch table."""
+        self._processors = list(processors)
+        self._rebuild_dispatch()
 
     def add_processor(self, processor: ContentProcessor) -> None:
         """Add a custom content processor to the pipeline."""
-        self.processors.append(processor)
+        self._processors.append(processor)
+        self._rebuild_dispatch()
+
+    def _rebuild_dispatch(self) -> None:
+        """Resolve the handling processor for every content type.
+
+        Mutating ``processors`` in place bypasses this; register through
+        ``add_processor`` or assign a new list so the table stays current.
+        """
+        self._dispatch: Dict[ContentType, ContentProcessor] = {}
+        for content_type in ContentType:
+            processor = self._find_processor(content_type)
+            if processor is not None:
+                self._dispatch[content_type] = processor
+
+    def _find_processor(self, content_type: ContentType) -> Optional[ContentProcessor]:
+        """Return the first registered processor accepting content_type."""
+        for processor in self._processors:
+            if processor.can_process(content_type):
+                return processor
+        return None
+
+    def processor_for(self, content_type: ContentType) -> ContentProcessor:
+        """Return the processor that handles content_type.
+
+        Falls back to text processing when no registered processor claims it.
+        """
+        return self._dispatch.get(content_type, self._fallback)
 
     def process_message(self, message: Message) -> str:
         """Process a message using the appropriate processor.
@@ -85,14 +244,211 @@ class ContentProcessingPipeline:
 
         Returns:
             Processed markdown content
+        """
+        return self.processor_for(message.content_type).process(message)
+
+    def process_messages(
+        self,
+        messages: Sequence[Message],
+        observer: Optional[ProcessingObserver] = None,
+    ) -> List[str]:
+        """Process messages in order, batching consecutive runs of one type.
+
+        Each run of consecutive messages sharing a content type goes to its
+        processor's ``process_batch`` in a single call.
+
+        Args:
+            messages: Messages to process
+            observer: Optional callback timing the processor calls chosen by
+                is_timed_call
+
+        Returns:
+            Processed markdown content, one entry per message in input order
+
+        Raises:
+            ValueError: If a processor returns the wrong number of results
+        """
+        results: List[str] = []
+        groups = groupby(messages, key=_content_type_of)
+        for index, (content_type, run) in enumerate(groups):
+            batch = list(run)
+            processor = self.processor_for(content_type).resolve()
+            # is_timed_call, inlined: this runs once per message at worst
+            if observer is None or (
+                index >= FULLY_TIMED_CALLS and index % TIMING_SAMPLE_INTERVAL
+            ):
+                processed = processor.process_batch(batch)
+            else:
+                started = time.perf_counter()
+                processed = processor.process_batch(batch)
+                observer(
+                    processor,
+                    content_type,
+                    time.perf_counter() - started,
+                    len(batch),
+                )
+            if len(processed) != len(batch):
+                raise ValueError(
+                    f"Processor for {content_type.value} content returned "
+                    f"{len(processed)} results for {len(batch)} messages"
+                )
+            results.extend(processed)
+        return results
+
+    async def aprocess_message(self, message: Message) -> str:
+        """Process a message, awaiting the processor if it is async.
+
+        Args:
+            message: Message to process
+
+        Returns:
+            Processed markdown content
+        """
+        processor = self.processor_for(message.content_type).resolve()
+        if isinstance(processor, AsyncContentProcessor):
+            return await processor.aprocess(message)
+        return processor.process(message)
+
+    async def aprocess_messages(
+        self,
+        messages: Sequence[Message],
+        max_concurrency: int = DEFAULT_MAX_PROCESSOR_CONCURRENCY,
+        observer: Optional[ProcessingObserver] = None,
+    ) -> List[str]:
+        """Process messages in order, running async processors concurrently.
+
+        Runs handled by synchronous processors are batched exactly as in
+        ``process_messages``. Messages handled by an AsyncContentProcessor are
+        scheduled at once and awaited together, at most ``max_concurrency`` in
+        flight; results are placed back at their message's position.
+
+        Args:
+            messages: Messages to process
+            max_concurrency: Maximum async processor calls in flight at once
+            observer: Optional callback timing the synchronous processor
+                calls chosen by is_timed_call, and every async call. Async
+                calls wait on I/O far longer than timing takes, and are
+                timed from when they acquire a concurrency slot.
+
+        Returns:
+            Processed markdown content, one entry per message in input order
 
         Raises:
-            ValueError: If no processor can handle the content type
+            MessageProcessingError: If a processor raises ValueError,
+                TypeError or AttributeError for a message. An async failure is
+                reported as it happens, without waiting for the calls still in
+                flight; a failed synchronous run is replayed one message at a
+                time to find the message, which repeats no async call.
+            ValueError: If max_concurrency is not positive, or a processor
+                returns the wrong number of results
         """
-        for processor in self.processors:
-            if processor.can_process(message.content_type):
-                return processor.process(message)
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be positive: {max_concurrency}")
+
+        import asyncio
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        results: List[Optional[str]] = []
+        pending: List[Tuple[int, "asyncio.Task[str]"]] = []
+
+        try:
+            groups = groupby(messages, key=_content_type_of)
+            for index, (content_type, run) in enumerate(groups):
+                batch = list(run)
+                processor = self.processor_for(content_type).resolve()
+
+                if isinstance(processor, AsyncContentProcessor):
+                    for message in batch:
+                        task = asyncio.ensure_future(
+                            _bounded_aprocess(
+                                semaphore, processor, message, len(results), observer
+                            )
+                        )
+                        pending.append((len(results), task))
+                        results.append(None)
+                    continue
+
+                try:
+                    if observer is None or not is_timed_call(index):
+                        processed = processor.process_batch(batch)
+                    else:
+                        started = time.perf_counter()
+                        processed = processor.process_batch(batch)
+                        observer(
+                            processor,
+                            content_type,
+                            time.perf_counter() - started,
+                            len(batch),
+                        )
+                except (ValueError, TypeError, AttributeError):
+                    _raise_for_failed_message(processor, batch, len(results))
+                    raise
+                if len(processed) != len(batch):
+                    raise ValueError(
+                        f"Processor for {content_type.value} content returned "
+                        f"{len(processed)} results for {len(batch)} messages"
+                    )
+                results.extend(processed)
+
+            if pending:
+                outputs = await asyncio.gather(*(task for _, task in pending))
+                for (position, _), output in zip(pending, outputs):
+                    results[position] = output
+
+        except BaseException:
+            # One failure (or our own cancellation) abandons the conversion:
+            # stop the calls still in flight rather than leak them.
+            for _, task in pending:
+                task.cancel()
+            raise
+
+        return results
+
+
+async def _bounded_aprocess(
+    semaphore: "asyncio.Semaphore",
+    processor: AsyncContentProcessor,
+    message: Message,
+    position: int,
+    observer: Optional[ProcessingObserver],
+) -> str:
+    """Await one async processor call once a concurrency slot is free.
+
+    A failure is raised as a MessageProcessingError naming ``position``, so
+    the caller never has to repeat the call to find which message failed.
+    """
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            result = await processor.aprocess(message)
+        except (ValueError, TypeError, AttributeError) as e:
+            raise MessageProcessingError(position, e) from e
+        if observer is not None:
+            observer(
+                processor,
+                message.content_type,
+                time.perf_counter() - started,
+                1,
+            )
+        return result
+
+
+def _raise_for_failed_message(
+    processor: ContentProcessor, batch: Sequence[Message], start: int
+) -> None:
+    """Process a failed synchronous run one message at a time.
+
+    Raises:
+        MessageProcessingError: For the first message that fails, numbered
+            from ``start``. Nothing is raised if they all succeed one by one.
+    """
+    for offset, message in enumerate(batch):
+        try:
+            processor.process(message)
+        except (ValueError, TypeError, AttributeError) as e:
+            raise MessageProcessingError(start + offset, e) from e
+
 
-        # Fallback to text processing if no specific processor found
-        text_processor = TextContentProcessor()
-        return text_processor.process(message)
+def _content_type_of(message: Message) -> ContentType:
+    """Group key for batching consecutive messages."""
+    return message.content_type
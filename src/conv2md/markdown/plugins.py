@@ -0,0 +1,155 @@
+"""Lazy discovery of third-party content processors.
+
+Plugins register processors under the ``conv2md.processors`` entry-point
+group. The entry-point name is ``<content type>.<plugin name>``, so the
+content types a plugin handles are known from package metadata alone::
+
+    [project.entry-points."conv2md.processors"]
+    "image.ocr" = "conv2md_ocr:OcrImageProcessor"
+
+A plugin handling several content types registers one entry point per type,
+all pointing at the same object. Discovery reads metadata only: a plugin's
+module (and whatever heavy library it wraps) is imported the first time a
+message of one of its content types is processed.
+"""
+
+import logging
+import threading
+from importlib.metadata import EntryPoint, entry_points
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from conv2md.domain.models import ContentType, Message
+from conv2md.markdown.exceptions import PluginLoadError
+from conv2md.markdown.pipeline import ContentProcessor
+
+logger = logging.getLogger(__name__)
+
+PROCESSOR_ENTRY_POINT_GROUP = "conv2md.processors"
+
+
+class LazyContentProcessor(ContentProcessor):
+    """Stand-in for a plugin processor that imports it on first use."""
+
+    def __init__(
+        self,
+        name: str,
+        content_types: FrozenSet[ContentType],
+        entry_point: EntryPoint,
+    ):
+        """Initialize the stand-in without importing the plugin.
+
+        Args:
+            name: Plugin name, the entry-point name without its type prefix
+            content_types: Content types the plugin declared
+            entry_point: Entry point resolving to a ContentProcessor subclass
+                or instance
+        """
+        self.name = name
+        self.content_types = content_types
+        self.entry_point = entry_point
+        self._processor: Optional[ContentProcessor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the plugin module has been imported."""
+        return self._processor is not None
+
+    def can_process(self, content_type: ContentType) -> bool:
+        """Answer from the declared content types, without importing."""
+        return content_type in self.content_types
+
+    def process(self, message: Message) -> str:
+        """Load the plugin if needed and process one message."""
+        return self._load().process(message)
+
+    def process_batch(self, messages: Sequence[Message]) -> List[str]:
+        """Load the plugin if needed and process a run of messages."""
+        return self._load().process_batch(messages)
+
+    def resolve(self) -> ContentProcessor:
+        """Load the plugin if needed and return the processor itself."""
+        return self._load()
+
+    def _load(self) -> ContentProcessor:
+        """Import and instantiate the plugin processor once.
+
+        Raises:
+            PluginLoadError: If the entry point cannot be imported or does not
+                provide a ContentProcessor
+        """
+        if self._processor is not None:
+            return self._processor
+
+        with self._lock:
+            if self._processor is None:
+                logger.debug(
+                    f"Loading content processor plugin '{self.name}' "
+                    f"from {self.entry_point.value}"
+                )
+                try:
+                    target = self.entry_point.load()
+                    processor = target() if isinstance(target, type) else target
+                except Exception as e:
+                    raise PluginLoadError(
+                        f"Plugin '{self.name}' failed to load from "
+                        f"{self.entry_point.value}: {e}"
+                    ) from e
+
+                if not isinstance(processor, ContentProcessor):
+                    raise PluginLoadError(
+                        f"Plugin '{self.name}' entry point {self.entry_point.value} "
+                        f"is not a ContentProcessor"
+                    )
+                self._processor = processor
+
+        return self._processor
+
+
+def _parse_entry_point_name(name: str) -> Optional[Tuple[ContentType, str]]:
+    """Split ``<content type>.<plugin name>`` into its parts."""
+    type_name, separator, plugin_name = name.partition(".")
+    if not separator or not plugin_name:
+        return None
+    try:
+        return ContentType(type_name), plugin_name
+    except ValueError:
+        return None
+
+
+def discover_processors(
+    group: str = PROCESSOR_ENTRY_POINT_GROUP,
+) -> List[LazyContentProcessor]:
+    """Discover installed processor plugins without importing them.
+
+    Args:
+        group: Entry-point group to scan
+
+    Returns:
+        One lazy processor per plugin target, ordered by plugin name so that
+        precedence does not depend on installation order
+    """
+    declared: Dict[Tuple[str, str], List] = {}
+
+    for entry_point in entry_points(group=group):
+        parsed = _parse_entry_point_name(entry_point.name)
+        if parsed is None:
+            logger.warning(
+                f"Ignoring content processor plugin '{entry_point.name}': "
+                f"name must be '<content type>.<plugin name>' with a content "
+                f"type of {', '.join(t.value for t in ContentType)}"
+            )
+            continue
+
+        content_type, plugin_name = parsed
+        key = (plugin_name, entry_point.value)
+        if key not in declared:
+            declared[key] = [set(), entry_point]
+        declared[key][0].add(content_type)
+
+    processors = [
+        LazyContentProcessor(plugin_name, frozenset(content_types), entry_point)
+        for (plugin_name, _), (content_types, entry_point) in sorted(declared.items())
+    ]
+    logger.debug(f"Discovered {len(processors)} content processor plugins")
+    return processors
@@ -0,0 +1,263 @@
+"""Process-wide aggregation and export of conversion metrics.
+
+A MetricsCollector tracks one conversion at a time. MetricsRegistry folds the
+finished ConversionMetrics of many conversions into running totals and writes
+them in the Prometheus text exposition format, atomically, for the node
+exporter's textfile collector, or appends each conversion as one JSON line
+for offline analysis.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from conv2md.markdown.metrics import (
+    TIMING_BUCKET_BOUNDS,
+    ConversionMetrics,
+    ConversionStatus,
+    TimingHistogram,
+)
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "conv2md"
+
+
+class MetricsRegistry:
+    """Aggregates conversion metrics across many conversions in one process.
+
+    All methods are safe to call from several threads at once.
+    """
+
+    def __init__(self, jsonl_path: Optional[Path] = None):
+        """Initialize an empty registry.
+
+        Args:
+            jsonl_path: Optional file to append every observed conversion to,
+                one ``ConversionMetrics.to_dict()`` JSON object per line
+        """
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._status_counts: Counter = Counter()
+        self._message_counts: Counter = Counter()
+        self._counters: Counter = Counter()
+        self._stage_seconds: Counter = Counter()
+        self._stage_bytes: Counter = Counter()
+        self._duration = TimingHistogram()
+        # Extra counters contributed by other components (e.g. a fetcher's
+        # connection pool), keyed by (name, help text) then label value.
+        self._external: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._external_gauges: Dict[Tuple[str, str], float] = {}
+
+    def observe(self, metrics: ConversionMetrics) -> None:
+        """Fold one finished (or failed) conversion into the totals."""
+        with self._lock:
+            self._status_counts[metrics.status.value] += 1
+            self._message_counts["code"] += metrics.code_blocks_processed
+            self._message_counts["image"] += metrics.images_processed
+            self._message_counts["text"] += metrics.text_messages_processed
+            self._counters["content_chars"] += metrics.total_content_size
+            self._counters["output_chars"] += metrics.output_size
+            self._counters["errors"] += metrics.errors_encountered
+            self._counters["warnings"] += metrics.warnings_issued
+
+            for name, stage in metrics.stages.items():
+                self._stage_seconds[name] += stage.duration_seconds
+                self._stage_bytes[name] += stage.bytes_processed
+
+            seconds = conversion_seconds(metrics)
+            if seconds is not None:
+                self._duration.record(seconds)
+
+            if self.jsonl_path is not None:
+                self._append_jsonl(metrics)
+
+    def observe_failure(self) -> None:
+        """Count a conversion that failed before producing any metrics."""
+        with self._lock:
+            self._status_counts[ConversionStatus.ERROR.value] += 1
+            self._counters["errors"] += 1
+
+    def set_counter(self, name: str, help_text: str, values: Dict[str, float]) -> None:
+        """Publish a counter family maintained outside the registry.
+
+        Args:
+            name: Metric name without the conv2md prefix, ending in _total
+            help_text: One-line description for the HELP comment
+            values: Current totals keyed by the value of a ``kind`` label
+        """
+        with self._lock:
+            self._external[(name, help_text)] = dict(values)
+
+    def set_gauge(self, name: str, help_text: str, value: float) -> None:
+        """Publish a gauge maintained outside the registry.
+
+        Args:
+            name: Metric name without the conv2md prefix
+            help_text: One-line description for the HELP comment
+            value: Current value
+        """
+        with self._lock:
+            self._external_gauges[(name, help_text)] = value
+
+    def _append_jsonl(self, metrics: ConversionMetrics) -> None:
+        """Append one conversion as a JSON line. Caller holds the lock."""
+        line = json.dumps(metrics.to_dict(), sort_keys=True)
+        with open(self.jsonl_path, "a", encoding="utf-8") as jsonl_file:
+            jsonl_file.write(line + "\n")
+
+    def render(self) -> str:
+        """Render the totals in the Prometheus text exposition format."""
+        with self._lock:
+            lines: List[str] = []
+
+            _counter(
+                lines,
+                "conversions_total",
+                "Conversions observed, by final status.",
+                "status",
+                self._status_counts,
+            )
+            _counter(
+                lines,
+                "messages_total",
+                "Messages converted, by content type.",
+                "content_type",
+                self._message_counts,
+            )
+            for name, help_text in (
+                ("content_chars", "Characters of message content converted."),
+                ("output_chars", "Characters of Markdown produced."),
+                ("errors", "Errors encountered during conversion."),
+                ("warnings", "Warnings issued during conversion."),
+            ):
+                _counter(lines, f"{name}_total", help_text, None, self._counters[name])
+            _counter(
+                lines,
+                "stage_seconds_total",
+                "Time spent in each conversion stage.",
+                "stage",
+                self._stage_seconds,
+            )
+            _counter(
+                lines,
+                "stage_bytes_total",
+                "Bytes consumed by each conversion stage.",
+                "stage",
+                self._stage_bytes,
+            )
+            _histogram(
+                lines,
+                "conversion_duration_seconds",
+                "Wall time of each conversion.",
+                self._duration,
+            )
+            for (name, help_text), values in sorted(self._external.items()):
+                _counter(lines, name, help_text, "kind", values)
+            for (name, help_text), value in sorted(self._external_gauges.items()):
+                _gauge(lines, name, help_text, value)
+
+            _gauge(
+                lines,
+                "metrics_updated_timestamp_seconds",
+                "Unix time these metrics were rendered.",
+                time.time(),
+            )
+            return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Path) -> None:
+        """Write the rendered totals to ``path`` atomically.
+
+        The textfile collector may read at any moment, so the file is written
+        under a temporary name in the same directory and renamed into place.
+        The temporary name does not end in ``.prom``, so the collector never
+        picks it up.
+        """
+        path = Path(path)
+        content = self.render().encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(content)
+            # mkstemp creates 0600; the collector usually runs as another user
+            os.chmod(temp_name, 0o644)
+            os.replace(temp_name, path)
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+        logger.debug(f"Wrote metrics textfile {path}")
+
+
+def conversion_seconds(metrics: ConversionMetrics) -> Optional[float]:
+    """Return a conversion's wall time across all of its measured stages.
+
+    Stages include parse and write, which run outside the generator's own
+    duration; without stage data the generator duration is all there is.
+    """
+    if metrics.stages:
+        return sum(stage.duration_seconds for stage in metrics.stages.values())
+    return metrics.duration_seconds
+
+
+def _metric_name(name: str) -> str:
+    """Prefix a metric name with the conv2md namespace."""
+    return f"{METRIC_PREFIX}_{name}"
+
+
+def _escape_label(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value; integers print without a decimal point."""
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _counter(lines, name, help_text, label, values) -> None:
+    """Append a counter family, labelled when ``values`` is a mapping."""
+    metric = _metric_name(name)
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} counter")
+    if label is None:
+        lines.append(f"{metric} {_format_value(values)}")
+        return
+    for key in sorted(values):
+        lines.append(
+            f'{metric}{{{label}="{_escape_label(str(key))}"}} '
+            f"{_format_value(values[key])}"
+        )
+
+
+def _gauge(lines, name, help_text, value) -> None:
+    """Append an unlabelled gauge."""
+    metric = _metric_name(name)
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} gauge")
+    lines.append(f"{metric} {_format_value(value)}")
+
+
+def _histogram(lines, name, help_text, histogram: TimingHistogram) -> None:
+    """Append a histogram with cumulative ``le`` buckets."""
+    metric = _metric_name(name)
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    cumulative = 0
+    for bound, bucket_count in zip(TIMING_BUCKET_BOUNDS, histogram.counts):
+        cumulative += bucket_count
+        lines.append(f'{metric}_bucket{{le="{bound!r}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+    lines.append(f"{metric}_sum {_format_value(histogram.total_seconds)}")
+    lines.append(f"{metric}_count {histogram.count}")
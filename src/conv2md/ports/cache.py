@@ -0,0 +1,44 @@
+"""Conversion cache port: Markdown kept from earlier runs, by content digest.
+
+A page downloaded again with the same content converts to the same
+Markdown, so the application asks the cache before converting. Adapters
+decide where the Markdown is kept and for how long, and make sure it came
+from the same conv2md version and output options.
+"""
+
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+
+# Content is identified by its BLAKE2b digest of this many bytes, as the
+# batch manifest identifies input files
+DIGEST_SIZE = 16
+
+
+def content_hasher() -> Any:
+    """Return a hash object computing content digests incrementally."""
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def content_digest(data: bytes) -> str:
+    """Return the hex digest identifying ``data``."""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+class ConversionCache(ABC):
+    """Markdown previously converted from content with a known digest."""
+
+    @abstractmethod
+    def get_conversion(self, digest: str) -> Optional[bytes]:
+        """Return the UTF-8 Markdown converted from content with ``digest``.
+
+        Args:
+            digest: content_digest of the converted content
+
+        Returns:
+            The Markdown, or None if there is none for this digest
+        """
+
+    @abstractmethod
+    def put_conversion(self, digest: str, markdown: bytes) -> None:
+        """Keep the UTF-8 Markdown converted from content with ``digest``."""
@@ -0,0 +1,99 @@
+"""Content fetcher port: how the application reads remote resources.
+
+The application asks for a URL and reads the body as a stream, so a large
+page can be converted while it downloads. Adapters decide how connections
+are made, kept and reused.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Iterator, Mapping, Optional
+
+# Read size for iterating over a response body
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class FetchError(Exception):
+    """Raised when a resource cannot be fetched: bad URL, network or protocol."""
+
+
+class FetchResponse(ABC):
+    """A response whose body is read as a stream.
+
+    Close the response when done with it, or use it as a context manager:
+    adapters may hold a connection until then.
+    """
+
+    def __init__(self, url: str, status: int, headers: Mapping[str, str]):
+        """Initialize the response.
+
+        Args:
+            url: URL the response came from, after any redirects
+            status: HTTP status code
+            headers: Response headers; lookups are case-insensitive
+        """
+        self.url = url
+        self.status = status
+        self.headers = headers
+        # The body's content_digest, when it is known before the body is
+        # read, as for a body served from a cache
+        self.body_digest: Optional[str] = None
+
+    @abstractmethod
+    def read(self, size: int = -1) -> bytes:
+        """Read up to ``size`` bytes of the body, or all of it; b"" at the end.
+
+        Raises:
+            FetchError: If the connection fails part way
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release the response; unread body is discarded."""
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the body in chunks of up to ``chunk_size`` bytes."""
+        while chunk := self.read(chunk_size):
+            yield chunk
+
+    def __enter__(self) -> "FetchResponse":
+        """Return the open response."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the response."""
+        self.close()
+
+
+class ContentFetcher(ABC):
+    """Fetches remote resources by URL."""
+
+    @abstractmethod
+    def fetch(
+        self, url: str, headers: Optional[Mapping[str, str]] = None
+    ) -> FetchResponse:
+        """Send a GET request for ``url`` and return the response.
+
+        Responses of any status are returned, not raised: a 404 or a 304 is
+        an answer the caller may act on.
+
+        Args:
+            url: Absolute http or https URL
+            headers: Extra request headers, e.g. validators for revalidation
+
+        Returns:
+            The response, with its body still to be read
+
+        Raises:
+            FetchError: If the URL is not supported or no response was received
+        """
+
+    def close(self) -> None:
+        """Release whatever the fetcher keeps open between requests."""
+
+    def __enter__(self) -> "ContentFetcher":
+        """Return the fetcher."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the fetcher."""
+        self.close()
@@ -0,0 +1,225 @@
+"""Integration tests for the conversion daemon and its socket client."""
+
+import os
+import socket
+import stat
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from conv2md.adapters.socket_client import (
+    MAX_LINE_BYTES,
+    DaemonUnavailable,
+    encode_line,
+    submit_jobs,
+)
+from conv2md.adapters.socket_server import ConversionDaemon
+from conv2md.application.service import ConversionService
+from conv2md.cli import main
+
+CONVERSATION = '{"messages": [{"speaker": "User", "content": "Hello"}]}'
+
+
+class TestConversionDaemon(unittest.TestCase):
+    """Jobs sent over the socket are converted by the warm workers."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Start one daemon, with one worker, for every test."""
+        cls.service = ConversionService(workers=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stop the workers."""
+        cls.service.close()
+
+    def setUp(self):
+        """Serve on a socket in a temporary directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name).resolve()
+        (self.root / "in" / "nested").mkdir(parents=True)
+        for name in ("a.json", os.path.join("nested", "b.json")):
+            (self.root / "in" / name).write_text(CONVERSATION)
+        self.out_dir = self.root / "out"
+        self.socket_path = self.root / "conv2md.sock"
+
+        self.daemon = ConversionDaemon(self.socket_path, self.service)
+        self.thread = threading.Thread(
+            target=self.daemon.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop serving and clean up."""
+        self.daemon.shutdown()
+        self.thread.join()
+        self.daemon.server_close()
+        self.temp_dir.cleanup()
+
+    def job(self, spec, **options):
+        """Return a job descriptor for ``spec`` converted into the out dir."""
+        return {"input": str(spec), "out_dir": str(self.out_dir), "options": options}
+
+    def test_socket_is_private(self):
+        """Only the owner may send jobs."""
+        mode = os.stat(self.socket_path).st_mode
+        self.assertTrue(stat.S_ISSOCK(mode))
+        self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    def test_file_job_converts_and_reports_metrics(self):
+        """A file job is written where a local conversion would write it."""
+        results = list(
+            submit_jobs(str(self.socket_path), [self.job(self.root / "in" / "a.json")])
+        )
+
+        self.assertEqual(len(results), 1)
+        self.assertIsNone(results[0]["error"])
+        self.assertEqual(results[0]["output"], str(self.out_dir / "a.md"))
+        self.assertEqual(results[0]["metrics"]["status"], "success")
+        self.assertEqual((self.out_dir / "a.md").read_text(), "**User:**\nHello")
+
+    def test_directory_job_streams_one_result_per_file(self):
+        """A directory expands in the daemon and mirrors the tree."""
+        results = list(submit_jobs(str(self.socket_path), [self.job(self.root / "in")]))
+
+        outputs = sorted(result["output"] for result in results)
+        self.assertEqual(
+            outputs, [str(self.out_dir / "a.md"), str(self.out_dir / "nested" / "b.md")]
+        )
+
+    def test_bad_jobs_answered_without_stopping_the_rest(self):
+        """Unknown inputs, relative paths and bad files each get an error."""
+        (self.root / "in" / "broken.json").write_text("{not json")
+        jobs = [
+            self.job(self.root / "missing.json"),
+            self.job("in/a.json"),
+            self.job(self.root / "in" / "broken.json"),
+            self.job(self.root / "in" / "a.json"),
+        ]
+
+        results = list(submit_jobs(str(self.socket_path), jobs))
+
+        errors = [result["error"] for result in results]
+        self.assertEqual(len(results), 4)
+        self.assertEqual(sum(error is None for error in errors), 1)
+        self.assertIn("Job paths must be absolute", errors)
+        self.assertTrue(any(e and e.startswith("JSONDecodeError") for e in errors))
+
+    def test_malformed_line_is_reported(self):
+        """A line that is not a job descriptor gets an error, not a crash."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(str(self.socket_path))
+            connection.sendall(b"not json\n" + encode_line({"input": 1}))
+            connection.shutdown(socket.SHUT_WR)
+            replies = connection.makefile("rb").read().splitlines()
+
+        self.assertEqual(len(replies), 2)
+        self.assertTrue(all(b"Invalid job" in reply for reply in replies))
+
+    def test_too_long_line_cancels_the_connections_jobs(self):
+        """Jobs queued before an oversized line are not left to run."""
+        queued = Future()
+        with patch.object(self.service, "submit", return_value=queued):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+                connection.connect(str(self.socket_path))
+                connection.sendall(
+                    encode_line(self.job(self.root / "in" / "a.json"))
+                    + b"x" * (MAX_LINE_BYTES + 1)
+                    + b"\n"
+                )
+                connection.shutdown(socket.SHUT_WR)
+                replies = connection.makefile("rb").read().splitlines()
+
+        self.assertEqual(len(replies), 1)
+        self.assertIn(b"Job line too long", replies[0])
+        self.assertTrue(queued.cancelled())
+
+    def test_second_daemon_on_live_socket_is_refused(self):
+        """Starting a daemon where one is listening fails rather than steals."""
+        with self.assertRaisesRegex(OSError, "already listening"):
+            ConversionDaemon(self.socket_path, self.service)
+
+    def test_cli_client_converts_through_daemon(self):
+        """--socket hands the conversion to the daemon and reports it."""
+        result = CliRunner().invoke(
+            main,
+            [
+                "--socket",
+                str(self.socket_path),
+                "--input",
+                str(self.root / "in"),
+                "--out",
+                str(self.out_dir),
+            ],
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Converted 2 of 2 files (0 failed)", result.output)
+        self.assertTrue((self.out_dir / "nested" / "b.md").exists())
+
+
+class TestDaemonClient(unittest.TestCase):
+    """The client fails cleanly without a daemon."""
+
+    def setUp(self):
+        """Set up a directory for sockets."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.temp_dir.name, "conv2md.sock")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_no_daemon(self):
+        """Connecting to a missing socket raises DaemonUnavailable."""
+        with self.assertRaises(DaemonUnavailable):
+            list(submit_jobs(self.socket_path, []))
+
+    def test_stale_socket_is_replaced(self):
+        """A socket left by a dead daemon does not block a new one."""
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+
+        daemon = ConversionDaemon(Path(self.socket_path), service=None)
+        daemon.server_close()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_cli_reports_missing_daemon(self):
+        """--socket without a daemon exits 1 with a hint."""
+        with tempfile.NamedTemporaryFile(suffix=".json") as conversation:
+            result = CliRunner().invoke(
+                main,
+                ["--socket", self.socket_path, "--input", conversation.name],
+            )
+
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("conv2md serve", result.output)
+
+    def test_cli_rejects_local_only_options(self):
+        """Options the daemon cannot honour are refused up front."""
+        with tempfile.NamedTemporaryFile(suffix=".json") as conversation:
+            result = CliRunner().invoke(
+                main,
+                [
+                    "--socket",
+                    self.socket_path,
+                    "--input",
+                    conversation.name,
+                    "--jobs",
+                    "2",
+                ],
+            )
+
+        self.assertEqual(result.exit_code, 2, result.output)
+        self.assertIn("--jobs", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,400 @@
+"""Integration tests for fetching and converting URLs against a local server."""
+
+import asyncio
+import http.server
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from click.testing import CliRunner
+
+from conv2md.adapters.http_pool import HTTPConnectionPool
+from conv2md.application.fetch import FetchScheduler, convert_urls
+from conv2md.application.robots import RobotsCache
+from conv2md.cli import main
+from conv2md.converters.html_conv import HTMLConverter
+from conv2md.markdown.registry import MetricsRegistry
+from conv2md.ports.cache import ConversionCache, content_digest
+from conv2md.ports.fetcher import ContentFetcher
+
+ROBOTS_TXT = b"User-agent: *\nDisallow: /private\n"
+CONVERSATION = b'{"messages": [{"speaker": "User", "content": "Hello"}]}'
+PAGE = b"<html><head><title>Greeting</title></head><body><p>Hello</p></body></html>"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Serves a conversation at any path, with latency and faults on request.
+
+    ``?delay=S`` sleeps S seconds first; ``?charset=C`` declares charset C
+    for HTML; ``/flaky`` paths answer 503 the first time; ``/down`` always
+    answers 503; ``/missing`` answers 404; ``.html`` paths are served as an
+    HTML page and ``.png`` paths as an image. robots.txt disallows
+    ``/private``.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_StandInServer"
+
+    def do_GET(self):
+        server = self.server
+        host = self.headers["Host"].split(":")[0]
+        with server.lock:
+            server.requests[self.path] += 1
+            first = server.requests[self.path] == 1
+            server.in_flight[host] += 1
+            server.peak_in_flight[host] = max(
+                server.peak_in_flight[host], server.in_flight[host]
+            )
+            total = sum(server.in_flight.values())
+            server.peak_total = max(server.peak_total, total)
+        try:
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            time.sleep(float(query.get("delay", ["0"])[0]))
+            if url.path == "/robots.txt":
+                self.reply(200, ROBOTS_TXT, {"Content-Type": "text/plain"})
+            elif url.path == "/missing":
+                self.reply(404, b"")
+            elif url.path == "/down" or (url.path.startswith("/flaky") and first):
+                self.reply(503, b"", {"Retry-After": "0"})
+            elif url.path.endswith(".html"):
+                charset = query.get("charset", ["utf-8"])[0]
+                headers = {"Content-Type": f"text/html; charset={charset}"}
+                self.reply(200, PAGE, headers)
+            elif url.path.endswith(".png"):
+                self.reply(200, b"\x89PNG", {"Content-Type": "image/png"})
+            else:
+                self.reply(200, CONVERSATION, {"Content-Type": "application/json"})
+        finally:
+            with server.lock:
+                server.in_flight[host] -= 1
+
+    def reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.requests = Counter()
+        self.in_flight = Counter()
+        self.peak_in_flight = Counter()
+        self.peak_total = 0
+
+
+class _DictCache(ConversionCache):
+    """Conversion cache kept in a dict."""
+
+    def __init__(self):
+        self.conversions = {}
+
+    def get_conversion(self, digest):
+        return self.conversions.get(digest)
+
+    def put_conversion(self, digest, markdown):
+        self.conversions[digest] = markdown
+
+
+class _KnownDigestFetcher(ContentFetcher):
+    """Fetcher whose responses know the page's digest, as a cache's do."""
+
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+
+    def fetch(self, url, headers=None):
+        response = self.fetcher.fetch(url, headers)
+        response.body_digest = content_digest(PAGE)
+        return response
+
+
+class _BrokenFetcher(ContentFetcher):
+    """Fetcher that fails with a bug, not a FetchError, on ``/broken`` paths."""
+
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+
+    def fetch(self, url, headers=None):
+        if "/broken" in url:
+            raise RuntimeError("fetcher bug")
+        return self.fetcher.fetch(url, headers)
+
+
+class TestFetchAndConvert(unittest.TestCase):
+    """URLs are fetched under the limits and converted as they arrive."""
+
+    def setUp(self):
+        """Start a stand-in server reachable under two host names."""
+        self.server = _StandInServer()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self.thread.start()
+        port = self.server.server_address[1]
+        # Two names for one server are two hosts to the scheduler
+        self.host_a = f"http://127.0.0.1:{port}"
+        self.host_b = f"http://localhost:{port}"
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.out_dir = Path(self.temp_dir.name)
+        self.pool = HTTPConnectionPool(max_per_host=8)
+
+    def tearDown(self):
+        """Stop the server and close the pool."""
+        self.pool.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def run_urls(self, urls, on_outcome=None, **options):
+        """Convert ``urls`` with a scheduler configured by ``options``."""
+        options.setdefault("backoff_seconds", 0.01)
+        scheduler = FetchScheduler(self.pool, **options)
+        return asyncio.run(
+            convert_urls(urls, self.out_dir, scheduler, on_outcome=on_outcome)
+        )
+
+    def test_every_url_is_converted_once(self):
+        """Each distinct URL is written to its own file and fetched once."""
+        urls = [f"{self.host_a}/chat/{i}.json" for i in range(5)]
+
+        summary = self.run_urls(urls + urls[:2])
+
+        self.assertEqual(summary.succeeded, 5)
+        self.assertEqual(len(list(self.out_dir.glob("*.md"))), 5)
+        written = (self.out_dir / "127.0.0.1-chat-3-json.md").read_text()
+        self.assertEqual(written, "**User:**\nHello")
+        self.assertEqual(set(self.server.requests.values()), {1})
+
+    def test_hosts_run_in_parallel_within_their_cap(self):
+        """No host exceeds max_per_host while hosts are fetched concurrently."""
+        urls = [
+            f"{host}/chat/{i}?delay=0.1"
+            for i in range(6)
+            for host in (self.host_a, self.host_b)
+        ]
+
+        summary = self.run_urls(urls, max_per_host=2)
+
+        self.assertEqual(summary.failed, 0)
+        self.assertEqual(self.server.peak_in_flight["127.0.0.1"], 2)
+        self.assertEqual(self.server.peak_in_flight["localhost"], 2)
+        self.assertGreater(self.server.peak_total, 2)
+
+    def test_rate_limit_spaces_out_requests(self):
+        """After the burst, requests start no faster than the rate limit."""
+        urls = [f"{self.host_a}/chat/{i}" for i in range(10)]
+
+        started = time.perf_counter()
+        self.run_urls(urls, max_per_host=2, rate_limit=20)
+        elapsed = time.perf_counter() - started
+
+        # Two go at once, the other eight at 20 per second
+        self.assertGreaterEqual(elapsed, 0.38)
+
+    def test_transient_failures_are_retried(self):
+        """A 503 is retried; a 404 is final; retries run out on a dead URL."""
+        urls = [
+            f"{self.host_a}/flaky/chat",
+            f"{self.host_a}/missing",
+            f"{self.host_a}/down",
+        ]
+
+        summary = self.run_urls(urls, retries=2)
+        outcomes = {outcome.url: outcome for outcome in summary.outcomes}
+
+        flaky, missing, down = (outcomes[url] for url in urls)
+        self.assertTrue(flaky.succeeded)
+        self.assertEqual(flaky.attempts, 2)
+        self.assertEqual((missing.error, missing.attempts), ("HTTP 404", 1))
+        self.assertEqual((down.error, down.attempts), ("HTTP 503", 3))
+
+    def test_conversion_overlaps_downloads(self):
+        """A fast page is converted and written while a slow one downloads."""
+        slow = f"{self.host_a}/chat/slow?delay=0.5"
+        fast = f"{self.host_a}/chat/fast"
+        in_flight_when_written = []
+
+        def on_outcome(outcome):
+            if outcome.url == fast:
+                with self.server.lock:
+                    in_flight_when_written.append(self.server.in_flight["127.0.0.1"])
+
+        summary = self.run_urls([slow, fast], on_outcome=on_outcome)
+
+        self.assertEqual([outcome.url for outcome in summary.outcomes], [fast, slow])
+        self.assertEqual(in_flight_when_written, [1])
+
+    def test_unusable_responses_fail_alone(self):
+        """Unsupported content, oversized bodies and bad URLs fail per URL."""
+        image = f"{self.host_a}/picture.png"
+        large = f"{self.host_a}/chat/large"
+        urls = [image, large, "ftp://example.com/a"]
+
+        scheduler = FetchScheduler(self.pool, max_bytes=len(CONVERSATION) - 1)
+        summary = asyncio.run(convert_urls(urls, self.out_dir, scheduler))
+        errors = {outcome.url: outcome.error for outcome in summary.outcomes}
+
+        self.assertEqual(errors[image], "Unsupported content type image/png")
+        self.assertIn("limit", errors[large])
+        self.assertIn("Not an http or https URL", errors["ftp://example.com/a"])
+        self.assertEqual(self.server.requests["/chat/large"], 1)
+
+    def test_unexpected_errors_fail_their_url_alone(self):
+        """Every URL gets exactly one outcome, even when its fetch has a bug."""
+        urls = [f"{self.host_a}/chat/1", f"{self.host_a}/broken", f"{self.host_a}/b"]
+        scheduler = FetchScheduler(_BrokenFetcher(self.pool), retries=2)
+
+        with self.assertLogs("conv2md.application.fetch", "ERROR"):
+            summary = asyncio.run(convert_urls(urls, self.out_dir, scheduler))
+
+        outcomes = {outcome.url: outcome for outcome in summary.outcomes}
+        self.assertEqual(len(summary.outcomes), len(urls))
+        self.assertEqual(set(outcomes), set(urls))
+        broken = outcomes[f"{self.host_a}/broken"]
+        self.assertEqual(broken.error, "RuntimeError: fetcher bug")
+        self.assertEqual(broken.attempts, 1)
+        self.assertEqual(summary.failed, 1)
+
+    def test_html_pages_are_converted_as_they_download(self):
+        """HTML is converted on the fetch thread, without the size cap on bodies."""
+        page = f"{self.host_a}/docs/page.html"
+        scheduler = FetchScheduler(self.pool, max_bytes=10)
+
+        summary = asyncio.run(convert_urls([page], self.out_dir, scheduler))
+
+        outcome = summary.outcomes[0]
+        self.assertIsNone(outcome.error)
+        markdown = outcome.output_path.read_text()
+        self.assertIn('title: "Greeting"', markdown)
+        self.assertIn(f'url: "{page}"', markdown)
+        self.assertTrue(markdown.endswith("---\n\nHello"))
+
+    def test_html_pages_are_counted_and_cached(self):
+        """Converted pages are counted and cached; cached ones are not reconverted."""
+        page = f"{self.host_a}/docs/page.html"
+        scheduler = FetchScheduler(_KnownDigestFetcher(self.pool))
+        cache = _DictCache()
+        registry = MetricsRegistry()
+
+        def run():
+            summary = asyncio.run(
+                convert_urls(
+                    [page], self.out_dir, scheduler, registry=registry, cache=cache
+                )
+            )
+            return summary.outcomes[0]
+
+        first = run()
+        markdown = first.output_path.read_bytes()
+        first.output_path.unlink()
+        second = run()
+
+        self.assertEqual(first.metrics.stages["parse"].bytes_processed, len(PAGE))
+        self.assertEqual(first.metrics.output_size, len(markdown))
+        self.assertEqual(list(cache.conversions.values()), [markdown])
+        self.assertTrue(second.reused)
+        self.assertIsNone(second.metrics)
+        self.assertEqual(second.output_path.read_bytes(), markdown)
+        # Only the conversion that ran is counted
+        self.assertIn(
+            'conv2md_conversions_total{status="success"} 1', registry.render()
+        )
+
+    def test_bogus_charsets_are_decoded_or_fail_alone(self):
+        """Non-text codecs fall back to UTF-8; a charset that cannot decode fails."""
+        pages = {
+            charset: f"{self.host_a}/page.html?charset={charset}"
+            for charset in ("hex", "zlib", "rot13", "utf-16")
+        }
+
+        summary = asyncio.run(
+            convert_urls(pages.values(), self.out_dir, FetchScheduler(self.pool))
+        )
+        outcomes = {outcome.url: outcome for outcome in summary.outcomes}
+
+        self.assertEqual(len(summary.outcomes), len(pages))
+        for charset in ("hex", "zlib", "rot13"):
+            outcome = outcomes[pages[charset]]
+            self.assertIsNone(outcome.error)
+            self.assertTrue(outcome.output_path.read_text().endswith("Hello"))
+        self.assertIn("Cannot decode", outcomes[pages["utf-16"]].error)
+        self.assertEqual(summary.to_dict()["failed"], 1)
+
+    def test_html_is_converted_on_the_fetch_threads_whatever_the_jobs(self):
+        """Worker processes convert JSON; HTML is converted where it downloads."""
+        page = f"{self.host_a}/docs/page.html"
+        threads = []
+        iter_markdown = HTMLConverter.iter_markdown
+
+        def recording(converter, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return iter_markdown(converter, *args, **kwargs)
+
+        scheduler = FetchScheduler(self.pool)
+        with patch.object(HTMLConverter, "iter_markdown", recording):
+            summary = asyncio.run(convert_urls([page], self.out_dir, scheduler, jobs=2))
+
+        self.assertIsNone(summary.outcomes[0].error)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("conv2md-fetch"))
+
+    def test_robots_txt_is_fetched_once_and_respected(self):
+        """Disallowed URLs are not requested; robots.txt is read once per host."""
+        urls = [f"{self.host_a}/chat/{i}" for i in range(4)] + [
+            f"{self.host_a}/private/chat",
+            f"{self.host_b}/private/chat",
+        ]
+        robots = RobotsCache(self.pool)
+
+        summary = self.run_urls(urls, robots=robots)
+        errors = {outcome.url: outcome.error for outcome in summary.outcomes}
+
+        self.assertEqual(summary.succeeded, 4)
+        self.assertEqual(errors[urls[4]], "Disallowed by robots.txt")
+        self.assertEqual(errors[urls[5]], "Disallowed by robots.txt")
+        self.assertEqual(self.server.requests["/robots.txt"], 2)
+        self.assertEqual(self.server.requests["/private/chat"], 0)
+        self.assertEqual(robots.stats.fetched, 2)
+
+    def test_cli_converts_an_input_list(self):
+        """--input-list downloads and converts every URL in the file."""
+        url_list = self.out_dir / "urls.txt"
+        urls = [
+            f"{self.host_a}/chat/a",
+            f"{self.host_b}/chat/b",
+            f"{self.host_a}/missing",
+        ]
+        url_list.write_text("# chats\n" + "\n".join(urls) + "\n")
+        out = self.out_dir / "out"
+
+        result = CliRunner().invoke(
+            main,
+            ["--input-list", str(url_list), "--out", str(out), "--retries", "0"],
+        )
+
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertTrue((out / "127.0.0.1-chat-a.md").exists())
+        self.assertTrue((out / "localhost-chat-b.md").exists())
+        self.assertIn("Failed to convert", result.output)
+        self.assertIn("Converted 2 of 3 URLs (1 failed)", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,346 @@
+"""Integration tests for the on-disk HTTP cache against a local server."""
+
+import asyncio
+import hashlib
+import http.server
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from conv2md.adapters.http_cache import HTTPCache
+from conv2md.adapters.http_pool import HTTPConnectionPool
+from conv2md.application.fetch import FetchScheduler, convert_urls
+from conv2md.cli import main
+from conv2md.markdown.registry import MetricsRegistry
+from conv2md.ports.cache import content_digest
+
+
+def _conversation(text: str) -> bytes:
+    """Return a one-message conversation saying ``text``."""
+    return b'{"messages": [{"speaker": "User", "content": "%s"}]}' % text.encode()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Serves the server's pages with ETags, answering 304 when they match.
+
+    ``/fresh`` pages are cacheable for a minute; ``/nostore`` pages must
+    not be stored; ``/plain`` pages come without validators. ``.html``
+    pages are served as HTML, the rest as JSON.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_StandInServer"
+
+    def do_GET(self):
+        server = self.server
+        if self.path not in server.pages:
+            self.reply(404, b"", {})
+            return
+        body = server.pages[self.path]
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path.endswith(".html"):
+            headers = {"Content-Type": "text/html; charset=utf-8"}
+        else:
+            headers = {"Content-Type": "application/json"}
+        if not self.path.startswith("/plain"):
+            headers["ETag"] = etag
+        if self.path.startswith("/fresh"):
+            headers["Cache-Control"] = "max-age=60"
+        elif self.path.startswith("/nostore"):
+            headers["Cache-Control"] = "no-store"
+        if self.headers.get("If-None-Match") == etag:
+            self.reply(304, b"", headers)
+        else:
+            self.reply(200, body, headers)
+
+    def reply(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.pages = {}
+        self.requests = []
+
+
+class FakeClock:
+    """Wall clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHTTPCache(unittest.TestCase):
+    """Responses are stored, revalidated, reused and evicted."""
+
+    def setUp(self):
+        """Start a stand-in server and open an empty cache."""
+        self.server = _StandInServer()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self.thread.start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.clock = FakeClock()
+        self.cache = self.open_cache()
+
+    def tearDown(self):
+        """Close the cache and stop the server."""
+        self.cache.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def open_cache(self, **options):
+        """Open the cache directory with a fresh pool."""
+        return HTTPCache(
+            HTTPConnectionPool(),
+            self.root / "cache",
+            {"use_plugins": False},
+            clock=self.clock,
+            **options,
+        )
+
+    def get(self, path):
+        """Fetch ``path`` through the cache and return its body."""
+        with self.cache.fetch(self.base + path) as response:
+            self.assertEqual(response.status, 200)
+            return b"".join(response.iter_chunks())
+
+    def test_unchanged_page_is_revalidated_not_downloaded(self):
+        """The second request is conditional and its 304 is served from disk."""
+        self.server.pages["/a"] = _conversation("one")
+
+        first = self.get("/a")
+        second = self.get("/a")
+
+        self.assertEqual(first, second)
+        self.assertIsNone(self.server.requests[0][1])
+        self.assertIsNotNone(self.server.requests[1][1])
+        self.assertEqual(
+            (self.cache.stats.misses, self.cache.stats.revalidated), (1, 1)
+        )
+
+    def test_changed_page_is_downloaded_again(self):
+        """A validator that no longer matches gets the new body."""
+        self.server.pages["/a"] = _conversation("one")
+        self.get("/a")
+        self.server.pages["/a"] = _conversation("two")
+
+        self.assertEqual(self.get("/a"), _conversation("two"))
+        self.assertEqual(self.get("/a"), _conversation("two"))
+        self.assertEqual(self.cache.stats.misses, 2)
+        self.assertEqual(self.cache.stats.revalidated, 1)
+
+    def test_fresh_page_is_served_without_a_request(self):
+        """Within its max-age a page is not asked for at all."""
+        self.server.pages["/fresh"] = _conversation("one")
+        self.get("/fresh")
+
+        self.get("/fresh")
+        self.clock.now += 61
+        self.get("/fresh")
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.cache.stats.hits, 1)
+        self.assertEqual(self.cache.stats.revalidated, 1)
+
+    def test_uncacheable_and_unfinished_responses_are_not_stored(self):
+        """no-store, missing validators and bodies left unread are not kept."""
+        for path in ("/nostore", "/plain", "/a"):
+            self.server.pages[path] = _conversation(path)
+        self.get("/nostore")
+        self.get("/plain")
+        self.cache.fetch(self.base + "/a").close()
+
+        for path in ("/nostore", "/plain", "/a"):
+            self.get(path)
+
+        self.assertEqual(self.cache.stats.misses, 6)
+        self.assertEqual([value for _, value in self.server.requests], [None] * 6)
+
+    def test_validators_survive_reopening(self):
+        """The cache persists: a new process revalidates what an old one stored."""
+        self.server.pages["/a"] = _conversation("one")
+        self.get("/a")
+        self.cache.close()
+
+        self.cache = self.open_cache()
+
+        self.assertEqual(self.get("/a"), _conversation("one"))
+        self.assertEqual(self.cache.stats.revalidated, 1)
+
+    def test_conversions_are_cached_under_the_options(self):
+        """Markdown is reused for the same content and options only."""
+        digest = content_digest(b"content")
+        self.cache.put_conversion(digest, b"# Markdown")
+
+        self.assertEqual(self.cache.get_conversion(digest), b"# Markdown")
+        self.assertIsNone(self.cache.get_conversion(content_digest(b"other")))
+        self.cache.close()
+        self.cache = HTTPCache(
+            HTTPConnectionPool(), self.root / "cache", {"use_plugins": True}
+        )
+        self.assertIsNone(self.cache.get_conversion(digest))
+
+    def test_unused_items_are_evicted_by_age(self):
+        """Whatever has not been used within max_age_seconds is evicted."""
+        self.cache.close()
+        self.cache = self.open_cache(max_age_seconds=100)
+        self.server.pages["/old"] = _conversation("old")
+        self.server.pages["/new"] = _conversation("new")
+        self.get("/old")
+        self.clock.now += 60
+        self.get("/new")
+        self.clock.now += 60
+
+        self.assertEqual(self.cache.prune(), 1)
+        self.get("/old")
+        self.get("/new")
+        self.assertEqual(self.cache.stats.misses, 3)
+        self.assertEqual(self.cache.stats.revalidated, 1)
+
+    def test_least_recently_used_items_are_evicted_over_size(self):
+        """Over max_bytes, the items used longest ago go first."""
+        self.cache.close()
+        size = len(_conversation("page 0"))
+        self.cache = self.open_cache(max_bytes=2 * size)
+        for i in range(3):
+            self.server.pages[f"/{i}"] = _conversation(f"page {i}")
+            self.get(f"/{i}")
+            self.clock.now += 1
+        # Using page 0 again makes page 1 the least recently used
+        self.get("/0")
+
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertEqual(self.cache.stats.evicted, 1)
+        self.get("/1")
+        self.assertEqual(self.server.requests[-1], ("/1", None))
+
+    def test_unchanged_pages_are_not_converted_again(self):
+        """A second run revalidates, and writes the cached Markdown as is."""
+        self.server.pages["/chat"] = _conversation("hello")
+        out_dir = self.root / "out"
+
+        def run():
+            scheduler = FetchScheduler(self.cache)
+            return asyncio.run(
+                convert_urls(
+                    [self.base + "/chat"], out_dir, scheduler, cache=self.cache
+                )
+            )
+
+        first = run().outcomes[0]
+        first_markdown = first.output_path.read_text()
+        first.output_path.unlink()
+        second = run().outcomes[0]
+
+        self.assertFalse(first.reused)
+        self.assertTrue(second.reused)
+        self.assertIsNone(second.metrics)
+        self.assertEqual(second.output_path.read_text(), first_markdown)
+        self.assertEqual(self.cache.stats.conversions_reused, 1)
+
+    def test_unchanged_html_pages_are_not_converted_again(self):
+        """Revalidated HTML is written from the cache under the same options."""
+        self.server.pages["/page.html"] = (
+            b"<html><head><title>Greeting</title></head><body><p>Hello</p></body>"
+            b"</html>"
+        )
+        out_dir = self.root / "out"
+        registry = MetricsRegistry()
+
+        def run(main_content=True):
+            scheduler = FetchScheduler(self.cache, main_content=main_content)
+            outcome = asyncio.run(
+                convert_urls(
+                    [self.base + "/page.html"],
+                    out_dir,
+                    scheduler,
+                    registry=registry,
+                    cache=self.cache,
+                )
+            ).outcomes[0]
+            markdown = outcome.output_path.read_text()
+            outcome.output_path.unlink()
+            return outcome, markdown
+
+        first, first_markdown = run()
+        second, second_markdown = run()
+        full_page, _ = run(main_content=False)
+
+        self.assertFalse(first.reused)
+        self.assertTrue(second.reused)
+        self.assertIsNone(second.metrics)
+        self.assertEqual(second_markdown, first_markdown)
+        self.assertFalse(full_page.reused)
+        self.assertEqual(self.cache.stats.revalidated, 2)
+        self.assertEqual(self.cache.stats.conversions_reused, 1)
+        self.assertIn(
+            'conv2md_conversions_total{status="success"} 2', registry.render()
+        )
+
+    def test_counters_are_published(self):
+        """Hits, revalidations and misses are exported to a registry."""
+        self.server.pages["/a"] = _conversation("one")
+        self.get("/a")
+        self.get("/a")
+        registry = MetricsRegistry()
+
+        self.cache.publish(registry)
+
+        text = registry.render()
+        self.assertIn('conv2md_http_cache_requests_total{kind="miss"} 1', text)
+        self.assertIn('conv2md_http_cache_requests_total{kind="revalidated"} 1', text)
+
+    def test_cli_reports_cache_use(self):
+        """--cache-dir makes a repeated run revalidate and reuse conversions."""
+        self.server.pages["/chat"] = _conversation("hello")
+        url_list = self.root / "urls.txt"
+        url_list.write_text(self.base + "/chat\n")
+        args = [
+            "--input-list",
+            str(url_list),
+            "--out",
+            str(self.root / "out"),
+            "--cache-dir",
+            str(self.root / "cli-cache"),
+        ]
+
+        CliRunner().invoke(main, args)
+        result = CliRunner().invoke(main, args)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(
+            "cache: 0 fresh, 1 revalidated, 0 downloaded, 1 conversions reused",
+            result.output,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+"""Integration tests for the pooled HTTP fetcher against a local server."""
+
+import http.server
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+
+from conv2md.adapters.http_pool import HTTPConnectionPool
+from conv2md.markdown.registry import MetricsRegistry
+from conv2md.ports.fetcher import FetchError
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    """Keep-alive handler whose behaviour is chosen by the path."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_StandInServer"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.1)
+            if self.path == "/redirect":
+                self.send_response(302)
+                self.send_header("Location", "/page")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = f"body of {self.path}".encode()
+            if self.path == "/large":
+                body = b"x" * (1024 * 1024)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            if self.path == "/drop":
+                # Hang up without saying so: the client thinks it can reuse
+                self.close_connection = True
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StandInServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lock = threading.Lock()
+        self.connections = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHTTPConnectionPool(unittest.TestCase):
+    """Connections are kept, reused, limited and replaced when stale."""
+
+    def setUp(self):
+        """Start a stand-in server and an empty pool."""
+        self.server = _StandInServer()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self.thread.start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.clock = FakeClock()
+        self.pool = HTTPConnectionPool(max_per_host=2, clock=self.clock)
+
+    def tearDown(self):
+        """Stop the server and close the pool."""
+        self.pool.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def get(self, path):
+        """Fetch ``path`` and return its body."""
+        with self.pool.fetch(self.base + path) as response:
+            return response.read()
+
+    def test_sequential_requests_share_one_connection(self):
+        """Keep-alive requests reuse the connection opened by the first."""
+        bodies = [self.get(f"/page{i}") for i in range(5)]
+
+        self.assertEqual(bodies[3], b"body of /page3")
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(self.pool.stats.opened, 1)
+        self.assertEqual(self.pool.stats.reused, 4)
+        self.assertAlmostEqual(self.pool.stats.hit_rate, 0.8)
+
+    def test_concurrency_is_capped_per_host(self):
+        """No more than max_per_host requests to a host run at once."""
+        threads = [
+            threading.Thread(target=self.get, args=(f"/slow{i}",)) for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.server.peak_in_flight, 2)
+        self.assertLessEqual(len(self.server.connections), 2)
+
+    def test_idle_connections_expire(self):
+        """A connection idle past the timeout is closed, not reused."""
+        self.get("/a")
+        self.clock.now += self.pool.idle_timeout + 1
+        self.get("/b")
+
+        self.assertEqual(self.pool.stats.opened, 2)
+        self.assertEqual(self.pool.stats.idle_closed, 1)
+
+    def test_prune_closes_expired_connections(self):
+        """prune() closes what has expired without waiting for a request."""
+        self.get("/a")
+        self.clock.now += self.pool.idle_timeout + 1
+
+        self.assertEqual(self.pool.prune(), 1)
+        self.assertEqual(self.pool.prune(), 0)
+
+    def test_connection_closed_by_server_is_not_reused(self):
+        """A connection the server hung up on is noticed and replaced."""
+        self.get("/drop")
+        time.sleep(0.05)
+
+        self.assertEqual(self.get("/after"), b"body of /after")
+        self.assertEqual(self.pool.stats.stale_discarded, 1)
+        self.assertEqual(self.pool.stats.opened, 2)
+
+    def test_stale_connection_failure_is_retried(self):
+        """A request failing on a reused connection is resent on a new one."""
+        self.get("/drop")
+        time.sleep(0.05)
+        # Defeat the check before reuse, as when the server closes the
+        # connection just after it was taken from the pool
+        with mock.patch(
+            "conv2md.adapters.http_pool._has_been_closed", return_value=False
+        ):
+            self.assertEqual(self.get("/after"), b"body of /after")
+
+        self.assertEqual(self.pool.stats.stale_retries, 1)
+
+    def test_partly_read_large_body_closes_connection(self):
+        """Abandoning a large body closes its connection instead of draining."""
+        with self.pool.fetch(self.base + "/large") as response:
+            self.assertEqual(len(response.read(10)), 10)
+        self.get("/next")
+
+        self.assertEqual(self.pool.stats.opened, 2)
+
+    def test_redirects_are_followed(self):
+        """Redirects are followed on pooled connections."""
+        with self.pool.fetch(self.base + "/redirect") as response:
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.url, self.base + "/page")
+            self.assertEqual(response.read(), b"body of /page")
+
+        self.assertEqual(self.pool.stats.opened, 1)
+
+    def test_unsupported_urls_raise(self):
+        """Only http and https URLs are fetched."""
+        for url in ("ftp://example.com/x", "/relative", "http://"):
+            with self.subTest(url=url):
+                with self.assertRaises(FetchError):
+                    self.pool.fetch(url)
+
+    def test_connection_refused_raises(self):
+        """A host that refuses connections raises FetchError."""
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            port = unused.getsockname()[1]
+        with self.assertRaises(FetchError):
+            HTTPConnectionPool().fetch(f"http://127.0.0.1:{port}/")
+
+    def test_stats_are_published(self):
+        """The hit rate and connection counts reach the metrics registry."""
+        self.get("/a")
+        self.get("/b")
+        registry = MetricsRegistry()
+
+        self.pool.publish(registry)
+        text = registry.render()
+
+        self.assertIn('conv2md_http_pool_connections_total{kind="reused"} 1', text)
+        self.assertIn('conv2md_http_pool_connections_total{kind="opened"} 1', text)
+        self.assertIn("conv2md_http_pool_hit_ratio 0.5", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
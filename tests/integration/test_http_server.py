@@ -0,0 +1,186 @@
+"""Integration tests for the HTTP conversion service."""
+
+import http.client
+import json
+import socket
+import threading
+import time
+import unittest
+
+from conv2md.adapters.http_server import ConversionHTTPServer
+from conv2md.application.service import ConverterPool, PoolSaturated
+
+CONVERSATION = json.dumps(
+    {
+        "messages": [
+            {"speaker": "User", "content": "Hello"},
+            {"speaker": "Assistant", "content": "Hi there"},
+        ]
+    }
+)
+
+
+class TestConversionHTTPServer(unittest.TestCase):
+    """Requests are converted on the pool and answered with streamed Markdown."""
+
+    def setUp(self):
+        """Serve on a free localhost port with a single converter."""
+        self.pool = ConverterPool(1, max_waiting=0)
+        self.server = ConversionHTTPServer(("127.0.0.1", 0), self.pool)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self.thread.start()
+
+    def tearDown(self):
+        """Stop serving."""
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request on a new connection; return status, headers, body."""
+        connection = http.client.HTTPConnection(
+            "127.0.0.1", self.server.server_address[1], timeout=10
+        )
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            return response.status, response.headers, response.read()
+        finally:
+            connection.close()
+
+    def test_conversation_is_converted_in_chunks(self):
+        """POST /convert answers with the Markdown, chunk-encoded."""
+        status, headers, body = self.request("POST", "/convert", CONVERSATION)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Transfer-Encoding"], "chunked")
+        self.assertTrue(headers["Content-Type"].startswith("text/markdown"))
+        self.assertEqual(
+            body.decode("utf-8"), "**User:**\nHello\n\n**Assistant:**\nHi there"
+        )
+
+    def test_connection_is_reused(self):
+        """Keep-alive connections carry several conversions."""
+        connection = http.client.HTTPConnection(
+            "127.0.0.1", self.server.server_address[1], timeout=10
+        )
+        try:
+            for _ in range(3):
+                connection.request("POST", "/convert", CONVERSATION)
+                response = connection.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertIn(b"Hi there", response.read())
+        finally:
+            connection.close()
+
+    def test_malformed_conversation_is_bad_request(self):
+        """Invalid JSON is answered 400 with the parse error."""
+        status, headers, body = self.request("POST", "/convert", "{not json")
+
+        self.assertEqual(status, 400)
+        self.assertIn("error", json.loads(body))
+
+    def test_missing_content_length_is_refused(self):
+        """Chunked request bodies are refused with 411."""
+        status, _, _ = self.request(
+            "POST",
+            "/convert",
+            iter([CONVERSATION.encode("utf-8")]),
+            headers={"Transfer-Encoding": "chunked"},
+        )
+
+        self.assertEqual(status, 411)
+
+    def test_saturated_pool_answers_service_unavailable(self):
+        """With every converter busy and no queue room, requests get 503."""
+        with self.pool.acquire():
+            status, headers, _ = self.request("POST", "/convert", CONVERSATION)
+
+        self.assertEqual(status, 503)
+        self.assertEqual(headers["Retry-After"], "1")
+        # The converter is back once released
+        self.assertEqual(self.request("POST", "/convert", CONVERSATION)[0], 200)
+
+    def test_slow_sender_does_not_hold_a_converter(self):
+        """A body still arriving leaves the only converter free for others."""
+        body = CONVERSATION.encode("utf-8")
+        slow = socket.create_connection(self.server.server_address, timeout=10)
+        try:
+            slow.sendall(
+                b"POST /convert HTTP/1.1\r\nHost: test\r\n"
+                b"Content-Length: %d\r\n\r\n%s" % (len(body), body[:10])
+            )
+            # Let the server read the headers and start waiting for the body
+            time.sleep(0.2)
+
+            self.assertEqual(self.request("POST", "/convert", CONVERSATION)[0], 200)
+
+            slow.sendall(body[10:])
+            response = http.client.HTTPResponse(slow)
+            response.begin()
+            self.assertEqual(response.status, 200)
+            self.assertIn(b"Hi there", response.read())
+        finally:
+            slow.close()
+
+    def test_metrics_report_conversions_and_rejections(self):
+        """GET /metrics exports conversion totals and pool state."""
+        self.request("POST", "/convert", CONVERSATION)
+        with self.pool.acquire():
+            self.request("POST", "/convert", CONVERSATION)
+
+        status, headers, body = self.request("GET", "/metrics")
+        text = body.decode("utf-8")
+
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("text/plain"))
+        self.assertIn('conv2md_conversions_total{status="success"} 1', text)
+        self.assertIn('conv2md_http_responses_total{kind="200"} 1', text)
+        self.assertIn('conv2md_http_responses_total{kind="503"} 1', text)
+        self.assertIn('conv2md_http_rejected_total{kind="saturated"} 1', text)
+        self.assertIn("conv2md_http_conversions_in_progress 0", text)
+
+    def test_unknown_path_is_not_found(self):
+        """Only /convert and /metrics are served."""
+        self.assertEqual(self.request("GET", "/convert")[0], 404)
+        self.assertEqual(self.request("POST", "/other", "{}")[0], 404)
+
+
+class TestConverterPool(unittest.TestCase):
+    """The pool bounds concurrent conversions and waiting callers."""
+
+    def test_waiting_caller_gets_released_pair(self):
+        """A caller within the queue limit waits for the next free pair."""
+        pool = ConverterPool(1, max_waiting=1)
+        acquired = []
+
+        with pool.acquire() as first:
+            waiter = threading.Thread(
+                target=lambda: acquired.append(pool.acquire(timeout=10).__enter__())
+            )
+            waiter.start()
+            while pool.waiting == 0:
+                threading.Event().wait(0.01)
+        waiter.join()
+
+        self.assertIs(acquired[0], first)
+        self.assertEqual(pool.rejected, 0)
+
+    def test_wait_times_out(self):
+        """A caller that waits too long is rejected."""
+        pool = ConverterPool(1, max_waiting=1)
+
+        with pool.acquire():
+            with self.assertRaisesRegex(PoolSaturated, "within"):
+                with pool.acquire(timeout=0.01):
+                    pass
+
+        self.assertEqual(pool.rejected, 1)
+        self.assertEqual(pool.waiting, 0)
+        self.assertEqual(pool.in_use, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
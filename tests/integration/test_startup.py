@@ -0,0 +1,138 @@
+"""Integration tests for CLI start-up cost."""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Cold-start budget for importing the CLI module. Wall-clock time depends on
+# the host, so by default the budget is a multiple of importing click alone
+# on the same host: the CLI itself takes about 1.6 times that, and eagerly
+# importing asyncio or the conversion modules pushes it past 2. A host that
+# wants an absolute budget sets it, in milliseconds, in the environment.
+IMPORT_BUDGET_ENV = "CONV2MD_IMPORT_BUDGET_MS"
+IMPORT_BUDGET_CLICK_MULTIPLE = 2.0
+IMPORT_SAMPLES = 3
+
+# Modules only a conversion needs. --help, --version and the daemon client
+# must not load them.
+HEAVY_MODULES = (
+    "conv2md.adapters.http_cache",
+    "conv2md.adapters.http_pool",
+    "conv2md.adapters.http_server",
+    "conv2md.application.aio",
+    "conv2md.adapters.manifest",
+    "conv2md.adapters.socket_server",
+    "conv2md.application.convert",
+    "conv2md.application.fetch",
+    "conv2md.application.many",
+    "conv2md.application.robots",
+    "conv2md.application.service",
+    "conv2md.converters.html_conv",
+    "conv2md.converters.json_conv",
+    "conv2md.converters.main_content",
+    "conv2md.markdown.generator",
+    "conv2md.markdown.pipeline",
+    "conv2md.markdown.registry",
+    "asyncio",
+    "html.parser",
+    "http.server",
+    "urllib.robotparser",
+    "sqlite3",
+    "concurrent.futures",
+    "cProfile",
+    "pstats",
+    "tracemalloc",
+    "importlib.metadata",
+)
+
+
+def _run_python(*args: str) -> subprocess.CompletedProcess:
+    """Run a fresh interpreter that imports conv2md the way this one does."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run(
+        [sys.executable, *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def _import_milliseconds(module: str) -> float:
+    """Return the best cumulative -X importtime of ``module`` in cold processes."""
+    best = None
+    # Best of a few runs: the budget is about the code, not a busy host
+    for _ in range(IMPORT_SAMPLES):
+        result = _run_python("-X", "importtime", "-c", f"import {module}")
+        for line in result.stderr.splitlines():
+            # "import time: <self us> | <cumulative us> | <module>"
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                microseconds = int(fields[1])
+                break
+        else:
+            raise AssertionError(f"{module} missing from importtime:\n{result.stderr}")
+        best = microseconds if best is None else min(best, microseconds)
+    return best / 1000
+
+
+class TestStartupCost(unittest.TestCase):
+    """The CLI starts quickly because conversion code is imported lazily."""
+
+    def test_cli_import_within_budget(self):
+        """Importing conv2md.cli stays within the host's cold-start budget."""
+        if os.environ.get(IMPORT_BUDGET_ENV):
+            budget_ms = float(os.environ[IMPORT_BUDGET_ENV])
+        else:
+            budget_ms = IMPORT_BUDGET_CLICK_MULTIPLE * _import_milliseconds("click")
+
+        import_ms = _import_milliseconds("conv2md.cli")
+
+        self.assertLess(
+            import_ms,
+            budget_ms,
+            f"import conv2md.cli took {import_ms:.1f}ms, budget {budget_ms:.1f}ms",
+        )
+
+    def test_help_and_version_skip_conversion_modules(self):
+        """--help and --version load none of the conversion machinery."""
+        script = (
+            "import json, sys\n"
+            "from conv2md.cli import main\n"
+            "for args in (['--help'], ['--version']):\n"
+            "    try:\n"
+            "        main(args)\n"
+            "    except SystemExit:\n"
+            "        pass\n"
+            "print(json.dumps(sorted(sys.modules)), file=sys.stderr)\n"
+        )
+
+        loaded = set(json.loads(_run_python("-c", script).stderr))
+
+        self.assertEqual(sorted(loaded.intersection(HEAVY_MODULES)), [])
+
+    def test_daemon_client_skips_conversion_modules(self):
+        """--socket leaves the conversion to the daemon, and its imports too."""
+        script = (
+            "import json, sys, tempfile\n"
+            "from conv2md.cli import main\n"
+            "with tempfile.NamedTemporaryFile(suffix='.json') as f:\n"
+            "    try:\n"
+            "        main(['--socket', f.name + '.sock', '--input', f.name])\n"
+            "    except SystemExit:\n"
+            "        pass\n"
+            "print(json.dumps(sorted(sys.modules)), file=sys.stderr)\n"
+        )
+
+        # The last line: before it is the client's "no daemon" error
+        stderr = _run_python("-c", script).stderr
+        loaded = set(json.loads(stderr.splitlines()[-1]))
+
+        self.assertIn("conv2md.adapters.socket_client", loaded)
+        self.assertEqual(sorted(loaded.intersection(HEAVY_MODULES)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+"""Unit tests for the async conversion API."""
+
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from conv2md.application.aio import AsyncFileWriter, aconvert, agenerate_to
+from conv2md.application.convert import convert_file
+from conv2md.converters.json_conv import ConversationParseError, JSONConverter
+from conv2md.domain.models import Message
+from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.registry import MetricsRegistry
+
+
+def _conversation(messages: int, words: int = 50) -> str:
+    """Return a conversation of ``messages`` messages."""
+    content = " ".join(["word"] * words)
+    return json.dumps(
+        {
+            "messages": [
+                {"speaker": "User" if i % 2 else "Assistant", "content": content}
+                for i in range(messages)
+            ]
+        }
+    )
+
+
+class _SlowWriter:
+    """Async writer that takes a while to drain, recording what it got."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.data = bytearray()
+        self.first_write = asyncio.Event()
+
+    def write(self, data: bytes) -> None:
+        self.data.extend(data)
+        self.first_write.set()
+
+    async def drain(self) -> None:
+        await asyncio.sleep(self.delay)
+
+
+class _BlockingConverter(JSONConverter):
+    """Converter that stops after the first message until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.stopped = threading.Event()
+        self.read_errors = []
+
+    def iter_messages(self, reader):
+        messages = super().iter_messages(reader)
+        yield next(messages)
+        self.started.set()
+        self.release.wait(5)
+        try:
+            reader.read(1)
+        except ValueError as e:
+            self.read_errors.append(e)
+        finally:
+            self.stopped.set()
+        yield from messages
+
+
+class TestAsyncConversion(unittest.IsolatedAsyncioTestCase):
+    """Async conversions match the synchronous ones and keep the loop free."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    async def test_aconvert_matches_convert_file(self):
+        """The async file conversion writes what convert_file writes."""
+        input_path = self.root / "chat.json"
+        input_path.write_text(_conversation(2000))
+        registry = MetricsRegistry()
+
+        result = await aconvert(input_path, self.root / "async.md", registry=registry)
+        convert_file(input_path, self.root / "sync.md")
+
+        self.assertEqual(
+            (self.root / "async.md").read_bytes(), (self.root / "sync.md").read_bytes()
+        )
+        self.assertEqual(result.output_path, self.root / "async.md")
+        self.assertEqual(
+            result.metrics.stages["parse"].bytes_processed, input_path.stat().st_size
+        )
+        self.assertEqual(
+            result.metrics.stages["write"].bytes_processed,
+            (self.root / "async.md").stat().st_size,
+        )
+        self.assertIn('conversions_total{status="success"} 1', registry.render())
+
+    async def test_agenerate_to_writes_to_a_socket(self):
+        """A StreamWriter receives exactly what generate returns."""
+        conversation = JSONConverter().parse(_conversation(300))
+        received = asyncio.get_running_loop().create_future()
+
+        async def receive(reader, writer):
+            received.set_result(await reader.read())
+            writer.close()
+
+        server = await asyncio.start_server(receive, "127.0.0.1", 0)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            metrics = await agenerate_to(conversation, writer)
+            writer.close()
+            await writer.wait_closed()
+            data = await received
+
+        expected = MarkdownGenerator().generate(conversation)
+        self.assertEqual(data.decode("utf-8"), expected)
+        self.assertEqual(metrics.message_count, 300)
+
+    async def test_event_loop_stays_responsive(self):
+        """Other tasks keep running while a large conversation converts."""
+        input_path = self.root / "large.json"
+        input_path.write_text(_conversation(20000))
+        gaps = []
+
+        async def heartbeat():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        ticker = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await aconvert(input_path, self.root / "large.md")
+        elapsed = time.perf_counter() - started
+        ticker.cancel()
+
+        # The loop ran throughout, not only before and after
+        self.assertGreater(len(gaps), 10)
+        self.assertLess(max(gaps), max(0.1, elapsed / 4))
+
+    async def test_cancellation_stops_between_messages(self):
+        """A cancelled conversion reads no further and writes no output."""
+        pulled = []
+
+        def messages():
+            for i in range(100000):
+                pulled.append(i)
+                yield Message(speaker="User", content="word " * 50)
+
+        writer = _SlowWriter(delay=10)
+        task = asyncio.create_task(agenerate_to(messages(), writer))
+        await writer.first_write.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        count = len(pulled)
+        await asyncio.sleep(0.05)
+
+        self.assertLess(count, 100000)
+        self.assertEqual(len(pulled), count)
+
+    async def test_cancellation_waits_for_the_input_to_be_released(self):
+        """The input stays open until the executor stops reading it."""
+        input_path = self.root / "input.json"
+        input_path.write_text(_conversation(10))
+        converter = _BlockingConverter()
+
+        task = asyncio.create_task(
+            aconvert(input_path, self.root / "output.md", converter=converter)
+        )
+        await asyncio.to_thread(converter.started.wait, 5)
+        task.cancel()
+        asyncio.get_running_loop().call_later(0.05, converter.release.set)
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertTrue(converter.stopped.is_set())
+        self.assertEqual(converter.read_errors, [])
+        self.assertFalse((self.root / "output.md").exists())
+
+    async def test_failed_conversion_leaves_no_output(self):
+        """Invalid input raises and the output file is never created."""
+        input_path = self.root / "bad.json"
+        input_path.write_text('{"messages": [{"speaker": "User"}]}')
+        registry = MetricsRegistry()
+
+        with self.assertRaises((ConversationParseError, KeyError)):
+            await aconvert(input_path, self.root / "bad.md", registry=registry)
+
+        self.assertEqual(list(self.root.iterdir()), [input_path])
+        self.assertIn('conversions_total{status="error"} 1', registry.render())
+
+    async def test_file_writer_replaces_target_on_success_only(self):
+        """AsyncFileWriter keeps the old file if the block fails."""
+        target = self.root / "out.md"
+        target.write_text("old")
+
+        with self.assertRaises(RuntimeError):
+            async with AsyncFileWriter(target) as writer:
+                writer.write(b"partial")
+                await writer.drain()
+                raise RuntimeError("interrupted")
+        self.assertEqual(target.read_text(), "old")
+
+        async with AsyncFileWriter(target) as writer:
+            writer.write(b"new")
+        self.assertEqual(target.read_text(), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()
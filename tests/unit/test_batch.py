@@ -0,0 +1,203 @@
+"""Unit tests for batch conversion planning and execution."""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from conv2md.application.batch import (
+    MAX_TASK_FILES,
+    BatchItem,
+    _tasks,
+    expand_inputs,
+    file_digest,
+    mirrored_output_path,
+    plan_batch,
+    run_batch,
+    walk_conversation_files,
+)
+from conv2md.markdown.registry import MetricsRegistry
+
+
+def _conversation(words: int) -> str:
+    """Return a conversation whose size grows with ``words``."""
+    content = " ".join(["word"] * words)
+    return '{"messages": [{"speaker": "User", "content": "%s"}]}' % content
+
+
+class TestBatchPlanning(unittest.TestCase):
+    """Inputs expand to a deduplicated, largest-first work list."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name).resolve()
+        (self.root / "in" / "sub").mkdir(parents=True)
+        (self.root / "in" / ".git").mkdir()
+        (self.root / "in" / "small.json").write_text(_conversation(1))
+        (self.root / "in" / "sub" / "large.json").write_text(_conversation(500))
+        (self.root / "in" / "notes.txt").write_text("not a conversation")
+        (self.root / "in" / ".git" / "config.json").write_text("{}")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_walk_finds_json_files_and_skips_hidden_directories(self):
+        """Only *.json files outside hidden directories are collected."""
+        found = {path.name for path, _ in walk_conversation_files(self.root / "in")}
+
+        self.assertEqual(found, {"small.json", "large.json"})
+
+    def test_walk_does_not_follow_directory_symlinks(self):
+        """A symlink cycle cannot make the walk endless."""
+        os.symlink(self.root / "in", self.root / "in" / "sub" / "loop")
+
+        found = list(walk_conversation_files(self.root / "in"))
+
+        self.assertEqual(len(found), 2)
+
+    def test_expand_deduplicates_and_finds_common_root(self):
+        """A file named twice is converted once, mirrored from the shared root."""
+        files, root = expand_inputs(
+            [
+                self.root / "in",
+                str(self.root / "in" / "sub" / "*.json"),
+            ]
+        )
+
+        self.assertEqual(len(files), 2)
+        self.assertEqual(root, self.root / "in")
+
+    def test_expand_rejects_pattern_without_matches(self):
+        """A glob that matches nothing is an error, not a silent no-op."""
+        with self.assertRaises(ValueError):
+            expand_inputs([str(self.root / "*.nothing")])
+
+    def test_plan_orders_largest_first_and_mirrors_outputs(self):
+        """The biggest file is scheduled first; outputs keep the tree."""
+        files, root = expand_inputs([self.root / "in"])
+        out_dir = self.root / "out"
+
+        items = plan_batch(files, root, out_dir)
+
+        self.assertEqual(items[0].input_path.name, "large.json")
+        self.assertEqual(items[0].output_path, out_dir / "sub" / "large.md")
+
+    def test_mirrored_output_path(self):
+        """The output keeps the relative directory and swaps the suffix."""
+        self.assertEqual(
+            mirrored_output_path(Path("/a/b/c.json"), Path("/a"), Path("/o")),
+            Path("/o/b/c.md"),
+        )
+
+
+class TestRunBatch(unittest.TestCase):
+    """run_batch converts every item and confines failures to their file."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name).resolve()
+        (self.root / "in").mkdir()
+        for i in range(5):
+            (self.root / "in" / f"c{i}.json").write_text(_conversation(i + 1))
+        (self.root / "in" / "broken.json").write_text("{not json")
+        files, root = expand_inputs([self.root / "in"])
+        self.items = plan_batch(files, root, self.root / "out")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def _assert_summary(self, summary):
+        self.assertEqual(summary.succeeded, 5)
+        self.assertEqual(summary.failed, 1)
+        failed = [o for o in summary.outcomes if not o.ok][0]
+        self.assertEqual(failed.item.input_path.name, "broken.json")
+        self.assertTrue(failed.error.startswith("JSONDecodeError"))
+        for i in range(5):
+            self.assertTrue((self.root / "out" / f"c{i}.md").exists())
+
+    def test_in_process_batch(self):
+        """jobs=1 converts in this process and reports every outcome."""
+        seen = []
+        registry = MetricsRegistry()
+
+        summary = run_batch(self.items, registry=registry, on_outcome=seen.append)
+
+        self._assert_summary(summary)
+        self.assertEqual(len(seen), 6)
+        self.assertIn('conv2md_conversions_total{status="error"} 1', registry.render())
+
+    def test_process_pool_batch(self):
+        """jobs>1 converts on worker processes with the same results."""
+        summary = run_batch(self.items, jobs=2)
+
+        self._assert_summary(summary)
+        self.assertEqual(summary.to_dict()["files"], 6)
+        self.assertIsNotNone(summary.files_per_sec)
+
+    def test_record_digests(self):
+        """Workers report the digest and stat of each input they convert."""
+        summary = run_batch(self.items, jobs=2, record_digests=True)
+
+        for outcome in summary.outcomes:
+            stat = outcome.item.input_path.stat()
+            self.assertEqual(outcome.input_stat, (stat.st_size, stat.st_mtime_ns))
+            self.assertEqual(outcome.input_digest, file_digest(outcome.item.input_path))
+
+    def test_digests_not_recorded_by_default(self):
+        """Batches without a manifest do not read inputs twice."""
+        summary = run_batch(self.items[:1])
+
+        self.assertIsNone(summary.outcomes[0].input_digest)
+
+
+class TestTaskSplitting(unittest.TestCase):
+    """Worker tasks share the large files out rather than bunching them."""
+
+    def setUp(self):
+        """Set up a largest-first work list."""
+        self.items = [
+            BatchItem(Path(f"{i}.json"), Path(f"{i}.md"), size=10_000 - i)
+            for i in range(1000)
+        ]
+
+    def test_largest_items_go_to_different_tasks(self):
+        """Each of the largest files leads a task of its own."""
+        tasks = list(_tasks(self.items, jobs=4))
+
+        self.assertGreater(len(tasks), 1)
+        self.assertEqual([task[0] for task in tasks], self.items[: len(tasks)])
+
+    def test_every_item_is_dealt_once_within_the_task_cap(self):
+        """Tasks cover the list exactly and stay within MAX_TASK_FILES."""
+        tasks = list(_tasks(self.items, jobs=2))
+
+        dealt = [item for task in tasks for item in task]
+        self.assertEqual(sorted(dealt, key=self.items.index), self.items)
+        self.assertLessEqual(max(len(task) for task in tasks), MAX_TASK_FILES)
+        sizes = [sum(item.size for item in task) for task in tasks]
+        self.assertLess(max(sizes) - min(sizes), 10_000)
+
+
+class TestFileDigest(unittest.TestCase):
+    """file_digest depends on the content only."""
+
+    def test_digest_tracks_content(self):
+        """Equal content gives equal digests, different content does not."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, name) for name in "abc"]
+            for path, content in zip(paths, (b"x", b"x", b"y")):
+                with open(path, "wb") as f:
+                    f.write(content)
+
+            digests = [file_digest(path) for path in paths]
+
+        self.assertEqual(digests[0], digests[1])
+        self.assertNotEqual(digests[0], digests[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,8 @@
 import unittest
 import tempfile
 import os
+from pathlib import Path
+from unittest import mock
 from click.testing import CliRunner
 
 from conv2md.cli import main
@@ -73,24 +75,15 @@ class TestCLIArgumentParsing(unittest.TestCase):
         )
         self.assertIn("not found", result.output.lower())
 
-    def test_cli_validates_input_is_file(self):
-        """Test CLI validates that input path is a file, not a directory."""
-        import tempfile
-
+    def test_cli_rejects_directory_without_conversations(self):
+        """A directory is batch input, but one with no .json files is an error."""
         with tempfile.TemporaryDirectory() as temp_dir:
             # Pass the directory as --input
             result = self.runner.invoke(main, ["--input", temp_dir])
             self.assertNotEqual(
-                result.exit_code, 0, "CLI should error if input is a directory"
-            )
-            # Check for directory-related error message
-            self.assertTrue(
-                any(
-                    phrase in result.output.lower()
-                    for phrase in ["not a file", "is a directory", "invalid"]
-                ),
-                f"Expected directory error message, got: {result.output}",
+                result.exit_code, 0, "CLI should error if nothing can be converted"
             )
+            self.assertIn("no conversation files found", result.output.lower())
 
     def test_cli_shows_help(self):
         """Test CLI shows comprehensive help information."""
@@ -110,6 +103,273 @@ class TestCLIArgumentParsing(unittest.TestCase):
         # Click's validation will show "not found" for non-existent files
         self.assertIn("not found", result.output.lower())
 
+    def test_serve_requires_exactly_one_transport(self):
+        """serve listens on a socket or over HTTP, never both or neither."""
+        for args in ([], ["--socket", "x.sock", "--http", "127.0.0.1:0"]):
+            result = self.runner.invoke(main, ["serve", *args])
+            self.assertEqual(result.exit_code, 2, result.output)
+            self.assertIn("exactly one of --socket and --http", result.output)
+
+    def test_serve_rejects_malformed_http_address(self):
+        """--http takes HOST:PORT."""
+        result = self.runner.invoke(main, ["serve", "--http", "localhost"])
+
+        self.assertEqual(result.exit_code, 2, result.output)
+        self.assertIn("HOST:PORT", result.output)
+
+    def test_input_list_stands_alone(self):
+        """--input-list cannot be mixed with --input, and must list a URL."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            url_list = Path(temp_dir, "urls.txt")
+            url_list.write_text("# nothing yet\n")
+            chat = Path(temp_dir, "chat.json")
+            chat.write_text("{}")
+
+            mixed = self.runner.invoke(
+                main, ["--input-list", str(url_list), "--input", str(chat)]
+            )
+            empty = self.runner.invoke(main, ["--input-list", str(url_list)])
+
+        self.assertEqual(mixed.exit_code, 2, mixed.output)
+        self.assertIn("cannot be combined with --input", mixed.output)
+        self.assertEqual(empty.exit_code, 1, empty.output)
+        self.assertIn("No URLs in", empty.output)
+
+    def test_cache_dir_needs_an_input_list(self):
+        """Only downloads are cached: --cache-dir is refused for local inputs."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            chat = Path(temp_dir, "chat.json")
+            chat.write_text("{}")
+            result = self.runner.invoke(
+                main, ["--input", str(chat), "--cache-dir", temp_dir]
+            )
+
+        self.assertEqual(result.exit_code, 2, result.output)
+        self.assertIn("--cache-dir caches downloads", result.output)
+
+
+class TestCLIConversion(unittest.TestCase):
+    """The CLI converts a conversation file into the output directory."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.runner = CliRunner()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.temp_dir.name, "chat.json")
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            f.write('{"messages": [{"speaker": "User", "content": "Hello"}]}')
+        self.out_dir = os.path.join(self.temp_dir.name, "out")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_cli_writes_markdown_file(self):
+        """Converting a file writes <stem>.md into --out."""
+        result = self.runner.invoke(
+            main, ["--input", self.input_path, "--out", self.out_dir]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(os.path.join(self.out_dir, "chat.md"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "**User:**\nHello")
+
+    def test_cli_metrics_flag_reports_stages(self):
+        """--metrics prints the metrics, including every stage."""
+        result = self.runner.invoke(
+            main, ["--input", self.input_path, "--out", self.out_dir, "--metrics"]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('"stages"', result.output)
+        self.assertIn('"write"', result.output)
+
+    def test_cli_writes_metrics_textfile(self):
+        """--metrics-textfile exports the run in the exposition format."""
+        textfile = os.path.join(self.temp_dir.name, "conv2md.prom")
+        result = self.runner.invoke(
+            main,
+            [
+                "--input",
+                self.input_path,
+                "--out",
+                self.out_dir,
+                "--metrics-textfile",
+                textfile,
+            ],
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(textfile, encoding="utf-8") as f:
+            self.assertIn('conv2md_conversions_total{status="success"} 1', f.read())
+
+    def test_cli_reports_invalid_conversation(self):
+        """Invalid input fails with a clean error and exit code 1."""
+        with open(self.input_path, "w", encoding="utf-8") as f:
+            f.write('{"messages": []}')
+
+        result = self.runner.invoke(
+            main, ["--input", self.input_path, "--out", self.out_dir]
+        )
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("Failed to convert", result.output)
+        self.assertFalse(os.path.exists(self.out_dir))
+
+    def test_cli_reports_unsupported_url(self):
+        """URLs are accepted by --input but converted through --input-list."""
+        result = self.runner.invoke(main, ["--input", "https://example.com/a"])
+
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("not supported", result.output)
+        self.assertIn("--input-list", result.output)
+
+    def test_cli_streams_stdin_to_stdout(self):
+        """--input - --stdout converts a pipeline without touching --out."""
+        with open(self.input_path, encoding="utf-8") as f:
+            conversation = f.read()
+
+        result = self.runner.invoke(
+            main,
+            ["--input", "-", "--stdout", "--out", self.out_dir],
+            input=conversation,
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(result.output, "**User:**\nHello")
+        self.assertFalse(os.path.exists(self.out_dir))
+
+    def test_cli_stdin_without_stdout_writes_to_out(self):
+        """Stdin input alone is written to stdin.md in --out."""
+        result = self.runner.invoke(
+            main,
+            ["--input", "-", "--out", self.out_dir],
+            input='{"messages": [{"speaker": "A", "content": "b"}]}',
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(os.path.join(self.out_dir, "stdin.md"), encoding="utf-8") as f:
+            self.assertEqual(f.read(), "**A:**\nb")
+
+    def test_cli_stdout_rejects_several_inputs(self):
+        """--stdout cannot interleave a batch on one stream."""
+        result = self.runner.invoke(
+            main, ["--input", self.input_path, "--input", "-", "--stdout"]
+        )
+
+        self.assertEqual(result.exit_code, 2, result.output)
+
+
+class TestCLIBatchConversion(unittest.TestCase):
+    """Directories and glob patterns convert every file in one process."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.runner = CliRunner()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.in_dir = os.path.join(self.temp_dir.name, "in")
+        os.makedirs(os.path.join(self.in_dir, "nested"))
+        for name in ("a.json", os.path.join("nested", "b.json")):
+            with open(os.path.join(self.in_dir, name), "w", encoding="utf-8") as f:
+                f.write('{"messages": [{"speaker": "User", "content": "Hi"}]}')
+        self.out_dir = os.path.join(self.temp_dir.name, "out")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_cli_converts_directory_tree(self):
+        """Outputs mirror the input tree and a summary is reported."""
+        result = self.runner.invoke(
+            main, ["--input", self.in_dir, "--out", self.out_dir]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(os.path.exists(os.path.join(self.out_dir, "a.md")))
+        self.assertTrue(os.path.exists(os.path.join(self.out_dir, "nested", "b.md")))
+        self.assertIn("Converted 2 of 2 files (0 failed)", result.output)
+
+    def test_cli_batch_reports_failures_and_exits_nonzero(self):
+        """A bad file is reported without stopping the others."""
+        with open(os.path.join(self.in_dir, "bad.json"), "w") as f:
+            f.write("{not json")
+
+        result = self.runner.invoke(
+            main, ["--input", self.in_dir, "--out", self.out_dir]
+        )
+
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("bad.json", result.output)
+        self.assertIn("Converted 2 of 3 files (1 failed)", result.output)
+
+    def test_cli_converts_glob_with_worker_pool(self):
+        """A glob pattern is expanded and converted on --jobs workers."""
+        pattern = os.path.join(self.in_dir, "**", "*.json")
+
+        result = self.runner.invoke(
+            main, ["--input", pattern, "--out", self.out_dir, "--jobs", "2"]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Converted 2 of 2 files", result.output)
+        self.assertTrue(os.path.exists(os.path.join(self.out_dir, "nested", "b.md")))
+
+    def test_cli_incremental_skips_unchanged_files(self):
+        """A second --incremental run converts only what changed."""
+        args = ["--input", self.in_dir, "--out", self.out_dir, "--incremental"]
+        self.assertEqual(self.runner.invoke(main, args).exit_code, 0)
+        with open(os.path.join(self.in_dir, "a.json"), "w", encoding="utf-8") as f:
+            f.write('{"messages": [{"speaker": "User", "content": "Changed"}]}')
+
+        result = self.runner.invoke(main, args)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Converted 1 of 1 files (0 failed)", result.output)
+        self.assertIn("1 unchanged skipped", result.output)
+
+    def test_cli_resume_without_interrupted_run(self):
+        """--resume fails cleanly when the last run finished."""
+        self.runner.invoke(
+            main, ["--input", self.in_dir, "--out", self.out_dir, "--incremental"]
+        )
+
+        result = self.runner.invoke(main, ["--out", self.out_dir, "--resume"])
+
+        self.assertEqual(result.exit_code, 1, result.output)
+        self.assertIn("No interrupted run", result.output)
+
+    def test_cli_resume_takes_no_input(self):
+        """--resume continues the journalled inputs, not new ones."""
+        result = self.runner.invoke(
+            main, ["--input", self.in_dir, "--out", self.out_dir, "--resume"]
+        )
+
+        self.assertEqual(result.exit_code, 2, result.output)
+
+    def test_cli_watch_converts_then_watches(self):
+        """--watch converts the directory before it starts watching."""
+        with mock.patch(
+            "conv2md.application.watch.DirectoryWatcher.watch", return_value=iter([])
+        ) as watch:
+            result = self.runner.invoke(
+                main,
+                ["--input", self.in_dir, "--out", self.out_dir, "--watch"],
+            )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Converted 2 of 2 files", result.output)
+        self.assertIn("Watching 2 files", result.output)
+        watch.assert_called_once_with(2.0)
+
+    def test_cli_watch_requires_one_directory(self):
+        """--watch cannot watch a single file."""
+        result = self.runner.invoke(
+            main, ["--input", os.path.join(self.in_dir, "a.json"), "--watch"]
+        )
+
+        self.assertEqual(result.exit_code, 2, result.output)
+        self.assertIn("one input directory", result.output)
+
 
 if __name__ == "__main__":
     unittest.main()
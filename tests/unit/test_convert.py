@@ -0,0 +1,198 @@
+"""Unit tests for the file conversion use case."""
+
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from conv2md.application.convert import (
+    convert_file,
+    convert_stream,
+    output_path_for,
+    write_output,
+)
+from conv2md.converters.json_conv import ConversationParseError
+from conv2md.domain.models import Conversation, Message
+from conv2md.markdown.generator import MarkdownGenerator
+
+CONVERSATION = {
+    "messages": [
+        {"speaker": "User", "content": "Hi *there*"},
+        {"speaker": "Bot", "content": "Hello!"},
+    ]
+}
+
+
+class TestConvertFile(unittest.TestCase):
+    """convert_file reads, converts and writes one conversation."""
+
+    def setUp(self):
+        """Create a scratch directory with one conversation file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.input_path = self.root / "chat.json"
+        self.input_path.write_text(json.dumps(CONVERSATION), encoding="utf-8")
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        self.temp_dir.cleanup()
+
+    def test_output_path_uses_input_stem(self):
+        """Output is named after the input, with a .md suffix."""
+        self.assertEqual(
+            output_path_for(Path("/in/chat.json"), Path("/out")),
+            Path("/out/chat.md"),
+        )
+
+    def test_writes_markdown_and_creates_directories(self):
+        """The output directory is created and holds the rendered Markdown."""
+        output_path = self.root / "out" / "nested" / "chat.md"
+
+        result = convert_file(self.input_path, output_path)
+
+        self.assertEqual(result.output_path, output_path)
+        self.assertEqual(
+            output_path.read_text(encoding="utf-8"),
+            "**User:**\nHi \\*there\\*\n\n**Bot:**\nHello\\!",
+        )
+
+    def test_metrics_cover_every_stage(self):
+        """Parse and write join the generator's stages with byte counts."""
+        output_path = self.root / "chat.md"
+
+        result = convert_file(self.input_path, output_path)
+
+        stages = result.metrics.to_dict()["stages"]
+        self.assertEqual(
+            list(stages),
+            ["parse", "validate", "sanitize", "render", "join", "write"],
+        )
+        self.assertEqual(
+            stages["parse"]["bytes_processed"], self.input_path.stat().st_size
+        )
+        self.assertEqual(stages["write"]["bytes_processed"], output_path.stat().st_size)
+        for name, stage in stages.items():
+            with self.subTest(stage=name):
+                self.assertGreaterEqual(stage["duration_seconds"], 0.0)
+
+    def test_memory_tracking_covers_parse_and_write(self):
+        """Opting in measures memory for the stages outside the generator."""
+        from conv2md.markdown.generator import MarkdownGenerator
+
+        result = convert_file(
+            self.input_path,
+            self.root / "chat.md",
+            generator=MarkdownGenerator(track_memory=True),
+        )
+
+        stages = result.metrics.to_dict()["stages"]
+        self.assertIn("memory_peak_bytes", stages["parse"])
+        self.assertIn("memory_peak_bytes", stages["write"])
+        self.assertGreaterEqual(
+            result.metrics.traced_peak_bytes, stages["parse"]["memory_peak_bytes"]
+        )
+
+    def test_invalid_input_writes_nothing(self):
+        """A parse failure propagates and leaves no output behind."""
+        self.input_path.write_text('{"messages": []}', encoding="utf-8")
+        output_path = self.root / "out" / "chat.md"
+
+        with self.assertRaises(ConversationParseError):
+            convert_file(self.input_path, output_path)
+
+        self.assertFalse(output_path.exists())
+
+    def test_failed_write_leaves_no_partial_file(self):
+        """An interrupted write removes its temporary file."""
+        output_path = self.root / "chat.md"
+
+        with patch(
+            "conv2md.application.convert.os.replace", side_effect=OSError("boom")
+        ):
+            with self.assertRaises(OSError):
+                write_output(output_path, b"data")
+
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["chat.json"])
+
+
+class OneByteReader:
+    """Binary stream returning a single byte per read."""
+
+    def __init__(self, data: bytes):
+        self.stream = io.BytesIO(data)
+
+    def read(self, size: int) -> bytes:
+        return self.stream.read(1)
+
+
+class TestConvertStream(unittest.TestCase):
+    """convert_stream writes the same Markdown as convert_file, incrementally."""
+
+    def setUp(self):
+        """Create a scratch directory with one conversation file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.conversation = {
+            "messages": [
+                {"speaker": "Zoë", "content": "Ünïcödé *text* → 🎉"},
+                {"speaker": "Bot", "content": "```py\nprint(1)\n```"},
+            ]
+        }
+        self.data = json.dumps(self.conversation, ensure_ascii=False).encode()
+        self.input_path = self.root / "chat.json"
+        self.input_path.write_bytes(self.data)
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        self.temp_dir.cleanup()
+
+    def test_stream_output_matches_file_output(self):
+        """Multi-byte characters split across reads still decode correctly."""
+        result = convert_file(self.input_path, self.root / "chat.md")
+        output = io.StringIO()
+
+        convert_stream(OneByteReader(self.data), output)
+
+        self.assertEqual(output.getvalue(), result.output_path.read_text("utf-8"))
+
+    def test_stream_metrics_cover_parse_and_write(self):
+        """Parse counts the input bytes, write the output bytes."""
+        output = io.StringIO()
+
+        metrics = convert_stream(io.BytesIO(self.data), output)
+
+        self.assertEqual(metrics.stages["parse"].bytes_processed, len(self.data))
+        self.assertEqual(
+            metrics.stages["write"].bytes_processed,
+            len(output.getvalue().encode("utf-8")),
+        )
+        self.assertEqual(metrics.message_count, 2)
+
+    def test_stream_returns_its_own_metrics(self):
+        """A conversion started while the stream is writing is not returned."""
+        generator = MarkdownGenerator()
+        other = Conversation(messages=[Message(speaker="User", content="other")])
+
+        class Interrupting(io.StringIO):
+            def write(self, text):
+                generator.generate(other)
+                return super().write(text)
+
+        metrics = convert_stream(
+            io.BytesIO(self.data), Interrupting(), generator=generator
+        )
+
+        self.assertEqual(metrics.message_count, 2)
+        self.assertEqual(set(metrics.stages) & {"parse", "write"}, {"parse", "write"})
+        self.assertIsNot(metrics, generator.metrics_collector.current_metrics)
+
+    def test_stream_rejects_invalid_utf8(self):
+        """Undecodable input fails like a file conversion does."""
+        with self.assertRaises(UnicodeDecodeError):
+            convert_stream(io.BytesIO(b'{"messages": "\xff"}'), io.StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Unit tests for the URL fetch scheduler's building blocks."""
+
+import asyncio
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from conv2md.application.fetch import (
+    MAX_BACKOFF_SECONDS,
+    FetchScheduler,
+    TokenBucket,
+    read_url_list,
+    url_output_path,
+)
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand, or by the patched sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tokens are spent at most at the configured rate after a burst."""
+
+    def setUp(self):
+        """Patch the scheduler's sleep onto a fake clock."""
+        self.clock = FakeClock()
+        patcher = mock.patch(
+            "conv2md.application.fetch.asyncio.sleep", side_effect=self.clock.sleep
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def acquire(self, bucket, times):
+        """Acquire ``times`` tokens in a fresh event loop."""
+
+        async def run():
+            for _ in range(times):
+                await bucket.acquire()
+
+        asyncio.run(run())
+
+    def test_burst_is_free_then_rate_applies(self):
+        """A full bucket gives ``burst`` tokens at once, then one per 1/rate."""
+        bucket = TokenBucket(rate=4, burst=2, clock=self.clock)
+
+        self.acquire(bucket, 2)
+        self.assertEqual(self.clock.sleeps, [])
+
+        self.acquire(bucket, 3)
+        self.assertAlmostEqual(self.clock.now, 0.75)
+
+    def test_idle_time_refills_up_to_burst(self):
+        """Tokens accrued while idle are capped at the burst size."""
+        bucket = TokenBucket(rate=10, burst=3, clock=self.clock)
+        self.acquire(bucket, 3)
+
+        self.clock.now += 60
+        self.acquire(bucket, 3)
+        self.assertEqual(self.clock.sleeps, [])
+        self.acquire(bucket, 1)
+        self.assertAlmostEqual(sum(self.clock.sleeps), 0.1)
+
+
+class TestBackoff(unittest.TestCase):
+    """Retry delays grow exponentially, jittered, capped and floored."""
+
+    def scheduler(self, jitter):
+        """Return a scheduler with a fixed jitter and no fetcher."""
+        return FetchScheduler(mock.Mock(), backoff_seconds=0.5, jitter=lambda: jitter)
+
+    def test_delay_doubles_up_to_the_cap(self):
+        """At full jitter the delay is the exponential cap itself."""
+        scheduler = self.scheduler(1.0)
+
+        delays = [scheduler._backoff(attempt, None) for attempt in range(1, 5)]
+
+        self.assertEqual(delays, [0.5, 1.0, 2.0, 4.0])
+        self.assertEqual(scheduler._backoff(20, None), MAX_BACKOFF_SECONDS)
+
+    def test_jitter_scales_the_delay(self):
+        """The delay is a random share of the cap."""
+        self.assertEqual(self.scheduler(0.25)._backoff(3, None), 0.5)
+
+    def test_retry_after_is_a_floor(self):
+        """A Retry-After in seconds is waited out; an HTTP date is ignored."""
+        scheduler = self.scheduler(0.0)
+
+        self.assertEqual(scheduler._backoff(1, "5"), 5.0)
+        self.assertEqual(scheduler._backoff(1, "3600"), MAX_BACKOFF_SECONDS)
+        self.assertEqual(scheduler._backoff(1, "Wed, 21 Oct 2026 07:28:00 GMT"), 0)
+
+
+class TestURLNaming(unittest.TestCase):
+    """URL lists are parsed and URLs map to stable output names."""
+
+    def test_read_url_list_skips_comments_and_blanks(self):
+        """Lines are stripped; blank lines and # comments are skipped."""
+        lines = ["# docs\n", "https://a.test/x\n", "\n", "  https://b.test/  \n"]
+
+        self.assertEqual(read_url_list(lines), ["https://a.test/x", "https://b.test/"])
+
+    def test_output_path_is_host_and_path_slug(self):
+        """Path separators and punctuation collapse to dashes."""
+        out = Path("out")
+
+        self.assertEqual(
+            url_output_path("https://Example.com/chats/2024/a.json", out),
+            out / "example.com-chats-2024-a-json.md",
+        )
+        self.assertEqual(
+            url_output_path("http://example.com/", out), out / "example.com-index.md"
+        )
+
+    def test_query_strings_get_distinct_names(self):
+        """URLs differing only in their query do not share a file."""
+        first = url_output_path("https://a.test/chat?id=1", Path("out"))
+        second = url_output_path("https://a.test/chat?id=2", Path("out"))
+
+        self.assertNotEqual(first, second)
+        self.assertTrue(first.name.startswith("a.test-chat-"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+"""Unit tests for the streaming HTML converter."""
+
+import unittest
+
+from conv2md.converters.html_conv import HTMLConverter, charset_of
+
+
+def _body(markdown: str) -> str:
+    """Return the Markdown after its frontmatter."""
+    return markdown.split("---\n\n", 1)[1]
+
+
+class TestHTMLConverter(unittest.TestCase):
+    """HTML elements become their Markdown equivalents."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.converter = HTMLConverter()
+
+    def convert(self, html, url=None):
+        return _body(self.converter.convert(html, url=url))
+
+    def test_frontmatter_records_the_page(self):
+        """The title, description and URL go into the frontmatter."""
+        markdown = self.converter.convert(
+            "<head><title> A  page </title>"
+            '<meta name="description" content="About it"></head><p>Text</p>',
+            url="https://example.com/a",
+        )
+
+        self.assertEqual(
+            markdown,
+            "---\n"
+            'description: "About it"\n'
+            'source: "url"\n'
+            'title: "A page"\n'
+            'url: "https://example.com/a"\n'
+            "---\n\n"
+            "Text",
+        )
+
+    def test_scripts_and_styles_are_dropped(self):
+        """Non-content elements and everything in them leave no trace."""
+        markdown = self.convert(
+            "<style>p { color: red }</style><p>Kept</p>"
+            "<script>document.write('<p>Not kept</p>')</script>"
+            "<svg><text>Icon</text></svg><noscript><p>Enable JS</p></noscript>"
+        )
+
+        self.assertEqual(markdown, "Kept")
+
+    def test_headings_paragraphs_and_inline_markup(self):
+        """Headings, emphasis, code and line breaks are kept."""
+        markdown = self.convert(
+            "<h2>Title <em>here</em></h2>"
+            "<p>Some <strong>bold</strong>,  <i>italic</i> and <code>a`b</code>."
+            "<br>Second line</p>"
+        )
+
+        self.assertEqual(
+            markdown,
+            "## Title _here_\n\nSome **bold**, _italic_ and ``a`b``.\\\nSecond line",
+        )
+
+    def test_links_and_images_resolve_against_the_page(self):
+        """Relative targets are made absolute and unsafe ones are dropped."""
+        markdown = self.convert(
+            '<p><a href="../b">Next</a> <a href="javascript:go()">Go</a> '
+            '<img src="/img/x.png" alt="An [x]"></p>',
+            url="https://example.com/docs/a",
+        )
+
+        self.assertEqual(
+            markdown,
+            "[Next](https://example.com/b) Go "
+            "![An \\[x\\]](https://example.com/img/x.png)",
+        )
+
+    def test_text_is_escaped(self):
+        """Text that would read as Markdown is escaped."""
+        markdown = self.convert("<p>2 * 3 = <6></p><p># not a heading</p>")
+
+        self.assertEqual(markdown, "2 \\* 3 = \\<6\\>\n\n\\# not a heading")
+
+    def test_nested_lists(self):
+        """Items are marked and nested items indented under theirs."""
+        markdown = self.convert(
+            "<ul><li>One</li><li>Two<ol><li>A<li>B</ol></li><li>Three</ul>"
+        )
+
+        self.assertEqual(markdown, "- One\n- Two\n  1. A\n  2. B\n- Three")
+
+    def test_blockquotes_stay_quoted_between_paragraphs(self):
+        """A blank line inside a quote keeps its marker."""
+        markdown = self.convert("<blockquote><p>One</p><p>Two</p></blockquote>")
+
+        self.assertEqual(markdown, "> One\n>\n> Two")
+
+    def test_preformatted_text_becomes_a_code_block(self):
+        """<pre> keeps its whitespace, and a language class its language."""
+        markdown = self.convert(
+            '<pre><code class="language-python">def f():\n'
+            "    return 1 &lt; 2\n</code></pre>"
+        )
+
+        self.assertEqual(markdown, "```python\ndef f():\n    return 1 < 2\n```")
+
+    def test_tables_become_gfm_tables(self):
+        """The first row is the header; pipes in cells are escaped."""
+        markdown = self.convert(
+            "<table><tr><th>Name</th><th>Value</th></tr>"
+            "<tr><td>a|b</td><td><p>1</p><p>2</p></td></tr>"
+            "<tr><td>short</td></table>"
+        )
+
+        self.assertEqual(
+            markdown,
+            "| Name | Value |\n| --- | --- |\n| a\\|b | 1 2 |\n| short |  |",
+        )
+
+    def test_markdown_streams_as_blocks_close(self):
+        """Blocks are yielded while later chunks are still unread."""
+        read = []
+
+        def chunks():
+            for chunk in (b"<p>First</p>", b"<p>Second</p>", b"<p>Third</p>"):
+                read.append(chunk)
+                yield chunk
+
+        pieces = self.converter.iter_markdown(chunks())
+        next(pieces)  # frontmatter
+        self.assertEqual(next(pieces), "First")
+        self.assertEqual(len(read), 1)
+
+    def test_multibyte_characters_split_across_chunks(self):
+        """Decoding is incremental, in the declared charset."""
+        data = "<p>café ☃</p>".encode("utf-8")
+        chunks = [data[i : i + 1] for i in range(len(data))]
+
+        markdown = "".join(self.converter.iter_markdown(chunks))
+
+        self.assertEqual(_body(markdown), "café ☃")
+        latin = "".join(
+            self.converter.iter_markdown(
+                ["<p>café</p>".encode("latin-1")], encoding="iso-8859-1"
+            )
+        )
+        self.assertEqual(_body(latin), "café")
+
+    def test_non_text_charsets_decode_as_utf8(self):
+        """Codecs that do not decode bytes to text are not used for pages."""
+        for charset in ("hex", "zlib", "base64", "rot13", "no-such-charset"):
+            with self.subTest(charset=charset):
+                markdown = "".join(
+                    self.converter.iter_markdown(
+                        ["<p>café</p>".encode("utf-8")], encoding=charset
+                    )
+                )
+                self.assertEqual(_body(markdown), "café")
+
+    def test_oversized_pages_are_cut_off(self):
+        """Past max_bytes nothing more is read, and the cut is noted."""
+        converter = HTMLConverter(max_bytes=30)
+        read = []
+
+        def chunks():
+            for i in range(100):
+                read.append(i)
+                yield b"<p>Paragraph %d</p>" % i
+
+        with self.assertLogs("conv2md.converters.html_conv", "WARNING"):
+            markdown = _body("".join(converter.iter_markdown(chunks())))
+
+        self.assertEqual(len(read), 2)
+        self.assertEqual(
+            markdown,
+            "Paragraph 0\n\nParagraph\n\n"
+            "<!-- conv2md: truncated after 30 bytes of HTML -->",
+        )
+
+    def test_charset_of(self):
+        """The charset parameter is read from a Content-Type."""
+        self.assertEqual(charset_of('text/html; charset="ISO-8859-1"'), "ISO-8859-1")
+        self.assertIsNone(charset_of("text/html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
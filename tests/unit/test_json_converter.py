@@ -192,5 +192,79 @@ class TestJSONConverter(unittest.TestCase):
         self.assertIn("empty", log_output.lower())
 
 
+class TrickleStream:
+    """Text stream returning at most a few characters per read."""
+
+    def __init__(self, text: str, step: int = 3):
+        self.text = text
+        self.step = step
+        self.position = 0
+
+    def read(self, size: int) -> str:
+        chunk = self.text[self.position : self.position + min(size, self.step)]
+        self.position += len(chunk)
+        return chunk
+
+
+class TestIterMessages(unittest.TestCase):
+    """iter_messages streams the same messages parse returns."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.converter = JSONConverter()
+
+    def test_matches_parse_across_chunk_boundaries(self):
+        """Values split across reads are decoded exactly as parse does."""
+        document = json.dumps(
+            {
+                "title": "x" * 50,
+                "count": 1234567,
+                "messages": [
+                    {"speaker": "User", "content": 'Hi \u00e9 "quoted"'},
+                    {"speaker": "Bot", "content": "Line\nbreak", "extra": [1, 2]},
+                ],
+                "after": {"nested": [None, True]},
+            }
+        )
+
+        streamed = list(self.converter.iter_messages(TrickleStream(document)))
+
+        self.assertEqual(streamed, self.converter.parse(document).messages)
+
+    def test_yields_messages_before_stream_is_read(self):
+        """The first message is available after reading little more than it."""
+        document = json.dumps(
+            {
+                "messages": [
+                    {"speaker": "User", "content": f"message {i}"} for i in range(5000)
+                ]
+            }
+        )
+        stream = TrickleStream(document, step=64)
+
+        first = next(self.converter.iter_messages(stream))
+
+        self.assertEqual(first.content, "message 0")
+        self.assertLess(stream.position, 200)
+
+    def test_errors_match_parse(self):
+        """Invalid documents fail with the same exception types as parse."""
+        cases = [
+            ("{not json", json.JSONDecodeError),
+            ('{"title": "no messages"}', KeyError),
+            ('{"messages": []}', ConversationParseError),
+            ('{"messages": [{"speaker": "A"}]}', KeyError),
+            ('{"messages": [{"speaker": "A", "content": 1}]}', ConversationParseError),
+            ('{"messages": [{"speaker": "A", "content": "b"}]} trailing', ValueError),
+            ("[1, 2]", KeyError),
+        ]
+        for document, error in cases:
+            with self.subTest(document=document):
+                with self.assertRaises(error):
+                    self.converter.parse(document)
+                with self.assertRaises(error):
+                    list(self.converter.iter_messages(TrickleStream(document)))
+
+
 if __name__ == "__main__":
     unittest.main()
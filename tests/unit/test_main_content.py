@@ -0,0 +1,105 @@
+"""Unit tests for single-pass main-content extraction."""
+
+import unittest
+
+from conv2md.converters.html_conv import HTMLConverter
+from conv2md.converters.main_content import MainContentExtractor
+
+SENTENCE = "A sentence of the article, long enough to count as content. "
+PARAGRAPH = f"<p>{SENTENCE * 3}</p>"
+
+
+def _main(html: str) -> str:
+    """Return the Markdown of the page's main content, after the frontmatter."""
+    markdown = HTMLConverter(main_content=True).convert(html)
+    return markdown.split("---\n\n", 1)[1]
+
+
+class TestMainContentExtraction(unittest.TestCase):
+    """The densest or most preferred element's blocks are kept, alone."""
+
+    def test_boilerplate_around_the_content_is_dropped(self):
+        """Navigation, link lists and footers are left out."""
+        markdown = _main(
+            "<body><header><nav><a href='/'>Home</a> <a href='/b'>Blog</a></nav>"
+            "</header><div id='side'><p><a href='/1'>A long list of links</a> "
+            "<a href='/2'>to other pages on this site</a></p></div>"
+            f"<div id='content'><h1>Story</h1>{PARAGRAPH}{PARAGRAPH}</div>"
+            "<footer><p>Copyright, all rights reserved, and so on.</p></footer>"
+            "</body>"
+        )
+
+        self.assertTrue(markdown.startswith("# Story\n\nA sentence"))
+        self.assertEqual(markdown.count("A sentence"), 6)
+        for boilerplate in ("Home", "links", "Copyright"):
+            self.assertNotIn(boilerplate, markdown)
+
+    def test_article_is_preferred_to_denser_text(self):
+        """An <article> with enough text wins over a div with more."""
+        markdown = _main(
+            f"<article><h1>Article</h1>{PARAGRAPH}{PARAGRAPH}</article>"
+            f"<div><p>{SENTENCE * 8}, , , ,</p>{PARAGRAPH * 3}</div>"
+        )
+
+        self.assertTrue(markdown.startswith("# Article"))
+        self.assertEqual(markdown.count("A sentence"), 6)
+
+    def test_article_is_preferred_to_main(self):
+        """<article> is preferred to the <main> around it."""
+        markdown = _main(
+            f"<main><article><h1>Article</h1>{PARAGRAPH * 2}</article>"
+            "<section><h2>Comments</h2>"
+            f"{PARAGRAPH * 3}</section></main>"
+        )
+
+        self.assertTrue(markdown.startswith("# Article"))
+        self.assertNotIn("Comments", markdown)
+
+    def test_pages_without_a_candidate_are_kept_whole(self):
+        """With nothing to choose between, every block is kept."""
+        self.assertEqual(_main("<p>One</p><p>Two</p>"), "One\n\nTwo")
+
+    def test_unclosed_paragraphs_are_closed(self):
+        """Paragraphs left open end where the next one begins."""
+        markdown = _main(f"<div><p>{SENTENCE}<p>{SENTENCE}</div><p>Outside")
+
+        self.assertEqual(markdown.count("A sentence"), 2)
+        self.assertNotIn("Outside", markdown)
+
+    def test_deep_nesting_is_linear(self):
+        """Totals are carried up the stack once, not recounted per ancestor."""
+        depth = 20_000
+        extractor = MainContentExtractor()
+        for _ in range(depth):
+            extractor.start("div")
+        extractor.start("p")
+        extractor.text(SENTENCE * 3)
+        extractor.add("block")
+        extractor.end("p")
+        for _ in range(depth):
+            extractor.end("div")
+
+        self.assertEqual(extractor.finish(), ["block"])
+
+    def test_only_candidate_blocks_are_buffered(self):
+        """Blocks outside every candidate are dropped once there is a winner."""
+        extractor = MainContentExtractor()
+        extractor.start("body")
+        extractor.start("div")
+        extractor.start("p")
+        extractor.text(SENTENCE * 3)
+        extractor.add("content")
+        extractor.end("p")
+        extractor.end("div")
+        for i in range(100):
+            extractor.start("footer")
+            extractor.text("boilerplate")
+            extractor.add(f"boilerplate {i}")
+            extractor.end("footer")
+
+        self.assertEqual(extractor._pending, [])
+        self.assertEqual(extractor.finish(), ["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
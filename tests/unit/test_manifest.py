@@ -0,0 +1,191 @@
+"""Unit tests for the SQLite conversion manifest."""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+from unittest import mock
+
+from conv2md.adapters import manifest as manifest_module
+from conv2md.adapters.manifest import (
+    MANIFEST_NAME,
+    ConversionManifest,
+    ManifestError,
+    options_fingerprint,
+)
+from conv2md.application.batch import expand_inputs, plan_batch, run_batch
+
+OPTIONS = {"use_plugins": False}
+
+
+class TestOptionsFingerprint(unittest.TestCase):
+    """The fingerprint changes with the options and the conv2md version."""
+
+    def test_fingerprint_tracks_options_and_version(self):
+        """Equal options agree; other options or another version do not."""
+        fingerprint = options_fingerprint(OPTIONS)
+
+        self.assertEqual(fingerprint, options_fingerprint(dict(OPTIONS)))
+        self.assertNotEqual(fingerprint, options_fingerprint({"use_plugins": True}))
+        with mock.patch.object(manifest_module, "__version__", "999"):
+            self.assertNotEqual(fingerprint, options_fingerprint(OPTIONS))
+
+
+class TestConversionManifest(unittest.TestCase):
+    """Up-to-date outputs are skipped and interrupted runs resume."""
+
+    def setUp(self):
+        """Set up a batch of three conversations."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name).resolve()
+        self.in_dir = self.root / "in"
+        self.out_dir = self.root / "out"
+        self.in_dir.mkdir()
+        for name in ("a", "b", "c"):
+            self.write(name, name)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def write(self, name, content, mtime_ns=None):
+        """Write a one-message conversation to ``<name>.json``."""
+        path = self.in_dir / f"{name}.json"
+        path.write_text(
+            '{"messages": [{"speaker": "User", "content": "%s"}]}' % content
+        )
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def plan(self):
+        """Return the work list for the input directory."""
+        files, root = expand_inputs([self.in_dir])
+        return plan_batch(files, root, self.out_dir)
+
+    def convert(self, options=OPTIONS):
+        """Run an incremental batch and return the (summary, skipped count)."""
+        with ConversionManifest(self.out_dir, options) as manifest:
+            items, skipped = manifest.select_stale(self.plan())
+            manifest.start_run(items)
+            summary = run_batch(items, on_outcome=manifest.record, record_digests=True)
+            manifest.finish_run()
+        return summary, skipped
+
+    def converted_names(self, summary):
+        """Return the input file names a batch converted."""
+        return sorted(o.item.input_path.name for o in summary.outcomes)
+
+    def test_first_run_converts_and_second_skips_everything(self):
+        """Nothing is converted twice while inputs and options are unchanged."""
+        first, skipped = self.convert()
+        self.assertEqual((len(first.outcomes), skipped), (3, 0))
+        self.assertTrue((self.out_dir / MANIFEST_NAME).exists())
+
+        second, skipped = self.convert()
+
+        self.assertEqual((len(second.outcomes), skipped), (0, 3))
+
+    def test_changed_content_is_reconverted(self):
+        """Only inputs whose content changed are converted again."""
+        self.convert()
+        self.write("b", "changed", mtime_ns=10**9)
+
+        summary, skipped = self.convert()
+
+        self.assertEqual(self.converted_names(summary), ["b.json"])
+        self.assertEqual(skipped, 2)
+
+    def test_touched_input_is_skipped_and_its_stat_refreshed(self):
+        """A new mtime over the same content is not a reason to convert."""
+        self.convert()
+        path = self.write("a", "a", mtime_ns=10**9)
+
+        with mock.patch.object(
+            manifest_module, "file_digest", wraps=manifest_module.file_digest
+        ) as digest:
+            self.assertEqual(self.convert()[1], 3)
+            self.assertEqual(digest.call_args_list, [mock.call(path)])
+            # The refreshed stat spares the next run from reading it again
+            digest.reset_mock()
+            self.assertEqual(self.convert()[1], 3)
+            digest.assert_not_called()
+
+    def test_missing_or_modified_output_is_reconverted(self):
+        """An output deleted or edited since it was written is stale."""
+        self.convert()
+        (self.out_dir / "a.md").unlink()
+        with open(self.out_dir / "b.md", "a", encoding="utf-8") as f:
+            f.write("edited")
+
+        summary, skipped = self.convert()
+
+        self.assertEqual(self.converted_names(summary), ["a.json", "b.json"])
+
+    def test_other_options_reconvert(self):
+        """Output made with other options is not reused."""
+        self.convert()
+
+        summary, skipped = self.convert(options={"use_plugins": True})
+
+        self.assertEqual((len(summary.outcomes), skipped), (3, 0))
+
+    def test_failed_file_is_retried_next_run(self):
+        """A failure is journalled but not recorded as a valid output."""
+        broken = self.in_dir / "broken.json"
+        broken.write_text("{not json")
+        first, _ = self.convert()
+        self.assertEqual(first.failed, 1)
+
+        second, skipped = self.convert()
+
+        self.assertEqual(self.converted_names(second), ["broken.json"])
+        self.assertEqual(skipped, 3)
+
+    def test_interrupted_run_resumes_with_the_work_left(self):
+        """A run that never finished hands back its unconverted files."""
+        items = self.plan()
+        with ConversionManifest(self.out_dir, {"use_plugins": True}) as manifest:
+            manifest.start_run(items)
+            # Converting the first file, then the process dies
+            run_batch(items[:1], on_outcome=manifest.record, record_digests=True)
+
+        with ConversionManifest(self.out_dir, OPTIONS) as manifest:
+            left = manifest.resume()
+            # The resumed run records its files the way the run began them
+            self.assertEqual(manifest.options, {"use_plugins": True})
+            run_batch(left, on_outcome=manifest.record, record_digests=True)
+            manifest.finish_run()
+            self.assertEqual(left, items[1:])
+
+        with ConversionManifest(self.out_dir, {"use_plugins": True}) as manifest:
+            self.assertIsNone(manifest.resume())
+            self.assertEqual(manifest.select_stale(items), ([], 3))
+
+    def test_results_are_committed_in_batches(self):
+        """Outcomes are buffered and written by one transaction per flush."""
+        items = self.plan()
+        with mock.patch.object(manifest_module, "FLUSH_INTERVAL_SECONDS", 3600):
+            with ConversionManifest(self.out_dir, OPTIONS) as manifest:
+                manifest.start_run(items)
+                run_batch(items, on_outcome=manifest.record, record_digests=True)
+                with closing(sqlite3.connect(manifest.path)) as reader:
+                    count = "SELECT COUNT(*) FROM outputs"
+                    self.assertEqual(reader.execute(count).fetchone()[0], 0)
+                    manifest.flush()
+                    self.assertEqual(reader.execute(count).fetchone()[0], 3)
+
+    def test_newer_schema_is_refused(self):
+        """A manifest from a future conv2md is not silently rewritten."""
+        self.out_dir.mkdir()
+        with closing(sqlite3.connect(self.out_dir / MANIFEST_NAME)) as db:
+            db.execute("PRAGMA user_version = 99")
+
+        with self.assertRaises(ManifestError):
+            ConversionManifest(self.out_dir, OPTIONS)
+
+
+if __name__ == "__main__":
+    unittest.main()
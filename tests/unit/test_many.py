@@ -0,0 +1,105 @@
+"""Unit tests for the convert_many library API."""
+
+import itertools
+import tempfile
+import unittest
+from pathlib import Path
+
+import conv2md
+from conv2md.application.batch import TASKS_PER_WORKER
+from conv2md.application.many import ConvertedSource, convert_many
+
+
+def _conversation(index: int) -> bytes:
+    """Return a small conversation whose Markdown names ``index``."""
+    return b'{"messages": [{"speaker": "User", "content": "Message %d"}]}' % index
+
+
+class TestConvertMany(unittest.TestCase):
+    """Sources are converted with failures reported per source."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_paths_and_bytes_are_converted_in_order(self):
+        """In-process conversion yields one result per source, in order."""
+        path = self.root / "chat.json"
+        path.write_bytes(_conversation(1))
+        sources = [path, str(path), _conversation(2)]
+
+        results = list(convert_many(sources))
+
+        self.assertEqual([result.source for result in results], sources)
+        self.assertEqual(results[0].markdown, "**User:**\nMessage 1")
+        self.assertEqual(results[2].markdown, "**User:**\nMessage 2")
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertIn("parse", results[0].metrics.stages)
+
+    def test_failures_are_reported_without_stopping(self):
+        """Bad sources get an error and the rest are still converted."""
+        sources = [b"{not json", self.root / "missing.json", _conversation(3)]
+
+        results = list(convert_many(sources))
+
+        self.assertTrue(results[0].error.startswith("JSONDecodeError"))
+        self.assertTrue(results[1].error.startswith("FileNotFoundError"))
+        self.assertIsNone(results[0].markdown)
+        self.assertEqual(results[2].markdown, "**User:**\nMessage 3")
+
+    def test_workers_preserve_input_order_when_asked(self):
+        """ordered=True yields in input order across workers."""
+        sources = [_conversation(i) for i in range(40)]
+
+        results = list(convert_many(sources, jobs=2, ordered=True, chunk_size=3))
+
+        self.assertEqual([result.source for result in results], sources)
+        self.assertEqual(results[39].markdown, "**User:**\nMessage 39")
+
+    def test_workers_yield_every_result_in_completion_order(self):
+        """Unordered results cover every source exactly once."""
+        sources = [_conversation(i) for i in range(40)] + [b"[]"]
+
+        results = list(convert_many(sources, jobs=2, chunk_size=3))
+
+        self.assertCountEqual([result.source for result in results], sources)
+        self.assertEqual(sum(not result.succeeded for result in results), 1)
+
+    def test_sources_are_drawn_lazily(self):
+        """An endless iterable is consumed only as far as the work in flight."""
+        drawn = itertools.count()
+        sources = (_conversation(next(drawn)) for _ in itertools.count())
+
+        with self.subTest(jobs=1):
+            results = convert_many(sources)
+            self.assertEqual(len(list(itertools.islice(results, 5))), 5)
+            results.close()
+
+        drawn = itertools.count()
+        sources = (_conversation(next(drawn)) for _ in itertools.count())
+        chunk_size = 2
+        results = convert_many(sources, jobs=2, chunk_size=chunk_size)
+        first = list(itertools.islice(results, 5))
+        results.close()
+
+        self.assertEqual(len(first), 5)
+        # What was drawn is bounded by the tasks allowed in flight
+        bound = (2 * TASKS_PER_WORKER + 3) * chunk_size
+        self.assertLessEqual(next(drawn), bound)
+
+    def test_exported_lazily_from_package(self):
+        """conv2md.convert_many is the library entry point."""
+        self.assertIs(conv2md.convert_many, convert_many)
+        self.assertIs(conv2md.ConvertedSource, ConvertedSource)
+        self.assertIn("convert_many", dir(conv2md))
+        with self.assertRaises(AttributeError):
+            conv2md.no_such_name
+
+
+if __name__ == "__main__":
+    unittest.main()
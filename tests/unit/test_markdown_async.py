@@ -0,0 +1,253 @@
+"""Unit tests for async content processors and the async generation path."""
+
+import asyncio
+import time
+import unittest
+
+from conv2md.domain.models import Conversation, ContentType, Message
+from conv2md.markdown.exceptions import InvalidContentError
+from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.pipeline import (
+    AsyncContentProcessor,
+    ContentProcessingPipeline,
+    TextContentProcessor,
+)
+
+# Latency the stand-in service applies to every image lookup
+SERVICE_LATENCY = 0.2
+
+
+class StandInImageService:
+    """Local TCP service standing in for a slow image/alt-text backend.
+
+    Each request is one line naming an image; the reply is one line of alt text
+    sent after an optional per-request delay ("name|seconds").
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.server = None
+
+    async def start(self) -> None:
+        """Listen on an ephemeral localhost port."""
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop accepting connections."""
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            name, _, delay = (await reader.readline()).decode().strip().partition("|")
+            await asyncio.sleep(float(delay or SERVICE_LATENCY))
+            writer.write(f"alt text for {name}\n".encode())
+            await writer.drain()
+        finally:
+            self.in_flight -= 1
+            writer.close()
+
+
+class ServiceImageProcessor(AsyncContentProcessor):
+    """Async processor asking the stand-in service for image alt text."""
+
+    def __init__(self, port: int):
+        self.port = port
+
+    def can_process(self, content_type: ContentType) -> bool:
+        return content_type == ContentType.IMAGE
+
+    async def aprocess(self, message: Message) -> str:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(f"{message.content}\n".encode())
+        await writer.drain()
+        alt_text = (await reader.readline()).decode().strip()
+        writer.close()
+        await writer.wait_closed()
+        if not alt_text:
+            raise ValueError(f"no alt text for {message.content}")
+        return f"![{alt_text}]({message.content.split('|')[0]})"
+
+
+def _image(name: str) -> Message:
+    """Build an image message."""
+    return Message(speaker="User", content=name, content_type=ContentType.IMAGE)
+
+
+class TestAsyncGeneration(unittest.IsolatedAsyncioTestCase):
+    """Async processors run concurrently, bounded, and keep output order."""
+
+    async def asyncSetUp(self):
+        """Start the stand-in service and a pipeline using it."""
+        self.service = StandInImageService()
+        await self.service.start()
+        self.pipeline = ContentProcessingPipeline()
+        self.pipeline.processors = [
+            ServiceImageProcessor(self.service.port)
+        ] + self.pipeline.processors
+        self.generator = MarkdownGenerator(pipeline=self.pipeline)
+
+    async def asyncTearDown(self):
+        """Stop the stand-in service."""
+        await self.service.stop()
+
+    async def test_image_heavy_conversation_takes_max_not_sum_latency(self):
+        """Ten slow lookups finish in about one latency, not ten."""
+        conversation = Conversation(messages=[_image(f"img{i}") for i in range(10)])
+
+        started = time.perf_counter()
+        await self.generator.agenerate(conversation, max_concurrency=10)
+        elapsed = time.perf_counter() - started
+
+        self.assertGreaterEqual(elapsed, SERVICE_LATENCY)
+        self.assertLess(elapsed, SERVICE_LATENCY * 10 / 2)
+
+    async def test_concurrency_is_bounded(self):
+        """No more than max_concurrency calls reach the service at once."""
+        conversation = Conversation(messages=[_image(f"img{i}") for i in range(6)])
+
+        await self.generator.agenerate(conversation, max_concurrency=2)
+
+        self.assertEqual(self.service.peak_in_flight, 2)
+
+    async def test_output_order_follows_messages_not_completion(self):
+        """Faster later calls do not overtake earlier messages in the output."""
+        conversation = Conversation(
+            messages=[
+                _image("slow|0.3"),
+                Message(speaker="Bot", content="between *text*"),
+                _image("fast|0.01"),
+            ]
+        )
+
+        result = await self.generator.agenerate(conversation)
+
+        self.assertEqual(
+            result,
+            "**User:**\n![alt text for slow](slow)\n\n"
+            "**Bot:**\nbetween \\*text\\*\n\n"
+            "**User:**\n![alt text for fast](fast)",
+        )
+
+    async def test_async_output_matches_sync_output_for_sync_processors(self):
+        """Without async processors both paths render identically."""
+        generator = MarkdownGenerator()
+        conversation = Conversation(
+            messages=[
+                Message(speaker="A", content="hi *there*", timestamp="12:00"),
+                Message(
+                    speaker="B",
+                    content="x = 1",
+                    content_type=ContentType.CODE,
+                    language="python",
+                ),
+                _image("a.png"),
+            ]
+        )
+        metadata = {"title": "T"}
+
+        expected = generator.generate(conversation, metadata)
+        result = await generator.agenerate(conversation, metadata)
+
+        self.assertEqual(result, expected)
+
+    async def test_failure_names_the_failing_message(self):
+        """An async processor error is reported against its message."""
+        self.pipeline.processors = [
+            FailingOnSecondProcessor()
+        ] + self.pipeline.processors[1:]
+        conversation = Conversation(messages=[_image("ok"), _image("bad")])
+
+        with self.assertRaises(InvalidContentError) as cm:
+            await self.generator.agenerate(conversation)
+
+        self.assertIn("Failed to process message 2", str(cm.exception))
+        metrics = self.generator.metrics_collector.current_metrics
+        self.assertEqual(metrics.errors_encountered, 1)
+
+    async def test_failure_does_not_repeat_async_calls(self):
+        """Naming the failed message does not call any async processor again."""
+        processor = FailingOnSecondProcessor()
+        self.pipeline.processors = [processor] + self.pipeline.processors[1:]
+        conversation = Conversation(
+            messages=[_image("ok"), _image("bad"), _image("also ok")]
+        )
+
+        with self.assertRaises(InvalidContentError) as cm:
+            await self.generator.agenerate(conversation)
+
+        self.assertIn("Failed to process message 2", str(cm.exception))
+        self.assertIsInstance(cm.exception.__cause__, ValueError)
+        self.assertLessEqual(processor.calls.count("ok"), 1)
+        self.assertEqual(processor.calls.count("bad"), 1)
+
+    async def test_sync_failure_among_async_messages_is_named(self):
+        """A failing synchronous run is still pinned to its message."""
+
+        class RejectingTextProcessor(TextContentProcessor):
+            def process(self, message):
+                if message.content == "bad":
+                    raise ValueError("rejected")
+                return super().process(message)
+
+        self.pipeline.processors = [
+            FailingOnSecondProcessor(),
+            RejectingTextProcessor(),
+        ] + self.pipeline.processors[1:]
+        conversation = Conversation(
+            messages=[
+                _image("ok"),
+                Message(speaker="User", content="fine"),
+                Message(speaker="User", content="bad"),
+            ]
+        )
+
+        with self.assertRaises(InvalidContentError) as cm:
+            await self.generator.agenerate(conversation)
+
+        self.assertIn("Failed to process message 3", str(cm.exception))
+
+    async def test_non_positive_concurrency_is_rejected(self):
+        """A zero concurrency bound could never make progress."""
+        with self.assertRaises(ValueError):
+            await self.pipeline.aprocess_messages([_image("a")], max_concurrency=0)
+
+
+class FailingOnSecondProcessor(AsyncContentProcessor):
+    """Async processor that rejects images named "bad"."""
+
+    def __init__(self):
+        self.calls = []
+
+    def can_process(self, content_type: ContentType) -> bool:
+        return content_type == ContentType.IMAGE
+
+    async def aprocess(self, message: Message) -> str:
+        self.calls.append(message.content)
+        await asyncio.sleep(0)
+        if message.content == "bad":
+            raise ValueError("rejected")
+        return message.content
+
+
+class TestAsyncProcessorSyncPath(unittest.TestCase):
+    """Async processors still work from the synchronous generator."""
+
+    def test_sync_generate_runs_async_processor(self):
+        """generate() drives aprocess to completion per message."""
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = [FailingOnSecondProcessor()] + pipeline.processors
+
+        result = MarkdownGenerator(pipeline=pipeline).generate(
+            Conversation(messages=[_image("ok")])
+        )
+
+        self.assertEqual(result, "**User:**\nok")
+
+
+if __name__ == "__main__":
+    unittest.main()
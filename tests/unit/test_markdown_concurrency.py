@@ -0,0 +1,116 @@
+"""Unit tests for sharing one MarkdownGenerator across threads and tasks."""
+
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from conv2md.domain.models import Conversation, ContentType, Message
+from conv2md.markdown.generator import GenerationResult, MarkdownGenerator
+from conv2md.markdown.metrics import MetricsCollector
+from conv2md.markdown.pipeline import (
+    AsyncContentProcessor,
+    ContentProcessingPipeline,
+)
+
+
+def _conversation(message_count: int) -> Conversation:
+    """Build a conversation of ``message_count`` text messages."""
+    return Conversation(
+        messages=[
+            Message(speaker="User", content=f"message {i}")
+            for i in range(message_count)
+        ]
+    )
+
+
+class YieldingImageProcessor(AsyncContentProcessor):
+    """Async processor that yields to the event loop before answering."""
+
+    def can_process(self, content_type: ContentType) -> bool:
+        return content_type == ContentType.IMAGE
+
+    async def aprocess(self, message: Message) -> str:
+        await asyncio.sleep(0.001)
+        return f"![image]({message.content})"
+
+
+class TestGenerateWithMetrics(unittest.TestCase):
+    """generate_with_metrics returns each call's own metrics."""
+
+    def test_result_carries_markdown_and_metrics(self):
+        """The result pairs the Markdown with the finished metrics."""
+        generator = MarkdownGenerator()
+
+        result = generator.generate_with_metrics(_conversation(2))
+
+        self.assertIsInstance(result, GenerationResult)
+        self.assertEqual(result.markdown, generator.generate(_conversation(2)))
+        self.assertEqual(result.metrics.message_count, 2)
+        self.assertEqual(result.metrics.output_size, len(result.markdown))
+
+    def test_shared_generator_keeps_thread_metrics_apart(self):
+        """Conversions on a thread pool never see each other's counts."""
+        generator = MarkdownGenerator()
+        sizes = [1 + i % 7 for i in range(64)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(
+                pool.map(
+                    lambda n: generator.generate_with_metrics(_conversation(n)),
+                    sizes,
+                )
+            )
+
+        self.assertEqual([r.metrics.message_count for r in results], sizes)
+        self.assertEqual([r.metrics.text_messages_processed for r in results], sizes)
+
+    def test_collector_state_is_per_thread(self):
+        """A conversion started in another thread is invisible here."""
+        collector = MetricsCollector()
+        started = collector.start_conversion()
+
+        seen_in_thread = []
+        thread = threading.Thread(
+            target=lambda: seen_in_thread.append(collector.current_metrics)
+        )
+        thread.start()
+        thread.join()
+
+        self.assertIsNone(seen_in_thread[0])
+        self.assertIs(collector.current_metrics, started)
+
+
+class TestAsyncSharedGenerator(unittest.IsolatedAsyncioTestCase):
+    """Concurrent agenerate calls on one generator keep separate metrics."""
+
+    async def test_interleaved_tasks_keep_their_metrics(self):
+        """Tasks that interleave at every await still count only their own."""
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = [YieldingImageProcessor()] + pipeline.processors
+        generator = MarkdownGenerator(pipeline=pipeline)
+
+        def images(count):
+            return Conversation(
+                messages=[
+                    Message(
+                        speaker="User",
+                        content=f"img{i}.png",
+                        content_type=ContentType.IMAGE,
+                    )
+                    for i in range(count)
+                ]
+            )
+
+        sizes = [1, 5, 2, 8, 3]
+        results = await asyncio.gather(
+            *(generator.agenerate_with_metrics(images(n)) for n in sizes)
+        )
+
+        self.assertEqual([r.metrics.images_processed for r in results], sizes)
+        for result, size in zip(results, sizes):
+            self.assertEqual(result.markdown.count("![image]"), size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,12 @@
 
 import re
 import unittest
+from unittest.mock import patch
 
 from conv2md.domain.models import Conversation, Message, ContentType
 from conv2md.markdown.constants import MAX_CONTENT_SANITIZATION_SIZE
 from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.metrics import ConversionStatus
 from conv2md.markdown.exceptions import (
     ContentTooLargeError,
     EncodingError,
@@ -482,6 +484,7 @@ class TestMarkdownGenerator(unittest.TestCase):
 
         # Test that ValueError (a processing error) is caught and converted
         mock_pipeline = Mock()
+        mock_pipeline.process_messages.side_effect = ValueError("Mock processing error")
         mock_pipeline.process_message.side_effect = ValueError("Mock processing error")
 
         generator = MarkdownGenerator(pipeline=mock_pipeline)
@@ -500,6 +503,7 @@ class TestMarkdownGenerator(unittest.TestCase):
         from unittest.mock import Mock
 
         failing_pipeline = Mock()
+        failing_pipeline.process_messages.side_effect = ValueError("Mock failure")
         failing_pipeline.process_message.side_effect = ValueError("Mock failure")
 
         scenarios = [
@@ -555,13 +559,41 @@ class TestMarkdownGenerator(unittest.TestCase):
 
                 self.assertIsInstance(cm.exception.__cause__, cause_type)
 
+    def test_batch_failure_names_the_failing_message(self):
+        """A failing batch is replayed so the error names the bad message."""
+        from conv2md.markdown.pipeline import (
+            ContentProcessingPipeline,
+            TextContentProcessor,
+        )
+
+        class RejectingProcessor(TextContentProcessor):
+            def process(self, message):
+                if message.content == "bad":
+                    raise ValueError("rejected")
+                return super().process(message)
+
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = [RejectingProcessor()]
+        generator = MarkdownGenerator(pipeline=pipeline)
+        conversation = Conversation(
+            messages=[
+                Message(speaker="User", content="ok"),
+                Message(speaker="User", content="bad"),
+            ]
+        )
+
+        with self.assertRaises(InvalidContentError) as cm:
+            generator.generate(conversation)
+
+        self.assertIn("Failed to process message 2", str(cm.exception))
+
     def test_unexpected_exceptions_are_not_masked(self):
         """Test that unexpected exceptions like RuntimeError are not caught."""
         from unittest.mock import Mock
 
         # Create a mock pipeline that raises an unexpected exception
         mock_pipeline = Mock()
-        mock_pipeline.process_message.side_effect = RuntimeError("Unexpected error")
+        mock_pipeline.process_messages.side_effect = RuntimeError("Unexpected error")
 
         generator = MarkdownGenerator(pipeline=mock_pipeline)
         messages = [Message(speaker="User", content="Test")]
@@ -662,5 +694,116 @@ class TestMarkdownGenerator(unittest.TestCase):
         self.assertEqual(content_lines, expected_order)
 
 
+class TestGenerateStream(unittest.TestCase):
+    """generate_stream yields, chunk by chunk, exactly what generate returns."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.generator = MarkdownGenerator()
+
+    def _assert_same_output(self, messages, metadata=None):
+        expected = self.generator.generate(Conversation(messages=messages), metadata)
+        chunks = list(self.generator.generate_stream(iter(messages), metadata))
+        self.assertEqual("".join(chunks), expected)
+        self.assertEqual(len(chunks), len(messages))
+
+    def test_stream_matches_generate(self):
+        """Text, code, images, timestamps and frontmatter all match."""
+        cases = {
+            "single": [Message(speaker="User", content="Hello *world*")],
+            "mixed": [
+                Message(speaker="User", content="Look:", timestamp="2024-01-01"),
+                Message(
+                    speaker="Bot",
+                    content="print('hi')",
+                    content_type=ContentType.CODE,
+                    language="python",
+                ),
+                Message(
+                    speaker="Bot",
+                    content="https://example.com/a.png",
+                    content_type=ContentType.IMAGE,
+                ),
+            ],
+            "truncated": [
+                Message(
+                    speaker="User", content="x" * (MAX_CONTENT_SANITIZATION_SIZE + 5)
+                ),
+                Message(speaker="Bot", content="after"),
+            ],
+        }
+        for name, messages in cases.items():
+            with self.subTest(case=name):
+                self._assert_same_output(messages)
+                self._assert_same_output(messages, {"title": "T", "source": "s"})
+
+    def test_stream_records_metrics(self):
+        """The streamed conversion finishes with its own metrics."""
+        messages = [Message(speaker="User", content="Hello")] * 3
+
+        output = "".join(self.generator.generate_stream(messages))
+
+        metrics = self.generator.metrics_collector.current_metrics
+        self.assertEqual(metrics.message_count, 3)
+        self.assertEqual(metrics.output_size, len(output))
+        self.assertEqual(set(metrics.stages), {"validate", "sanitize", "render"})
+
+    def test_interleaved_streams_keep_their_own_metrics(self):
+        """Streams consumed alternately on one thread do not mix their counts."""
+        collector = self.generator.metrics_collector
+        # The first stream's last message is truncated after the second
+        # stream has become the current conversion
+        oversized = "x" * (MAX_CONTENT_SANITIZATION_SIZE + 1)
+        first = self.generator.generate_stream(
+            [Message(speaker="User", content="one")] * 4
+            + [Message(speaker="User", content=oversized)]
+        )
+        second = self.generator.generate_stream(
+            [Message(speaker="Bot", content="two two")] * 5
+        )
+
+        with patch.object(
+            collector, "finish_conversion", wraps=collector.finish_conversion
+        ) as finish:
+            outputs = ["", ""]
+            for chunks in zip(first, second):
+                outputs = [done + chunk for done, chunk in zip(outputs, chunks)]
+            for stream in (first, second):
+                self.assertEqual(list(stream), [])
+
+        finished = [call.args[1] for call in finish.call_args_list]
+        self.assertEqual([m.message_count for m in finished], [5, 5])
+        self.assertEqual(
+            [m.total_content_size for m in finished],
+            [12 + MAX_CONTENT_SANITIZATION_SIZE, 35],
+        )
+        self.assertEqual([m.warnings_issued for m in finished], [1, 0])
+        self.assertEqual(
+            [m.status for m in finished],
+            [ConversionStatus.PARTIAL, ConversionStatus.SUCCESS],
+        )
+        self.assertEqual([m.output_size for m in finished], [len(o) for o in outputs])
+        for metrics in finished:
+            (timing,) = metrics.processor_timings.values()
+            self.assertEqual(timing.count, 5)
+
+    def test_stream_rejects_invalid_message_when_reached(self):
+        """Earlier chunks are yielded before an invalid message is reported."""
+        messages = [
+            Message(speaker="User", content="fine"),
+            Message(speaker="", content="no speaker"),
+        ]
+        stream = self.generator.generate_stream(messages)
+
+        self.assertIn("fine", next(stream))
+        with self.assertRaises(InvalidContentError):
+            next(stream)
+
+    def test_stream_rejects_empty_conversation(self):
+        """A conversation without messages is rejected as in generate."""
+        with self.assertRaises(InvalidContentError):
+            list(self.generator.generate_stream([]))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -25,6 +25,24 @@ class MockContentProcessor(ContentProcessor):
         return self.result
 
 
+class CountingBatchProcessor(ContentProcessor):
+    """Processor that records the batches it receives."""
+
+    def __init__(self, content_type: ContentType):
+        self.content_type = content_type
+        self.batches = []
+
+    def can_process(self, content_type: ContentType) -> bool:
+        return content_type == self.content_type
+
+    def process(self, message: Message) -> str:
+        return f"one:{message.content}"
+
+    def process_batch(self, messages):
+        self.batches.append([message.content for message in messages])
+        return [f"batch:{message.content}" for message in messages]
+
+
 class TestContentProcessors(unittest.TestCase):
     """Test individual content processors."""
 
@@ -171,6 +189,72 @@ class TestContentProcessingPipeline(unittest.TestCase):
         # Restore processors
         self.pipeline.processors = original_processors
 
+    def test_pipeline_first_registered_processor_wins(self):
+        """Earlier processors keep precedence for a shared content type."""
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = [
+            MockContentProcessor(ContentType.TEXT, "FIRST"),
+            MockContentProcessor(ContentType.TEXT, "SECOND"),
+        ]
+        message = Message(speaker="User", content="x", content_type=ContentType.TEXT)
+
+        self.assertEqual(pipeline.process_message(message), "FIRST")
+
+    def test_add_processor_cannot_override_existing_type(self):
+        """Appended processors only claim types nobody registered before."""
+        pipeline = ContentProcessingPipeline()
+        pipeline.add_processor(MockContentProcessor(ContentType.TEXT, "LATE"))
+        message = Message(speaker="User", content="hi", content_type=ContentType.TEXT)
+
+        self.assertEqual(pipeline.process_message(message), "hi")
+
+    def test_add_processor_rebuilds_dispatch(self):
+        """A processor added after construction handles its type at once."""
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = []
+        message = Message(
+            speaker="User", content="a.png", content_type=ContentType.IMAGE
+        )
+        # Falls back to text before the image processor is registered
+        self.assertEqual(pipeline.process_message(message), "a\\.png")
+
+        pipeline.add_processor(MockContentProcessor(ContentType.IMAGE, "IMAGE"))
+
+        self.assertEqual(pipeline.process_message(message), "IMAGE")
+
+    def test_dispatch_does_not_rescan_processors_per_message(self):
+        """can_process is consulted when the table is built, not per message."""
+        pipeline = ContentProcessingPipeline()
+        processor = MockContentProcessor(ContentType.TEXT, "TEXT")
+        calls = []
+        original = processor.can_process
+
+        def counting_can_process(content_type):
+            calls.append(content_type)
+            return original(content_type)
+
+        processor.can_process = counting_can_process
+        pipeline.processors = [processor]
+        calls_after_build = len(calls)
+        message = Message(speaker="User", content="x", content_type=ContentType.TEXT)
+
+        for _ in range(10):
+            pipeline.process_message(message)
+
+        self.assertEqual(calls_after_build, len(ContentType))
+        self.assertEqual(len(calls), calls_after_build)
+
+    def test_fallback_processor_is_reused(self):
+        """Unclaimed content types share one cached fallback processor."""
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = []
+
+        first = pipeline.processor_for(ContentType.CODE)
+        second = pipeline.processor_for(ContentType.IMAGE)
+
+        self.assertIsInstance(first, TextContentProcessor)
+        self.assertIs(first, second)
+
     def test_pipeline_deterministic_output(self):
         """Test that pipeline produces deterministic output."""
         message = Message(
@@ -191,5 +275,88 @@ class TestContentProcessingPipeline(unittest.TestCase):
             self.assertEqual(result, first_result)
 
 
+class TestBatchProcessing(unittest.TestCase):
+    """Test batched processing of consecutive same-type messages."""
+
+    def _mixed_messages(self):
+        """Messages with runs of each type, including markup and backslashes."""
+        return [
+            Message(speaker="A", content="*one*", content_type=ContentType.TEXT),
+            Message(speaker="A", content="two\\ [x](y)", content_type=ContentType.TEXT),
+            Message(
+                speaker="B",
+                content="print(1)",
+                content_type=ContentType.CODE,
+                language="python",
+            ),
+            Message(speaker="A", content="", content_type=ContentType.TEXT),
+            Message(speaker="A", content="pic.png", content_type=ContentType.IMAGE),
+            Message(speaker="A", content="# end!", content_type=ContentType.TEXT),
+        ]
+
+    def test_batch_output_matches_per_message_output(self):
+        """Batching must not change the content or order of any result."""
+        pipeline = ContentProcessingPipeline()
+        messages = self._mixed_messages()
+
+        expected = [pipeline.process_message(message) for message in messages]
+
+        self.assertEqual(pipeline.process_messages(messages), expected)
+
+    def test_text_batch_with_separator_in_content(self):
+        """Content containing the batch separator still escapes per message."""
+        processor = TextContentProcessor()
+        messages = [
+            Message(speaker="A", content="a\x00*b"),
+            Message(speaker="A", content="c_"),
+        ]
+
+        self.assertEqual(
+            processor.process_batch(messages),
+            [processor.process(message) for message in messages],
+        )
+
+    def test_default_process_batch_falls_back_to_process(self):
+        """Processors without a batch override process one message at a time."""
+        processor = MockContentProcessor(ContentType.TEXT, "X")
+        messages = [Message(speaker="A", content=str(i)) for i in range(3)]
+
+        self.assertEqual(processor.process_batch(messages), ["X", "X", "X"])
+
+    def test_consecutive_runs_are_grouped(self):
+        """Each consecutive run of one content type is a single batch call."""
+        processor = CountingBatchProcessor(ContentType.TEXT)
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = [processor, CodeContentProcessor()]
+        messages = [
+            Message(speaker="A", content="1"),
+            Message(speaker="A", content="2"),
+            Message(speaker="A", content="c", content_type=ContentType.CODE),
+            Message(speaker="A", content="3"),
+        ]
+
+        results = pipeline.process_messages(messages)
+
+        self.assertEqual(processor.batches, [["1", "2"], ["3"]])
+        self.assertEqual(results, ["batch:1", "batch:2", "```\nc\n```", "batch:3"])
+
+    def test_wrong_batch_result_count_is_rejected(self):
+        """A processor dropping results must fail rather than misalign output."""
+
+        class ShortBatchProcessor(MockContentProcessor):
+            def process_batch(self, messages):
+                return ["only one"]
+
+        pipeline = ContentProcessingPipeline()
+        pipeline.processors = [ShortBatchProcessor(ContentType.TEXT, "X")]
+        messages = [
+            Message(speaker="A", content="1"),
+            Message(speaker="A", content="2"),
+        ]
+
+        with self.assertRaises(ValueError):
+            pipeline.process_messages(messages)
+
+
 if __name__ == "__main__":
     unittest.main()
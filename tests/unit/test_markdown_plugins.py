@@ -0,0 +1,174 @@
+"""Unit tests for lazy content processor plugin discovery."""
+
+import sys
+import tempfile
+import textwrap
+import unittest
+from importlib.metadata import EntryPoint
+from pathlib import Path
+from unittest.mock import patch
+
+from conv2md.domain.models import Conversation, ContentType, Message
+from conv2md.markdown.exceptions import PluginLoadError
+from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.pipeline import ContentProcessingPipeline
+from conv2md.markdown.plugins import (
+    PROCESSOR_ENTRY_POINT_GROUP,
+    LazyContentProcessor,
+    discover_processors,
+)
+
+OCR_MODULE = "conv2md_test_ocr_plugin"
+LLM_MODULE = "conv2md_test_llm_plugin"
+
+PLUGIN_SOURCE = textwrap.dedent("""
+    from conv2md.markdown.pipeline import ContentProcessor
+
+
+    class Processor(ContentProcessor):
+        def can_process(self, content_type):
+            return True
+
+        def process(self, message):
+            return "{label}:" + message.content
+    """)
+
+
+def _entry_point(name: str, value: str) -> EntryPoint:
+    """Build an entry point in the processor group."""
+    return EntryPoint(name=name, value=value, group=PROCESSOR_ENTRY_POINT_GROUP)
+
+
+class TestPluginDiscovery(unittest.TestCase):
+    """Plugins are discovered from metadata and imported on first use."""
+
+    def setUp(self):
+        """Write importable plugin modules to a temporary sys.path entry."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        plugin_dir = Path(self.temp_dir.name)
+        for module, label in ((OCR_MODULE, "OCR"), (LLM_MODULE, "LLM")):
+            source = PLUGIN_SOURCE.replace("{label}", label)
+            (plugin_dir / f"{module}.py").write_text(source)
+        sys.path.insert(0, str(plugin_dir))
+
+        self.entry_points = [
+            _entry_point("image.ocr", f"{OCR_MODULE}:Processor"),
+            _entry_point("code.llm", f"{LLM_MODULE}:Processor"),
+            _entry_point("image.llm", f"{LLM_MODULE}:Processor"),
+        ]
+        patcher = patch(
+            "conv2md.markdown.plugins.entry_points",
+            side_effect=lambda group: [
+                ep for ep in self.entry_points if ep.group == group
+            ],
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Remove the plugin modules from sys.path and sys.modules."""
+        sys.path.remove(self.temp_dir.name)
+        for module in (OCR_MODULE, LLM_MODULE):
+            sys.modules.pop(module, None)
+        self.temp_dir.cleanup()
+
+    def test_discovery_records_names_and_types_without_importing(self):
+        """Discovery groups entry points per plugin and imports nothing."""
+        processors = discover_processors()
+
+        self.assertEqual([p.name for p in processors], ["llm", "ocr"])
+        llm, ocr = processors
+        self.assertEqual(llm.content_types, {ContentType.CODE, ContentType.IMAGE})
+        self.assertEqual(ocr.content_types, {ContentType.IMAGE})
+        self.assertFalse(llm.loaded or ocr.loaded)
+        self.assertNotIn(OCR_MODULE, sys.modules)
+        self.assertNotIn(LLM_MODULE, sys.modules)
+
+    def test_malformed_entry_point_names_are_skipped(self):
+        """Names without a known content type prefix are ignored."""
+        self.entry_points = [
+            _entry_point("ocr", f"{OCR_MODULE}:Processor"),
+            _entry_point("video.ocr", f"{OCR_MODULE}:Processor"),
+        ]
+
+        with self.assertLogs("conv2md.markdown.plugins", level="WARNING"):
+            self.assertEqual(discover_processors(), [])
+
+    def test_text_only_conversion_imports_no_plugin(self):
+        """Plugins for other content types are never imported."""
+        generator = MarkdownGenerator(
+            pipeline=ContentProcessingPipeline(use_plugins=True)
+        )
+        conversation = Conversation(messages=[Message(speaker="User", content="hi")])
+
+        result = generator.generate(conversation)
+
+        self.assertEqual(result, "**User:**\nhi")
+        self.assertNotIn(OCR_MODULE, sys.modules)
+        self.assertNotIn(LLM_MODULE, sys.modules)
+
+    def test_plugin_is_imported_on_first_message_of_its_type(self):
+        """The first image message imports the image plugin, and only it."""
+        generator = MarkdownGenerator(
+            pipeline=ContentProcessingPipeline(use_plugins=True)
+        )
+        conversation = Conversation(
+            messages=[
+                Message(speaker="User", content="hi"),
+                Message(
+                    speaker="User", content="cat.png", content_type=ContentType.IMAGE
+                ),
+            ]
+        )
+
+        result = generator.generate(conversation)
+
+        # "llm" sorts ahead of "ocr", so it wins the shared image type
+        self.assertIn("LLM:cat.png", result)
+        self.assertIn(LLM_MODULE, sys.modules)
+        self.assertNotIn(OCR_MODULE, sys.modules)
+
+    def test_plugins_take_precedence_over_defaults(self):
+        """An opted-in plugin replaces the built-in processor for its type."""
+        self.entry_points = [_entry_point("text.ocr", f"{OCR_MODULE}:Processor")]
+        pipeline = ContentProcessingPipeline(use_plugins=True)
+
+        result = pipeline.process_message(Message(speaker="User", content="hi"))
+
+        self.assertEqual(result, "OCR:hi")
+
+    def test_plugins_are_ignored_unless_opted_in(self):
+        """The default pipeline never consults entry points."""
+        pipeline = ContentProcessingPipeline()
+
+        self.assertFalse(
+            any(isinstance(p, LazyContentProcessor) for p in pipeline.processors)
+        )
+
+    def test_broken_plugin_raises_plugin_load_error(self):
+        """Import failures surface as PluginLoadError on first use."""
+        processor = LazyContentProcessor(
+            "missing",
+            frozenset({ContentType.TEXT}),
+            _entry_point("text.missing", "conv2md_no_such_module:Processor"),
+        )
+
+        with self.assertRaises(PluginLoadError) as cm:
+            processor.process(Message(speaker="User", content="hi"))
+
+        self.assertIsInstance(cm.exception.__cause__, ImportError)
+
+    def test_non_processor_entry_point_is_rejected(self):
+        """An entry point that is not a ContentProcessor fails to load."""
+        processor = LazyContentProcessor(
+            "bogus",
+            frozenset({ContentType.TEXT}),
+            _entry_point("text.bogus", "builtins:object"),
+        )
+
+        with self.assertRaises(PluginLoadError):
+            processor.process(Message(speaker="User", content="hi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,10 +5,17 @@ import time
 import unittest
 from unittest.mock import patch
 
+from conv2md.domain.models import Conversation, ContentType, Message
+from conv2md.markdown.generator import MarkdownGenerator
+from conv2md.markdown.pipeline import FULLY_TIMED_CALLS, TIMING_SAMPLE_INTERVAL
 from conv2md.markdown.metrics import (
+    TIMING_BUCKET_BOUNDS,
     ConversionMetrics,
     ConversionStatus,
     MetricsCollector,
+    StageMetrics,
+    TimingHistogram,
+    measure_stage,
 )
 
 
@@ -110,6 +117,9 @@ class TestConversionMetricsSerialization(unittest.TestCase):
                 "warnings_issued",
                 "status",
                 "processing_rate_chars_per_sec",
+                "processor_timings",
+                "content_type_timings",
+                "stages",
             },
         )
 
@@ -160,5 +170,330 @@ class TestMetricsCollectorLogging(unittest.TestCase):
             collector.finish_conversion(output_size=1)
 
 
+class TestTimingHistogram(unittest.TestCase):
+    """Fixed-bucket histograms summarize processing times compactly."""
+
+    def test_samples_land_in_power_of_two_buckets(self):
+        """Each sample goes to the first bucket whose bound exceeds it."""
+        cases = [
+            ("sub-microsecond", 0.0000004, 0),
+            ("just under 2us", 0.0000019, 1),
+            ("exactly 2us", 0.000002, 2),
+            ("3ms", 0.003, 12),
+            ("beyond last bound", 1000.0, len(TIMING_BUCKET_BOUNDS)),
+        ]
+
+        for label, seconds, expected_index in cases:
+            with self.subTest(case=label):
+                histogram = TimingHistogram()
+                histogram.record(seconds)
+
+                self.assertEqual(histogram.counts[expected_index], 1)
+                self.assertEqual(len(histogram.counts), len(TIMING_BUCKET_BOUNDS) + 1)
+
+    def test_percentiles_and_max(self):
+        """Percentiles report bucket bounds, capped at the largest sample."""
+        histogram = TimingHistogram()
+        for _ in range(98):
+            histogram.record(0.0000015)  # 1.5us -> 2us bucket
+        histogram.record(0.003)  # 3ms -> 4.096ms bucket
+        histogram.record(0.5)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(0.50), 0.000002)
+        self.assertEqual(histogram.percentile(0.95), 0.000002)
+        self.assertEqual(histogram.percentile(0.99), 2**12 / 1_000_000)
+        self.assertEqual(histogram.percentile(1.0), 0.5)
+        self.assertEqual(histogram.max_seconds, 0.5)
+
+    def test_empty_histogram_has_no_percentiles(self):
+        """Nothing recorded means nothing to report."""
+        summary = TimingHistogram().to_dict()
+
+        self.assertEqual(summary["count"], 0)
+        self.assertIsNone(summary["p50_seconds"])
+        self.assertIsNone(summary["p99_seconds"])
+
+    def test_batch_samples_are_weighted(self):
+        """One call covering several messages counts once per message."""
+        histogram = TimingHistogram()
+        histogram.record(0.001, samples=4)
+
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.total_seconds, 0.004)
+
+    def test_merge_adds_buckets(self):
+        """Merged histograms equal recording every sample into one."""
+        left, right, combined = TimingHistogram(), TimingHistogram(), TimingHistogram()
+        for seconds in (0.00001, 0.002):
+            left.record(seconds)
+            combined.record(seconds)
+        right.record(0.3)
+        combined.record(0.3)
+
+        left.merge(right)
+
+        self.assertEqual(left, combined)
+
+
+class TestProcessingTimings(unittest.TestCase):
+    """Processing time is reported per processor class and content type."""
+
+    def _conversation(self):
+        """Conversation touching every default processor."""
+        return Conversation(
+            messages=[
+                Message(speaker="User", content="one"),
+                Message(speaker="User", content="two"),
+                Message(speaker="Bot", content="x = 1", content_type=ContentType.CODE),
+                Message(
+                    speaker="User", content="a.png", content_type=ContentType.IMAGE
+                ),
+            ]
+        )
+
+    def test_generator_records_timings_per_processor_and_type(self):
+        """Every processor call is timed and exposed through to_dict()."""
+        generator = MarkdownGenerator()
+        generator.generate(self._conversation())
+
+        exported = generator.metrics_collector.current_metrics.to_dict()
+
+        self.assertEqual(
+            set(exported["processor_timings"]),
+            {
+                "TextContentProcessor",
+                "CodeContentProcessor",
+                "ImageContentProcessor",
+            },
+        )
+        self.assertEqual(
+            set(exported["content_type_timings"]), {"text", "code", "image"}
+        )
+        text = exported["content_type_timings"]["text"]
+        self.assertEqual(text["count"], 2)
+        for key in ("p50_seconds", "p95_seconds", "p99_seconds", "max_seconds"):
+            self.assertIsNotNone(text[key])
+
+    def test_long_conversations_time_a_sample_of_calls(self):
+        """Past the first calls, one call in the sample interval is timed."""
+        calls = FULLY_TIMED_CALLS + 4 * TIMING_SAMPLE_INTERVAL
+        messages = [
+            Message(speaker="User", content="text"),
+            Message(speaker="Bot", content="x = 1", content_type=ContentType.CODE),
+        ] * (calls // 2)
+        generator = MarkdownGenerator()
+
+        collector = generator.metrics_collector
+        generator.generate(Conversation(messages=messages))
+        generated = collector.current_metrics
+        chunks = list(generator.generate_stream(messages))
+        streamed = collector.current_metrics
+
+        self.assertEqual(len(chunks), calls)
+        for metrics in (generated, streamed):
+            timed = sum(h.count for h in metrics.processor_timings.values())
+            self.assertEqual(timed, FULLY_TIMED_CALLS + 4)
+
+    def test_timings_can_be_switched_off(self):
+        """With collection disabled nothing is recorded or exported."""
+        generator = MarkdownGenerator(collect_timings=False)
+        generator.generate(self._conversation())
+
+        exported = generator.metrics_collector.current_metrics.to_dict()
+
+        self.assertEqual(exported["processor_timings"], {})
+        self.assertEqual(exported["content_type_timings"], {})
+
+    def test_finish_names_timing_keys(self):
+        """Recorded class and enum keys become plain names when finished."""
+        collector = MetricsCollector()
+        collector.start_conversion()
+        collector.record_processing_time(object(), ContentType.TEXT, 0.001, 2)
+
+        metrics = collector.finish_conversion(output_size=1)
+
+        self.assertEqual(list(metrics.processing_timings), [("object", "text")])
+        self.assertEqual(metrics.processor_timings["object"].count, 2)
+
+
+class TestStageMetrics(unittest.TestCase):
+    """Each conversion stage reports its own time, volume and throughput."""
+
+    def test_measure_stage_times_block(self):
+        """The yielded stage receives the block's perf_counter duration."""
+        with patch(
+            "conv2md.markdown.metrics.time.perf_counter", side_effect=[10.0, 12.0]
+        ):
+            with measure_stage("parse") as stage:
+                stage.bytes_processed = 100
+
+        self.assertEqual(stage.duration_seconds, 2.0)
+        self.assertEqual(stage.throughput_bytes_per_sec, 50.0)
+
+    def test_measure_stage_records_duration_when_block_raises(self):
+        """A failing stage still reports how long it ran."""
+        with patch(
+            "conv2md.markdown.metrics.time.perf_counter", side_effect=[1.0, 1.5]
+        ):
+            with self.assertRaises(RuntimeError):
+                with measure_stage("write") as stage:
+                    raise RuntimeError("disk full")
+
+        self.assertEqual(stage.duration_seconds, 0.5)
+
+    def test_throughput_requires_time_and_bytes(self):
+        """Throughput is undefined without both a duration and a volume."""
+        self.assertIsNone(StageMetrics("render").throughput_bytes_per_sec)
+        self.assertIsNone(
+            StageMetrics("render", duration_seconds=1.0).throughput_bytes_per_sec
+        )
+
+    def test_record_stage_accumulates_repeated_stage(self):
+        """Recording a stage twice sums its duration and bytes."""
+        metrics = ConversionMetrics()
+        metrics.record_stage(StageMetrics("render", 1.0, 10))
+        metrics.record_stage(StageMetrics("render", 0.5, 5))
+
+        self.assertEqual(metrics.stages["render"], StageMetrics("render", 1.5, 15))
+
+    def test_to_dict_lists_stages_in_pipeline_order(self):
+        """Stages export in pipeline order regardless of recording order."""
+        metrics = ConversionMetrics()
+        for name in ("write", "custom", "parse", "render"):
+            metrics.record_stage(StageMetrics(name, 1.0, 1))
+
+        self.assertEqual(
+            list(metrics.to_dict()["stages"]), ["parse", "render", "write", "custom"]
+        )
+
+    def test_collector_stage_records_into_current_conversion(self):
+        """MetricsCollector.stage adds the measured stage to current metrics."""
+        collector = MetricsCollector()
+        collector.start_conversion()
+
+        with collector.stage("validate") as stage:
+            stage.bytes_processed = 7
+
+        self.assertIs(collector.current_metrics.stages["validate"], stage)
+
+    def test_generator_reports_its_stages(self):
+        """generate() times validate, sanitize, render and join."""
+        generator = MarkdownGenerator()
+        generator.generate(
+            Conversation(messages=[Message(speaker="User", content="héllo")])
+        )
+
+        stages = generator.metrics_collector.current_metrics.to_dict()["stages"]
+
+        self.assertEqual(list(stages), ["validate", "sanitize", "render", "join"])
+        # Byte counts are UTF-8 sizes, not character counts
+        self.assertEqual(stages["validate"]["bytes_processed"], 6)
+        self.assertEqual(stages["sanitize"]["bytes_processed"], 6)
+        self.assertEqual(stages["render"]["bytes_processed"], 6)
+        self.assertEqual(
+            stages["join"]["bytes_processed"], len("**User:**\nhéllo".encode())
+        )
+
+
+class TestMemoryTracking(unittest.TestCase):
+    """Opt-in memory accounting per conversion and per stage."""
+
+    def _generate(self, **generator_options):
+        """Generate a small conversation and return its metrics."""
+        generator = MarkdownGenerator(**generator_options)
+        generator.generate(
+            Conversation(messages=[Message(speaker="User", content="x" * 50_000)])
+        )
+        return generator.metrics_collector.current_metrics
+
+    def test_memory_is_not_reported_by_default(self):
+        """Without opting in nothing is measured or exported."""
+        metrics = self._generate()
+
+        self.assertFalse(metrics.memory_tracked)
+        self.assertNotIn("memory", metrics.to_dict())
+        for stage in metrics.to_dict()["stages"].values():
+            self.assertNotIn("memory_peak_bytes", stage)
+
+    def test_tracked_conversion_reports_memory_per_stage(self):
+        """Every stage carries tracemalloc figures and the run carries RSS."""
+        metrics = self._generate(track_memory=True)
+
+        exported = metrics.to_dict()
+        memory = exported["memory"]
+        self.assertGreater(memory["traced_peak_bytes"], 50_000)
+        self.assertEqual(
+            set(memory),
+            {
+                "rss_before_bytes",
+                "rss_after_bytes",
+                "rss_peak_bytes",
+                "traced_peak_bytes",
+            },
+        )
+        for name, stage in exported["stages"].items():
+            with self.subTest(stage=name):
+                self.assertGreaterEqual(
+                    stage["memory_peak_bytes"], stage["memory_current_bytes"]
+                )
+
+    def test_tracing_started_for_a_conversion_is_stopped(self):
+        """The collector stops tracemalloc tracing it started itself."""
+        import tracemalloc
+
+        self.assertFalse(tracemalloc.is_tracing())
+        self._generate(track_memory=True)
+
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_tracing_started_by_caller_is_left_running(self):
+        """Tracing the caller started stays on after the conversion."""
+        import tracemalloc
+
+        tracemalloc.start()
+        try:
+            self._generate(track_memory=True)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_overlapping_stages_report_no_memory_peak(self):
+        """Stages measuring at once cannot tell their peaks apart."""
+        import tracemalloc
+
+        tracemalloc.start()
+        try:
+            with measure_stage("parse", track_memory=True) as first:
+                with measure_stage("parse", track_memory=True) as second:
+                    pass
+            with measure_stage("render", track_memory=True) as alone:
+                data = bytearray(100_000)
+                del data
+        finally:
+            tracemalloc.stop()
+
+        self.assertIsNone(first.memory_peak_bytes)
+        self.assertIsNone(second.memory_peak_bytes)
+        self.assertGreaterEqual(alone.memory_peak_bytes, 100_000)
+
+    def test_repeated_stage_keeps_the_highest_peak(self):
+        """Accumulating a stage keeps its largest memory peak."""
+        metrics = ConversionMetrics()
+        metrics.record_stage(StageMetrics("render", 1.0, 10, 900, 100))
+        metrics.record_stage(StageMetrics("render", 1.0, 10, 500, 200))
+
+        self.assertEqual(metrics.stages["render"].memory_peak_bytes, 900)
+        self.assertEqual(metrics.stages["render"].memory_current_bytes, 200)
+
+    def test_unreadable_rss_is_reported_as_none(self):
+        """Platforms without a current RSS reading export None, not garbage."""
+        with patch("conv2md.markdown.metrics.current_rss_bytes", return_value=None):
+            metrics = self._generate(track_memory=True)
+
+        self.assertIsNone(metrics.rss_before_bytes)
+        self.assertIsNone(metrics.rss_after_bytes)
+
+
 if __name__ == "__main__":
     unittest.main()
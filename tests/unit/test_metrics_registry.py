@@ -0,0 +1,185 @@
+"""Unit tests for cross-conversion metrics aggregation and export."""
+
+import json
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from conv2md.application.convert import convert_file
+from conv2md.markdown.metrics import (
+    ConversionMetrics,
+    ConversionStatus,
+    StageMetrics,
+)
+from conv2md.markdown.registry import MetricsRegistry, conversion_seconds
+
+
+def _metrics(status=ConversionStatus.SUCCESS, seconds=0.01):
+    """Build finished metrics with a parse and a write stage."""
+    metrics = ConversionMetrics(
+        status=status,
+        text_messages_processed=2,
+        code_blocks_processed=1,
+        total_content_size=30,
+        output_size=50,
+    )
+    metrics.record_stage(StageMetrics("parse", seconds / 2, bytes_processed=40))
+    metrics.record_stage(StageMetrics("write", seconds / 2, bytes_processed=55))
+    return metrics
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """The registry sums conversions and renders the exposition format."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.registry = MetricsRegistry()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_render_aggregates_counters_across_conversions(self):
+        """Counters are totals over every observed conversion."""
+        self.registry.observe(_metrics())
+        self.registry.observe(_metrics(status=ConversionStatus.ERROR))
+        self.registry.observe_failure()
+
+        text = self.registry.render()
+
+        self.assertIn('conv2md_conversions_total{status="success"} 1', text)
+        self.assertIn('conv2md_conversions_total{status="error"} 2', text)
+        self.assertIn('conv2md_messages_total{content_type="text"} 4', text)
+        self.assertIn('conv2md_stage_bytes_total{stage="write"} 110', text)
+        self.assertIn("conv2md_output_chars_total 100", text)
+        self.assertIn("# TYPE conv2md_conversions_total counter", text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket counts never decrease and +Inf equals the sample count."""
+        for seconds in (0.001, 0.01, 2.0):
+            self.registry.observe(_metrics(seconds=seconds))
+
+        lines = self.registry.render().splitlines()
+        buckets = [
+            int(line.rsplit(" ", 1)[1])
+            for line in lines
+            if line.startswith("conv2md_conversion_duration_seconds_bucket")
+        ]
+
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], 3)
+        self.assertIn("conv2md_conversion_duration_seconds_count 3", lines)
+
+    def test_conversion_seconds_spans_all_stages(self):
+        """Wall time includes parse and write, not just generation."""
+        metrics = _metrics(seconds=0.5)
+        metrics.duration_seconds = 0.1
+
+        self.assertAlmostEqual(conversion_seconds(metrics), 0.5)
+
+    def test_write_textfile_replaces_file_atomically(self):
+        """The textfile is complete and no temporary file is left behind."""
+        path = Path(self.temp_dir.name) / "conv2md.prom"
+        path.write_text("stale\n")
+        self.registry.observe(_metrics())
+
+        self.registry.write_textfile(path)
+
+        self.assertEqual(os.listdir(self.temp_dir.name), ["conv2md.prom"])
+        content = path.read_text()
+        self.assertNotIn("stale", content)
+        self.assertTrue(content.endswith("\n"))
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o644)
+
+    def test_jsonl_mode_appends_one_line_per_conversion(self):
+        """Each observed conversion becomes one JSON object per line."""
+        path = Path(self.temp_dir.name) / "metrics.jsonl"
+        registry = MetricsRegistry(jsonl_path=path)
+
+        registry.observe(_metrics())
+        registry.observe(_metrics(status=ConversionStatus.PARTIAL))
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual([r["status"] for r in records], ["success", "partial"])
+        self.assertIn("stages", records[0])
+
+    def test_external_counters_are_exported(self):
+        """Components outside the generator can publish their own counters."""
+        self.registry.set_counter(
+            "pool_requests_total", "Pooled requests.", {"hit": 3, "miss": 1}
+        )
+
+        text = self.registry.render()
+
+        self.assertIn('conv2md_pool_requests_total{kind="hit"} 3', text)
+
+    def test_external_gauges_are_exported(self):
+        """Gauges published from outside keep their latest value."""
+        self.registry.set_gauge("queue_depth", "Queued requests.", 4)
+        self.registry.set_gauge("queue_depth", "Queued requests.", 2)
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE conv2md_queue_depth gauge", text)
+        self.assertIn("conv2md_queue_depth 2", text)
+
+    def test_concurrent_observations_are_not_lost(self):
+        """Observing from many threads counts every conversion."""
+        threads = [
+            threading.Thread(
+                target=lambda: [self.registry.observe(_metrics()) for _ in range(50)]
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIn(
+            'conv2md_conversions_total{status="success"} 400', self.registry.render()
+        )
+
+
+class TestConvertFileRegistry(unittest.TestCase):
+    """convert_file reports successes and failures to a registry."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.registry = MetricsRegistry()
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_successful_conversion_is_observed(self):
+        """A finished conversion is counted with its parse and write stages."""
+        input_path = self.root / "chat.json"
+        input_path.write_text('{"messages": [{"speaker": "A", "content": "hi"}]}')
+
+        convert_file(input_path, self.root / "chat.md", registry=self.registry)
+
+        text = self.registry.render()
+        self.assertIn('conv2md_conversions_total{status="success"} 1', text)
+        self.assertIn('conv2md_stage_seconds_total{stage="parse"}', text)
+
+    def test_parse_failure_is_counted_as_error(self):
+        """Input that never reaches the generator still counts as an error."""
+        input_path = self.root / "bad.json"
+        input_path.write_text("{not json")
+
+        with self.assertRaises(ValueError):
+            convert_file(input_path, self.root / "bad.md", registry=self.registry)
+
+        self.assertIn(
+            'conv2md_conversions_total{status="error"} 1', self.registry.render()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Unit tests for cProfile instrumentation of conversions."""
+
+import os
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from conv2md.application.convert import convert_file
+from conv2md.application.profiling import (
+    format_profile_report,
+    profile_path_for,
+    profiled,
+)
+from conv2md.cli import main
+
+CONVERSATION = '{"messages": [{"speaker": "A", "content": "hi"}]}'
+
+
+class TestProfiling(unittest.TestCase):
+    """Profiles are saved next to the output and summarised on request."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        self.input_path = self.root / "chat.json"
+        self.input_path.write_text(CONVERSATION)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def test_profile_path_sits_next_to_output(self):
+        """The profile keeps the output's name and gains .pstats."""
+        self.assertEqual(
+            profile_path_for(Path("out/chat.md")), Path("out/chat.md.pstats")
+        )
+
+    def test_convert_file_profile_flag_saves_stats(self):
+        """profile=True writes a loadable pstats file covering generation."""
+        result = convert_file(self.input_path, self.root / "chat.md", profile=True)
+
+        self.assertEqual(result.profile_path, self.root / "chat.md.pstats")
+        functions = pstats.Stats(str(result.profile_path)).stats
+        self.assertTrue(
+            any(name == "generate_with_metrics" for _, _, name in functions)
+        )
+
+    def test_convert_file_without_profile_writes_nothing_extra(self):
+        """Profiling is off by default."""
+        result = convert_file(self.input_path, self.root / "chat.md")
+
+        self.assertIsNone(result.profile_path)
+        self.assertEqual(sorted(os.listdir(self.root)), ["chat.json", "chat.md"])
+
+    def test_profile_is_saved_when_block_raises(self):
+        """A failing run still leaves its profile behind."""
+        path = self.root / "failed.pstats"
+
+        with self.assertRaises(RuntimeError):
+            with profiled(path):
+                raise RuntimeError("boom")
+
+        self.assertTrue(path.exists())
+
+    def test_report_lists_one_table_per_sort_key(self):
+        """The report honours the sort keys, top-N and filter."""
+        result = convert_file(self.input_path, self.root / "chat.md", profile=True)
+
+        report = format_profile_report(
+            result.profile_path,
+            top=5,
+            sort_keys=("cumulative", "tottime"),
+            restrict="conv2md",
+        )
+
+        self.assertIn("Top 5 functions by cumulative", report)
+        self.assertIn("Top 5 functions by tottime", report)
+        self.assertIn("generator.py", report)
+
+    def test_cli_profile_prints_report(self):
+        """--profile reports where the stats went and the hottest functions."""
+        out_dir = self.root / "out"
+        result = CliRunner().invoke(
+            main,
+            [
+                "--input",
+                str(self.input_path),
+                "--out",
+                str(out_dir),
+                "--profile",
+                "--profile-sort",
+                "tottime",
+                "--profile-top",
+                "3",
+            ],
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue((out_dir / "chat.md.pstats").exists())
+        self.assertIn("Top 3 functions by tottime", result.output)
+        self.assertNotIn("by cumulative", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""Unit tests for the shared robots.txt rules cache."""
+
+import io
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from conv2md.application.robots import (
+    ERROR_TTL_SECONDS,
+    RobotsCache,
+)
+from conv2md.ports.fetcher import ContentFetcher, FetchError, FetchResponse
+
+ROBOTS_TXT = b"""User-agent: conv2md
+Disallow: /drafts
+
+User-agent: *
+Disallow: /
+"""
+
+
+class _Response(FetchResponse):
+    def __init__(self, url, status, body):
+        super().__init__(url, status, {})
+        self._body = io.BytesIO(body)
+
+    def read(self, size=-1):
+        return self._body.read(size)
+
+    def close(self):
+        pass
+
+
+class FakeFetcher(ContentFetcher):
+    """Answers every robots.txt with one status and body, counting requests."""
+
+    def __init__(self, status=200, body=ROBOTS_TXT, delay=0.0):
+        self.status = status
+        self.body = body
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def fetch(self, url, headers=None):
+        with self.lock:
+            self.requests.append(url)
+        time.sleep(self.delay)
+        if self.status is None:
+            raise FetchError(f"Cannot connect for {url}")
+        return _Response(url, self.status, self.body)
+
+
+class FakeClock:
+    """Wall clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRobotsCache(unittest.TestCase):
+    """Rules are fetched once per host, interpreted and kept for a TTL."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+
+    def test_rules_are_fetched_once_per_host(self):
+        """Every URL of a host is checked against one fetch of its rules."""
+        fetcher = FakeFetcher()
+        robots = RobotsCache(fetcher, clock=self.clock)
+
+        self.assertTrue(robots.allowed("https://a.test/docs/page"))
+        self.assertFalse(robots.allowed("https://a.test/drafts/page"))
+        self.assertTrue(robots.allowed("https://a.test/"))
+        self.assertTrue(robots.allowed("https://b.test/docs"))
+
+        self.assertEqual(
+            fetcher.requests, ["https://a.test/robots.txt", "https://b.test/robots.txt"]
+        )
+        self.assertEqual((robots.stats.fetched, robots.stats.cached), (2, 2))
+
+    def test_rules_for_other_agents_do_not_apply(self):
+        """Only the groups naming conv2md, or *, apply."""
+        fetcher = FakeFetcher(body=b"User-agent: otherbot\nDisallow: /\n")
+        robots = RobotsCache(fetcher, clock=self.clock)
+
+        self.assertTrue(robots.allowed("https://a.test/anything"))
+
+    def test_statuses_are_interpreted_like_robotparser(self):
+        """Other 4xx allow everything; 401, 403, 5xx and no answer allow nothing."""
+        expectations = {404: True, 410: True, 401: False, 403: False, 503: False}
+        for status, allowed in expectations.items():
+            with self.subTest(status=status):
+                robots = RobotsCache(FakeFetcher(status=status), clock=self.clock)
+                self.assertEqual(robots.allowed("https://a.test/page"), allowed)
+
+        robots = RobotsCache(FakeFetcher(status=None), clock=self.clock)
+        self.assertFalse(robots.allowed("https://a.test/page"))
+
+    def test_rules_expire_after_the_ttl(self):
+        """Rules are refetched once their TTL has passed."""
+        fetcher = FakeFetcher()
+        robots = RobotsCache(fetcher, ttl_seconds=60, clock=self.clock)
+
+        robots.allowed("https://a.test/x")
+        self.clock.now += 59
+        robots.allowed("https://a.test/x")
+        self.clock.now += 2
+        robots.allowed("https://a.test/x")
+
+        self.assertEqual(len(fetcher.requests), 2)
+
+    def test_server_errors_are_retried_sooner(self):
+        """A host that failed to answer gets another chance after a short TTL."""
+        fetcher = FakeFetcher(status=500)
+        robots = RobotsCache(fetcher, clock=self.clock)
+        self.assertFalse(robots.allowed("https://a.test/x"))
+
+        fetcher.status = 404
+        self.clock.now += ERROR_TTL_SECONDS + 1
+
+        self.assertTrue(robots.allowed("https://a.test/x"))
+        self.assertEqual(len(fetcher.requests), 2)
+
+    def test_concurrent_lookups_share_one_fetch(self):
+        """Threads asking while the rules are being fetched wait for that fetch."""
+        fetcher = FakeFetcher(delay=0.1)
+        robots = RobotsCache(fetcher)
+        results = []
+
+        def check(i):
+            results.append(robots.allowed(f"https://a.test/docs/{i}"))
+
+        threads = [threading.Thread(target=check, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [True] * 8)
+        self.assertEqual(len(fetcher.requests), 1)
+        self.assertEqual(robots.stats.coalesced, 7)
+
+    def test_rules_persist_across_runs(self):
+        """Saved rules are used by the next run until they expire."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "robots.json"
+            first = RobotsCache(FakeFetcher(), path=path, clock=self.clock)
+            first.allowed("https://a.test/x")
+            first.save()
+
+            fetcher = FakeFetcher(status=404)
+            second = RobotsCache(fetcher, path=path, clock=self.clock)
+            self.assertFalse(second.allowed("https://a.test/drafts/x"))
+            self.assertEqual(fetcher.requests, [])
+
+            self.clock.now += 2 * 24 * 60 * 60
+            third = RobotsCache(fetcher, path=path, clock=self.clock)
+            self.assertTrue(third.allowed("https://a.test/drafts/x"))
+            self.assertEqual(len(fetcher.requests), 1)
+
+    def test_unreadable_saved_rules_are_ignored(self):
+        """A corrupt rules file starts an empty cache."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "robots.json"
+            path.write_text("{not json")
+
+            robots = RobotsCache(FakeFetcher(), path=path, clock=self.clock)
+
+            self.assertFalse(robots.allowed("https://a.test/drafts/x"))
+            self.assertEqual(robots.stats.fetched, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
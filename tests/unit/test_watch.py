@@ -0,0 +1,194 @@
+"""Unit tests for the directory watcher behind --watch."""
+
+import os
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from conv2md.application.watch import DirectoryWatcher
+
+
+class FakeClock:
+    """Monotonic clock the tests advance by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+    """Only files whose content changed, once settled, are reported."""
+
+    def setUp(self):
+        """Set up a watched tree with one existing file."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name)
+        (self.root / "nested").mkdir()
+        self.existing = self.write("a.json", '{"messages": []}')
+        self.clock = FakeClock()
+        # full_scan_every=1: the tests rewrite files in place within the same
+        # second, which directory mtimes alone cannot reveal
+        self.watcher = DirectoryWatcher(
+            self.root, debounce_seconds=1.0, full_scan_every=1, clock=self.clock
+        )
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        self.temp_dir.cleanup()
+
+    def write(self, name, content, mtime_ns=None):
+        """Write ``content`` to ``name`` under the root, optionally dating it."""
+        path = self.root / name
+        path.write_text(content, encoding="utf-8")
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+        return path
+
+    def settle(self):
+        """Poll once to notice changes and again after the debounce period."""
+        noticed = self.watcher.poll()
+        self.clock.advance(1.0)
+        return noticed, self.watcher.poll()
+
+    def test_prime_indexes_without_reporting(self):
+        """Files present at start-up are returned once, then not reported."""
+        self.write("ignored.txt", "x")
+        (self.root / ".hidden").mkdir()
+        self.write(os.path.join(".hidden", "c.json"), "{}")
+        self.write("b.JSON", "{}")
+
+        primed = sorted(path.name for path, _ in self.watcher.prime())
+
+        self.assertEqual(primed, ["a.json", "b.JSON"])
+        self.assertEqual(self.settle(), ([], []))
+
+    def test_new_file_reported_after_debounce(self):
+        """A new file is held back until it has been still for the debounce."""
+        self.watcher.prime()
+        created = self.write(os.path.join("nested", "new.json"), "{}")
+
+        noticed, settled = self.settle()
+
+        self.assertEqual(noticed, [])
+        self.assertEqual(settled, [(created, 2)])
+        self.assertEqual(self.watcher.poll(), [])
+
+    def test_modified_file_reported_once(self):
+        """A rewrite with new content is reported once, then forgotten."""
+        self.watcher.prime()
+        self.write("a.json", '{"messages": [1]}', mtime_ns=10**9)
+
+        self.assertEqual(self.settle()[1], [(self.existing, 17)])
+        self.assertEqual(self.settle(), ([], []))
+
+    def test_touch_without_content_change_not_reported(self):
+        """A new mtime over the same content is absorbed by the digest."""
+        self.write("a.json", '{"messages": []}', mtime_ns=10**9)
+        self.watcher.prime()
+        # A real change first: the touch then follows a reconversion
+        self.write("a.json", '{"messages": [1]}', mtime_ns=2 * 10**9)
+        self.settle()
+
+        self.write("a.json", '{"messages": [1]}', mtime_ns=3 * 10**9)
+
+        self.assertEqual(self.settle(), ([], []))
+
+    def test_touching_a_primed_file_is_not_reported(self):
+        """Files indexed at start-up have digests: a touch is not a change."""
+        self.write("a.json", '{"messages": []}', mtime_ns=10**9)
+        self.watcher.prime()
+
+        self.write("a.json", '{"messages": []}', mtime_ns=2 * 10**9)
+
+        self.assertEqual(self.settle(), ([], []))
+
+    def test_changes_during_debounce_are_coalesced(self):
+        """A file still being written is reported once, when it stops moving."""
+        self.watcher.prime()
+        path = self.write("growing.json", "{")
+        self.watcher.poll()
+        self.clock.advance(0.6)
+        self.write("growing.json", "{}")
+        self.watcher.poll()
+        self.clock.advance(0.6)
+
+        # Only 0.6s since the last change: still settling
+        self.assertEqual(self.watcher.poll(), [])
+        self.clock.advance(0.5)
+        self.assertEqual(self.watcher.poll(), [(path, 2)])
+
+    def test_burst_of_files_reported_together(self):
+        """Files that settle between two polls come back in one sorted list."""
+        self.watcher.prime()
+        paths = [self.write(f"{name}.json", "{}") for name in ("c", "b")]
+
+        self.assertEqual(self.settle()[1], [(paths[1], 2), (paths[0], 2)])
+
+    def test_deleted_file_dropped(self):
+        """Deleted files leave the index, and a pending one is never reported."""
+        self.watcher.prime()
+        pending = self.write("short-lived.json", "{}")
+        self.watcher.poll()
+
+        pending.unlink()
+        self.existing.unlink()
+
+        self.assertEqual(self.settle(), ([], []))
+        self.assertEqual(self.watcher.file_count, 0)
+
+    def test_removed_directory_dropped(self):
+        """Files in a removed subdirectory leave the index."""
+        nested = self.write(os.path.join("nested", "b.json"), "{}")
+        self.watcher.prime()
+
+        nested.unlink()
+        nested.parent.rmdir()
+        self.watcher.poll()
+
+        self.assertEqual(self.watcher.file_count, 1)
+
+    def test_idle_poll_skips_unchanged_directories(self):
+        """Between full scans, a directory with an old mtime is not listed."""
+        watcher = DirectoryWatcher(self.root, full_scan_every=3, clock=self.clock)
+        old = 10**9
+        os.utime(self.existing, ns=(old, old))
+        for directory in (self.root / "nested", self.root):
+            os.utime(directory, ns=(old, old))
+        watcher.prime()
+
+        # In place, so the root directory's mtime does not move
+        self.write("a.json", '{"messages": [2]}', mtime_ns=2 * old)
+        os.utime(self.root, ns=(old, old))
+        self.clock.advance(1.0)
+        self.assertEqual(watcher.poll(), [])
+        self.clock.advance(1.0)
+        self.assertEqual(watcher.poll(), [])
+
+        # The third poll is a full scan and sees the rewrite
+        watcher.poll()
+        self.clock.advance(1.0)
+        self.assertEqual(watcher.poll(), [(self.existing, 17)])
+
+    def test_watch_yields_changes_until_stopped(self):
+        """watch polls in a loop and ends when the stop event is set."""
+        watcher = DirectoryWatcher(self.root, debounce_seconds=0, full_scan_every=1)
+        watcher.prime()
+        created = self.write("new.json", "{}")
+        stop = threading.Event()
+
+        batches = []
+        for changed in watcher.watch(interval_seconds=0.01, stop=stop):
+            batches.append(changed)
+            stop.set()
+
+        self.assertEqual(batches, [[(created, 2)]])
+
+
+if __name__ == "__main__":
+    unittest.main()